@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import os
-import shutil
 import tkinter as tk
 from tkinter import filedialog
 from pathlib import Path
@@ -11,6 +10,9 @@ from typing import Optional, Tuple
 # Core
 from src.logging.logger_setup import setup_logger
 from src.interface.tkinter_ui import ConverterUI
+from src.interface.queue_model import ConversionQueue
+from src.io.staging import clone_file
+from src.warmup import Warmup
 
 # FileHandler (giống Word/Excel). Nếu thiếu thì fallback dùng filedialog
 try:
@@ -18,8 +20,8 @@ try:
 except Exception:
     FileHandler = None  # fallback
 
-# Converter ảnh -> PDF
-from src.converters.image_to_pdf import image_to_pdf, is_image_file
+# Converter ảnh -> PDF: nạp lười qua registry (import ở luồng warm-up / lần chuyển đổi đầu)
+from src.registry import classify, get_converter
 
 # Giống style 2 cái kia: dùng pattern *.ext để hiển thị trên UI
 SUPPORTED_PATTERNS: Tuple[str, ...] = ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.tif", "*.tiff", "*.webp")
@@ -35,6 +37,8 @@ class ImageToPDFApp:
 
         self.selected_file: Optional[Path] = None
         self.temp_pdf_path: Optional[Path] = None
+        # Khởi động nền converter/Office ngay khi cửa sổ hiện (xem src/warmup.py)
+        self.warmup = Warmup("image", logger=self.logger)
 
         # Thư mục tạm đồng bộ như Word/Excel
         self.temp_dir = Path(__file__).resolve().parent / "outputpdf"
@@ -70,7 +74,7 @@ class ImageToPDFApp:
             return
 
         path = Path(path_str)
-        if not is_image_file(str(path)):
+        if classify(path) != "image":
             if self.ui:
                 self.ui.alert_warning("Sai định dạng", "Hãy chọn ảnh (PNG/JPG/JPEG/BMP/TIF/TIFF/WEBP).")
                 self.ui.update_status("⚠️ Tệp không hợp lệ. Hãy chọn lại.", 0)
@@ -90,45 +94,48 @@ class ImageToPDFApp:
             return
 
         src = self.selected_file
-        if not is_image_file(str(src)):
+        if classify(src) != "image":
             if self.ui:
                 self.ui.alert_warning("Sai định dạng", "Tệp đã chọn không phải ảnh hợp lệ.")
                 self.ui.update_status("⚠️ Tệp không hợp lệ. Hãy chọn lại.", 0)
             return
 
-        try:
-            if self.ui:
-                self.ui.set_buttons_enabled(select=False, convert=False, open_downloads=False, quit_btn=False)
-                self.ui.update_status("⏳ Đang chuyển sang PDF…", 30)
-
-            out_name = src.with_suffix(".pdf").name
-            temp_out = self.temp_dir / out_name
+        if not self.ui:
+            return
+        out_name = src.with_suffix(".pdf").name
+        temp_out = self.temp_dir / out_name
+
+        # LƯU TẠM vào ./outputpdf — chạy nền để cửa sổ không bị đơ, có nút Huỷ
+        self.ui.run_in_background(
+            lambda progress: self.warmup.convert(lambda: get_converter("image")(str(src), str(temp_out), progress=progress)),
+            on_success=lambda pdf_path: self._on_converted(pdf_path, temp_out),
+            on_error=self._on_convert_error,
+            busy_text="⏳ Đang chuyển sang PDF…",
+            label=src.name,
+        )
 
-            # LƯU TẠM vào ./outputpdf
-            pdf_path = image_to_pdf(str(src), str(temp_out))
-            self.temp_pdf_path = Path(pdf_path)
+    def _on_converted(self, pdf_path: str, temp_out: Path) -> None:
+        self.temp_pdf_path = Path(pdf_path)
 
-            # --- THÔNG BÁO RÕ RÀNG NHƯ YÊU CẦU ---
-            if self.ui:
-                self.ui.update_status(
-                    f"✅ Chuyển thành công! ĐÃ LƯU vào: {temp_out.name} (thư mục ./outputpdf). "
-                    "Bấm 'Tải về…' để chọn nơi lưu cuối.",
-                    90
-                )
-                # popup thông báo
-                self.ui.alert_info(
-                    "Chuyển thành công",
-                    f"PDF đã  vào:\n{temp_out}\n\n"
-                    "Đây CHƯA phải nơi lưu cuối. Hãy bấm 'Tải về…' để chọn thư mục đích."
-                )
-                self.ui.set_buttons_enabled(select=True, convert=True, open_downloads=True, quit_btn=True)
+        # --- THÔNG BÁO RÕ RÀNG NHƯ YÊU CẦU ---
+        if self.ui:
+            self.ui.update_status(
+                f"✅ Chuyển thành công! ĐÃ LƯU vào: {temp_out.name} (thư mục ./outputpdf). "
+                "Bấm 'Tải về…' để chọn nơi lưu cuối.",
+                100
+            )
+            # popup thông báo
+            self.ui.alert_info(
+                "Chuyển thành công",
+                f"PDF đã  vào:\n{temp_out}\n\n"
+                "Đây CHƯA phải nơi lưu cuối. Hãy bấm 'Tải về…' để chọn thư mục đích."
+            )
 
-        except Exception as e:
-            self.logger.exception("Lỗi khi chuyển ảnh sang PDF: %s", e)
-            if self.ui:
-                self.ui.alert_error("Lỗi", f"Không thể chuyển sang PDF: {e}")
-                self.ui.update_status("❌ Lỗi khi chuyển. Hãy thử lại.", 0)
-                self.ui.set_buttons_enabled(select=True, convert=True, open_downloads=True, quit_btn=True)
+    def _on_convert_error(self, e: BaseException) -> None:
+        self.logger.error("Lỗi khi chuyển ảnh sang PDF: %s", e, exc_info=e)
+        if self.ui:
+            self.ui.alert_error("Lỗi", f"Không thể chuyển sang PDF: {e}")
+            self.ui.update_status("❌ Lỗi khi chuyển. Hãy thử lại.", 0)
 
     # ===== Bước 3: Tải về (chọn nơi lưu cuối) =====
     def _on_open_downloads(self) -> None:
@@ -152,7 +159,9 @@ class ImageToPDFApp:
 
             final_path = Path(final_path_str)
             final_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copyfile(str(self.temp_pdf_path), str(final_path))
+            # Bản tạm → đích: reflink nếu được, không thì copy; không hard link (bản tạm còn dùng lại, vd: lưu lần nữa)
+            method = clone_file(str(self.temp_pdf_path), str(final_path), allow_link=False)
+            self.logger.info("Tải về %s (%s)", final_path, method)
 
             if self.ui:
                 self.ui.update_status(f"✅ Đã lưu về: {final_path}", 100)
@@ -177,13 +186,24 @@ class ImageToPDFApp:
             supported_extensions=SUPPORTED_PATTERNS,
             window_title="Image to PDF Converter",
             window_size="680x420",
+            # Hàng đợi nhiều tệp: PDF ghi vào ./outputpdf (giữ thư mục con khi thêm cả thư mục)
+            queue_factory=lambda: ConversionQueue(
+                self.root,
+                lambda src, dst, progress: self.warmup.convert(lambda: get_converter("image")(str(src), str(dst), progress=progress)),
+                self.temp_dir,
+                kinds=("image",),
+            ),
         )
 
         if self.ui:
             self.ui.update_status("✅ Sẵn sàng - Chọn tệp Ảnh để bắt đầu", 0)
             self.ui.set_buttons_enabled(select=True, convert=False, open_downloads=True, quit_btn=True)
 
-        self.root.mainloop()
+        self.root.after(0, self.warmup.start)
+        try:
+            self.root.mainloop()
+        finally:
+            self.warmup.shutdown()
 
 
 if __name__ == "__main__":
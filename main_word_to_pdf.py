@@ -2,31 +2,20 @@
 from __future__ import annotations
 
 import os
-import shutil
 import tkinter as tk
 from tkinter import filedialog
 from pathlib import Path
 from typing import Optional, Tuple
-from src.converters.word_to_pdf import word_to_pdf, is_word_file
-
 
 # Core modules
 from src.logging.logger_setup import setup_logger
 from src.interface.tkinter_ui import ConverterUI
+from src.interface.queue_model import ConversionQueue
 from src.io.file_handler import FileHandler
-
-# Converters — adjust imports to your actual module names if different
-try:
-    from src.converters.word_to_pdf import word_to_pdf, is_word_file  # preferred if exists
-except Exception:
-    # Fallback to docx_to_pdf naming if your project uses that
-    from src.converters.docx_to_pdf import docx_to_pdf as word_to_pdf  # type: ignore
-    try:
-        from src.converters.docx_to_pdf import is_docx_file as is_word_file  # type: ignore
-    except Exception:
-        # last resort — simple extension check
-        def is_word_file(p: str) -> bool:
-            return str(p).lower().endswith((".doc", ".docx"))
+from src.io.staging import clone_file
+from src.warmup import Warmup
+# Converter nạp lười qua registry (import ở luồng warm-up / lần chuyển đổi đầu, không làm chậm mở cửa sổ)
+from src.registry import classify, get_converter
 
 SUPPORTED_EXTENSIONS_WORD: Tuple[str, ...] = (".doc", ".docx")
 
@@ -44,6 +33,8 @@ class WordApp:
         self.ui: Optional[ConverterUI] = None
         self.selected_file: Optional[Path] = None
         self.temp_pdf_path: Optional[Path] = None
+        # Khởi động nền converter/Office ngay khi cửa sổ hiện (xem src/warmup.py)
+        self.warmup = Warmup("word", logger=self.logger)
 
         # temp directory inside project (./outputpdf)
         self.temp_dir = Path(__file__).parent / "outputpdf"
@@ -72,7 +63,7 @@ class WordApp:
             )
 
         path = Path(path_str)
-        if not is_word_file(str(path)):
+        if classify(path) != "word":
             if self.ui:
                 self.ui.alert_warning("Sai định dạng", "Hãy chọn tệp Word hợp lệ (doc, docx).")
                 self.ui.update_status("⚠️ Tệp không hợp lệ. Hãy chọn lại.", 0)
@@ -105,45 +96,48 @@ class WordApp:
             return
 
         src = self.selected_file
-        if not is_word_file(str(src)):
+        if classify(src) != "word":
             if self.ui:
                 self.ui.alert_warning("Sai định dạng", "Tệp đã chọn không phải Word hợp lệ.")
                 self.ui.update_status("⚠️ Tệp không hợp lệ. Hãy chọn lại.", 0)
             return
 
-        try:
-            if self.ui:
-                # khóa các nút trong lúc chạy
-                self.ui.set_buttons_enabled(select=False, convert=False, open_downloads=False, quit_btn=False)
-                self.ui.update_status("🔄 Đang chuyển đổi… (vui lòng đợi)", 25)
-
-            tmp_out = self._make_unique(self.temp_dir / (src.stem + ".pdf"))
+        if not self.ui:
+            return
+        tmp_out = self._make_unique(self.temp_dir / (src.stem + ".pdf"))
+
+        # Chạy nền: cửa sổ vẫn phản hồi, thanh tiến độ theo converter, có nút Huỷ
+        self.ui.run_in_background(
+            lambda progress: self.warmup.convert(lambda: get_converter("word")(str(src), str(tmp_out), progress=progress)),
+            on_success=lambda pdf_path_str: self._on_converted(pdf_path_str, tmp_out),
+            on_error=self._on_convert_error,
+            busy_text="🔄 Đang chuyển đổi…",
+            label=src.name,
+        )
 
-            # Thực thi converter → xuất TẠM
-            pdf_path_str = word_to_pdf(str(src), str(tmp_out))
-            pdf_path = Path(pdf_path_str) if pdf_path_str else tmp_out
-            self.temp_pdf_path = pdf_path
+    def _on_converted(self, pdf_path_str: Optional[str], tmp_out: Path) -> None:
+        """Luồng Tk, sau khi converter chạy nền xong."""
+        pdf_path = Path(pdf_path_str) if pdf_path_str else tmp_out
+        self.temp_pdf_path = pdf_path
 
-            if self.ui:
-                self.ui.update_status(
-                    f"✅ Đã tạo bản TẠM: {pdf_path.name} (trong thư mục outputpdf). "
-                    "Bây giờ nhấn 'Tải về…' để chọn nơi lưu bản chính.",
-                    100
-                )
-                try:
-                    # Nếu ConverterUI có API đổi nhãn nút thứ 3, ta đổi thành 'Tải về…'
-                    self.ui.set_open_downloads_text("Tải về…")
-                except Exception:
-                    pass
-                self.ui.alert_info("Thành công", f"Đã tạo PDF tạm: {pdf_path}")
-                # mở lại các nút + bật nút 'Tải về…'
-                self.ui.set_buttons_enabled(select=True, convert=True, open_downloads=True, quit_btn=True)
-        except Exception as e:
-            self.logger.exception("Lỗi khi chuyển đổi Word → PDF: %s", e)
-            if self.ui:
-                self.ui.alert_error("Lỗi", f"Không thể chuyển đổi: {e}")
-                self.ui.update_status("❌ Lỗi khi chuyển đổi. Hãy thử lại hoặc kiểm tra file Word.", 0)
-                self.ui.set_buttons_enabled(select=True, convert=True, open_downloads=True, quit_btn=True)
+        if self.ui:
+            self.ui.update_status(
+                f"✅ Đã tạo bản TẠM: {pdf_path.name} (trong thư mục outputpdf). "
+                "Bây giờ nhấn 'Tải về…' để chọn nơi lưu bản chính.",
+                100
+            )
+            try:
+                # Nếu ConverterUI có API đổi nhãn nút thứ 3, ta đổi thành 'Tải về…'
+                self.ui.set_open_downloads_text("Tải về…")
+            except Exception:
+                pass
+            self.ui.alert_info("Thành công", f"Đã tạo PDF tạm: {pdf_path}")
+
+    def _on_convert_error(self, e: BaseException) -> None:
+        self.logger.error("Lỗi khi chuyển đổi Word → PDF: %s", e, exc_info=e)
+        if self.ui:
+            self.ui.alert_error("Lỗi", f"Không thể chuyển đổi: {e}")
+            self.ui.update_status("❌ Lỗi khi chuyển đổi. Hãy thử lại hoặc kiểm tra file Word.", 0)
 
     def _on_save_as(self) -> None:
         """Bước 3: Chọn nơi 'Tải về…' (Save As) từ bản PDF tạm."""
@@ -174,8 +168,9 @@ class WordApp:
             # đảm bảo tồn tại thư mục đích
             final_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # Sao chép bản tạm → đích
-            shutil.copyfile(self.temp_pdf_path, final_path)
+            # Bản tạm → đích: reflink nếu được, không thì copy; không hard link (bản tạm còn dùng lại, vd: lưu lần nữa)
+            method = clone_file(self.temp_pdf_path, final_path, allow_link=False)
+            self.logger.info("Tải về %s (%s)", final_path, method)
 
             if self.ui:
                 self.ui.update_status(f"✅ Đã lưu về: {final_path}", 100)
@@ -204,6 +199,13 @@ class WordApp:
             supported_extensions=SUPPORTED_EXTENSIONS_WORD,
             window_title="Word → PDF",
             window_size="700x440",
+            # Hàng đợi nhiều tệp: PDF ghi vào ./outputpdf (giữ thư mục con khi thêm cả thư mục)
+            queue_factory=lambda: ConversionQueue(
+                self.root,
+                lambda src, dst, progress: self.warmup.convert(lambda: get_converter("word")(str(src), str(dst), progress=progress)),
+                self.temp_dir,
+                kinds=("word",),
+            ),
         )
 
         # cố gắng đổi nhãn nút thứ 3 → 'Tải về…' (nếu UI hỗ trợ)
@@ -217,7 +219,11 @@ class WordApp:
             self.ui.update_status("✅ Sẵn sàng - Chọn tệp Word để bắt đầu", 0)
             self.ui.set_buttons_enabled(select=True, convert=False, open_downloads=True, quit_btn=True)
 
-        self.root.mainloop()
+        self.root.after(0, self.warmup.start)
+        try:
+            self.root.mainloop()
+        finally:
+            self.warmup.shutdown()
 
 
 def main() -> None:
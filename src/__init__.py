@@ -1,10 +1,18 @@
+"""
+Package gốc. Import phải gần như không tốn gì (CLI, tiến trình worker của supervisor): không import
+logging/configparser/pathlib ở đây, config.ini chỉ được đọc khi lần đầu truy cập một biến lấy từ config
+(AUTHOR, OUTPUT_FOLDER, LOG_LEVEL, OUTPUT_PATH, config...) qua __getattr__ bên dưới.
+Converter được nạp lười qua src.registry; ngân sách thời gian import: src/startup.py.
+"""
+from __future__ import annotations
+
 import os
-import configparser
-from pathlib import Path
-import logging
 import sys
 
-def setup_logger(name: str = "app", level: str = "INFO") -> logging.Logger:
+
+def setup_logger(name: str = "app", level: str = "INFO") -> "logging.Logger":
+    import logging
+
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger
@@ -17,52 +25,68 @@ def setup_logger(name: str = "app", level: str = "INFO") -> logging.Logger:
     return logger
 
 
-# Tạo đối tượng configparser
-config = configparser.ConfigParser()
-# Đọc file config.ini với UTF-8 từ đường dẫn tuyệt đối (../config.ini)
-CONFIG_PATH = (Path(__file__).resolve().parent.parent / "config.ini")
-config.read(CONFIG_PATH, encoding="utf-8")
-
 # ==================================================
-# KHAI BÁO CÁC BIẾN TỪ CONFIG.INI
+# KHAI BÁO CÁC BIẾN TỪ CONFIG.INI (đọc lười)
 # ==================================================
 
-# [DEFAULT] Section
-APP_NAME = config.get('DEFAULT', 'app_name', fallback='Word to PDF Converter')
-VERSION = config.get('DEFAULT', 'version', fallback='1.0.0')
-AUTHOR = config.get('DEFAULT', 'author', fallback='thangvk')
-
-# [PATHS] Section
-OUTPUT_FOLDER = config.get('PATHS', 'output_folder', fallback='PDF_Output')
-DOWNLOADS_FOLDER = config.get('PATHS', 'downloads_folder', fallback='Downloads')
-LOG_FOLDER = config.get('PATHS', 'log_folder', fallback='logs')
-
-# [CONVERSION] Section
-DEFAULT_METHOD = config.get('CONVERSION', 'default_method', fallback='auto')
-BACKUP_METHOD = config.get('CONVERSION', 'backup_method', fallback='docx2pdf')
-
-# [LOGGING] Section
-LOG_LEVEL = config.get('LOGGING', 'level', fallback='INFO')
-FILE_LOGGING = config.getboolean('LOGGING', 'file_logging', fallback=True)
-MAX_FILE_SIZE = config.getint('LOGGING', 'max_file_size', fallback=5242880)  # 5MB
-BACKUP_COUNT = config.getint('LOGGING', 'backup_count', fallback=5)
-
-# [UI] Section
-WINDOW_WIDTH = config.getint('UI', 'window_width', fallback=600)
-WINDOW_HEIGHT = config.getint('UI', 'window_height', fallback=500)
-THEME = config.get('UI', 'theme', fallback='clam')
-
-# ==================================================
-# COMPUTED PATHS (Đường dẫn được tính toán)
-# ==================================================
-
-# Base directory của project (thư mục chứa config.ini)
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# Tên biến -> (section, key, fallback); kiểu lấy theo fallback (bool/int/str)
+_CONFIG_VARS = {
+    # [DEFAULT] Section (APP_NAME, VERSION là hằng số bên dưới)
+    "AUTHOR": ("DEFAULT", "author", "thangvk"),
+    # [PATHS] Section
+    "OUTPUT_FOLDER": ("PATHS", "output_folder", "PDF_Output"),
+    "DOWNLOADS_FOLDER": ("PATHS", "downloads_folder", "Downloads"),
+    "LOG_FOLDER": ("PATHS", "log_folder", "logs"),
+    # [CONVERSION] Section
+    "DEFAULT_METHOD": ("CONVERSION", "default_method", "auto"),
+    "BACKUP_METHOD": ("CONVERSION", "backup_method", "docx2pdf"),
+    # [LOGGING] Section
+    "LOG_LEVEL": ("LOGGING", "level", "INFO"),
+    "FILE_LOGGING": ("LOGGING", "file_logging", True),
+    "MAX_FILE_SIZE": ("LOGGING", "max_file_size", 5242880),  # 5MB
+    "BACKUP_COUNT": ("LOGGING", "backup_count", 5),
+    # [UI] Section (WINDOW_WIDTH, WINDOW_HEIGHT là hằng số bên dưới)
+    "THEME": ("UI", "theme", "clam"),
+}
 
-# Các đường dẫn tuyệt đối
-OUTPUT_PATH = PROJECT_ROOT / OUTPUT_FOLDER
-DOWNLOADS_PATH = PROJECT_ROOT / DOWNLOADS_FOLDER  
-LOG_PATH = PROJECT_ROOT / LOG_FOLDER
+# Đường dẫn (pathlib.Path) cũng tính lười
+_PATH_VARS = ("PROJECT_ROOT", "CONFIG_PATH", "OUTPUT_PATH", "DOWNLOADS_PATH", "LOG_PATH")
+
+
+def _load_config() -> None:
+    """Đọc config.ini (UTF-8, ../config.ini) 1 lần và gán mọi biến lười vào globals của module."""
+    import configparser
+    from pathlib import Path
+
+    g = globals()
+    # Base directory của project (thư mục chứa config.ini)
+    root = Path(__file__).resolve().parent.parent
+    config = configparser.ConfigParser()
+    config.read(root / "config.ini", encoding="utf-8")
+    values = {"config": config, "PROJECT_ROOT": root, "CONFIG_PATH": root / "config.ini"}
+    for name, (section, key, fallback) in _CONFIG_VARS.items():
+        if isinstance(fallback, bool):
+            values[name] = config.getboolean(section, key, fallback=fallback)
+        elif isinstance(fallback, int):
+            values[name] = config.getint(section, key, fallback=fallback)
+        else:
+            values[name] = config.get(section, key, fallback=fallback)
+    # Các đường dẫn tuyệt đối
+    values["OUTPUT_PATH"] = root / values["OUTPUT_FOLDER"]
+    values["DOWNLOADS_PATH"] = root / values["DOWNLOADS_FOLDER"]
+    values["LOG_PATH"] = root / values["LOG_FOLDER"]
+    g.update(values)
+
+
+def __getattr__(name: str):
+    if name == "config" or name in _CONFIG_VARS or name in _PATH_VARS:
+        _load_config()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_CONFIG_VARS) | set(_PATH_VARS) | {"config"})
 
 # ==================================================
 # CONSTANTS (Hằng số ứng dụng)
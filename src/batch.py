@@ -0,0 +1,409 @@
+# src/batch.py
+"""
+Chuyển hàng loạt (không giao diện): gom file đầu vào, chọn converter theo loại file,
+chạy song song theo số worker riêng cho từng engine và trả về bản tổng kết dạng dict (JSON được).
+
+Dùng bởi CLI `python -m src` (src/cli.py).
+"""
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import CONVERSION_TIMEOUT
+from .cache import get_cache
+from .preflight import estimate
+from .registry import classify, get_converter
+from .scheduler import LARGE_JOB_COST, run_scheduled, sjf_order
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("word", "excel", "image")
+
+# Engine mặc định cho từng loại (tham số engine của word_to_pdf/excel_to_pdf)
+DEFAULT_ENGINES: Dict[str, str] = {"word": "auto", "excel": "auto", "image": "auto"}
+
+SKIP_MODES = ("exists", "mtime")
+
+# "sjf": xếp lịch theo chi phí ước lượng (preflight), file nhỏ không phải chờ sau file lớn; "fifo": theo thứ tự vào
+SCHEDULES = ("sjf", "fifo")
+
+
+@dataclass
+class BatchJob:
+    src: Path
+    dst: Path
+    kind: str
+
+
+@dataclass
+class BatchResult:
+    src: str
+    dst: Optional[str]
+    kind: str
+    status: str                 # "ok" | "failed" | "skipped"
+    seconds: float = 0.0
+    engine: Optional[str] = None
+    error: Optional[str] = None
+    cost: Optional[float] = None  # chi phí ước lượng khi preflight (giây)
+    cache: Optional[str] = None   # "hit" | "miss" khi cache bật (đo ở tiến trình đã chạy job)
+
+
+# -------------------- Gom đầu vào --------------------
+def _is_glob(spec: str) -> bool:
+    return any(ch in spec for ch in "*?[")
+
+
+def collect_inputs(specs: Iterable[str], recursive: bool = False) -> List[Tuple[Path, Path]]:
+    """
+    Trả về [(file, gốc)] cho các file hỗ trợ. `specs` là file, thư mục hoặc glob.
+    `gốc` dùng để giữ cấu trúc thư mục con ở thư mục đích (thư mục -> chính nó, file/glob -> thư mục cha).
+    File bị trùng chỉ lấy 1 lần; file không hỗ trợ trong thư mục bị bỏ qua.
+    """
+    seen = set()
+    out: List[Tuple[Path, Path]] = []
+
+    def add(p: Path, base: Path) -> None:
+        key = os.path.normcase(str(p.resolve()))
+        if key in seen or classify(p) is None:
+            return
+        seen.add(key)
+        out.append((p, base))
+
+    for spec in specs:
+        if _is_glob(spec):
+            for m in sorted(glob.glob(spec, recursive=True)):
+                p = Path(m)
+                if p.is_file():
+                    add(p, p.parent)
+            continue
+        p = Path(spec)
+        if p.is_dir():
+            it = p.rglob("*") if recursive else p.iterdir()
+            for f in sorted(it):
+                if f.is_file() and not f.name.startswith("~$"):  # bỏ file khoá tạm của Office
+                    add(f, p)
+        elif p.is_file():
+            if classify(p) is None:
+                logger.warning("Bỏ qua file không hỗ trợ: %s", p)
+            add(p, p.parent)
+        else:
+            logger.warning("Không tìm thấy: %s", spec)
+    return out
+
+
+def plan_jobs(inputs: Iterable[Tuple[Path, Path]], out_dir: str | os.PathLike) -> List[BatchJob]:
+    """Đặt tên PDF đích trong out_dir (giữ thư mục con); trùng tên (a.docx + a.xlsx) -> a_xlsx.pdf."""
+    out_root = Path(out_dir).resolve()
+    used = set()
+    jobs: List[BatchJob] = []
+    for src, base in inputs:
+        try:
+            rel_parent = src.parent.relative_to(base)
+        except ValueError:
+            rel_parent = Path()
+        dst = out_root / rel_parent / (src.stem + ".pdf")
+        if os.path.normcase(str(dst)) in used:
+            dst = dst.with_name(f"{src.stem}_{src.suffix.lstrip('.').lower()}.pdf")
+        used.add(os.path.normcase(str(dst)))
+        jobs.append(BatchJob(src, dst, classify(src)))
+    return jobs
+
+
+def should_skip(job: BatchJob, mode: Optional[str]) -> bool:
+    """mode="exists": bỏ qua nếu PDF đích đã có; "mtime": chỉ bỏ qua khi PDF mới hơn file nguồn."""
+    if not mode or not job.dst.exists():
+        return False
+    if mode == "exists":
+        return True
+    try:
+        return job.dst.stat().st_mtime >= job.src.stat().st_mtime
+    except OSError:
+        return False
+
+
+# -------------------- Chạy --------------------
+def convert_with_stats(kind: str, src: str, dst: str, **options) -> Tuple[str, Optional[str]]:
+    """
+    Chạy converter và trả về (PDF, "hit" | "miss" | None) của cache. Chạy được cả trong worker của
+    supervisor: bộ đếm của cache nằm ở tiến trình đã chuyển đổi, nên kết quả cache phải đi kèm từng job.
+    """
+    stats: Dict[str, object] = {}
+    out = get_converter(kind)(src, dst, stats=stats, **options)
+    return out, stats.get("cache")
+
+
+def _convert_office(job: BatchJob, engine: str) -> Tuple[str, Optional[str]]:
+    return convert_with_stats(job.kind, str(job.src), str(job.dst), engine=engine)
+
+
+def _timed(job: BatchJob, engine: str,
+           convert: Callable[[BatchJob, str], Tuple[str, Optional[str]]] = _convert_office) -> BatchResult:
+    t0 = time.perf_counter()
+    try:
+        out, cache = convert(job, engine)
+        return BatchResult(str(job.src), out, job.kind, "ok", time.perf_counter() - t0, engine, cache=cache)
+    except Exception as e:
+        logger.error("Lỗi chuyển %s: %s", job.src, e)
+        return BatchResult(str(job.src), str(job.dst), job.kind, "failed", time.perf_counter() - t0,
+                           engine, f"{type(e).__name__}: {e}")
+
+
+class _EngineSetup:
+    """
+    Bật pool cho engine Office khi chạy >1 worker (pool COM / listener LibreOffice), tắt lại khi xong.
+    Pool người dùng đã bật sẵn thì giữ nguyên.
+
+    Listener LibreOffice dùng dải cổng riêng của từng loại (lo_base_port); pool LibreOffice trong tiến trình
+    chỉ có 1, nên nhóm Word và Excel chạy cùng lúc dùng chung pool do nhóm vào trước bật, và pool chỉ tắt
+    khi nhóm cuối cùng xong.
+    """
+
+    _lo_lock = threading.Lock()
+    _lo_users = 0
+    _lo_owned = False
+
+    def __init__(self, kind: str, engine: str, workers: int) -> None:
+        from .converters.libreoffice import port_range_for
+
+        self.kind, self.engine, self.workers = kind, engine, workers
+        self.lo_base_port = port_range_for(kind)
+        self._disable: Optional[Callable[[], None]] = None
+        self._lo_user = False
+
+    def __enter__(self) -> str:
+        if self.workers <= 1:
+            return self.engine
+        if self.engine == "libreoffice":
+            from .converters import libreoffice as lo
+            cls = _EngineSetup
+            with cls._lo_lock:
+                if lo.get_libreoffice_pool(create=False) is None:
+                    lo.enable_libreoffice(listeners=self.workers, base_port=self.lo_base_port)
+                    cls._lo_owned = True
+                cls._lo_users += 1
+                self._lo_user = True
+            return self.engine
+        if self.engine in ("auto", "com") and os.name == "nt":
+            if self.kind == "word":
+                from .converters import word_to_pdf as mod
+                enable, disable, current = mod.enable_word_pool, mod.disable_word_pool, mod.get_word_pool
+            else:
+                from .converters import excel_to_pdf as mod
+                enable, disable, current = mod.enable_excel_pool, mod.disable_excel_pool, mod.get_excel_pool
+            if current() is None:
+                try:
+                    enable(self.workers)
+                    self._disable = disable
+                except Exception as e:
+                    logger.warning("Không bật được pool %s (%s); chạy tuần tự.", self.kind, e)
+                    self.workers = 1
+                    return self.engine
+            return "com"  # docx2pdf dùng chung 1 Word, không an toàn khi chạy song song
+        return self.engine
+
+    def __exit__(self, *exc) -> None:
+        if self._lo_user:
+            from .converters import libreoffice as lo
+            cls = _EngineSetup
+            with cls._lo_lock:
+                cls._lo_users -= 1
+                if cls._lo_users == 0 and cls._lo_owned:
+                    cls._lo_owned = False
+                    lo.disable_libreoffice()
+        if self._disable is not None:
+            self._disable()
+
+
+def _run_office(kind: str, jobs: List[BatchJob], engine: str, workers: int,
+                costs: Sequence[float]) -> List[BatchResult]:
+    setup = _EngineSetup(kind, engine, workers)
+    with setup as effective:
+        return run_scheduled(jobs, costs, setup.workers, lambda j: _timed(j, effective),
+                             thread_name=f"batch-{kind}")
+
+
+def _run_office_supervised(kind: str, jobs: List[BatchJob], engine: str, workers: int, costs: Sequence[float],
+                           timeout: float, max_jobs: int) -> Tuple[List[BatchResult], Dict[str, int]]:
+    """Mỗi file chạy trong tiến trình worker có hạn chót; treo -> kill worker + Office của nó."""
+    from .supervisor import Supervisor
+
+    # Trên Windows worker giữ sẵn 1 instance Office (biết PID để kill); docx2pdf không dùng được kiểu này
+    warm = engine in ("auto", "com") and os.name == "nt"
+    effective = "com" if warm else engine
+    n = max(1, min(workers, len(jobs)))
+    # mỗi worker 1 cổng LibreOffice riêng trong dải của loại này (không đụng nhóm kia / worker khác)
+    lo_base_port = _EngineSetup(kind, engine, n).lo_base_port
+    with Supervisor(n, timeout=timeout, max_jobs=max_jobs, office=kind if warm else None,
+                    lo_base_port=lo_base_port) as sup:
+        def convert(job: BatchJob, eng: str) -> Tuple[str, Optional[str]]:
+            return tuple(sup.run(".batch:convert_with_stats", kind, str(job.src), str(job.dst), engine=eng))
+
+        results = run_scheduled(jobs, costs, n, lambda j: _timed(j, effective, convert),
+                                thread_name=f"batch-{kind}")
+    return results, dict(sup.stats)
+
+
+def _run_images(jobs: List[BatchJob], workers: int, dpi: int, costs: Sequence[float]) -> List[BatchResult]:
+    from .converters.image_to_pdf import image_to_pdf_many
+
+    # process pool chia job theo lô: chỉ đổi thứ tự đưa vào (ảnh nhỏ trước), kết quả trả lại đúng thứ tự
+    order = sjf_order(costs)
+    results, _stats = image_to_pdf_many([(jobs[i].src, jobs[i].dst) for i in order], workers=workers, dpi=dpi)
+    # process con dùng chung thư mục cache (biến môi trường): ảnh OK không lấy từ cache là 1 lần trượt
+    cached = get_cache() is not None
+    out: List[Optional[BatchResult]] = [None] * len(jobs)
+    for i, r in zip(order, results):
+        cache = ("hit" if r.mode == "cache" else "miss") if cached and r.ok else None
+        out[i] = BatchResult(r.src, r.dst, "image", "ok" if r.ok else "failed", r.seconds, r.mode, r.error,
+                             cache=cache)
+    return out
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    *,
+    workers: Optional[Dict[str, int]] = None,
+    engines: Optional[Dict[str, str]] = None,
+    skip: Optional[str] = None,
+    dpi: int = 300,
+    timeout: Optional[float] = CONVERSION_TIMEOUT,
+    max_jobs: int = 50,
+    schedule: str = "sjf",
+) -> Dict[str, object]:
+    """
+    Chạy các job. Mỗi loại (word/excel/image) có nhóm worker riêng và các nhóm chạy đồng thời
+    (Word/Excel chủ yếu chờ Office, ảnh chạy trên process pool).
+
+    Word/Excel chạy trong tiến trình worker có giám sát (src.supervisor): quá `timeout` giây thì
+    worker và Office/soffice của nó bị kill rồi khởi động lại; worker được thay sau `max_jobs` file.
+    timeout=None/0: chạy ngay trong tiến trình hiện tại (không ngắt được khi treo).
+
+    schedule="sjf": preflight ước lượng chi phí từng file từ metadata (src/preflight.py) rồi xếp lịch
+    shortest-job-first có aging, file lớn chạy ở làn riêng (src/scheduler.py); "fifo": theo thứ tự jobs.
+
+    Trả về dict tổng kết: total/ok/failed/skipped/seconds, engines và "files" (theo thứ tự jobs)
+    với thời gian từng file.
+    """
+    if skip is not None and skip not in SKIP_MODES:
+        raise ValueError(f"skip phải là một trong {SKIP_MODES}")
+    if schedule not in SCHEDULES:
+        raise ValueError(f"schedule phải là một trong {SCHEDULES}")
+    workers = {**{k: 1 for k in KINDS}, **(workers or {})}
+    engines = {**DEFAULT_ENGINES, **(engines or {})}
+
+    t0 = time.perf_counter()
+    by_kind: Dict[str, List[BatchJob]] = {k: [] for k in KINDS}
+    results: Dict[int, BatchResult] = {}
+    index = {}
+    for i, job in enumerate(jobs):
+        if should_skip(job, skip):
+            results[i] = BatchResult(str(job.src), str(job.dst), job.kind, "skipped")
+            continue
+        job.dst.parent.mkdir(parents=True, exist_ok=True)
+        index[id(job)] = i
+        by_kind[job.kind].append(job)
+
+    # Preflight: chi phí ước lượng (chỉ đọc metadata) để xếp lịch
+    t_pre = time.perf_counter()
+    costs: Dict[int, float] = {}
+    if schedule == "sjf":
+        for group in by_kind.values():
+            for job in group:
+                costs[id(job)] = estimate(job.src, job.kind).cost
+    preflight = {"seconds": round(time.perf_counter() - t_pre, 3),
+                 "estimated_cost": round(sum(costs.values()), 3),
+                 "large": sum(1 for c in costs.values() if c >= LARGE_JOB_COST)}
+
+    supervisor_stats: Dict[str, Dict[str, int]] = {}
+
+    def run_kind(kind: str) -> List[Tuple[int, BatchResult]]:
+        group = by_kind[kind]
+        group_costs = [costs.get(id(j), 0.0) for j in group]
+        if kind == "image":
+            res = _run_images(group, workers[kind], dpi, group_costs)
+        elif timeout:
+            res, supervisor_stats[kind] = _run_office_supervised(kind, group, engines[kind], workers[kind],
+                                                                 group_costs, timeout, max_jobs)
+        else:
+            res = _run_office(kind, group, engines[kind], workers[kind], group_costs)
+        for j, r in zip(group, res):
+            r.cost = costs.get(id(j))
+        return [(index[id(j)], r) for j, r in zip(group, res)]
+
+    active = [k for k in KINDS if by_kind[k]]
+    with ThreadPoolExecutor(max_workers=max(1, len(active)), thread_name_prefix="batch") as ex:
+        for pairs in ex.map(run_kind, active):
+            results.update(pairs)
+
+    files = [asdict(results[i]) for i in range(len(jobs))]
+    count = {s: sum(1 for f in files if f["status"] == s) for s in ("ok", "failed", "skipped")}
+    summary = {
+        "total": len(files),
+        **count,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "engines": {k: {"engine": engines[k], "workers": workers[k]} for k in KINDS},
+        "schedule": schedule,
+        "files": [dict(f, seconds=round(f["seconds"], 3)) for f in files],
+    }
+    if costs:
+        summary["preflight"] = preflight
+    if supervisor_stats:
+        summary["supervisor"] = supervisor_stats
+    cache = get_cache()
+    if cache is not None:
+        # Job chạy ở process con (supervisor, process pool ảnh): đếm theo kết quả từng job, không theo
+        # bộ đếm của cache trong tiến trình này
+        hits = sum(1 for f in files if f["cache"] == "hit")
+        misses = sum(1 for f in files if f["cache"] == "miss")
+        summary["cache"] = {"hits": hits, "misses": misses,
+                            "by_kind": {k: sum(1 for f in files if f["kind"] == k and f["cache"] == "hit")
+                                        for k in KINDS},
+                            "size_mb": round(cache.size_bytes() / (1024 * 1024), 3)}
+        if hits + misses:
+            summary["cache"]["hit_rate"] = round(hits / (hits + misses), 3)
+    return summary
+
+
+# -------------------- Ghép kết quả thành 1 PDF --------------------
+def merge_outputs(summary: Dict[str, object], dst: str | os.PathLike, *, bookmarks: bool = True) -> Dict[str, object]:
+    """
+    Ghép PDF của các file "ok"/"skipped" trong bản tổng kết (theo thứ tự đầu vào) thành 1 file
+    bằng src.pdf.merge (streaming, font/ảnh trùng chỉ ghi 1 lần). bookmarks: mỗi file 1 mục lục cấp 1.
+    """
+    from .io.staging import staged
+    from .pdf.merge import merge_pdfs
+
+    parts = [(f["dst"], Path(f["src"]).stem) for f in summary["files"]
+             if f["status"] in ("ok", "skipped") and f["dst"] and os.path.isfile(f["dst"])]
+    if not parts:
+        raise ValueError("Không có PDF nào để ghép")
+    with staged(dst) as st:
+        stats = merge_pdfs(parts if bookmarks else [p for p, _t in parts], st["tmp"])
+    logger.info("Ghép %d PDF (%d trang, %d object trùng) -> %s",
+                stats["files"], stats["pages"], stats["deduped"], st["path"])
+    return {"path": st["path"], **stats}
+
+
+def convert_and_merge(paths: Iterable[str | os.PathLike], dst: str | os.PathLike, *,
+                      bookmarks: bool = True, **kwargs) -> Dict[str, object]:
+    """
+    Chuyển các file Word/Excel/ảnh (theo thứ tự truyền vào) rồi ghép thành 1 PDF dst.
+    PDF trung gian nằm trong thư mục tạm cạnh dst, bị xoá sau khi ghép. kwargs chuyển cho run_batch.
+    Trả về bản tổng kết của run_batch + "merged" (None nếu không file nào chuyển được).
+    """
+    out = Path(dst).resolve()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    inputs = collect_inputs([os.fspath(p) for p in paths])
+    with tempfile.TemporaryDirectory(prefix=".merge-", dir=out.parent) as tmp:
+        summary = run_batch(plan_jobs(inputs, tmp), **kwargs)
+        summary["merged"] = merge_outputs(summary, out, bookmarks=bookmarks) if summary["ok"] else None
+    return summary
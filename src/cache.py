@@ -0,0 +1,294 @@
+# src/cache.py
+"""
+Cache PDF theo nội dung (content-addressed) dùng chung cho word_to_pdf / excel_to_pdf / image_to_pdf.
+
+Khoá = hash(dấu vân tay nội dung file nguồn + tuỳ chọn đã chuẩn hoá + phiên bản engine).
+- .docx/.xlsx/... (ZIP): dấu vân tay lấy từ central directory (tên, CRC32, kích thước từng phần),
+  không phải băm toàn bộ file.
+- File khác: BLAKE2b toàn bộ nội dung.
+
+Trúng cache -> reflink (không được thì copy) PDF đã lưu vào đích (src/io/staging.py). Dung lượng có giới hạn,
+loại bỏ theo LRU (dựa vào mtime, được "chạm" mỗi lần trúng) xuống 90% dung lượng mỗi lần vượt.
+
+Bật bằng enable_cache(dir) hoặc biến môi trường DOCXTOPDF_CACHE_DIR (process con kế thừa).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Mapping, Optional
+
+from .io.staging import clone_file
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENV = "DOCXTOPDF_CACHE_DIR"
+CACHE_MAX_ENV = "DOCXTOPDF_CACHE_MAX_MB"
+DEFAULT_MAX_MB = 2048
+# Vượt max_bytes thì loại bỏ tới mức này: lần quét + sắp xếp cả thư mục cache chỉ xảy ra sau mỗi ~10% dung lượng
+EVICT_LOW_WATER = 0.9
+ZIP_EXTS = {".docx", ".docm", ".dotx", ".xlsx", ".xlsm", ".xltx", ".xltm"}
+
+# Tăng khi đổi cách dựng khoá hoặc định dạng lưu
+_KEY_SCHEMA = 1
+
+# Thư viện ảnh hưởng tới kết quả của từng engine (đưa phiên bản vào khoá)
+_ENGINE_LIBS = {
+    "word": ("docx2pdf", "pywin32", "python-docx", "reportlab"),
+    "excel": ("pywin32", "openpyxl", "reportlab"),
+    "image": ("pillow", "reportlab"),
+}
+
+
+def fingerprint(path: str | os.PathLike) -> str:
+    """Dấu vân tay nội dung. ZIP Office: từ central directory; còn lại: băm toàn file."""
+    p = Path(path)
+    h = hashlib.blake2b(digest_size=20)
+    if p.suffix.lower() in ZIP_EXTS:
+        try:
+            with zipfile.ZipFile(p) as zf:
+                h.update(b"zip:%d" % p.stat().st_size)
+                for info in zf.infolist():
+                    h.update(info.filename.encode("utf-8"))
+                    h.update(b":%d:%d;" % (info.CRC, info.file_size))
+            return "z" + h.hexdigest()
+        except zipfile.BadZipFile:
+            h = hashlib.blake2b(digest_size=20)  # không phải ZIP hợp lệ -> băm toàn file
+    with open(p, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return "f" + h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def engine_version(kind: str, engine: str) -> str:
+    from importlib import metadata
+    from . import VERSION
+
+    parts = [f"schema{_KEY_SCHEMA}", VERSION, kind, engine or "auto", os.name]
+    for lib in _ENGINE_LIBS.get(kind, ()):
+        try:
+            parts.append(f"{lib}={metadata.version(lib)}")
+        except metadata.PackageNotFoundError:
+            pass
+    return "|".join(parts)
+
+
+def _normalize(value):
+    if isinstance(value, float):
+        return round(value, 3)
+    if isinstance(value, (tuple, list)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, Mapping):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (str, int, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class ConversionCache:
+    """Thư mục cache: <root>/<2 ký tự đầu>/<khoá>.pdf. An toàn đa luồng; ghi bằng os.replace."""
+
+    def __init__(self, root: str | os.PathLike, max_mb: float = DEFAULT_MAX_MB) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    # ---- khoá ----
+    def key(self, src: str | os.PathLike, kind: str, engine: str, options: Optional[dict] = None) -> str:
+        payload = json.dumps({
+            "src": fingerprint(src),
+            "ext": Path(src).suffix.lower(),
+            "options": _normalize(options or {}),
+            "engine": engine_version(kind, engine),
+        }, sort_keys=True)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pdf"
+
+    # ---- đọc / ghi ----
+    def fetch(self, key: str, dst: str | os.PathLike) -> bool:
+        """Trúng cache thì đặt PDF vào dst (reflink, không được thì copy) và trả về True."""
+        entry = self._entry(key)
+        try:
+            os.utime(entry)  # đánh dấu vừa dùng (LRU)
+        except OSError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return False
+        dst = Path(dst)
+        try:
+            # reflink / copy, không hard link: sửa file đích không được làm hỏng bản trong cache; ghi đè nguyên tử
+            clone_file(entry, dst, allow_link=False)
+        except OSError:
+            logger.warning("Không đặt được PDF từ cache vào %s", dst, exc_info=True)
+            with self._lock:
+                self.stats["errors"] += 1
+                self.stats["misses"] += 1
+            return False
+        with self._lock:
+            self.stats["hits"] += 1
+        return True
+
+    def store(self, key: str, pdf_path: str | os.PathLike) -> None:
+        """Lưu bản sao PDF (không hard link, để file đích sửa về sau không làm hỏng cache)."""
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            old_size = entry.stat().st_size  # ghi đè khoá đã có (vd: 2 job cùng nội dung chạy song song)
+        except OSError:
+            old_size = 0
+        try:
+            # reflink nếu FS hỗ trợ (không tốn chỗ/không copy), không thì copy; không hard link
+            clone_file(pdf_path, entry, allow_link=False)
+        except OSError:
+            logger.warning("Không ghi được cache cho %s", pdf_path, exc_info=True)
+            with self._lock:
+                self.stats["errors"] += 1
+            return
+        size = entry.stat().st_size
+        with self._lock:
+            self.stats["stores"] += 1
+            if self._total is not None:
+                self._total += size - old_size
+        self._evict()
+
+    # ---- dung lượng / LRU ----
+    def _scan(self):
+        entries = []
+        for sub in self.root.iterdir():
+            if not sub.is_dir():
+                continue
+            for f in sub.glob("*.pdf"):
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, f))
+        return entries
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _m, size, _f in self._scan())
+            return self._total
+
+    def _evict(self) -> None:
+        if self.size_bytes() <= self.max_bytes:
+            return
+        with self._lock:
+            entries = sorted(self._scan(), key=lambda e: e[0])
+            total = sum(size for _m, size, _f in entries)
+            target = self.max_bytes * EVICT_LOW_WATER
+            for _mtime, size, f in entries:
+                if total <= target:
+                    break
+                try:
+                    f.unlink()
+                except OSError:
+                    continue
+                total -= size
+                self.stats["evictions"] += 1
+            self._total = total
+
+    def clear(self) -> None:
+        with self._lock:
+            for _m, _s, f in self._scan():
+                try:
+                    f.unlink()
+                except OSError:
+                    pass
+            self._total = 0
+
+    def snapshot(self) -> Dict[str, float]:
+        stats: Dict[str, float] = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["size_mb"] = self.size_bytes() / (1024 * 1024)
+        return stats
+
+
+# -------------------- Cache dùng chung --------------------
+_CACHE: Optional[ConversionCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def enable_cache(root: str | os.PathLike, max_mb: float = DEFAULT_MAX_MB, *, export_env: bool = True) -> ConversionCache:
+    """
+    Bật cache cho mọi converter. export_env=True: ghi DOCXTOPDF_CACHE_DIR / _MAX_MB vào môi trường
+    để các process con (image_to_pdf_many, ...) dùng chung thư mục cache.
+    """
+    global _CACHE
+    cache = ConversionCache(root, max_mb)
+    with _CACHE_LOCK:
+        _CACHE = cache
+    if export_env:
+        os.environ[CACHE_ENV] = str(cache.root.resolve())
+        os.environ[CACHE_MAX_ENV] = str(max_mb)
+    return cache
+
+
+def disable_cache() -> None:
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = None
+    os.environ.pop(CACHE_ENV, None)
+    os.environ.pop(CACHE_MAX_ENV, None)
+
+
+def get_cache() -> Optional[ConversionCache]:
+    """Cache đang bật; nếu chưa bật nhưng có DOCXTOPDF_CACHE_DIR thì tạo theo biến môi trường."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None and os.environ.get(CACHE_ENV):
+            try:
+                max_mb = float(os.environ.get(CACHE_MAX_ENV) or DEFAULT_MAX_MB)
+            except ValueError:
+                max_mb = DEFAULT_MAX_MB
+            _CACHE = ConversionCache(os.environ[CACHE_ENV], max_mb)
+        return _CACHE
+
+
+def cached_convert(kind: str, src: str | os.PathLike, dst: str | os.PathLike, engine: str,
+                   options: Optional[dict], run: Callable[[], str],
+                   stats: Optional[dict] = None) -> str:
+    """
+    Bọc 1 lần chuyển đổi: trúng cache thì đặt PDF vào dst, trượt thì chạy `run()` (trả về đường dẫn
+    PDF thực tế) rồi lưu vào cache. Không bật cache -> gọi thẳng run().
+    Nếu truyền stats, ghi stats["cache"] = "hit" | "miss".
+    """
+    cache = get_cache()
+    if cache is None:
+        return run()
+    try:
+        key = cache.key(src, kind, engine, options)
+    except OSError:
+        logger.debug("Không tính được khoá cache cho %s", src, exc_info=True)
+        return run()
+    if cache.fetch(key, dst):
+        if stats is not None:
+            stats["cache"] = "hit"
+        logger.debug("Cache hit %s -> %s", src, dst)
+        return str(dst)
+    if stats is not None:
+        stats["cache"] = "miss"
+
+    dst_path = Path(dst)
+    try:
+        if dst_path.exists() and dst_path.stat().st_nlink > 1:
+            dst_path.unlink()  # dst đang là hard-link vào cache: không ghi đè lên bản trong cache
+    except OSError:
+        pass
+    out = run()
+    cache.store(key, out)
+    return out
@@ -0,0 +1,124 @@
+# src/cli.py
+"""
+CLI chuyển hàng loạt, không cần giao diện:
+
+    python -m src báo_cáo.docx bảng/*.xlsx scans/ -o PDF_Output --image-workers 4 --skip-unchanged
+    python -m src bìa.docx số_liệu.xlsx ảnh/ -o PDF_Output --merge hồ_sơ.pdf
+
+In bản tổng kết JSON (thời gian từng file) ra stdout; log ra stderr.
+Mã thoát: 0 = thành công, 1 = có file lỗi, 2 = không có file đầu vào hợp lệ.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from . import CONVERSION_TIMEOUT, OUTPUT_FOLDER, VERSION
+from .batch import collect_inputs, merge_outputs, plan_jobs, run_batch
+from .cache import DEFAULT_MAX_MB, enable_cache
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Chuyển Word / Excel / ảnh sang PDF hàng loạt (chọn converter theo đuôi file).",
+    )
+    p.add_argument("inputs", nargs="+", help="file, thư mục hoặc glob (vd: 'scans/**/*.jpg')")
+    p.add_argument("-o", "--output-dir", default=OUTPUT_FOLDER,
+                   help=f"thư mục lưu PDF (mặc định: ./{OUTPUT_FOLDER})")
+    p.add_argument("-r", "--recursive", action="store_true", help="duyệt cả thư mục con")
+
+    g = p.add_argument_group("engine / worker")
+    g.add_argument("--word-engine", default="auto",
+                   choices=("auto", "docx2pdf", "com", "native", "libreoffice"))
+    g.add_argument("--excel-engine", default="auto", choices=("auto", "com", "native", "libreoffice"))
+    g.add_argument("--word-workers", type=int, default=1, metavar="N",
+                   help="số file Word chạy song song (COM: số instance Word trong pool)")
+    g.add_argument("--excel-workers", type=int, default=1, metavar="N",
+                   help="số file Excel chạy song song (COM: số instance Excel trong pool)")
+    g.add_argument("--image-workers", type=int, default=os.cpu_count() or 1, metavar="N",
+                   help="số process chuyển ảnh (mặc định: số CPU)")
+    g.add_argument("--dpi", type=int, default=300, help="dpi cho ảnh -> PDF")
+    g.add_argument("--timeout", type=float, default=CONVERSION_TIMEOUT, metavar="SEC",
+                   help=f"hạn chót mỗi file Word/Excel, quá hạn thì kill worker + Office "
+                        f"(mặc định {CONVERSION_TIMEOUT}; 0 = chạy trong tiến trình, không giới hạn)")
+    g.add_argument("--schedule", default="sjf", choices=("sjf", "fifo"),
+                   help="sjf: ước lượng chi phí từng file (đọc metadata) và chạy file nhỏ trước, file lớn ở "
+                        "làn riêng; fifo: theo thứ tự đầu vào (mặc định sjf)")
+    g.add_argument("--max-jobs", type=int, default=50, metavar="N",
+                   help="thay tiến trình worker sau N file để chặn rò rỉ bộ nhớ (0 = không giới hạn)")
+
+    s = p.add_mutually_exclusive_group()
+    s.add_argument("--skip-existing", dest="skip", action="store_const", const="exists",
+                   help="bỏ qua file đã có PDF đích")
+    s.add_argument("--skip-unchanged", dest="skip", action="store_const", const="mtime",
+                   help="bỏ qua nếu PDF đích mới hơn file nguồn (so mtime)")
+
+    c = p.add_argument_group("cache")
+    c.add_argument("--cache-dir", metavar="DIR",
+                   help="bật cache PDF theo nội dung (mặc định lấy từ biến DOCXTOPDF_CACHE_DIR nếu có)")
+    c.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB, metavar="MB",
+                   help=f"dung lượng tối đa của cache, loại bỏ theo LRU (mặc định {DEFAULT_MAX_MB})")
+
+    p.add_argument("--merge", metavar="PDF",
+                   help="ghép mọi PDF kết quả (theo thứ tự đầu vào, mỗi file 1 mục lục) thành 1 file")
+    p.add_argument("--summary", metavar="FILE", help="ghi thêm bản tổng kết JSON ra file")
+    p.add_argument("-q", "--quiet", action="store_true", help="chỉ log lỗi")
+    p.add_argument("-v", "--verbose", action="store_true", help="log chi tiết")
+    p.add_argument("--version", action="version", version=f"%(prog)s {VERSION}")
+    return p
+
+
+def _setup_logging(quiet: bool, verbose: bool) -> None:
+    level = logging.ERROR if quiet else logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(level=level, stream=sys.stderr,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    _setup_logging(args.quiet, args.verbose)
+    log = logging.getLogger("src.cli")
+
+    inputs = collect_inputs(args.inputs, recursive=args.recursive)
+    if not inputs:
+        log.error("Không có file Word/Excel/ảnh nào trong: %s", " ".join(args.inputs))
+        return 2
+
+    if args.cache_dir:
+        enable_cache(args.cache_dir, args.cache_max_mb)
+
+    out_dir = Path(args.output_dir)
+    jobs = plan_jobs(inputs, out_dir)
+    log.info("%d file -> %s", len(jobs), out_dir.resolve())
+
+    summary = run_batch(
+        jobs,
+        workers={"word": args.word_workers, "excel": args.excel_workers, "image": args.image_workers},
+        engines={"word": args.word_engine, "excel": args.excel_engine},
+        skip=args.skip,
+        dpi=args.dpi,
+        timeout=args.timeout,
+        max_jobs=args.max_jobs,
+        schedule=args.schedule,
+    )
+    summary["output_dir"] = str(out_dir.resolve())
+    merge_failed = False
+    if args.merge:
+        try:
+            summary["merged"] = merge_outputs(summary, args.merge)
+        except Exception as e:
+            log.error("Không ghép được PDF -> %s: %s", args.merge, e)
+            summary["merged"] = None
+            merge_failed = True
+
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.summary:
+        Path(args.summary).write_text(text, encoding="utf-8")
+    print(text)
+    return 1 if summary["failed"] or merge_failed else 0
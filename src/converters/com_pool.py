@@ -0,0 +1,449 @@
+# src/converters/com_pool.py
+"""
+Pool các instance Office (COM) "ấm" để tái sử dụng giữa các lần chuyển đổi.
+
+- Mỗi instance gắn với 1 worker thread riêng (COM STA: object chỉ dùng được trên thread đã tạo ra nó).
+- Job được đưa vào hàng đợi chung; thread nào rảnh thì nhận job và chạy fn(app) trên instance của nó.
+- Instance được tái tạo (recycle) sau max_jobs job, khi RAM vượt max_memory_mb, hoặc khi health-check lỗi.
+  Đo RAM cần PID của instance + psutil (requirements.txt) hoặc pywin32; không đo được thì cảnh báo 1 lần
+  và chỉ recycle theo max_jobs.
+- `dispatch` có thể thay bằng factory giả (fake COM) để chạy/kiểm thử trên Linux.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# Tạo instance tuần tự để dò đúng PID của tiến trình Office vừa sinh ra
+_SPAWN_LOCK = threading.Lock()
+
+
+# -------------------- tiện ích COM / tiến trình --------------------
+def _co_initialize() -> None:
+    try:
+        import pythoncom  # type: ignore
+    except ImportError:
+        return  # không phải Windows / thiếu pywin32 (vd: chạy với fake COM)
+    pythoncom.CoInitialize()
+
+
+def _co_uninitialize() -> None:
+    try:
+        import pythoncom  # type: ignore
+    except ImportError:
+        return
+    try:
+        pythoncom.CoUninitialize()
+    except Exception:
+        pass
+
+
+_PID_WARNED = False
+
+
+def _warn_no_pid(process_name: str) -> None:
+    """Cảnh báo 1 lần: không biết PID Office -> hết hạn không kill được, không recycle theo RAM."""
+    global _PID_WARNED
+    if not _PID_WARNED:
+        _PID_WARNED = True
+        logger.warning("Không xác định được PID của %s (cần pywin32 hoặc psutil): Office treo sẽ không bị kill "
+                       "khi quá hạn và max_memory_mb không có hiệu lực", process_name or "Office")
+
+
+def _window_pid(hwnd) -> Optional[int]:
+    """PID của tiến trình sở hữu cửa sổ hwnd (pywin32)."""
+    try:
+        import win32process  # type: ignore
+        _tid, pid = win32process.GetWindowThreadProcessId(int(hwnd))
+    except Exception:
+        return None
+    return int(pid) or None
+
+
+def _office_pids(process_name: str) -> Set[int]:
+    """PID các tiến trình tên process_name (cần psutil; thiếu thì trả rỗng)."""
+    if not process_name:
+        return set()
+    try:
+        import psutil  # type: ignore
+    except ImportError:
+        return set()
+    name = process_name.lower()
+    pids = set()
+    for p in psutil.process_iter(["name"]):
+        try:
+            if (p.info.get("name") or "").lower() == name:
+                pids.add(p.pid)
+        except Exception:
+            pass
+    return pids
+
+
+def _rss_bytes(pid: Optional[int]) -> Optional[int]:
+    """RAM (working set) của tiến trình pid: psutil, không có thì GetProcessMemoryInfo của pywin32."""
+    if not pid:
+        return None
+    try:
+        import psutil  # type: ignore
+    except ImportError:
+        psutil = None
+    try:
+        if psutil is not None:
+            return int(psutil.Process(pid).memory_info().rss)
+        import win32api  # type: ignore
+        import win32con  # type: ignore
+        import win32process  # type: ignore
+        handle = win32api.OpenProcess(win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ, False, pid)
+        try:
+            return int(win32process.GetProcessMemoryInfo(handle)["WorkingSetSize"])
+        finally:
+            win32api.CloseHandle(handle)
+    except Exception:
+        return None
+
+
+def spawn_office(dispatch: Callable[[], Any], process_name: str,
+                 pid_of: Optional[Callable[[Any], Optional[int]]] = None):
+    """
+    Gọi dispatch() và lấy PID tiến trình Office mới (None nếu không xác định được).
+    Office chạy qua DCOM nên không phải tiến trình con của ta: PID đọc từ cửa sổ của app (pid_of, pywin32),
+    không được thì so danh sách tiến trình trước/sau (psutil).
+    """
+    with _SPAWN_LOCK:
+        before = _office_pids(process_name)
+        app = dispatch()
+        pid = None
+        if pid_of is not None:
+            try:
+                pid = pid_of(app)
+            except Exception:
+                logger.debug("Không đọc được PID từ cửa sổ %s", process_name, exc_info=True)
+        if pid is None:
+            new = _office_pids(process_name) - before
+            pid = next(iter(new)) if len(new) == 1 else None
+    if pid is None and pid_of is not None:  # COM thật (fake COM không có PID)
+        _warn_no_pid(process_name)
+    return app, pid
+
+
+# -------------------- Pool tổng quát --------------------
+class _Slot:
+    """Trạng thái 1 instance trong pool (chỉ thread sở hữu được đụng vào app)."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.app: Any = None
+        self.pid: Optional[int] = None
+        self.jobs = 0
+        self.started_at = 0.0
+
+
+class ComPool:
+    """
+    Pool tổng quát cho ứng dụng Office qua COM. Lớp con khai báo prog_id/process_name
+    và override _configure/_check/_reset nếu cần.
+    """
+
+    prog_id = ""
+    process_name = ""
+
+    def __init__(
+        self,
+        size: int = 1,
+        *,
+        max_jobs: int = 50,
+        max_memory_mb: Optional[float] = 1024,
+        dispatch: Optional[Callable[[], Any]] = None,
+        memory_probe: Optional[Callable[[Optional[int]], Optional[int]]] = None,
+    ) -> None:
+        if size < 1:
+            raise ValueError("size phải >= 1")
+        self.size = int(size)
+        self.max_jobs = int(max_jobs) if max_jobs else 0
+        self.max_memory_mb = max_memory_mb
+        self._dispatch = dispatch or self._default_dispatch
+        self._memory_probe = memory_probe or _rss_bytes
+
+        self._jobs: "queue.Queue[Any]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._slots: List[_Slot] = []
+        self._ready = threading.Barrier(self.size + 1)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._memory_warned = False
+        self.stats: Dict[str, int] = {"jobs": 0, "errors": 0, "spawned": 0, "recycled": 0, "unhealthy": 0}
+
+    # ---- hook cho lớp con ----
+    def _default_dispatch(self):
+        import win32com.client as win32  # ModuleNotFoundError nếu chưa cài
+        return win32.DispatchEx(self.prog_id)
+
+    def _before_start(self) -> None:
+        """Chạy 1 lần trên thread gọi start() trước khi tạo các instance: sinh typelib (gencache) 1 lần."""
+        if self._dispatch != self._default_dispatch:
+            return  # fake COM: không cần typelib
+        try:
+            from win32com.client import gencache  # type: ignore
+        except ImportError:
+            return
+        _co_initialize()
+        try:
+            gencache.EnsureDispatch(self.prog_id)
+        except Exception:
+            logger.debug("%s: EnsureDispatch lỗi", type(self).__name__, exc_info=True)
+        finally:
+            _co_uninitialize()
+
+    def _configure(self, app) -> None:
+        app.Visible = False
+
+    def _pid(self, app) -> Optional[int]:
+        """PID tiến trình Office của app (Application.Hwnd -> GetWindowThreadProcessId)."""
+        return _window_pid(app.Hwnd)
+
+    def _check(self, app) -> None:
+        """Health-check giữa các job: ném lỗi nếu instance không còn dùng được."""
+
+    def _reset(self, app) -> None:
+        """Dọn trạng thái sau mỗi job để không rò rỉ sang job sau."""
+
+    def _quit(self, app) -> None:
+        app.Quit()
+
+    # ---- vòng đời ----
+    def start(self) -> "ComPool":
+        with self._lock:
+            if self._threads:
+                return self
+            self._before_start()
+            for i in range(self.size):
+                slot = _Slot(i)
+                self._slots.append(slot)
+                t = threading.Thread(target=self._worker, args=(slot,),
+                                     name=f"{type(self).__name__}-{i}", daemon=True)
+                self._threads.append(t)
+                t.start()
+        # chờ mọi instance khởi động xong (pool "ấm")
+        try:
+            self._ready.wait(timeout=120)
+        except threading.BrokenBarrierError:
+            logger.warning("%s: một số instance khởi động chậm/lỗi", type(self).__name__)
+        return self
+
+    def close(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._jobs.put(_STOP)
+        if wait:
+            for t in threads:
+                t.join(timeout=60)
+
+    def pids(self) -> List[int]:
+        """PID các tiến trình Office hiện do pool sở hữu (để tiến trình giám sát kill khi treo)."""
+        return [s.pid for s in self._slots if s.pid]
+
+    def __enter__(self) -> "ComPool":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- gửi job ----
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Chạy fn(app, *args, **kwargs) trên 1 instance rảnh; trả về Future."""
+        if self._closed:
+            raise RuntimeError(f"{type(self).__name__} đã đóng")
+        if not self._threads:
+            self.start()
+        fut: Future = Future()
+        self._jobs.put((fut, fn, args, kwargs))
+        return fut
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+    # ---- worker thread (STA) ----
+    def _spawn(self, slot: _Slot) -> None:
+        slot.app, slot.pid = spawn_office(self._dispatch, self.process_name,
+                                          self._pid if self._dispatch == self._default_dispatch else None)
+        slot.jobs = 0
+        slot.started_at = time.monotonic()
+        self._configure(slot.app)
+        with self._lock:
+            self.stats["spawned"] += 1
+        logger.debug("%s[%d]: khởi động instance pid=%s", type(self).__name__, slot.index, slot.pid)
+
+    def _discard(self, slot: _Slot) -> None:
+        if slot.app is None:
+            return
+        try:
+            self._quit(slot.app)
+        except Exception:
+            logger.debug("%s[%d]: Quit lỗi", type(self).__name__, slot.index, exc_info=True)
+        slot.app = None
+        slot.pid = None
+
+    def _needs_recycle(self, slot: _Slot) -> Optional[str]:
+        if self.max_jobs and slot.jobs >= self.max_jobs:
+            return f"đã chạy {slot.jobs} job"
+        if self.max_memory_mb:
+            rss = self._memory_probe(slot.pid)
+            if rss is None and not self._memory_warned:
+                self._memory_warned = True
+                logger.warning("%s: không đo được RAM của instance (pid=%s; cần psutil hoặc pywin32) -> "
+                               "max_memory_mb=%s không có hiệu lực", type(self).__name__, slot.pid, self.max_memory_mb)
+            if rss is not None and rss > self.max_memory_mb * 1024 * 1024:
+                return f"RAM {rss / 1048576:.0f} MB"
+        return None
+
+    def _worker(self, slot: _Slot) -> None:
+        _co_initialize()
+        try:
+            try:
+                self._spawn(slot)
+            except Exception:
+                logger.exception("%s[%d]: không khởi động được instance", type(self).__name__, slot.index)
+            try:
+                self._ready.wait(timeout=120)
+            except threading.BrokenBarrierError:
+                pass
+
+            while True:
+                item = self._jobs.get()
+                if item is _STOP:
+                    break
+                fut, fn, args, kwargs = item
+                if not fut.set_running_or_notify_cancel():
+                    continue
+
+                # health-check trước job; instance hỏng -> tạo lại
+                try:
+                    if slot.app is None:
+                        self._spawn(slot)
+                    else:
+                        self._check(slot.app)
+                except Exception:
+                    with self._lock:
+                        self.stats["unhealthy"] += 1
+                    logger.warning("%s[%d]: instance không khỏe -> tạo lại", type(self).__name__, slot.index)
+                    self._discard(slot)
+                    try:
+                        self._spawn(slot)
+                    except Exception as e:
+                        fut.set_exception(e)
+                        continue
+
+                try:
+                    result = fn(slot.app, *args, **kwargs)
+                except BaseException as e:
+                    with self._lock:
+                        self.stats["errors"] += 1
+                    fut.set_exception(e)
+                else:
+                    fut.set_result(result)
+                finally:
+                    slot.jobs += 1
+                    with self._lock:
+                        self.stats["jobs"] += 1
+
+                # dọn trạng thái + quyết định recycle
+                try:
+                    self._reset(slot.app)
+                    reason = self._needs_recycle(slot)
+                except Exception:
+                    reason = "reset lỗi"
+                if reason:
+                    logger.info("%s[%d]: recycle instance (%s)", type(self).__name__, slot.index, reason)
+                    with self._lock:
+                        self.stats["recycled"] += 1
+                    self._discard(slot)
+        finally:
+            self._discard(slot)
+            _co_uninitialize()
+
+
+# -------------------- Word --------------------
+class WordPool(ComPool):
+    """N instance Word ấm; mỗi job tự Documents.Open/Close trên instance được cấp."""
+
+    prog_id = "Word.Application"
+    process_name = "WINWORD.EXE"
+
+    def _configure(self, app) -> None:
+        app.Visible = False
+        try:
+            app.DisplayAlerts = 0  # wdAlertsNone
+        except Exception:
+            pass
+
+    def _pid(self, app) -> Optional[int]:
+        # Word.Application không có Hwnd: đặt Caption riêng rồi tìm cửa sổ chính (lớp "OpusApp") theo tiêu đề
+        import uuid
+
+        import win32gui  # type: ignore
+
+        caption = f"docxtopdf-{uuid.uuid4().hex}"
+        old = app.Caption
+        app.Caption = caption
+        try:
+            hwnd = win32gui.FindWindow("OpusApp", caption)
+        finally:
+            app.Caption = old
+        return _window_pid(hwnd) if hwnd else None
+
+    def _check(self, app) -> None:
+        # Gọi 1 thuộc tính rẻ: nếu tiến trình đã chết, COM sẽ ném lỗi RPC
+        int(app.Documents.Count)
+
+    def _reset(self, app) -> None:
+        docs = app.Documents
+        while int(docs.Count) > 0:
+            docs(1).Close(False)
+
+
+# -------------------- Excel --------------------
+class ExcelPool(ComPool):
+    """
+    N instance Excel ấm, mỗi instance trên 1 STA thread riêng.
+    Typelib (gencache) chỉ sinh 1 lần khi start (ComPool._before_start); sau mỗi job đóng mọi workbook và
+    đặt lại cờ ứng dụng để job sau không thừa hưởng trạng thái cũ.
+    """
+
+    prog_id = "Excel.Application"
+    process_name = "EXCEL.EXE"
+
+    def _configure(self, app) -> None:
+        app.Visible = False
+        app.DisplayAlerts = False
+        app.ScreenUpdating = False
+        app.EnableEvents = False
+
+    def _check(self, app) -> None:
+        int(app.Workbooks.Count)
+
+    def _reset(self, app) -> None:
+        books = app.Workbooks
+        while int(books.Count) > 0:
+            books(1).Close(SaveChanges=False)
+        # job có thể đã đổi cờ ứng dụng -> đặt lại
+        self._configure(app)
+
+    def _quit(self, app) -> None:
+        try:
+            app.EnableEvents = True
+            app.ScreenUpdating = True
+            app.DisplayAlerts = True
+        finally:
+            app.Quit()
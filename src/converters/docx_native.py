@@ -0,0 +1,751 @@
+# src/converters/docx_native.py
+"""
+Engine thuần Python cho .docx (không cần Microsoft Word): python-docx đọc tài liệu,
+reportlab (platypus) dựng PDF.
+
+Hỗ trợ: đoạn văn + run (font, cỡ, đậm/nghiêng/gạch chân, màu, chỉ số trên/dưới),
+danh sách đánh số/bullet, bảng (gộp ô), ảnh inline, header/footer (kể cả trường PAGE),
+page setup theo từng section, ngắt trang.
+
+Luồng "stream": các khối của body được chuyển thành flowable theo kiểu lazy và đưa dần
+vào DocTemplate, nên không giữ toàn bộ danh sách flowable của tài liệu trong bộ nhớ.
+Chữ được chuẩn hoá NFC + nhúng font TTF Unicode để tiếng Việt hiển thị đúng.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from .fonts import resolve_font
+
+logger = logging.getLogger(__name__)
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+
+EMU_PER_PT = 12700
+TWIPS_PER_PT = 20
+
+DEFAULT_FONT_SIZE = 11.0
+PAGE_MARKER = "\x00PAGE\x00"
+
+# Kích thước khổ giấy (pt) cho tuỳ chọn page_size
+PAGE_SIZES = {"a4": (595.28, 841.89), "letter": (612.0, 792.0)}
+
+# Số flowable tối đa được dựng sẵn chờ layout
+STREAM_BUFFER = 32
+
+
+def _w(tag: str) -> str:
+    return f"{{{W_NS}}}{tag}"
+
+
+def _nfc(text: str) -> str:
+    return unicodedata.normalize("NFC", text)
+
+
+# -------------------- Danh sách đánh số --------------------
+def _roman(n: int) -> str:
+    vals = [(1000, "m"), (900, "cm"), (500, "d"), (400, "cd"), (100, "c"), (90, "xc"),
+            (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i")]
+    out = ""
+    for v, s in vals:
+        while n >= v:
+            out += s
+            n -= v
+    return out
+
+
+def _letter(n: int) -> str:
+    out = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        out = chr(ord("a") + r) + out
+    return out
+
+
+class _Numbering:
+    """Đọc numbering.xml 1 lần; đếm số thứ tự theo (numId, ilvl)."""
+
+    def __init__(self, document) -> None:
+        self._levels: Dict[str, Dict[int, Tuple[str, str, int]]] = {}
+        self._counters: Dict[str, List[int]] = {}
+        try:
+            numbering = document.part.numbering_part.element
+        except Exception:
+            return
+        abstract: Dict[str, Dict[int, Tuple[str, str, int]]] = {}
+        for an in numbering.findall(_w("abstractNum")):
+            levels = {}
+            for lvl in an.findall(_w("lvl")):
+                ilvl = int(lvl.get(_w("ilvl"), "0"))
+                fmt = lvl.find(_w("numFmt"))
+                text = lvl.find(_w("lvlText"))
+                start = lvl.find(_w("start"))
+                levels[ilvl] = (
+                    fmt.get(_w("val")) if fmt is not None else "decimal",
+                    text.get(_w("val")) if text is not None else "%1.",
+                    int(start.get(_w("val"))) if start is not None else 1,
+                )
+            abstract[an.get(_w("abstractNumId"))] = levels
+        for num in numbering.findall(_w("num")):
+            ref = num.find(_w("abstractNumId"))
+            if ref is not None:
+                self._levels[num.get(_w("numId"))] = abstract.get(ref.get(_w("val")), {})
+
+    def label(self, num_id: str, ilvl: int) -> str:
+        levels = self._levels.get(num_id)
+        if not levels:
+            return "•"
+        counters = self._counters.setdefault(num_id, [0] * 10)
+        fmt, text, start = levels.get(ilvl, ("bullet", "•", 1))
+        counters[ilvl] = (counters[ilvl] or start - 1) + 1
+        for deeper in range(ilvl + 1, len(counters)):
+            counters[deeper] = 0
+        if fmt == "bullet":
+            return "•" if not text or ord(text[0]) >= 0xF000 else text
+        if fmt == "none":
+            return ""
+        for lv in range(ilvl + 1):
+            f, _, st = levels.get(lv, ("decimal", "", 1))
+            n = counters[lv] or st
+            if f == "lowerLetter":
+                s = _letter(n)
+            elif f == "upperLetter":
+                s = _letter(n).upper()
+            elif f == "lowerRoman":
+                s = _roman(n)
+            elif f == "upperRoman":
+                s = _roman(n).upper()
+            else:
+                s = str(n)
+            text = text.replace(f"%{lv + 1}", s)
+        return text
+
+
+# -------------------- Renderer --------------------
+class _PartParent:
+    """Parent tối thiểu cho Paragraph/Run của python-docx (chỉ cần .part để tra style/ảnh)."""
+
+    def __init__(self, part) -> None:
+        self.part = part
+
+
+class _LazyFlowables(list):
+    """
+    List "tự nạp": reportlab build() chỉ dùng len()/[0]/del/insert, nên có thể
+    kéo flowable từ generator khi bộ đệm cạn thay vì dựng sẵn cả tài liệu.
+    """
+
+    def __init__(self, source: Iterator, buffer: int = STREAM_BUFFER) -> None:
+        super().__init__()
+        self._source = source
+        self._buffer = max(1, buffer)
+        self._done = False
+
+    def _fill(self) -> None:
+        while not self._done and list.__len__(self) < self._buffer:
+            try:
+                list.append(self, next(self._source))
+            except StopIteration:
+                self._done = True
+
+    def __len__(self) -> int:
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+class DocxRenderer:
+    """Chuyển 1 python-docx Document -> PDF bằng reportlab platypus."""
+
+    def __init__(
+        self,
+        document,
+        *,
+        page_size: Optional[str] = None,
+        orientation: Optional[str] = None,
+        margins_mm: Optional[Tuple[float, float, float, float]] = None,
+    ) -> None:
+        from reportlab.lib.styles import ParagraphStyle
+
+        self.document = document
+        self._page_size = page_size
+        self._orientation = orientation
+        self._margins_mm = margins_mm
+        self._numbering = _Numbering(document)
+        self._styles_cache: Dict[tuple, ParagraphStyle] = {}
+
+        normal = self._style_chain_value(self._named_style("Normal"), lambda s: s.font.name)
+        size = self._style_chain_value(self._named_style("Normal"), lambda s: s.font.size)
+        self.default_font = resolve_font(normal)
+        self.default_size = size.pt if size is not None else DEFAULT_FONT_SIZE
+        self.pages = 0
+        # số trang để thay vào trường PAGE (chỉ biết khi vẽ header/footer của từng trang)
+        self._field_page: Optional[int] = None
+
+    # ---- style helpers ----
+    def _named_style(self, name: str):
+        try:
+            return self.document.styles[name]
+        except Exception:
+            return None
+
+    @staticmethod
+    def _style_chain_value(style, getter):
+        while style is not None:
+            try:
+                v = getter(style)
+            except Exception:
+                v = None
+            if v is not None:
+                return v
+            style = getattr(style, "base_style", None)
+        return None
+
+    def _pstyle(self, align: int, size: float, leading: float, left: float, right: float,
+                first: float, before: float, after: float):
+        from reportlab.lib.styles import ParagraphStyle
+
+        key = (align, size, leading, left, right, first, before, after)
+        st = self._styles_cache.get(key)
+        if st is None:
+            st = ParagraphStyle(
+                f"p{len(self._styles_cache)}",
+                fontName=self.default_font,
+                fontSize=size,
+                leading=leading,
+                alignment=align,
+                leftIndent=left,
+                rightIndent=right,
+                firstLineIndent=first,
+                spaceBefore=before,
+                spaceAfter=after,
+            )
+            self._styles_cache[key] = st
+        return st
+
+    # ---- page setup ----
+    def _section_geometry(self, section) -> Tuple[float, float, float, float, float, float, float, float]:
+        """(page_w, page_h, left, right, top, bottom, header_dist, footer_dist) theo pt."""
+        def pt(v, default):
+            return v.pt if v is not None else default
+
+        w = pt(section.page_width, 595.28)
+        h = pt(section.page_height, 841.89)
+        if self._page_size and self._page_size.strip().lower() in PAGE_SIZES:
+            w, h = PAGE_SIZES[self._page_size.strip().lower()]
+            if section.page_width is not None and section.page_height is not None \
+                    and section.page_width > section.page_height:
+                w, h = h, w
+        if self._orientation:
+            landscape = self._orientation.strip().lower() == "landscape"
+            if landscape != (w > h):
+                w, h = h, w
+        left, right = pt(section.left_margin, 72.0), pt(section.right_margin, 72.0)
+        top, bottom = pt(section.top_margin, 72.0), pt(section.bottom_margin, 72.0)
+        if self._margins_mm:
+            from .word_to_pdf import mm_to_pt
+            left, right, top, bottom = (mm_to_pt(m) for m in self._margins_mm)
+        return (w, h, left, right, top, bottom,
+                pt(section.header_distance, 36.0), pt(section.footer_distance, 36.0))
+
+    # ---- inline: runs -> markup ----
+    def _run_markup(self, r, paragraph, size_default: float, pstyle) -> str:
+        from docx.text.run import Run
+
+        run = Run(r, paragraph)
+        font = run.font
+        texts: List[str] = []
+        for child in r.iterchildren():
+            tag = child.tag
+            if tag == _w("t"):
+                texts.append(escape(_nfc(child.text or "")))
+            elif tag == _w("tab"):
+                texts.append("&nbsp;" * 4)
+            elif tag in (_w("br"), _w("cr")) and child.get(_w("type")) != "page":
+                texts.append("<br/>")
+            elif tag == _w("noBreakHyphen"):
+                texts.append("-")
+        text = "".join(texts)
+        if not text:
+            return ""
+
+        def pick(own, getter):
+            if own is not None:
+                return own
+            try:
+                rstyle = run.style
+            except Exception:
+                rstyle = None
+            v = self._style_chain_value(rstyle, getter)
+            if v is None:
+                v = self._style_chain_value(pstyle, getter)
+            return v
+
+        bold = pick(run.bold, lambda s: s.font.bold)
+        italic = pick(run.italic, lambda s: s.font.italic)
+        underline = pick(run.underline, lambda s: s.font.underline)
+        size = pick(font.size, lambda s: s.font.size)
+        name = pick(font.name, lambda s: s.font.name)
+
+        attrs = [f'face="{resolve_font(name) if name else self.default_font}"']
+        attrs.append(f'size="{size.pt if size is not None else size_default:g}"')
+        try:
+            rgb = font.color.rgb if font.color is not None and font.color.type is not None else None
+        except Exception:
+            rgb = None
+        if rgb is not None:
+            attrs.append(f'color="#{rgb}"')
+        out = f"<font {' '.join(attrs)}>{text}</font>"
+        if bold:
+            out = f"<b>{out}</b>"
+        if italic:
+            out = f"<i>{out}</i>"
+        if underline:
+            out = f"<u>{out}</u>"
+        if font.superscript:
+            out = f"<super>{out}</super>"
+        elif font.subscript:
+            out = f"<sub>{out}</sub>"
+        if font.strike:
+            out = f"<strike>{out}</strike>"
+        return out
+
+    def _iter_inline(self, p_elm) -> Iterator:
+        """Duyệt run theo thứ tự (kể cả trong hyperlink/smartTag/sdt), đánh dấu trường PAGE."""
+        field_instr: List[str] = []
+        in_result = False
+        result_is_page = False
+        for r in p_elm.iter(_w("r"), _w("fldSimple")):
+            if r.tag == _w("fldSimple"):
+                if "PAGE" in (r.get(_w("instr")) or "").split():
+                    yield ("page", r)
+                continue
+            if r.getparent() is not None and r.getparent().tag == _w("fldSimple"):
+                parent_instr = (r.getparent().get(_w("instr")) or "").split()
+                if "PAGE" in parent_instr:
+                    continue  # giá trị cache của trường PAGE -> đã thay bằng số trang thật
+            fld = r.find(_w("fldChar"))
+            if fld is not None:
+                kind = fld.get(_w("fldCharType"))
+                if kind == "begin":
+                    field_instr, in_result, result_is_page = [], False, False
+                elif kind == "separate":
+                    in_result = True
+                    result_is_page = "PAGE" in " ".join(field_instr).split()
+                    if result_is_page:
+                        yield ("page", r)
+                elif kind == "end":
+                    in_result = result_is_page = False
+                continue
+            instr = r.find(_w("instrText"))
+            if instr is not None:
+                field_instr.append(instr.text or "")
+                continue
+            if in_result and result_is_page:
+                continue
+            yield ("run", r)
+
+    # ---- blocks ----
+    def _paragraph_flowables(self, p_elm, part) -> Iterator:
+        from docx.text.paragraph import Paragraph as DocxParagraph
+        from reportlab.platypus import Paragraph, PageBreak, Spacer
+
+        para = DocxParagraph(p_elm, _PartParent(part))
+        try:
+            pstyle = para.style
+        except Exception:
+            pstyle = self._named_style("Normal")
+
+        pf = para.paragraph_format
+        align_v = para.alignment if para.alignment is not None else \
+            self._style_chain_value(pstyle, lambda s: s.paragraph_format.alignment)
+        align = {0: 0, 1: 1, 2: 2, 3: 4}.get(int(align_v) if align_v is not None else 0, 0)
+
+        size_v = self._style_chain_value(pstyle, lambda s: s.font.size)
+        size = size_v.pt if size_v is not None else self.default_size
+
+        def length(v, getter, default=0.0):
+            if v is None:
+                v = self._style_chain_value(pstyle, lambda s: getter(s.paragraph_format))
+            return v.pt if v is not None else default
+
+        left = length(pf.left_indent, lambda f: f.left_indent)
+        right = length(pf.right_indent, lambda f: f.right_indent)
+        first = length(pf.first_line_indent, lambda f: f.first_line_indent)
+        before = length(pf.space_before, lambda f: f.space_before)
+        after = length(pf.space_after, lambda f: f.space_after)
+
+        spacing = pf.line_spacing if pf.line_spacing is not None else \
+            self._style_chain_value(pstyle, lambda s: s.paragraph_format.line_spacing)
+        if spacing is None:
+            leading = size * 1.2
+        elif isinstance(spacing, float):  # "multiple" (1.0, 1.15, 1.5…)
+            leading = size * 1.2 * spacing
+        else:  # exact/atLeast (Length)
+            leading = max(spacing.pt, size)
+
+        # Tiền tố danh sách
+        prefix = ""
+        num_pr = p_elm.find(f"{_w('pPr')}/{_w('numPr')}")
+        if num_pr is None:
+            # danh sách khai báo trong style (vd: "List Number", "List Bullet")
+            num_pr = self._style_chain_value(
+                pstyle, lambda s: s.element.find(f"{_w('pPr')}/{_w('numPr')}"))
+        if num_pr is not None:
+            num_id = num_pr.find(_w("numId"))
+            ilvl = num_pr.find(_w("ilvl"))
+            if num_id is not None and num_id.get(_w("val")) != "0":
+                label = self._numbering.label(num_id.get(_w("val")),
+                                              int(ilvl.get(_w("val"))) if ilvl is not None else 0)
+                if label:
+                    prefix = escape(_nfc(label)) + "&nbsp;&nbsp;"
+                    if not left:
+                        level = int(ilvl.get(_w("val"))) if ilvl is not None else 0
+                        left, first = 18.0 * (level + 1), -12.0
+
+        style = self._pstyle(align, size, leading, left, right, first, before, after)
+        if para.paragraph_format.page_break_before:
+            yield PageBreak()
+
+        chunks: List[str] = [prefix] if prefix else []
+        images: List = []
+
+        def flush():
+            markup = "".join(chunks).strip()
+            chunks.clear()
+            if markup:
+                page = "" if self._field_page is None else str(self._field_page)
+                return Paragraph(markup.replace(PAGE_MARKER, page), style)
+            return None
+
+        emitted = False
+        for kind, r in self._iter_inline(p_elm):
+            if kind == "page":
+                chunks.append(PAGE_MARKER)
+                continue
+            for br in r.findall(_w("br")):
+                if br.get(_w("type")) == "page":
+                    f = flush()
+                    if f is not None:
+                        emitted = True
+                        yield f
+                    yield PageBreak()
+            chunks.append(self._run_markup(r, para, size, pstyle))
+            images.extend(self._run_images(r, part))
+
+        f = flush()
+        if f is not None:
+            emitted = True
+            yield f
+        for img in images:
+            img.hAlign = {0: "LEFT", 1: "CENTER", 2: "RIGHT"}.get(align, "LEFT")
+            emitted = True
+            yield img
+        if not emitted:
+            # đoạn rỗng vẫn chiếm 1 dòng như trong Word
+            yield Spacer(1, leading + before + after)
+
+    def _run_images(self, r, part) -> List:
+        from reportlab.platypus import Image
+
+        out = []
+        for drawing in r.iter(_w("drawing")):
+            blip = drawing.find(f".//{{{A_NS}}}blip")
+            extent = drawing.find(f".//{{{WP_NS}}}extent")
+            if blip is None:
+                continue
+            rid = blip.get(f"{{{R_NS}}}embed")
+            try:
+                blob = part.related_parts[rid].blob
+            except Exception:
+                continue
+            w = h = None
+            if extent is not None:
+                w = int(extent.get("cx", "0")) / EMU_PER_PT or None
+                h = int(extent.get("cy", "0")) / EMU_PER_PT or None
+            try:
+                img = Image(io.BytesIO(blob), width=w, height=h)
+            except Exception:
+                logger.debug("Bỏ qua ảnh không đọc được (%s)", rid, exc_info=True)
+                continue
+            out.append(img)
+        return out
+
+    def _fit_image(self, img, max_w: float, max_h: float):
+        w, h = img.drawWidth, img.drawHeight
+        scale = min(1.0, max_w / w if w else 1.0, max_h / h if h else 1.0)
+        if scale < 1.0:
+            img.drawWidth, img.drawHeight = w * scale, h * scale
+        return img
+
+    def _table_flowable(self, tbl_elm, part, avail_w: float):
+        from docx.table import Table as DocxTable
+        from reportlab.platypus import Table, TableStyle
+        from reportlab.lib import colors
+
+        table = DocxTable(tbl_elm, _PartParent(part))
+        grid = [int(gc.get(_w("w"), "0") or 0) / TWIPS_PER_PT
+                for gc in tbl_elm.findall(f"{_w('tblGrid')}/{_w('gridCol')}")]
+        rows_tc: List[List] = []
+        for row in table.rows:
+            try:
+                rows_tc.append([c._tc for c in row.cells])
+            except Exception:
+                continue
+        if not rows_tc:
+            return None
+        n_cols = max(len(r) for r in rows_tc)
+        if len(grid) != n_cols or not all(grid):
+            grid = [avail_w / n_cols] * n_cols
+        total = sum(grid)
+        if total > avail_w:
+            grid = [g * avail_w / total for g in grid]
+
+        data: List[List] = []
+        spans = []
+        seen: Dict[int, Tuple[int, int]] = {}
+        for ri, tcs in enumerate(rows_tc):
+            row_data = []
+            for ci in range(n_cols):
+                tc = tcs[ci] if ci < len(tcs) else None
+                key = id(tc)
+                if tc is None or key in seen:
+                    row_data.append("")
+                    if tc is not None:
+                        r0, c0 = seen[key]
+                        spans.append((c0, r0, ci, ri))
+                    continue
+                seen[key] = (ri, ci)
+                cell_w = grid[ci] - 4
+                content = []
+                for child in tc.iterchildren():
+                    if child.tag == _w("p"):
+                        for f in self._paragraph_flowables(child, part):
+                            if hasattr(f, "drawWidth"):
+                                self._fit_image(f, cell_w, 600)
+                            content.append(f)
+                    elif child.tag == _w("tbl"):
+                        nested = self._table_flowable(child, part, cell_w)
+                        if nested is not None:
+                            content.append(nested)
+                row_data.append(content)
+            data.append(row_data)
+
+        style = [
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 2),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 2),
+        ]
+        tbl_pr = tbl_elm.find(_w("tblPr"))
+        style_name = ""
+        if tbl_pr is not None:
+            ts = tbl_pr.find(_w("tblStyle"))
+            style_name = (ts.get(_w("val")) if ts is not None else "") or ""
+        has_borders = tbl_pr is not None and tbl_pr.find(_w("tblBorders")) is not None
+        if has_borders or "grid" in style_name.lower():
+            style.append(("GRID", (0, 0), (-1, -1), 0.5, colors.black))
+
+        # merge span (gộp ngang/dọc) -> SPAN theo hình chữ nhật bao
+        merged: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        for c0, r0, c1, r1 in spans:
+            cur = merged.get((c0, r0), (c0, r0))
+            merged[(c0, r0)] = (max(cur[0], c1), max(cur[1], r1))
+        for (c0, r0), (c1, r1) in merged.items():
+            style.append(("SPAN", (c0, r0), (c1, r1)))
+
+        t = Table(data, colWidths=grid, repeatRows=0, splitByRow=1)
+        t.setStyle(TableStyle(style))
+        t.hAlign = "LEFT"
+        return t
+
+    def _body_flowables(self, sections_ids: List[str]) -> Iterator:
+        from reportlab.platypus import NextPageTemplate, PageBreak
+
+        body = self.document.element.body
+        part = self.document.part
+        section_idx = 0
+        avail = self._frame_widths
+        for child in body.iterchildren():
+            if child.tag == _w("p"):
+                for f in self._paragraph_flowables(child, part):
+                    if hasattr(f, "drawWidth"):
+                        self._fit_image(f, avail[section_idx], self._frame_heights[section_idx])
+                    yield f
+                # sectPr trong pPr đánh dấu kết thúc section
+                if child.find(f"{_w('pPr')}/{_w('sectPr')}") is not None \
+                        and section_idx + 1 < len(sections_ids):
+                    section_idx += 1
+                    yield NextPageTemplate(sections_ids[section_idx] + "_first")
+                    yield PageBreak()
+            elif child.tag == _w("tbl"):
+                t = self._table_flowable(child, part, avail[section_idx])
+                if t is not None:
+                    yield t
+            elif child.tag == _w("sdt"):
+                content = child.find(_w("sdtContent"))
+                if content is not None:
+                    for p in content.iterchildren(_w("p")):
+                        yield from self._paragraph_flowables(p, part)
+
+    # ---- header / footer ----
+    @staticmethod
+    def _hf_part(hf):
+        """Part định nghĩa header/footer (theo chuỗi "link to previous"), không tạo mới."""
+        try:
+            while hf is not None:
+                if hf._has_definition:
+                    return hf._definition
+                hf = hf._prior_headerfooter
+        except Exception:
+            pass
+        return None
+
+    def _hf_flowables(self, hf, width: float) -> List:
+        part = self._hf_part(hf)
+        if part is None:
+            return []
+        out = []
+        for child in part.element.iterchildren():
+            if child.tag == _w("p"):
+                for f in self._paragraph_flowables(child, part):
+                    if hasattr(f, "text") or hasattr(f, "drawWidth"):
+                        out.append(f)
+            elif child.tag == _w("tbl"):
+                t = self._table_flowable(child, part, width)
+                if t is not None:
+                    out.append(t)
+        return out
+
+    def _draw_hf(self, canvas, section, first: bool, geom) -> None:
+        w, h, left, right, top, bottom, hdist, fdist = geom
+        width = w - left - right
+        try:
+            header = section.first_page_header if first and section.different_first_page_header_footer \
+                else section.header
+            footer = section.first_page_footer if first and section.different_first_page_header_footer \
+                else section.footer
+        except Exception:
+            return
+
+        self._field_page = canvas.getPageNumber()
+        try:
+            self._draw_hf_items(canvas, header, footer, geom, width)
+        finally:
+            self._field_page = None
+
+    def _draw_hf_items(self, canvas, header, footer, geom, width: float) -> None:
+        w, h, left, right, top, bottom, hdist, fdist = geom
+
+        y = h - hdist
+        for f in self._hf_flowables(header, width):
+            if hasattr(f, "drawWidth"):
+                self._fit_image(f, width, max(top - hdist, 12))
+            _, fh = f.wrap(width, h)
+            f.drawOn(canvas, left, y - fh)
+            y -= fh
+
+        items = []
+        for f in self._hf_flowables(footer, width):
+            if hasattr(f, "drawWidth"):
+                self._fit_image(f, width, max(bottom - fdist, 12))
+            items.append((f, f.wrap(width, h)[1]))
+        y = fdist + sum(fh for _, fh in items)
+        for f, fh in items:
+            f.drawOn(canvas, left, y - fh)
+            y -= fh
+
+    # ---- build ----
+    def render(self, dst: str) -> int:
+        """Dựng PDF ra dst; trả về số trang."""
+        from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate
+
+        sections = list(self.document.sections) or [None]
+        geoms = []
+        templates = []
+        ids = []
+        self._frame_widths: List[float] = []
+        self._frame_heights: List[float] = []
+        for i, section in enumerate(sections):
+            if section is None:
+                geom = (595.28, 841.89, 72.0, 72.0, 72.0, 72.0, 36.0, 36.0)
+            else:
+                geom = self._section_geometry(section)
+            geoms.append(geom)
+            w, h, left, right, top, bottom, _, _ = geom
+            frame_w, frame_h = w - left - right, h - top - bottom
+            self._frame_widths.append(frame_w)
+            self._frame_heights.append(frame_h)
+            sid = f"s{i}"
+            ids.append(sid)
+
+            for suffix, first in (("_first", True), ("", False)):
+                frame = Frame(left, bottom, frame_w, frame_h, leftPadding=0, rightPadding=0,
+                              topPadding=0, bottomPadding=0, id=f"{sid}{suffix}_frame")
+                templates.append(PageTemplate(
+                    id=sid + suffix,
+                    frames=[frame],
+                    pagesize=(w, h),
+                    onPage=lambda c, d, s=section, g=geom, f=first: self._on_page(c, s, g, f),
+                    autoNextPageTemplate=sid if first else None,
+                ))
+
+        first_geom = geoms[0]
+        doc = BaseDocTemplate(
+            dst,
+            pagesize=(first_geom[0], first_geom[1]),
+            pageTemplates=templates,
+            title=self._core_title(),
+            author=self._core_author(),
+        )
+        doc.build(_LazyFlowables(self._body_flowables(ids)))
+        self.pages = doc.page
+        return self.pages
+
+    def _on_page(self, canvas, section, geom, first: bool) -> None:
+        if section is not None:
+            self._draw_hf(canvas, section, first, geom)
+
+    def _core_title(self) -> str:
+        try:
+            return self.document.core_properties.title or ""
+        except Exception:
+            return ""
+
+    def _core_author(self) -> str:
+        try:
+            return self.document.core_properties.author or ""
+        except Exception:
+            return ""
+
+
+def render_docx(
+    source,
+    dst: str,
+    *,
+    page_size: Optional[str] = None,
+    orientation: Optional[str] = None,
+    margins_mm: Optional[Tuple[float, float, float, float]] = None,
+) -> int:
+    """
+    Render .docx -> PDF không cần Word. `source` là đường dẫn, file-like hoặc python-docx Document.
+    Trả về số trang đã xuất.
+    """
+    try:
+        import docx  # python-docx
+        import reportlab  # noqa: F401
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("Engine native cần python-docx và reportlab (pip install python-docx reportlab)") from e
+
+    document = source if hasattr(source, "element") and hasattr(source, "sections") else docx.Document(source)
+    renderer = DocxRenderer(document, page_size=page_size, orientation=orientation, margins_mm=margins_mm)
+    return renderer.render(str(dst))
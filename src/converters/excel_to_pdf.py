@@ -3,29 +3,61 @@
 Excel -> PDF (Windows + Excel), chống vỡ layout + tránh 'Document not saved' / WinError 32
 + sửa lỗi CẮT DẤU tiếng Việt bằng cách tăng chiều cao hàng có kiểm soát.
 
-- AutoFit cột/hàng, sau đó cộng thêm đệm:
+- AutoFit cột; chiều cao hàng tính từ metric font (ROW_HEIGHT_MODEL = "metrics", row_height.py):
+  đọc Value2, độ rộng cột, font/cỡ/đậm/nghiêng + WrapText theo cột (chia đôi khi không đồng nhất),
+  tính trong Python gồm cả dấu chồng tiếng Việt, ghi RowHeight theo từng dải hàng liên tiếp cùng chiều cao
+- ROW_HEIGHT_MODEL = "autofit": cách cũ - Rows.AutoFit rồi cộng đệm:
     * ROW_PADDING_PT: đệm cơ bản cho mọi hàng
     * ROW_HEIGHT_SCALE: nhân thêm % chiều cao (để chắc chắn)
     * EXTRA_WRAP_PADDING_PT: đệm cộng thêm nếu hàng có wrap/ xuống dòng
     * TOP_ROWS_EXTRA_PAD_PT: đệm bổ sung cho vài hàng đầu (thường là tiêu đề)
+  (mô hình metric lỗi giữa chừng cũng rơi về cách này)
 - VerticalAlignment = Center để hạn chế cắt trên/dưới
 - FitToPagesWide=1, FitToPagesTall=False; Landscape; lề gọn; canh giữa ngang
-- Xuất ra %TEMP% rồi move về đích; nếu file đích đang khóa, tự tạo tên mới (thêm timestamp)
+- Xuất ra file tạm cạnh đích rồi os.replace (src/io/staging.py, không copy); nếu file đích đang khóa,
+  tự tạo tên mới (thêm timestamp)
+- Preflight (đọc XML, không mở Excel): bỏ qua sheet trống, workbook nhỏ (TRIVIAL_MAX_CELLS) được
+  render bằng engine native khi engine="auto" - không khởi động Excel
+- progress(done, total, label) (src/converters/progress.py): báo sau mỗi sheet; ném ConversionCancelled
+  từ callback để huỷ giữa các sheet
 """
 
+import logging
 import os
-import shutil
 import tempfile
+import threading
+import uuid
 from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Tuple
 
-# === THAM SỐ ĐIỀU CHỈNH (tăng nếu còn cắt) ===
+from ..registry import EXTENSIONS
+from .progress import ProgressFn, report
+
+logger = logging.getLogger(__name__)
+
+# "metrics": tính chiều cao hàng từ metric font (row_height.py) ; "autofit": Rows.AutoFit + đệm bên dưới
+ROW_HEIGHT_MODEL = "metrics"
+
+# === THAM SỐ ĐIỀU CHỈNH CHO "autofit" (tăng nếu còn cắt) ===
 ROW_PADDING_PT = 6.0            # đệm cơ bản (pt)
 ROW_HEIGHT_SCALE = 0.06          # cộng thêm 6% chiều cao sau AutoFit
 EXTRA_WRAP_PADDING_PT = 4.0      # đệm thêm nếu hàng có WrapText/ xuống dòng
 TOP_ROWS_TO_PAD = 3              # số hàng đầu coi như header
 TOP_ROWS_EXTRA_PAD_PT = 4.0      # đệm thêm cho các hàng đầu
 
-SUPPORTED_EXTS = {".xlsx", ".xls", ".xlsm", ".xlsb", ".xltx", ".xltm"}
+# "autofit": Excel lưu chiều cao hàng theo bước 0.25pt -> làm tròn để gom được nhiều hàng/1 lần ghi.
+# Khác row_height.ROW_HEIGHT_STEP_PT (0.75pt = 1 pixel, bước hiển thị mà "metrics" làm tròn lên).
+ROW_HEIGHT_STORE_STEP_PT = 0.25
+
+# engine="auto": workbook .xlsx* có tổng số ô in được <= ngưỡng này, không biểu đồ/hình, không đặt
+# vùng in riêng và không có bố cục native chưa in giống Excel (ô gộp, chiều cao hàng tuỳ chỉnh, hàng ẩn,
+# xuống dòng/căn lề, chữ tràn ô) thì render bằng engine native, không khởi động Excel. 0 = luôn dùng Excel.
+TRIVIAL_MAX_CELLS = 200
+
+# Hằng số Excel (không phụ thuộc gencache)
+XL_CALCULATION_MANUAL = -4135
+
+SUPPORTED_EXTS = EXTENSIONS["excel"]  # khai báo trong src/registry.py
 
 def is_excel_file(path: str) -> bool:
     if not os.path.isfile(path):
@@ -49,13 +81,12 @@ def _unique_path_like(path: str) -> str:
     return f"{base} - {stamp}{ext}"
 
 def _export_selected(excel, wb, out_path):
-    """Export ActiveSheet(s) ra out_path. Nếu bị khoá -> đổi tên khác tự động."""
-    tmp = os.path.join(tempfile.gettempdir(), os.path.basename(out_path))
-    try:
-        if os.path.exists(tmp):
-            os.remove(tmp)
-    except Exception:
-        pass
+    """
+    Export ActiveSheet(s) ra out_path qua file tạm cạnh đích (cùng ổ đĩa -> chỉ đổi tên, không copy).
+    Thư mục đích không ghi được (Excel báo 'Document not saved') -> export vào %TEMP% rồi chuyển về.
+    Đích bị khoá -> đổi tên khác tự động.
+    """
+    from ..io.staging import _unlink_quiet, staging_path
 
     def _do_export(target):
         excel.ActiveSheet.ExportAsFixedFormat(
@@ -67,45 +98,617 @@ def _export_selected(excel, wb, out_path):
             OpenAfterPublish=False
         )
 
-    _do_export(tmp)
+    tmp = None
+    try:
+        tmp = staging_path(out_path)
+        _do_export(tmp)
+    except Exception:
+        logger.debug("Không export được cạnh %s, dùng thư mục tạm hệ thống", out_path, exc_info=True)
+        if tmp is not None:
+            _unlink_quiet(tmp)  # bản dở dang cạnh đích
+        # không gọi lại staging_path: nó tạo thư mục đích, chính là chỗ vừa lỗi
+        name = os.path.basename(out_path)
+        tmp = os.path.join(tempfile.gettempdir(),
+                           f".{name}.{uuid.uuid4().hex[:12]}.tmp{os.path.splitext(name)[1]}")
+        _do_export(tmp)
+    return _move_into_place(tmp, out_path)
+
+def _fallback_paths(out_path: str):
+    alt = _unique_path_like(out_path)
+    yield alt
+    yield os.path.join(os.path.expanduser("~"), "Downloads", os.path.basename(alt))
+
+def _move_into_place(tmp: str, out_path: str) -> str:
+    """Đổi tên file tạm thành out_path (os.replace); đích bị khoá -> tên có timestamp, rồi tới ~/Downloads."""
+    from ..io.staging import finalize
+
+    return finalize(tmp, out_path, _fallback_paths(out_path))
+
+# -------------------- Đệm chiều cao hàng theo lô --------------------
+class _ComCounter:
+    """Bọc truy cập COM để đếm số lần gọi chéo tiến trình (mỗi get/set/call = 1 lần)."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get(self, obj, name: str):
+        self.calls += 1
+        return getattr(obj, name)
+
+    def set(self, obj, name: str, value) -> None:
+        self.calls += 1
+        setattr(obj, name, value)
+
+    def call(self, fn, *args):
+        self.calls += 1
+        return fn(*args)
+
+
+def _as_rows(value2) -> List[tuple]:
+    """UsedRange.Value2 trả về scalar nếu chỉ 1 ô, tuple-of-tuples nếu nhiều ô."""
+    if isinstance(value2, tuple):
+        return [row if isinstance(row, tuple) else (row,) for row in value2]
+    return [(value2,)]
+
+
+def _get_path(com: _ComCounter, obj, prop: str):
+    """Đọc thuộc tính lồng kiểu "Font.Size"."""
+    for name in prop.split("."):
+        obj = com.get(obj, name)
+    return obj
+
+
+def _read_uniform(com: _ComCounter, make_range: Callable[[int, int], object], prop: str,
+                  first: int, last: int) -> List:
+    """
+    Đọc thuộc tính `prop` (có thể lồng: "Font.Name") cho dải [first, last] bằng chia đôi: Excel trả None khi dải
+    không đồng nhất, nên chỉ tách tiếp những đoạn bị trộn. Số lệnh COM ~ O(k·log n)
+    với k = số đoạn giá trị khác nhau, thay vì O(n).
+    """
+    out: List = [None] * (last - first + 1)
+    stack: List[Tuple[int, int]] = [(first, last)]
+    while stack:
+        a, b = stack.pop()
+        v = _get_path(com, com.call(make_range, a, b), prop)
+        if v is not None or a == b:
+            for i in range(a, b + 1):
+                out[i - first] = v
+        else:
+            mid = (a + b) // 2
+            stack.append((mid + 1, b))
+            stack.append((a, mid))
+    return out
+
+
+def _row_has_wrap_flags(com: _ComCounter, ws, used, first_row: int, last_row: int,
+                        first_col: int, n_cols: int) -> List[bool]:
+    """Cờ WrapText theo hàng: thử cả UsedRange, rồi theo cột, chỉ chia nhỏ cột bị trộn."""
+    n_rows = last_row - first_row + 1
+    whole = com.get(used, "WrapText")
+    if whole is not None:
+        return [bool(whole)] * n_rows
+
+    flags = [False] * n_rows
+    for j in range(n_cols):
+        col = first_col + j
+        col_flag = com.get(com.call(used.Columns, j + 1), "WrapText")
+        if col_flag is False:
+            continue
+        if col_flag:
+            return [True] * n_rows
+        per_row = _read_uniform(
+            com,
+            lambda a, b, c=col: ws.Range(ws.Cells(a, c), ws.Cells(b, c)),
+            "WrapText", first_row, last_row,
+        )
+        for i, v in enumerate(per_row):
+            if v:
+                flags[i] = True
+    return flags
+
+
+def _padded_height(h: float, offset: int, has_wrap: bool) -> float:
+    # nhân theo tỉ lệ rồi cộng đệm cơ bản
+    new_h = max(h * (1.0 + ROW_HEIGHT_SCALE), h + ROW_PADDING_PT)
+    # đệm thêm nếu có wrap hoặc nằm trong các hàng tiêu đề đầu
+    if has_wrap:
+        new_h += EXTRA_WRAP_PADDING_PT
+    if offset < TOP_ROWS_TO_PAD:
+        new_h += TOP_ROWS_EXTRA_PAD_PT
+    new_h = round(new_h / ROW_HEIGHT_STORE_STEP_PT) * ROW_HEIGHT_STORE_STEP_PT
+    return min(new_h, 409.0)  # giới hạn RowHeight của Excel
+
+
+def _group_rows(first_row: int, heights: Sequence[float]) -> List[Tuple[int, int, float]]:
+    """Gom các hàng liên tiếp cùng chiều cao mới -> [(row_from, row_to, height)]."""
+    groups: List[Tuple[int, int, float]] = []
+    for i, h in enumerate(heights):
+        r = first_row + i
+        if groups and groups[-1][2] == h and groups[-1][1] == r - 1:
+            a, _, _ = groups[-1]
+            groups[-1] = (a, r, h)
+        else:
+            groups.append((r, r, h))
+    return groups
+
+
+def _pad_row_heights(ws, used, com: _ComCounter) -> dict:
+    """Đệm chiều cao hàng cho UsedRange bằng vài lệnh đọc/ghi theo lô."""
+    first_row = com.get(used, "Row")
+    n_rows = com.get(com.get(used, "Rows"), "Count")
+    first_col = com.get(used, "Column")
+    n_cols = com.get(com.get(used, "Columns"), "Count")
+    last_row = first_row + n_rows - 1
+
+    values = _as_rows(com.get(used, "Value2"))
+    wrap = _row_has_wrap_flags(com, ws, used, first_row, last_row, first_col, n_cols)
+    for i, row in enumerate(values):
+        if not wrap[i] and any(isinstance(v, str) and ("\n" in v or "\r" in v) for v in row):
+            wrap[i] = True
+
+    heights = _read_uniform(com, lambda a, b: ws.Range(f"{a}:{b}"), "RowHeight", first_row, last_row)
+    new_heights = [_padded_height(float(h or 0.0), i, wrap[i]) for i, h in enumerate(heights)]
+
+    groups = _group_rows(first_row, new_heights)
+    for a, b, h in groups:
+        com.set(com.call(ws.Range, f"{a}:{b}"), "RowHeight", h)
+
+    return {"rows": n_rows, "wrap_rows": sum(wrap), "row_groups": len(groups)}
+
+
+_CELL_PROPS = ("Font.Name", "Font.Size", "Font.Bold", "Font.Italic", "WrapText")
+
+
+def _plan_row_heights(ws, used, com: _ComCounter) -> dict:
+    """
+    Chiều cao hàng theo metric font (thay Rows.AutoFit + đệm): đọc theo lô, tính bằng RowHeightPlanner,
+    ghi RowHeight theo dải. Hàng ẩn giữ nguyên; hàng có ô gộp không bị hạ thấp hơn chiều cao đang có
+    (nội dung ô gộp trải nhiều cột/hàng, không đo theo 1 cột được).
+    """
+    from .row_height import CellText, RowHeightPlanner
+
+    first_row = com.get(used, "Row")
+    n_rows = com.get(com.get(used, "Rows"), "Count")
+    first_col = com.get(used, "Column")
+    n_cols = com.get(com.get(used, "Columns"), "Count")
+    last_row = first_row + n_rows - 1
+    values = _as_rows(com.get(used, "Value2"))
+
+    rows: List[List[CellText]] = [[] for _ in range(n_rows)]
+    for j in range(n_cols):
+        filled = [i for i, row in enumerate(values) if j < len(row) and row[j] not in (None, "")]
+        if not filled:
+            continue  # cột trống: khỏi đọc font
+        col = first_col + j
+        width = float(com.get(com.call(used.Columns, j + 1), "Width"))
+        props = [
+            _read_uniform(com, lambda a, b, c=col: ws.Range(ws.Cells(a, c), ws.Cells(b, c)),
+                          prop, first_row, last_row)
+            for prop in _CELL_PROPS
+        ]
+        for i in filled:
+            v = values[i][j]
+            name, size, bold, italic, wrap = (p[i] for p in props)
+            text = v if isinstance(v, str) else str(v)
+            rows[i].append(CellText(text, width, str(name or "Calibri"), float(size or 11.0),
+                                    bool(bold), bool(italic), bool(wrap) and isinstance(v, str)))
+
+    row_range = lambda a, b: ws.Range(f"{a}:{b}")
+    planner = RowHeightPlanner(float(com.get(ws, "StandardHeight") or 15.0))
+    new_heights: List[Optional[float]] = planner.plan(rows)
+
+    hidden = _read_uniform(com, row_range, "Hidden", first_row, last_row)
+    merged = com.get(used, "MergeCells")
+    if merged is not False:
+        merged = _read_uniform(
+            com, lambda a, b: ws.Range(ws.Cells(a, first_col), ws.Cells(b, first_col + n_cols - 1)),
+            "MergeCells", first_row, last_row)
+        current = _read_uniform(com, row_range, "RowHeight", first_row, last_row)
+        for i, m in enumerate(merged):
+            if m is not False:
+                new_heights[i] = max(new_heights[i], float(current[i] or 0.0))
+    for i, h in enumerate(hidden):
+        if h:
+            new_heights[i] = None
+
+    groups = _group_rows(first_row, new_heights)
+    for a, b, h in groups:
+        if h is not None:
+            com.set(com.call(ws.Range, f"{a}:{b}"), "RowHeight", h)
 
-    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    return {"rows": n_rows, "wrap_rows": sum(any(c.wrap for c in r) for r in rows),
+            "row_groups": len(groups)}
+
+
+def _setup_sheet(ws, constants, stats: Optional[list] = None) -> None:
+    com = _ComCounter()
+    info = {"sheet": None, "com_calls": 0}
+    try:
+        try:
+            info["sheet"] = str(ws.Name)
+        except Exception:
+            pass
+        used = com.get(ws, "UsedRange")
+
+        # (1) AutoFit cột để có độ rộng chuẩn
+        try:
+            com.call(com.get(used, "Columns").AutoFit)
+        except Exception:
+            pass
+
+        # (2) Chiều cao hàng: metric font, lỗi thì AutoFit hàng + đệm (đều đọc/ghi theo lô)
+        info["row_model"] = ROW_HEIGHT_MODEL
+        if ROW_HEIGHT_MODEL == "metrics":
+            try:
+                info.update(_plan_row_heights(ws, used, com))
+            except Exception:
+                logger.debug("Không tính được chiều cao hàng theo metric cho sheet %s", info["sheet"],
+                             exc_info=True)
+                info["row_model"] = "autofit"
+        if info["row_model"] == "autofit":
+            try:
+                com.call(com.get(used, "Rows").AutoFit)
+            except Exception:
+                pass
+            try:
+                info.update(_pad_row_heights(ws, used, com))
+            except Exception:
+                logger.debug("Không đệm được chiều cao hàng cho sheet %s", info["sheet"], exc_info=True)
+
+        # (3) Căn giữa dọc để giảm rủi ro cắt trên/dưới
+        try:
+            com.set(used, "VerticalAlignment", constants.xlVAlignCenter)
+        except Exception:
+            pass
+
+        # (4) Thiết lập trang in
+        ps = ws.PageSetup
+        try: ps.Zoom = False
+        except Exception: pass
+        try:
+            ps.FitToPagesWide = 1
+            ps.FitToPagesTall = False
+        except Exception:
+            pass
+        try: ps.Orientation = constants.xlLandscape  # đổi sang xlPortrait nếu bạn muốn
+        except Exception: pass
+        try:
+            ps.LeftMargin   = _points(0.25)
+            ps.RightMargin  = _points(0.25)
+            ps.TopMargin    = _points(0.5)
+            ps.BottomMargin = _points(0.5)
+            ps.HeaderMargin = _points(0.3)
+            ps.FooterMargin = _points(0.3)
+        except Exception:
+            pass
+        try:
+            ps.CenterHorizontally = True
+            ps.CenterVertically = False
+        except Exception:
+            pass
+        try:
+            ps.PrintArea = used.Address
+        except Exception:
+            pass
+        try:
+            ws.DisplayPageBreaks = False
+        except Exception:
+            pass
+    except Exception:
+        pass
+    finally:
+        info["com_calls"] = com.calls
+        logger.debug("setup_sheet %s: %s", info["sheet"], info)
+        if stats is not None:
+            stats.append(info)
+
+# -------------------- Pool Excel dùng chung --------------------
+# Tắt mặc định. Bật bằng enable_excel_pool() để tái sử dụng các instance Excel ấm.
+_EXCEL_POOL = None
+
+def enable_excel_pool(size: int = 1, **kwargs):
+    """
+    Bật pool Excel: excel_to_pdf() sẽ gửi job vào các instance ấm (mỗi instance 1 STA thread)
+    thay vì CoInitialize/EnsureDispatch/DispatchEx/Quit mỗi file. kwargs chuyển cho ExcelPool.
+    """
+    global _EXCEL_POOL
+    from .com_pool import ExcelPool
+
+    disable_excel_pool()
+    _EXCEL_POOL = ExcelPool(size, **kwargs).start()
+    return _EXCEL_POOL
+
+def disable_excel_pool() -> None:
+    global _EXCEL_POOL
+    pool, _EXCEL_POOL = _EXCEL_POOL, None
+    if pool is not None:
+        pool.close()
+
+def get_excel_pool():
+    return _EXCEL_POOL
+
+def _convert_with_excel(excel, input_abs: str, output_abs: str, sheet=None,
+                        sheet_stats: Optional[list] = None, names: Optional[Sequence[str]] = None,
+                        progress: Optional[ProgressFn] = None) -> str:
+    """
+    Mở workbook trên instance Excel có sẵn, thiết lập sheet, export rồi đóng workbook.
+    names (khi sheet=None): chỉ thiết lập + export các sheet này (preflight đã bỏ sheet trống).
+    progress: báo sau mỗi sheet đã thiết lập, bước cuối là export (tổng = số sheet + 1).
+    """
     try:
-        if os.path.exists(out_path):
-            os.remove(out_path)  # nếu đang mở sẽ ném WinError 32
-        shutil.move(tmp, out_path)
-        return out_path
+        from win32com.client import constants
     except Exception:
-        alt = _unique_path_like(out_path)
+        constants = None  # fake COM: _setup_sheet tự bỏ qua các bước cần constants
+
+    wb = None
+    try:
+        wb = excel.Workbooks.Open(input_abs, UpdateLinks=0, ReadOnly=True)
+
+        # Tắt tính toán tự động trong lúc đệm hàng (Calculation chỉ đặt được khi đã có workbook mở)
+        prev_calc = None
         try:
-            shutil.move(tmp, alt)
-            return alt
+            prev_calc = excel.Calculation
+            excel.Calculation = XL_CALCULATION_MANUAL
         except Exception:
-            home = os.path.expanduser("~")
-            fallback_dir = os.path.join(home, "Downloads")
-            os.makedirs(fallback_dir, exist_ok=True)
-            alt2 = os.path.join(fallback_dir, os.path.basename(alt))
-            shutil.move(tmp, alt2)
-            return alt2
-
-def excel_to_pdf(input_excel_path: str, output_pdf_path: str = None, sheet=None) -> str:
-    _ensure_windows()
+            prev_calc = None
 
-    if not is_excel_file(input_excel_path):
-        raise ValueError(f"Đường dẫn Excel không hợp lệ hoặc không hỗ trợ: {input_excel_path!r}")
+        # Thiết lập & export
+        try:
+            if sheet is not None:
+                ws = wb.Sheets(sheet if isinstance(sheet, int) else str(sheet))
+                report(progress, 0, 2, str(sheet))
+                _setup_sheet(ws, constants, sheet_stats)
+                report(progress, 1, 2, str(sheet))
+                ws.Select()
+            elif names:
+                total = len(names) + 1
+                for i, name in enumerate(names):
+                    report(progress, i, total, name)
+                    _setup_sheet(wb.Worksheets(name), constants, sheet_stats)
+                report(progress, len(names), total, "export")
+                wb.Worksheets(list(names)).Select()
+            else:
+                sheets = list(wb.Worksheets)
+                total = len(sheets) + 1
+                for i, ws in enumerate(sheets):
+                    report(progress, i, total, str(getattr(ws, "Name", "")))
+                    _setup_sheet(ws, constants, sheet_stats)
+                report(progress, len(sheets), total, "export")
+                wb.Worksheets.Select()
+        finally:
+            if prev_calc is not None:
+                try:
+                    excel.Calculation = prev_calc
+                except Exception:
+                    pass
 
-    input_abs = os.path.abspath(input_excel_path)
-    output_abs = (os.path.splitext(input_abs)[0] + ".pdf") if not output_pdf_path else os.path.abspath(output_pdf_path)
-    output_abs = os.path.normpath(output_abs)
+        out = _export_selected(excel, wb, output_abs)
+        report(progress, 1, 1, "export")
+        return out
+    finally:
+        if wb is not None:
+            wb.Close(SaveChanges=False)
+
+# -------------------- Preflight: bỏ sheet trống, workbook nhỏ không cần Excel --------------------
+_PREFLIGHT_LOCK = threading.Lock()
+_PREFLIGHT_TOTALS = {"workbooks": 0, "native": 0, "empty": 0, "skipped_sheets": 0, "excel_seconds_saved": 0.0}
+
+def get_preflight_totals() -> dict:
+    """Cộng dồn từ lúc import: số workbook đã preflight, bao nhiêu không cần Excel, ước tính giây Excel tiết kiệm."""
+    with _PREFLIGHT_LOCK:
+        return dict(_PREFLIGHT_TOTALS)
+
+def _route_workbook(input_abs: str, sheet, allow_native: bool) -> dict:
+    """
+    Quyết định cho 1 workbook từ preflight (src/preflight.py, chỉ đọc XML):
+    {"route": "native" | "excel" | "empty", "reason", "sheets": [tên sheet in được] | None,
+     "skipped": [sheet hiện nhưng trống], "cells", "excel_cost"}.
+    """
+    from ..preflight import estimate
+
+    plan = {"route": "excel", "reason": "", "sheets": None, "skipped": [], "cells": None, "excel_cost": None}
+    if os.path.splitext(input_abs)[1].lower() not in (".xlsx", ".xlsm", ".xltx", ".xltm"):
+        plan["reason"] = "định dạng nhị phân"
+        return plan
+    est = estimate(input_abs, "excel")
+    plan["excel_cost"] = est.cost
+    if est.error or not est.sheets:
+        plan["reason"] = f"không đọc được cấu trúc ({est.error})"
+        return plan
+
+    if sheet is None:
+        targets = [sh for sh in est.sheets if sh["state"] == "visible"]
+    elif isinstance(sheet, int):
+        targets = est.sheets[sheet - 1:sheet] if sheet >= 1 else []
+    else:
+        targets = [sh for sh in est.sheets if sh["name"] == str(sheet)]
+    if not targets:
+        plan["reason"] = f"không tìm thấy sheet {sheet!r}"
+        return plan  # để Excel báo lỗi như trước
+
+    printable = [sh for sh in targets if sh["dimension"] and not sh["empty"]]
+    plan["sheets"] = [sh["name"] for sh in printable]
+    plan["skipped"] = [sh["name"] for sh in targets if sh["dimension"] and sh["empty"]]
+    plan["cells"] = sum(sh["rows"] * sh["cols"] for sh in printable)
+    if not printable:
+        plan.update(route="empty", reason="không có sheet nào có nội dung để in")
+    elif not allow_native or not TRIVIAL_MAX_CELLS:
+        plan["reason"] = "engine com"
+    elif any(sh["drawing"] for sh in printable):
+        plan["reason"] = "có biểu đồ/hình"
+    elif any(sh["print_area"] for sh in printable):
+        plan["reason"] = "có vùng in riêng"
+    elif plan["cells"] > TRIVIAL_MAX_CELLS:
+        plan["reason"] = f"{plan['cells']} ô > {TRIVIAL_MAX_CELLS}"
+    else:
+        issues = _native_layout_issues(input_abs, printable)
+        if issues:
+            plan["reason"] = f"{plan['cells']} ô nhưng có {', '.join(issues)}"
+        else:
+            plan.update(route="native", reason=f"{plan['cells']} ô, {len(printable)} sheet")
+    return plan
+
+def _native_layout_issues(input_abs: str, sheets: List[dict]) -> List[str]:
+    """Bố cục native chưa in giống Excel (ô gộp, hàng tuỳ chỉnh/ẩn, xuống dòng, chữ tràn) -> phải dùng Excel."""
+    import zipfile
+
+    from .xlsx_native import native_layout_issues
+
+    issues: List[str] = []
+    try:
+        with zipfile.ZipFile(input_abs) as zf:
+            for sh in sheets:
+                for issue in native_layout_issues(zf, sh["member"]):
+                    if issue not in issues:
+                        issues.append(issue)
+    except Exception as e:  # không đọc được -> không mạo hiểm bỏ qua Excel
+        issues.append(f"không quét được bố cục ({e})")
+    return issues
+
+def _record_route(input_abs: str, plan: dict) -> None:
+    saved = (plan["excel_cost"] or 0.0) if plan["route"] != "excel" else 0.0
+    with _PREFLIGHT_LOCK:
+        t = _PREFLIGHT_TOTALS
+        t["workbooks"] += 1
+        t["skipped_sheets"] += len(plan["skipped"])
+        if plan["route"] in ("native", "empty"):
+            t[plan["route"]] += 1
+            t["excel_seconds_saved"] += saved
+    logger.info("Preflight %s: %s (%s)%s%s", os.path.basename(input_abs), plan["route"], plan["reason"],
+                f"; bỏ sheet trống {plan['skipped']}" if plan["skipped"] else "",
+                f"; không mở Excel, tiết kiệm ~{saved:.1f}s" if saved else "")
+
+# -------------------- Export song song từng sheet --------------------
+def _list_printable_sheets(excel, input_abs: str) -> List[str]:
+    """Sheet in được khi preflight không đọc được (.xls/.xlsb): worksheet Visible=-1 và UsedRange có ô khác rỗng."""
+    wb = excel.Workbooks.Open(input_abs, UpdateLinks=0, ReadOnly=True)
+    try:
+        names = []
+        for ws in wb.Worksheets:
+            if ws.Visible != -1:  # xlSheetVisible
+                continue
+            if excel.WorksheetFunction.CountA(ws.UsedRange) > 0:
+                names.append(str(ws.Name))
+        return names
+    finally:
+        wb.Close(SaveChanges=False)
+
+def _excel_to_pdf_com_parallel(input_abs: str, output_abs: str, workers: int,
+                               sheet_stats: Optional[list] = None, names: Optional[List[str]] = None,
+                               progress: Optional[ProgressFn] = None) -> str:
+    """
+    Mỗi sheet in được export trên 1 instance Excel riêng (mở workbook ReadOnly), chạy song song,
+    rồi ghép theo đúng thứ tự sheet bằng merge_pdfs. Sheet ẩn/trống bị bỏ qua từ preflight.
+    Dùng pool đang bật nếu có >= 2 instance, không thì mở pool tạm tối đa `workers` instance.
+    names: sheet in được từ preflight (_route_workbook); None -> hỏi Excel.
+    progress: báo mỗi khi 1 sheet export xong (theo thứ tự hoàn thành), bước cuối là ghép PDF.
+    """
+    from concurrent.futures import as_completed, wait
+
+    from ..pdf.merge import merge_pdfs
+
+    pool, own_pool = _EXCEL_POOL, False
+    if pool is None or pool.size < 2:
+        from .com_pool import ExcelPool
+        size = max(1, min(workers, len(names))) if names is not None else workers
+        pool, own_pool = ExcelPool(size, max_jobs=0).start(), True
+    try:
+        if names is None:
+            names = pool.run(_list_printable_sheets, input_abs)
+        logger.debug("Export song song %s: %d sheet in được trên %d instance", input_abs, len(names), pool.size)
+        if len(names) < 2:
+            # 0 sheet: để Excel tự báo lỗi như export thường ; 1 sheet: không có gì để chia
+            return pool.run(_convert_with_excel, input_abs, output_abs, names[0] if names else None, sheet_stats,
+                            None, progress)
+
+        out_dir = os.path.dirname(output_abs) or "."
+        os.makedirs(out_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix=".sheets-", dir=out_dir) as tmp:
+            stem = os.path.basename(tmp)
+            per_sheet: List[list] = [[] for _ in names]
+            futures = [pool.submit(_convert_with_excel, input_abs, os.path.join(tmp, f"{stem}-{i:03d}.pdf"),
+                                   name, per_sheet[i])
+                       for i, name in enumerate(names)]
+            sheet_of = dict(zip(futures, names))
+            total = len(names) + 1
+            try:
+                for done, fut in enumerate(as_completed(futures), 1):
+                    fut.result()
+                    report(progress, done, total, sheet_of[fut])
+            except BaseException:
+                # lỗi/huỷ: bỏ sheet chưa chạy, chờ sheet đang export xong rồi mới xoá thư mục tạm
+                for fut in futures:
+                    fut.cancel()
+                wait(futures)
+                raise
+            parts = [fut.result() for fut in futures]
+            if sheet_stats is not None:
+                sheet_stats.extend(info for infos in per_sheet for info in infos)
+            merged = os.path.join(tmp, f"{stem}.pdf")
+            merge_pdfs(parts, merged)
+            report(progress, total, total, "merge")
+            return _move_into_place(merged, output_abs)
+    finally:
+        if own_pool:
+            pool.close()
+
+def _excel_to_pdf_native(input_abs: str, output_abs: str, sheet=None, stats: Optional[dict] = None,
+                         progress: Optional[ProgressFn] = None) -> str:
+    """openpyxl (read_only, stream) + reportlab. Không cần Excel; chỉ .xlsx/.xlsm/.xltx/.xltm."""
+    from .xlsx_native import NATIVE_EXTS, render_workbook
+
+    if os.path.splitext(input_abs)[1].lower() not in NATIVE_EXTS:
+        raise ValueError(f"Engine native không hỗ trợ định dạng này (cần Excel/COM): {input_abs!r}")
+    os.makedirs(os.path.dirname(output_abs) or ".", exist_ok=True)
+    render_workbook(input_abs, output_abs, sheet, stats=stats, progress=progress)
+    return output_abs
+
+def _excel_to_pdf_libreoffice(input_abs: str, output_abs: str, sheet=None) -> str:
+    """Listener soffice --headless dùng chung. Xuất toàn bộ workbook (chưa hỗ trợ chọn sheet)."""
+    from .libreoffice import libreoffice_to_pdf
+
+    if sheet is not None:
+        raise ValueError("Engine libreoffice chưa hỗ trợ chọn sheet; hãy dùng engine='com' hoặc 'native'.")
+    return libreoffice_to_pdf(input_abs, output_abs)
+
+def _excel_to_pdf(input_abs: str, output_abs: str, sheet, engine: str, stats: Optional[dict],
+                  parallel: int = 0, progress: Optional[ProgressFn] = None) -> str:
+    if engine == "libreoffice":
+        return _excel_to_pdf_libreoffice(input_abs, output_abs, sheet)
+    if engine == "native" or (engine == "auto" and os.name != "nt" and _EXCEL_POOL is None):
+        return _excel_to_pdf_native(input_abs, output_abs, sheet, stats, progress)
+
+    plan = _route_workbook(input_abs, sheet, allow_native=engine == "auto")
+    _record_route(input_abs, plan)
+    if stats is not None:
+        stats["preflight"] = plan
+    if plan["route"] == "native":
+        return _excel_to_pdf_native(input_abs, output_abs, sheet, stats, progress)
+    if plan["route"] == "empty":
+        raise ValueError(f"Workbook không có nội dung để in: {input_abs!r}")
+    # chỉ truyền danh sách sheet khi thật sự bỏ bớt được sheet trống
+    names = plan["sheets"] if sheet is None and plan["skipped"] else None
+
+    sheet_stats: list = []
+    if stats is not None:
+        stats["sheets"] = sheet_stats
+
+    if parallel > 1 and sheet is None:
+        return _excel_to_pdf_com_parallel(input_abs, output_abs, parallel, sheet_stats, plan["sheets"], progress)
+
+    pool = _EXCEL_POOL
+    if pool is not None:
+        return pool.run(_convert_with_excel, input_abs, output_abs, sheet, sheet_stats, names, progress)
+
+    _ensure_windows()
 
     try:
         import pythoncom
-        from win32com.client import DispatchEx, constants, gencache
+        from win32com.client import DispatchEx, gencache
     except Exception as e:
         raise RuntimeError("Thiếu pywin32. Hãy cài: pip install pywin32") from e
 
     excel = None
-    wb = None
     try:
         pythoncom.CoInitialize()
         try:
@@ -119,124 +722,52 @@ def excel_to_pdf(input_excel_path: str, output_pdf_path: str = None, sheet=None)
         excel.ScreenUpdating = False
         excel.EnableEvents = False
 
-        wb = excel.Workbooks.Open(input_abs, UpdateLinks=0, ReadOnly=True)
-
-        def setup_sheet(ws):
-            try:
-                used = ws.UsedRange
-
-                # (1) AutoFit để có chiều cao/ rộng chuẩn
-                try:
-                    used.Columns.AutoFit()
-                    used.Rows.AutoFit()
-                except Exception:
-                    pass
-
-                # (2) Đệm chiều cao hàng:
-                try:
-                    first_row = used.Row
-                    last_row = first_row + used.Rows.Count - 1
-                    first_col = used.Column
-                    last_col = first_col + used.Columns.Count - 1
-
-                    for r in range(first_row, last_row + 1):
-                        row_obj = ws.Rows(r)
-                        # phát hiện hàng có wrap/ xuống dòng
-                        row_has_wrap = False
-                        try:
-                            rng_row = ws.Range(ws.Cells(r, first_col), ws.Cells(r, last_col))
-                            for cell in rng_row:
-                                try:
-                                    v = cell.Value
-                                    if bool(cell.WrapText) or (isinstance(v, str) and ("\n" in v or "\r" in v)):
-                                        row_has_wrap = True
-                                        break
-                                except Exception:
-                                    pass
-                        except Exception:
-                            pass
-
-                        try:
-                            h = float(row_obj.RowHeight)
-                            # nhân theo tỉ lệ rồi cộng đệm cơ bản
-                            new_h = max(h * (1.0 + ROW_HEIGHT_SCALE), h + ROW_PADDING_PT)
-                            # đệm thêm nếu có wrap hoặc nằm trong các hàng tiêu đề đầu
-                            if row_has_wrap:
-                                new_h += EXTRA_WRAP_PADDING_PT
-                            if (r - first_row) < TOP_ROWS_TO_PAD:
-                                new_h += TOP_ROWS_EXTRA_PAD_PT
-                            row_obj.RowHeight = new_h
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-
-                # (3) Căn giữa dọc để giảm rủi ro cắt trên/dưới
-                try:
-                    used.VerticalAlignment = constants.xlVAlignCenter
-                except Exception:
-                    pass
-
-                # (4) Thiết lập trang in
-                ps = ws.PageSetup
-                try: ps.Zoom = False
-                except Exception: pass
-                try:
-                    ps.FitToPagesWide = 1
-                    ps.FitToPagesTall = False
-                except Exception:
-                    pass
-                try: ps.Orientation = constants.xlLandscape  # đổi sang xlPortrait nếu bạn muốn
-                except Exception: pass
-                try:
-                    ps.LeftMargin   = _points(0.25)
-                    ps.RightMargin  = _points(0.25)
-                    ps.TopMargin    = _points(0.5)
-                    ps.BottomMargin = _points(0.5)
-                    ps.HeaderMargin = _points(0.3)
-                    ps.FooterMargin = _points(0.3)
-                except Exception:
-                    pass
-                try:
-                    ps.CenterHorizontally = True
-                    ps.CenterVertically = False
-                except Exception:
-                    pass
-                try:
-                    ps.PrintArea = used.Address
-                except Exception:
-                    pass
-                try:
-                    ws.DisplayPageBreaks = False
-                except Exception:
-                    pass
-            except Exception:
-                pass
-
-        # Thiết lập & export
-        if sheet is not None:
-            ws = wb.Sheets(sheet if isinstance(sheet, int) else str(sheet))
-            setup_sheet(ws)
-            ws.Select()
-            out = _export_selected(excel, wb, output_abs)
-        else:
-            for ws in wb.Worksheets:
-                setup_sheet(ws)
-            wb.Worksheets.Select()
-            out = _export_selected(excel, wb, output_abs)
-
-        return out
+        return _convert_with_excel(excel, input_abs, output_abs, sheet, sheet_stats, names, progress)
     finally:
-        try:
-            if wb is not None:
-                wb.Close(SaveChanges=False)
-        finally:
-            if excel is not None:
-                excel.EnableEvents = True
-                excel.ScreenUpdating = True
-                excel.DisplayAlerts = True
-                excel.Quit()
+        if excel is not None:
+            excel.EnableEvents = True
+            excel.ScreenUpdating = True
+            excel.DisplayAlerts = True
+            excel.Quit()
         try:
             pythoncom.CoUninitialize()
         except Exception:
             pass
+
+def excel_to_pdf(
+    input_excel_path: str,
+    output_pdf_path: str = None,
+    sheet=None,
+    *,
+    engine: str = "auto",                       # "auto" | "com" | "native" | "libreoffice"
+    stats: Optional[dict] = None,
+    parallel: int = 0,
+    progress: Optional[ProgressFn] = None,
+) -> str:
+    """
+    Chuyển Excel -> PDF. Trả về đường dẫn PDF thực tế (có thể đổi tên nếu đích bị khoá).
+
+    - engine="com": Excel qua COM (Windows). Nếu pool đang bật (enable_excel_pool),
+      job chạy trên 1 instance Excel ấm của pool.
+    - engine="native": openpyxl read_only + reportlab, chạy được trên Linux, bộ nhớ phẳng.
+    - engine="libreoffice": listener soffice --headless chạy sẵn (cần cài LibreOffice).
+    - engine="auto": COM trên Windows (hoặc khi pool bật), native ở nơi khác.
+    - parallel: (COM, sheet=None) > 1 -> mỗi sheet export trên 1 instance Excel riêng, song song
+      (tối đa `parallel` instance), rồi ghép PDF theo thứ tự sheet; sheet ẩn/trống bị bỏ qua.
+    - stats: nếu truyền dict, điền stats["sheets"] = [{"sheet", "rows", ...}]
+      (COM: thêm "row_groups", "com_calls" để đo số lệnh COM của bước đệm hàng);
+      khi cache bật (src.cache), stats["cache"] = "hit" | "miss" ; với engine "auto"/"com",
+      stats["preflight"] = quyết định preflight (route, reason, sheet bỏ qua...).
+    - progress: callback(done, total, label) sau mỗi sheet (xem converters/progress.py); có thể được gọi
+      từ luồng của pool Excel. Ném ConversionCancelled trong callback để huỷ.
+    """
+    if not is_excel_file(input_excel_path):
+        raise ValueError(f"Đường dẫn Excel không hợp lệ hoặc không hỗ trợ: {input_excel_path!r}")
+
+    input_abs = os.path.abspath(input_excel_path)
+    output_abs = (os.path.splitext(input_abs)[0] + ".pdf") if not output_pdf_path else os.path.abspath(output_pdf_path)
+    output_abs = os.path.normpath(output_abs)
+
+    from ..cache import cached_convert
+    return cached_convert("excel", input_abs, output_abs, engine, {"sheet": sheet, "parallel": parallel > 1},
+                          lambda: _excel_to_pdf(input_abs, output_abs, sheet, engine, stats, parallel, progress), stats)
@@ -0,0 +1,173 @@
+# src/converters/fonts.py
+"""
+Đăng ký font TrueType Unicode cho reportlab để hiển thị đúng tiếng Việt.
+
+Font chuẩn của PDF (Helvetica/Times) không có glyph cho chữ có dấu, nên các engine
+thuần Python (không dùng Office) phải nhúng TTF. Module này dò font trong thư mục
+hệ thống, đăng ký cả họ (thường/đậm/nghiêng/đậm nghiêng) và trả về tên họ font.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (regular, bold, italic, bold italic) theo tên file
+_FAMILY_FILES: Dict[str, Tuple[str, str, str, str]] = {
+    "arial": ("arial.ttf", "arialbd.ttf", "ariali.ttf", "arialbi.ttf"),
+    "times new roman": ("times.ttf", "timesbd.ttf", "timesi.ttf", "timesbi.ttf"),
+    "calibri": ("calibri.ttf", "calibrib.ttf", "calibrii.ttf", "calibriz.ttf"),
+    "cambria": ("cambria.ttc", "cambriab.ttf", "cambriai.ttf", "cambriaz.ttf"),
+    "tahoma": ("tahoma.ttf", "tahomabd.ttf", "tahoma.ttf", "tahomabd.ttf"),
+    "verdana": ("verdana.ttf", "verdanab.ttf", "verdanai.ttf", "verdanaz.ttf"),
+    "liberation sans": ("LiberationSans-Regular.ttf", "LiberationSans-Bold.ttf",
+                        "LiberationSans-Italic.ttf", "LiberationSans-BoldItalic.ttf"),
+    "liberation serif": ("LiberationSerif-Regular.ttf", "LiberationSerif-Bold.ttf",
+                         "LiberationSerif-Italic.ttf", "LiberationSerif-BoldItalic.ttf"),
+    "carlito": ("Carlito-Regular.ttf", "Carlito-Bold.ttf", "Carlito-Italic.ttf", "Carlito-BoldItalic.ttf"),
+    "dejavu sans": ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf", "DejaVuSans-Oblique.ttf",
+                    "DejaVuSans-BoldOblique.ttf"),
+    "noto sans": ("NotoSans-Regular.ttf", "NotoSans-Bold.ttf", "NotoSans-Italic.ttf",
+                  "NotoSans-BoldItalic.ttf"),
+}
+
+# Font Office thường gặp -> font thay thế có metric tương đương trên Linux
+_SUBSTITUTES: Dict[str, Tuple[str, ...]] = {
+    "arial": ("liberation sans",),
+    "helvetica": ("arial", "liberation sans"),
+    "times new roman": ("liberation serif",),
+    "times": ("times new roman", "liberation serif"),
+    "calibri": ("carlito",),
+    "cambria": ("liberation serif",),
+}
+
+# Thứ tự ưu tiên cho font mặc định (đều có đủ glyph tiếng Việt)
+DEFAULT_FAMILIES = ("arial", "liberation sans", "dejavu sans", "noto sans", "times new roman")
+
+FALLBACK_FONT = "Helvetica"  # không có dấu tiếng Việt, chỉ dùng khi không tìm được TTF nào
+
+_file_index: Optional[Dict[str, str]] = None
+_registered: Dict[str, Optional[str]] = {}
+
+
+def _font_dirs():
+    dirs = []
+    if os.name == "nt":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        dirs.append(Path(windir) / "Fonts")
+        local = os.environ.get("LOCALAPPDATA")
+        if local:
+            dirs.append(Path(local) / "Microsoft" / "Windows" / "Fonts")
+    elif sys.platform == "darwin":
+        dirs += [Path("/Library/Fonts"), Path("/System/Library/Fonts"), Path.home() / "Library" / "Fonts"]
+    else:
+        dirs += [Path("/usr/share/fonts"), Path("/usr/local/share/fonts"),
+                 Path.home() / ".fonts", Path.home() / ".local" / "share" / "fonts"]
+    extra = os.environ.get("DOCXTOPDF_FONT_DIR")
+    if extra:
+        dirs.insert(0, Path(extra))
+    return dirs
+
+
+def _index() -> Dict[str, str]:
+    """Bản đồ tên file (chữ thường) -> đường dẫn, quét thư mục font 1 lần."""
+    global _file_index
+    if _file_index is None:
+        idx: Dict[str, str] = {}
+        for d in _font_dirs():
+            if not d.is_dir():
+                continue
+            for root, _dirs, files in os.walk(d):
+                for f in files:
+                    if f.lower().endswith((".ttf", ".ttc")):
+                        idx.setdefault(f.lower(), os.path.join(root, f))
+        _file_index = idx
+    return _file_index
+
+
+def find_font_file(family: str, bold: bool = False, italic: bool = False) -> Optional[str]:
+    files = _FAMILY_FILES.get(family.strip().lower())
+    if not files:
+        return None
+    return _index().get(files[(1 if bold else 0) + (2 if italic else 0)].lower())
+
+
+def resolve_font_file(family: Optional[str] = None, bold: bool = False, italic: bool = False) -> Optional[str]:
+    """File TTF cho họ font theo cùng thứ tự thử như resolve_font (đúng tên -> thay thế -> mặc định)."""
+    candidates = []
+    if family:
+        key = family.strip().lower()
+        candidates.append(key)
+        candidates.extend(_SUBSTITUTES.get(key, ()))
+    candidates.extend(DEFAULT_FAMILIES)
+    for cand in candidates:
+        path = find_font_file(cand, bold, italic) or find_font_file(cand)
+        if path:
+            return path
+    return None
+
+
+def _register_family(family: str) -> Optional[str]:
+    """Đăng ký họ font với reportlab; trả về tên đã đăng ký hoặc None nếu thiếu file."""
+    key = family.strip().lower()
+    if key in _registered:
+        return _registered[key]
+
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.lib.fonts import addMapping
+
+    regular = find_font_file(key)
+    name = None
+    if regular:
+        name = "".join(part.capitalize() for part in key.split())
+        try:
+            variants = []
+            for bold, italic in ((False, False), (True, False), (False, True), (True, True)):
+                path = find_font_file(key, bold, italic) or regular
+                vname = name + ("-Bold" if bold else "") + ("-Italic" if italic else "")
+                pdfmetrics.registerFont(TTFont(vname, path))
+                variants.append(vname)
+            for (bold, italic), vname in zip(((0, 0), (1, 0), (0, 1), (1, 1)), variants):
+                addMapping(name, bold, italic, vname)
+        except Exception:
+            logger.warning("Không đăng ký được font %s", family, exc_info=True)
+            name = None
+    _registered[key] = name
+    return name
+
+
+def resolve_font(family: Optional[str] = None) -> str:
+    """
+    Tên font reportlab (đã đăng ký) cho họ font `family` của tài liệu.
+    Thử đúng tên -> font thay thế -> font mặc định có dấu tiếng Việt -> Helvetica.
+    """
+    candidates = []
+    if family:
+        key = family.strip().lower()
+        candidates.append(key)
+        candidates.extend(_SUBSTITUTES.get(key, ()))
+    candidates.extend(DEFAULT_FAMILIES)
+
+    for cand in candidates:
+        name = _register_family(cand)
+        if name:
+            return name
+
+    if "__warned__" not in _registered:
+        _registered["__warned__"] = None
+        logger.warning("Không tìm thấy font TTF Unicode; chữ có dấu có thể hiển thị sai (đặt DOCXTOPDF_FONT_DIR).")
+    return FALLBACK_FONT
+
+
+def font_variant(name: str, bold: bool = False, italic: bool = False) -> str:
+    """Tên font cụ thể (đậm/nghiêng) cho canvas.setFont, theo họ đã đăng ký."""
+    from reportlab.lib.fonts import tt2ps
+    try:
+        return tt2ps(name, int(bool(bold)), int(bool(italic)))
+    except Exception:
+        return name
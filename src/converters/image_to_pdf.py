@@ -1,18 +1,200 @@
 # src/converters/image_to_pdf.py
 from __future__ import annotations
 
+import logging
+import struct
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
-IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"}
+from ..registry import EXTENSIONS
+from .progress import ProgressFn, report
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTS = EXTENSIONS["image"]  # khai báo trong src/registry.py
 
 def is_image_file(p: str | Path) -> bool:
     return Path(p).suffix.lower() in IMAGE_EXTS
 
+
+# ====== Passthrough: nhúng nguyên luồng nén JPEG/PNG vào PDF, không giải mã ======
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+_JPEG_SOF_BASELINE = (0xC0, 0xC1)  # baseline / extended sequential Huffman
+_JPEG_SOF_OTHER = {0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_COLOR_SPACES = {1: "/DeviceGray", 3: "/DeviceRGB"}
+
+
+@dataclass
+class RawImage:
+    """Ảnh có thể nhúng thẳng vào PDF: chỉ giữ metadata + vị trí dữ liệu nén trong file."""
+    path: Path
+    kind: str                      # "jpeg" | "png"
+    width: int
+    height: int
+    color_space: str
+    bits: int = 8
+    filter_name: str = "/DCTDecode"
+    decode_parms: Optional[str] = None
+    segments: List[Tuple[int, int]] = field(default_factory=list)  # (offset, length) trong file
+
+    @property
+    def length(self) -> int:
+        return sum(n for _off, n in self.segments)
+
+    def iter_data(self, chunk_size: int = 1 << 20):
+        with open(self.path, "rb") as fh:
+            for off, n in self.segments:
+                fh.seek(off)
+                while n > 0:
+                    buf = fh.read(min(chunk_size, n))
+                    if not buf:
+                        raise ValueError(f"Tệp ảnh bị cắt cụt: {self.path}")
+                    n -= len(buf)
+                    yield buf
+
+
+def _exif_orientation(app1: bytes) -> int:
+    """Giá trị tag Orientation (0x0112) trong IFD0 của segment APP1 Exif; 1 nếu không có."""
+    if not app1.startswith(b"Exif\x00\x00") or len(app1) < 14:
+        return 1
+    tiff = app1[6:]
+    order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if order is None:
+        return 1
+    try:
+        (ifd,) = struct.unpack(order + "I", tiff[4:8])
+        (count,) = struct.unpack(order + "H", tiff[ifd:ifd + 2])
+        for i in range(count):
+            entry = tiff[ifd + 2 + 12 * i: ifd + 14 + 12 * i]
+            tag, typ, _n = struct.unpack(order + "HHI", entry[:8])
+            if tag == 0x0112 and typ == 3:
+                return struct.unpack(order + "H", entry[8:10])[0]
+    except struct.error:
+        pass
+    return 1
+
+
+def _probe_jpeg(path: Path) -> Optional[RawImage]:
+    """Chỉ đọc header: baseline 8 bit, 1 hoặc 3 kênh, không cần xoay EXIF."""
+    size = path.stat().st_size
+    with open(path, "rb") as fh:
+        if fh.read(2) != b"\xff\xd8":
+            return None
+        orientation = 1
+        while True:
+            b = fh.read(1)
+            while b == b"\xff":  # bỏ byte đệm 0xFF
+                b = fh.read(1)
+            if not b:
+                return None
+            marker = b[0]
+            if marker in (0x01,) or 0xD0 <= marker <= 0xD7:
+                continue
+            seg_len = fh.read(2)
+            if len(seg_len) < 2:
+                return None
+            (n,) = struct.unpack(">H", seg_len)
+            if marker == 0xE1:
+                data = fh.read(n - 2)
+                orientation = _exif_orientation(data) if orientation == 1 else orientation
+                continue
+            if marker in _JPEG_SOF_BASELINE:
+                precision, height, width, comps = struct.unpack(">BHHB", fh.read(6))
+                if precision != 8 or comps not in _COLOR_SPACES or width == 0 or height == 0:
+                    return None
+                if orientation != 1:
+                    return None
+                return RawImage(path, "jpeg", width, height, _COLOR_SPACES[comps],
+                                segments=[(0, size)])
+            if marker in _JPEG_SOF_OTHER or marker == 0xDA:
+                return None  # progressive/lossless/arith, hoặc tới SOS mà chưa thấy SOF
+            fh.seek(n - 2, 1)
+
+
+def _probe_png(path: Path) -> Optional[RawImage]:
+    """Chỉ duyệt chunk header: 8 bit gray/RGB/palette, không interlace, không alpha/tRNS."""
+    with open(path, "rb") as fh:
+        if fh.read(8) != _PNG_SIG:
+            return None
+        head = fh.read(8)
+        if len(head) < 8 or head[4:] != b"IHDR":
+            return None
+        width, height, depth, ctype, _comp, _filt, interlace = struct.unpack(">IIBBBBB", fh.read(13))
+        fh.seek(4, 1)  # CRC
+        if depth != 8 or interlace != 0 or ctype not in (0, 2, 3):
+            return None
+        palette = None
+        segments: List[Tuple[int, int]] = []
+        while True:
+            head = fh.read(8)
+            if len(head) < 8:
+                return None
+            (n,) = struct.unpack(">I", head[:4])
+            ctag = head[4:]
+            if ctag == b"IDAT":
+                segments.append((fh.tell(), n))
+                fh.seek(n + 4, 1)
+            elif ctag == b"PLTE":
+                palette = fh.read(n)
+                fh.seek(4, 1)
+            elif ctag == b"tRNS":
+                return None
+            elif ctag == b"IEND":
+                break
+            else:
+                fh.seek(n + 4, 1)
+    if not segments:
+        return None
+    if ctype == 3:
+        if not palette or len(palette) % 3:
+            return None
+        color_space = f"[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{palette.hex()}>]"
+        colors = 1
+    else:
+        color_space = _COLOR_SPACES[1 if ctype == 0 else 3]
+        colors = 1 if ctype == 0 else 3
+    parms = f"<< /Predictor 15 /Colors {colors} /BitsPerComponent 8 /Columns {width} >>"
+    return RawImage(path, "png", width, height, color_space, filter_name="/FlateDecode",
+                    decode_parms=parms, segments=segments)
+
+
+def probe_passthrough(path: str | Path) -> Optional[RawImage]:
+    """RawImage nếu ảnh nhúng thẳng được vào PDF, None nếu cần giải mã (xoay EXIF, alpha, progressive...)."""
+    p = Path(path)
+    try:
+        with open(p, "rb") as fh:
+            magic = fh.read(8)
+        if magic.startswith(b"\xff\xd8"):
+            return _probe_jpeg(p)
+        if magic == _PNG_SIG:
+            return _probe_png(p)
+    except (OSError, struct.error, ValueError):
+        logger.debug("Không đọc được header ảnh %s", p, exc_info=True)
+    return None
+
+
+def _add_raw_page(w, raw: RawImage, dpi: int) -> None:
+    img = w.add_image_xobject(raw.width, raw.height, raw.color_space, raw.bits, raw.filter_name,
+                              raw.iter_data(), length=raw.length, decode_parms=raw.decode_parms)
+    w.add_image_page(img, raw.width * 72.0 / dpi, raw.height * 72.0 / dpi)
+
+
+def _write_passthrough(raw: RawImage, dst: Path, dpi: int) -> None:
+    from ..pdf.writer import PdfStreamWriter
+
+    with PdfStreamWriter(dst) as w:
+        _add_raw_page(w, raw, dpi)
+
 def _open_image_fixed(path: Path):
     """Mở ảnh, sửa xoay EXIF, flatten alpha lên nền trắng để in/nhúng PDF không lỗi."""
-    from PIL import Image, ImageOps
-    im = Image.open(str(path))
+    from PIL import Image
+    return _fix_image(Image.open(str(path)))
+
+
+def _fix_image(im):
+    """Sửa xoay EXIF + flatten alpha cho ảnh PIL đã mở; luôn trả về ảnh RGB mới."""
+    from PIL import ImageOps
     try:
         im = ImageOps.exif_transpose(im)
     except Exception:
@@ -29,24 +211,16 @@ def _open_image_fixed(path: Path):
         im = im.convert("RGB")
     return im
 
-def image_to_pdf(
-    src_path: str | Path,
-    dst_path: Optional[str | Path] = None,
-    *,
-    dpi: int = 300,
-) -> str:
-    """
-    Ảnh -> PDF 'nét' (ưu tiên lossless):
-    - Nếu có reportlab: tạo trang PDF đúng theo kích thước ảnh tại dpi chỉ định (không upscale, không mờ).
-    - Nếu không: fallback Pillow với quality cao.
-    Trả về đường dẫn PDF.
-    """
-    src = Path(src_path)
-    if not src.exists() or not is_image_file(src):
-        raise ValueError(f"Tệp ảnh không hợp lệ hoặc không hỗ trợ: {src}")
-
-    dst = Path(dst_path) if dst_path else src.with_suffix(".pdf")
-    dst.parent.mkdir(parents=True, exist_ok=True)
+def _image_to_pdf(src: Path, dst: Path, dpi: int, passthrough: bool, stats: Dict[str, object]) -> str:
+    raw = probe_passthrough(src) if passthrough else None
+    if raw is not None:
+        try:
+            _write_passthrough(raw, dst, dpi)
+            stats.update(passthrough=1, mode=raw.kind)
+            logger.debug("Passthrough %s: %s", raw.kind, src)
+            return str(dst)
+        except Exception:
+            logger.warning("Passthrough thất bại, chuyển sang giải mã ảnh: %s", src, exc_info=True)
 
     # Thử dùng ReportLab cho chất lượng hiển thị/print tốt nhất
     try:
@@ -67,6 +241,7 @@ def image_to_pdf(
         c.drawImage(ImageReader(im), 0, 0, width=page_w, height=page_h, preserveAspectRatio=True, anchor='sw', mask='auto')
         c.showPage()
         c.save()
+        stats["mode"] = "reportlab"
         return str(dst)
 
     except Exception:
@@ -76,4 +251,244 @@ def image_to_pdf(
         # 'resolution' ảnh hưởng kích thước hiển thị trên trang, giữ chi tiết gốc
         # 'quality' nếu PDF backend sử dụng JPEG (thường sẽ được dùng)
         im.save(str(dst), "PDF", resolution=dpi, quality=95, optimize=True)
+        stats["mode"] = "pillow"
         return str(dst)
+
+def image_to_pdf(
+    src_path: str | Path,
+    dst_path: Optional[str | Path] = None,
+    *,
+    dpi: int = 300,
+    passthrough: bool = True,
+    stats: Optional[Dict[str, object]] = None,
+    progress: Optional[ProgressFn] = None,
+) -> str:
+    """
+    Ảnh -> PDF 'nét' (ưu tiên lossless):
+    - passthrough=True (mặc định): JPEG baseline không cần xoay EXIF và PNG 8 bit không alpha được nhúng
+      nguyên dữ liệu nén (DCTDecode / Flate + predictor PNG), không giải mã - nén lại.
+    - Nếu có reportlab: tạo trang PDF đúng theo kích thước ảnh tại dpi chỉ định (không upscale, không mờ).
+    - Nếu không: fallback Pillow với quality cao.
+    Trả về đường dẫn PDF. Nếu truyền dict `stats`, ghi lại "passthrough" (số trang nhúng thẳng, 0/1 -
+    cùng kiểu với images_to_pdf) và "mode" ("cache" khi lấy từ cache chuyển đổi, xem src.cache).
+    `progress` (converters/progress.py): 0/1 rồi 1/1.
+    """
+    src = Path(src_path)
+    if not src.exists() or not is_image_file(src):
+        raise ValueError(f"Tệp ảnh không hợp lệ hoặc không hỗ trợ: {src}")
+
+    dst = Path(dst_path) if dst_path else src.with_suffix(".pdf")
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if stats is None:
+        stats = {}
+    stats["passthrough"] = 0
+    report(progress, 0, 1, src.name)
+
+    from ..cache import cached_convert
+    out = cached_convert("image", src, dst, "auto", {"dpi": dpi, "passthrough": passthrough},
+                         lambda: _image_to_pdf(src, dst, dpi, passthrough, stats), stats)
+    if stats.get("cache") == "hit":
+        stats["mode"] = "cache"
+    report(progress, 1, 1, src.name)
+    return out
+
+
+def _add_decoded_page(w, src: Path, dpi: int, jpeg_quality: int) -> str:
+    """Giải mã 1 ảnh, nhúng thành 1 trang rồi giải phóng ngay. Trả về mode đã dùng."""
+    import io
+    import zlib
+    from PIL import Image
+
+    with Image.open(str(src)) as opened:
+        was_jpeg = opened.format == "JPEG"
+        im = _fix_image(opened)
+    try:
+        w_px, h_px = im.size
+        buf = io.BytesIO()
+        if was_jpeg:
+            # Ảnh gốc đã là JPEG (progressive/cần xoay): nén lại JPEG chất lượng cao thay vì Flate thô
+            im.save(buf, "JPEG", quality=jpeg_quality, optimize=True)
+            filter_name, mode = "/DCTDecode", "jpeg-reencode"
+        else:
+            comp = zlib.compressobj(6)
+            buf.write(comp.compress(im.tobytes()))
+            buf.write(comp.flush())
+            filter_name, mode = "/FlateDecode", "flate"
+    finally:
+        im.close()
+    data = buf.getvalue()
+    buf.close()
+    img = w.add_image_xobject(w_px, h_px, "/DeviceRGB", 8, filter_name, data)
+    w.add_image_page(img, w_px * 72.0 / dpi, h_px * 72.0 / dpi)
+    return mode
+
+
+def images_to_pdf(
+    paths: Iterable[str | Path],
+    dst_path: str | Path,
+    *,
+    dpi: int = 300,
+    passthrough: bool = True,
+    jpeg_quality: int = 95,
+    stats: Optional[Dict[str, object]] = None,
+    progress: Optional[ProgressFn] = None,
+) -> str:
+    """
+    Nhiều ảnh -> 1 PDF, mỗi ảnh 1 trang (kích thước trang = ảnh ở dpi chỉ định).
+
+    `paths` có thể là generator: ảnh được đọc lần lượt khi tới lượt nên có thể bắt đầu khi máy scan
+    chưa chạy xong. Mỗi ảnh được mở, ghi xuống file PDF rồi giải phóng trước ảnh kế tiếp, nên bộ nhớ
+    đỉnh ~ 1 trang đã giải mã bất kể số trang. Ảnh nhúng thẳng được (xem image_to_pdf) thì không giải mã.
+
+    `stats` (tuỳ chọn) nhận: pages, passthrough (số trang nhúng thẳng), modes (đếm theo mode).
+    `progress` báo sau mỗi trang (total=0 nếu `paths` là generator).
+    Lỗi ở 1 ảnh bất kỳ (kể cả huỷ từ progress) -> xoá file PDF dở dang và ném lỗi.
+    """
+    from ..pdf.writer import PdfStreamWriter
+
+    dst = Path(dst_path)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if stats is None:
+        stats = {}
+    modes: Dict[str, int] = {}
+    stats.update(pages=0, passthrough=0, modes=modes)
+    total = len(paths) if hasattr(paths, "__len__") else 0
+
+    w = PdfStreamWriter(dst)
+    try:
+        for item in paths:
+            src = Path(item)
+            if not src.exists() or not is_image_file(src):
+                raise ValueError(f"Tệp ảnh không hợp lệ hoặc không hỗ trợ: {src}")
+            raw = probe_passthrough(src) if passthrough else None
+            if raw is not None:
+                _add_raw_page(w, raw, dpi)
+                mode = raw.kind
+                stats["passthrough"] += 1
+            else:
+                mode = _add_decoded_page(w, src, dpi, jpeg_quality)
+            modes[mode] = modes.get(mode, 0) + 1
+            stats["pages"] += 1
+            report(progress, stats["pages"], total, src.name)
+        if not w.page_count:
+            raise ValueError("Không có ảnh nào để ghi PDF")
+        w.close()
+    except BaseException:
+        w.abort()
+        try:
+            dst.unlink()
+        except OSError:
+            pass
+        raise
+    logger.debug("images_to_pdf: %s trang -> %s (%s)", stats["pages"], dst, modes)
+    return str(dst)
+
+
+# ====== Batch nhiều file song song (process pool) ======
+@dataclass
+class ImageJobResult:
+    src: str
+    dst: Optional[str]
+    ok: bool
+    mode: Optional[str] = None
+    error: Optional[str] = None
+    bytes_in: int = 0
+    seconds: float = 0.0
+
+
+def _image_job(job: Tuple[str, Optional[str], int, bool]) -> ImageJobResult:
+    """Chạy trong process con: lỗi được trả về theo từng job, không làm hỏng cả batch."""
+    import time
+
+    src, dst, dpi, passthrough = job
+    t0 = time.perf_counter()
+    try:
+        size = Path(src).stat().st_size
+    except OSError:
+        size = 0
+    st: Dict[str, object] = {}
+    try:
+        out = image_to_pdf(src, dst, dpi=dpi, passthrough=passthrough, stats=st)
+        return ImageJobResult(src, out, True, mode=str(st.get("mode")), bytes_in=size,
+                              seconds=time.perf_counter() - t0)
+    except Exception as e:
+        return ImageJobResult(src, dst, False, error=f"{type(e).__name__}: {e}", bytes_in=size,
+                              seconds=time.perf_counter() - t0)
+
+
+def _auto_chunksize(n_jobs: int, workers: int) -> int:
+    # ~4 chunk / worker để cân tải, nhưng không quá lớn để kết quả về đều
+    return max(1, min(64, n_jobs // (workers * 4)))
+
+
+def image_to_pdf_many(
+    jobs: Iterable[str | Path | Tuple[str | Path, Optional[str | Path]]],
+    workers: Optional[int] = None,
+    *,
+    dpi: int = 300,
+    passthrough: bool = True,
+    chunksize: Optional[int] = None,
+    progress: Optional[ProgressFn] = None,
+) -> Tuple[List[ImageJobResult], Dict[str, float]]:
+    """
+    Chuyển nhiều ảnh -> nhiều PDF song song bằng ProcessPoolExecutor (giải mã/nén ảnh là việc CPU).
+
+    - `jobs`: đường dẫn ảnh (PDF cạnh ảnh) hoặc cặp (src, dst).
+    - Kết quả giữ đúng thứ tự `jobs`; lỗi ghi vào từng ImageJobResult, batch vẫn chạy tiếp.
+    - Gửi việc theo chunk (`chunksize`, mặc định tự tính) để hàng nghìn ảnh nhỏ không bị chi phối
+      bởi chi phí IPC.
+    - `workers=1` chạy ngay trong process hiện tại.
+    - `progress` báo sau mỗi file (theo thứ tự `jobs`); huỷ thì các chunk chưa chạy bị bỏ.
+
+    Trả về (results, stats) với stats: files, ok, failed, passthrough, cached, seconds, files_per_s, mb_per_s.
+    Trên Windows, script gọi hàm này phải có `if __name__ == "__main__":`.
+    """
+    import os
+    import time
+
+    items: List[Tuple[str, Optional[str], int, bool]] = []
+    for job in jobs:
+        if isinstance(job, (tuple, list)):
+            src, dst = job
+        else:
+            src, dst = job, None
+        items.append((str(src), str(dst) if dst else None, dpi, passthrough))
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    workers = min(workers, max(1, len(items)))
+    t0 = time.perf_counter()
+    results: List[ImageJobResult] = []
+    if workers == 1:
+        for it in items:
+            results.append(_image_job(it))
+            report(progress, len(results), len(items), Path(it[0]).name)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        cs = chunksize or _auto_chunksize(len(items), workers)
+        ex = ProcessPoolExecutor(max_workers=workers)
+        try:
+            for r in ex.map(_image_job, items, chunksize=cs):
+                results.append(r)
+                report(progress, len(results), len(items), Path(r.src).name)
+        except BaseException:
+            ex.shutdown(wait=True, cancel_futures=True)
+            raise
+        ex.shutdown(wait=True)
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+
+    ok = sum(1 for r in results if r.ok)
+    total_bytes = sum(r.bytes_in for r in results)
+    stats = {
+        "files": len(results),
+        "ok": ok,
+        "failed": len(results) - ok,
+        "passthrough": sum(1 for r in results if r.ok and r.mode in ("jpeg", "png")),
+        "cached": sum(1 for r in results if r.ok and r.mode == "cache"),
+        "workers": workers,
+        "seconds": elapsed,
+        "files_per_s": len(results) / elapsed,
+        "mb_per_s": total_bytes / (1024 * 1024) / elapsed,
+    }
+    logger.info("image_to_pdf_many: %d/%d OK, %.1f file/s, %.1f MB/s (%d workers)",
+                ok, len(results), stats["files_per_s"], stats["mb_per_s"], workers)
+    return results, stats
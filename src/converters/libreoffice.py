@@ -0,0 +1,551 @@
+# src/converters/libreoffice.py
+"""
+Engine LibreOffice: giữ sẵn 1..N tiến trình `soffice --headless` lắng nghe trên socket cục bộ
+và gửi lệnh chuyển đổi qua UNO, thay vì khởi động soffice cho mỗi file (~3s/lần).
+
+- Mỗi listener có profile riêng (-env:UserInstallation) để chạy song song không khoá nhau.
+- warm_up(): chờ cổng mở + kết nối UNO 1 lần trước khi nhận job.
+- Listener chết (tiến trình thoát / mất kết nối) -> tự khởi động lại và thử lại 1 lần; nhiều job cùng thấy
+  listener chết (max_concurrency > 1) thì chỉ job đầu khởi động lại, các job kia dùng luôn tiến trình mới.
+- Giới hạn số job đồng thời trên mỗi listener (max_concurrency, mặc định 1).
+- `command`, `client` và `listener_factory` thay được: stand_in_pool() chạy listener giả (Python lắng nghe
+  socket) + client giả ghi PDF trống, dùng khi không có LibreOffice:
+
+    python -m src.converters.libreoffice --self-check   # pool giả: job song song, kill listener, restart
+- Không có module `uno` (Python hệ thống không kèm LibreOffice) -> chạy `soffice --convert-to` 1 lần/file;
+  filter_data (PageRange, PDF/A...) đi theo chuỗi filter dạng JSON (LibreOffice >= 7.4).
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_BASE_PORT = 2002
+
+# Dải cổng riêng theo loại tài liệu và theo tiến trình worker (supervisor), để các listener của nhóm
+# Word / Excel và của từng worker không bao giờ dùng chung cổng: cổng = base + offset[loại] + worker * stride
+KIND_PORT_OFFSET = {"word": 0, "excel": 100}
+WORKER_PORT_STRIDE = 4
+
+# Cổng đầu cho pool tạo lười trong tiến trình này (set_base_port; worker của supervisor đặt theo chỉ số)
+_BASE_PORT = DEFAULT_BASE_PORT
+
+WRITER_PDF_FILTER = "writer_pdf_Export"
+CALC_PDF_FILTER = "calc_pdf_Export"
+
+CALC_EXTS = {".xlsx", ".xls", ".xlsm", ".xlsb", ".xltx", ".xltm", ".ods", ".csv"}
+
+
+def port_range_for(kind: Optional[str] = None, worker: int = 0) -> int:
+    """Cổng đầu dành cho nhóm `kind` ("word"/"excel") của worker thứ `worker` (0-based)."""
+    return DEFAULT_BASE_PORT + KIND_PORT_OFFSET.get(kind or "", 0) + int(worker) * WORKER_PORT_STRIDE
+
+
+def set_base_port(port: int) -> None:
+    """Cổng đầu cho pool tạo lười (get_libreoffice_pool) trong tiến trình này."""
+    global _BASE_PORT
+    _BASE_PORT = int(port)
+
+
+def find_soffice() -> Optional[str]:
+    for name in ("soffice", "libreoffice"):
+        path = shutil.which(name)
+        if path:
+            return path
+    if os.name == "nt":
+        for base in (os.environ.get("PROGRAMFILES", r"C:\Program Files"),
+                     os.environ.get("PROGRAMFILES(X86)", r"C:\Program Files (x86)")):
+            cand = Path(base) / "LibreOffice" / "program" / "soffice.exe"
+            if cand.exists():
+                return str(cand)
+    elif Path("/Applications/LibreOffice.app/Contents/MacOS/soffice").exists():
+        return "/Applications/LibreOffice.app/Contents/MacOS/soffice"
+    return None
+
+
+def pdf_filter_for(path: str) -> str:
+    return CALC_PDF_FILTER if Path(path).suffix.lower() in CALC_EXTS else WRITER_PDF_FILTER
+
+
+# -------------------- client UNO --------------------
+class UnoClient:
+    """Gửi lệnh load/store qua UNO tới 1 listener (import `uno` khi dùng lần đầu)."""
+
+    def __init__(self) -> None:
+        import uno  # noqa: F401  (ModuleNotFoundError nếu Python không kèm LibreOffice)
+        self._desktops: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _desktop(self, host: str, port: int, fresh: bool = False):
+        import uno
+
+        key = (host, port)
+        with self._lock:
+            if not fresh and key in self._desktops:
+                return self._desktops[key]
+            local = uno.getComponentContext()
+            resolver = local.ServiceManager.createInstanceWithContext(
+                "com.sun.star.bridge.UnoUrlResolver", local)
+            ctx = resolver.resolve(f"uno:socket,host={host},port={port};urp;StarOffice.ComponentContext")
+            desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+            self._desktops[key] = desktop
+            return desktop
+
+    def forget(self, host: str, port: int) -> None:
+        with self._lock:
+            self._desktops.pop((host, port), None)
+
+    def warm_up(self, host: str, port: int) -> None:
+        self._desktop(host, port, fresh=True)
+
+    @staticmethod
+    def _props(**kwargs):
+        from com.sun.star.beans import PropertyValue  # type: ignore
+        out = []
+        for k, v in kwargs.items():
+            p = PropertyValue()
+            p.Name, p.Value = k, v
+            out.append(p)
+        return tuple(out)
+
+    def convert(self, host: str, port: int, src: str, dst: str, filter_name: str,
+                filter_data: Optional[Dict] = None) -> None:
+        import uno
+
+        desktop = self._desktop(host, port)
+        doc = desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(src)), "_blank", 0,
+            self._props(Hidden=True, ReadOnly=True, UpdateDocMode=0))
+        if doc is None:
+            raise RuntimeError(f"LibreOffice không mở được tệp: {src}")
+        try:
+            store = {"FilterName": filter_name, "Overwrite": True}
+            if filter_data:
+                store["FilterData"] = uno.Any("[]com.sun.star.beans.PropertyValue",
+                                              self._props(**filter_data))
+            doc.storeToURL(uno.systemPathToFileUrl(os.path.abspath(dst)), self._props(**store))
+        finally:
+            try:
+                doc.close(True)
+            except Exception:
+                doc.dispose()
+
+
+# -------------------- listener --------------------
+class SofficeListener:
+    """1 tiến trình soffice headless lắng nghe trên host:port."""
+
+    def __init__(
+        self,
+        port: int,
+        *,
+        host: str = DEFAULT_HOST,
+        soffice: Optional[str] = None,
+        command: Optional[Sequence[str]] = None,
+        client=None,
+        max_concurrency: int = 1,
+        startup_timeout: float = 60.0,
+    ) -> None:
+        self.host = host
+        self.port = int(port)
+        self._soffice = soffice
+        self._command = list(command) if command else None
+        self._client = client
+        self._slots = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+        self._startup_timeout = startup_timeout
+        self._proc: Optional[subprocess.Popen] = None
+        self._profile: Optional[str] = None
+        self._lock = threading.RLock()       # start / stop / restart
+        self._count_lock = threading.Lock()  # in_flight / stats
+        self._generation = 0                 # tăng mỗi lần khởi động lại
+        self.in_flight = 0
+        self.stats = {"jobs": 0, "errors": 0, "restarts": 0}
+
+    def _bump(self, key: str) -> None:
+        with self._count_lock:
+            self.stats[key] += 1
+
+    # ---- tiến trình ----
+    def _argv(self) -> List[str]:
+        if self._command:
+            return [a.format(host=self.host, port=self.port) for a in self._command]
+        soffice = self._soffice or find_soffice()
+        if not soffice:
+            raise FileNotFoundError("Không tìm thấy LibreOffice (soffice). Hãy cài LibreOffice.")
+        if self._profile is None:
+            self._profile = tempfile.mkdtemp(prefix=f"lo_profile_{self.port}_")
+        return [
+            soffice, "--headless", "--invisible", "--nologo", "--norestore",
+            "--nodefault", "--nolockcheck", "--nofirststartwizard",
+            f"-env:UserInstallation={Path(self._profile).as_uri()}",
+            f"--accept=socket,host={self.host},port={self.port};urp;StarOffice.ComponentContext",
+        ]
+
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _wait_port(self) -> None:
+        deadline = time.monotonic() + self._startup_timeout
+        while time.monotonic() < deadline:
+            if self._proc is not None and self._proc.poll() is not None:
+                raise RuntimeError(f"soffice thoát sớm (mã {self._proc.returncode})")
+            try:
+                with socket.create_connection((self.host, self.port), timeout=1.0):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise TimeoutError(f"soffice không mở cổng {self.host}:{self.port} sau {self._startup_timeout}s")
+
+    def start(self) -> "SofficeListener":
+        with self._lock:
+            if self.alive():
+                return self
+            argv = self._argv()
+            logger.info("Khởi động listener LibreOffice :%d", self.port)
+            self._proc = subprocess.Popen(argv, stdin=subprocess.DEVNULL,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self._wait_port()
+        return self
+
+    def warm_up(self) -> "SofficeListener":
+        """Khởi động (nếu cần) và tạo sẵn kết nối UNO để job đầu không phải chờ."""
+        self.start()
+        client = self._get_client()
+        if hasattr(client, "warm_up"):
+            client.warm_up(self.host, self.port)
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+            if self._client is not None and hasattr(self._client, "forget"):
+                self._client.forget(self.host, self.port)
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait(timeout=5)
+
+    def restart(self, generation: Optional[int] = None) -> None:
+        """
+        Khởi động lại listener. generation: lượt khởi động mà job gọi đã thấy; job khác đã khởi động lại
+        sau lượt đó thì không kill tiến trình mới (đang chạy job khác), chỉ đảm bảo nó đã sẵn sàng.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                self.warm_up()
+                return
+            self._generation += 1
+            self._bump("restarts")
+            logger.warning("Listener LibreOffice :%d không phản hồi -> khởi động lại", self.port)
+            self.stop()
+            self.warm_up()
+
+    def close(self) -> None:
+        self.stop()
+        if self._profile:
+            shutil.rmtree(self._profile, ignore_errors=True)
+            self._profile = None
+
+    # ---- job ----
+    def _get_client(self):
+        if self._client is None:
+            self._client = UnoClient()
+        return self._client
+
+    def convert(self, src: str, dst: str, filter_name: Optional[str] = None,
+                filter_data: Optional[Dict] = None) -> None:
+        filter_name = filter_name or pdf_filter_for(src)
+        with self._slots:
+            with self._count_lock:
+                self.in_flight += 1
+            try:
+                generation = self._generation
+                if not self.alive():
+                    if self._proc is None:
+                        self.warm_up()
+                    else:
+                        self.restart(generation)
+                    generation = self._generation
+                try:
+                    self._get_client().convert(self.host, self.port, src, dst, filter_name, filter_data)
+                except Exception:
+                    if self.alive() and self._port_open():
+                        # listener vẫn sống -> lỗi nằm ở tài liệu
+                        self._bump("errors")
+                        raise
+                    # listener chết giữa chừng -> khởi động lại (nếu job khác chưa làm) và thử lại 1 lần
+                    self.restart(generation)
+                    self._get_client().convert(self.host, self.port, src, dst, filter_name, filter_data)
+                self._bump("jobs")
+            finally:
+                with self._count_lock:
+                    self.in_flight -= 1
+
+    def _port_open(self) -> bool:
+        try:
+            with socket.create_connection((self.host, self.port), timeout=1.0):
+                return True
+        except OSError:
+            return False
+
+
+# -------------------- pool --------------------
+class LibreOfficePool:
+    """N listener; mỗi job vào listener ít việc nhất."""
+
+    def __init__(
+        self,
+        listeners: int = 1,
+        *,
+        base_port: int = DEFAULT_BASE_PORT,
+        max_concurrency: int = 1,
+        listener_factory: Optional[Callable[[int], SofficeListener]] = None,
+        **listener_kwargs,
+    ) -> None:
+        factory = listener_factory or (
+            lambda port: SofficeListener(port, max_concurrency=max_concurrency, **listener_kwargs))
+        self.listeners = [factory(base_port + i) for i in range(max(1, int(listeners)))]
+        self._lock = threading.Lock()
+
+    def warm_up(self) -> "LibreOfficePool":
+        threads = [threading.Thread(target=l.warm_up, daemon=True) for l in self.listeners]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return self
+
+    def _pick(self) -> SofficeListener:
+        with self._lock:
+            return min(self.listeners, key=lambda l: l.in_flight)
+
+    def convert(self, src: str, dst: str, filter_name: Optional[str] = None,
+                filter_data: Optional[Dict] = None) -> None:
+        self._pick().convert(src, dst, filter_name, filter_data)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        out = {"jobs": 0, "errors": 0, "restarts": 0}
+        for l in self.listeners:
+            with l._count_lock:
+                for k in out:
+                    out[k] += l.stats[k]
+        return out
+
+    def close(self) -> None:
+        for l in self.listeners:
+            l.close()
+
+
+_POOL: Optional[LibreOfficePool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def enable_libreoffice(listeners: int = 1, *, warm_up: bool = True, **kwargs) -> LibreOfficePool:
+    """Bật pool listener dùng chung cho engine="libreoffice" (kwargs -> LibreOfficePool)."""
+    global _POOL
+    disable_libreoffice()
+    pool = LibreOfficePool(listeners, **kwargs)
+    if warm_up:
+        pool.warm_up()
+    with _POOL_LOCK:
+        _POOL = pool
+    return pool
+
+
+def disable_libreoffice() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
+
+
+def get_libreoffice_pool(create: bool = True) -> Optional[LibreOfficePool]:
+    """Pool hiện tại; chưa bật thì tạo pool 1 listener (sống tới khi thoát chương trình), trừ khi create=False."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None and create:
+            _POOL = LibreOfficePool(1, base_port=_BASE_PORT)
+            atexit.register(disable_libreoffice)
+        return _POOL
+
+
+def _filter_option_type(value) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "long"
+    if isinstance(value, float):
+        return "double"
+    return "string"
+
+
+def convert_to_arg(filter_name: str, filter_data: Optional[Dict] = None) -> str:
+    """
+    Tham số --convert-to: "pdf:<filter>" kèm filter_data dạng JSON như FilterData của UNO,
+    vd: pdf:writer_pdf_Export:{"PageRange":{"type":"string","value":"2-3"}}.
+    """
+    if not filter_data:
+        return f"pdf:{filter_name}"
+    # giá trị luôn là chuỗi ("true", "1", "2-3"), LibreOffice đổi theo "type"
+    options = {k: {"type": _filter_option_type(v), "value": str(v).lower() if isinstance(v, bool) else str(v)}
+               for k, v in filter_data.items()}
+    return f"pdf:{filter_name}:{json.dumps(options, separators=(',', ':'))}"
+
+
+def _convert_oneshot(src: str, dst: str, filter_name: Optional[str] = None,
+                     filter_data: Optional[Dict] = None) -> None:
+    """Fallback khi thiếu `uno`: soffice --convert-to (khởi động soffice cho mỗi file), cùng filter_data."""
+    from ..io.staging import finalize
+
+    soffice = find_soffice()
+    if not soffice:
+        raise FileNotFoundError("Không tìm thấy LibreOffice (soffice). Hãy cài LibreOffice.")
+    dst_dir = os.path.dirname(os.path.abspath(dst)) or "."
+    os.makedirs(dst_dir, exist_ok=True)
+    out_dir = tempfile.mkdtemp(prefix=".lo_out_", dir=dst_dir)  # cùng ổ với đích -> chỉ đổi tên
+    profile = tempfile.mkdtemp(prefix="lo_profile_")
+    try:
+        subprocess.run(
+            [soffice, "--headless", "--norestore", f"-env:UserInstallation={Path(profile).as_uri()}",
+             "--convert-to", convert_to_arg(filter_name or pdf_filter_for(src), filter_data),
+             "--outdir", out_dir, os.path.abspath(src)],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=600,
+        )
+        produced = Path(out_dir) / (Path(src).stem + ".pdf")
+        if not produced.exists():
+            raise RuntimeError(f"LibreOffice không tạo được PDF cho {src}")
+        finalize(str(produced), dst)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        shutil.rmtree(profile, ignore_errors=True)
+
+
+def libreoffice_to_pdf(src: str, dst: str, *, filter_data: Optional[Dict] = None) -> str:
+    """Chuyển src -> PDF qua listener LibreOffice dùng chung. Trả về dst."""
+    os.makedirs(os.path.dirname(os.path.abspath(dst)) or ".", exist_ok=True)
+    pool = _POOL
+    if pool is None:
+        try:
+            import uno  # noqa: F401
+        except ModuleNotFoundError:
+            logger.warning("Thiếu module uno -> dùng soffice --convert-to (chậm hơn, không có listener)")
+            _convert_oneshot(src, dst, filter_data=filter_data)
+            return dst
+        pool = get_libreoffice_pool()
+    pool.convert(src, dst, filter_data=filter_data)
+    return dst
+
+
+# -------------------- listener / client giả --------------------
+# Tiến trình thay soffice: chỉ mở cổng và nhận kết nối (đủ cho _wait_port / _port_open)
+STAND_IN_COMMAND = (
+    sys.executable, "-c",
+    "import socket\n"
+    "s = socket.socket()\n"
+    "s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)\n"
+    "s.bind(('{host}', {port}))\n"
+    "s.listen()\n"
+    "while True:\n"
+    "    s.accept()[0].close()\n",
+)
+
+
+class StandInClient:
+    """Client giả thay UnoClient: kiểm tra listener còn mở cổng, chờ `delay` giây rồi ghi 1 trang PDF trống."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls: List[tuple] = []
+
+    def warm_up(self, host: str, port: int) -> None:
+        socket.create_connection((host, port), timeout=1.0).close()
+
+    def convert(self, host: str, port: int, src: str, dst: str, filter_name: str,
+                filter_data: Optional[Dict] = None) -> None:
+        from ..pdf.writer import PdfStreamWriter
+
+        self.warm_up(host, port)  # listener chết -> ConnectionRefusedError như khi mất cầu UNO
+        self.calls.append((port, src, filter_name, dict(filter_data or {})))
+        time.sleep(self.delay)
+        with PdfStreamWriter(dst) as w:
+            w.add_page(595.0, 842.0, b"", "<< >>")
+
+
+def stand_in_pool(listeners: int = 1, *, base_port: int = DEFAULT_BASE_PORT, max_concurrency: int = 1,
+                  delay: float = 0.0) -> LibreOfficePool:
+    """Pool chạy listener giả + StandInClient (mỗi listener 1 client) cho thử nghiệm trên máy không có LibreOffice."""
+    return LibreOfficePool(
+        listeners, base_port=base_port,
+        listener_factory=lambda port: SofficeListener(port, command=STAND_IN_COMMAND, client=StandInClient(delay),
+                                                      max_concurrency=max_concurrency, startup_timeout=10.0),
+    )
+
+
+def self_check(listeners: int = 2, jobs: int = 8, *, base_port: int = DEFAULT_BASE_PORT + 900) -> Dict[str, object]:
+    """
+    Chạy pool giả: `jobs` job song song (max_concurrency=2), kill 1 listener giữa chừng. ok=True khi mọi job
+    có PDF, listener bị kill được khởi động lại đúng 1 lần và filter_data tới được client.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    pool = stand_in_pool(listeners, base_port=base_port, max_concurrency=2, delay=0.2).warm_up()
+    out_dir = tempfile.mkdtemp(prefix="lo_selfcheck_")
+    try:
+        def job(i: int) -> bool:
+            dst = os.path.join(out_dir, f"{i}.pdf")
+            pool.convert(f"doc{i}.docx", dst, filter_data={"PageRange": "1-2"})
+            return os.path.getsize(dst) > 0
+
+        with ThreadPoolExecutor(max_workers=listeners * 2) as ex:
+            futures = [ex.submit(job, i) for i in range(jobs)]
+            time.sleep(0.1)
+            pool.listeners[0]._proc.kill()  # listener chết khi đang có job
+            done = [f.result() for f in futures]
+        stats = pool.stats
+        calls = [c for l in pool.listeners for c in l._client.calls]
+        ok = (all(done) and stats["jobs"] == jobs and stats["restarts"] == 1
+              and all(c[3] == {"PageRange": "1-2"} for c in calls))
+        return {"ok": ok, "stats": stats, "ports": [l.port for l in pool.listeners]}
+    finally:
+        pool.close()
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    p = argparse.ArgumentParser(prog="python -m src.converters.libreoffice",
+                                description="Kiểm tra pool listener LibreOffice bằng listener/client giả.")
+    p.add_argument("--self-check", action="store_true", help="chạy pool giả (không cần LibreOffice)")
+    p.add_argument("--listeners", type=int, default=2, metavar="N")
+    p.add_argument("--jobs", type=int, default=8, metavar="N")
+    args = p.parse_args(argv)
+    if not args.self_check:
+        p.print_help()
+        return 2
+    report = self_check(args.listeners, args.jobs)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
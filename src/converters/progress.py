@@ -0,0 +1,35 @@
+# src/converters/progress.py
+"""
+Callback tiến độ dùng chung cho các converter.
+
+progress(done, total, label): đã xong `done` trên `total` bước (total=0 khi chưa biết tổng, vd: generator
+ảnh), label mô tả bước vừa xong (tên sheet, tên ảnh...). Callback có thể được gọi từ luồng khác
+(worker của pool COM) nên phía nhận phải thread-safe (UI: chỉ đẩy vào queue).
+
+Huỷ: callback ném ConversionCancelled -> converter dừng ở ranh giới bước kế tiếp, dọn file dở dang
+và ném tiếp lỗi này ra cho người gọi.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+ProgressFn = Callable[[int, int, str], None]
+
+
+class ConversionCancelled(Exception):
+    """Người dùng huỷ chuyển đổi (ném ra từ callback tiến độ)."""
+
+
+def report(progress: Optional[ProgressFn], done: int, total: int, label: str = "") -> None:
+    """Gọi callback nếu có. Lỗi của callback (trừ huỷ) chỉ ghi log, không làm hỏng chuyển đổi."""
+    if progress is None:
+        return
+    try:
+        progress(done, total, label)
+    except ConversionCancelled:
+        raise
+    except Exception:
+        logger.debug("Callback tiến độ lỗi (bỏ qua)", exc_info=True)
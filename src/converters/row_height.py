@@ -0,0 +1,210 @@
+# src/converters/row_height.py
+"""
+Tính chiều cao hàng Excel từ metric của font (thay cho Rows.AutoFit + đệm ước chừng).
+
+Chiều cao 1 dòng = (usWinAscent + usWinDescent) của font * cỡ chữ (như Excel/GDI dựng dòng).
+Chữ có dấu chồng của tiếng Việt (Ẩ, Ỗ, Ậ...) cao hơn usWinAscent nên bị cắt khi chỉ AutoFit:
+ở đây đọc khung bao (yMin/yMax) của đúng các glyph trong ô để cộng phần vượt lên trên/xuống dưới.
+Số dòng của ô wrap tính bằng độ rộng ký tự (hmtx) so với độ rộng cột.
+
+Metric đọc 1 lần cho mỗi file font và cache theo (font, cỡ, đậm, nghiêng). Dùng chung cho engine COM
+(excel_to_pdf._setup_sheet ghi RowHeight theo lô) và renderer thuần Python (xlsx_native).
+"""
+from __future__ import annotations
+
+import logging
+import math
+import struct
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .fonts import resolve_font_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FONT = "Calibri"
+DEFAULT_FONT_SIZE = 11.0
+DEFAULT_ROW_HEIGHT = 15.0       # pt (Calibri 11)
+MAX_ROW_HEIGHT = 409.0          # giới hạn RowHeight của Excel
+CELL_PAD_X = 2.0                # pt, lề trái/phải trong ô khi wrap
+CELL_PAD_Y = 1.5                # pt, khoảng trống trên/dưới (Excel ~2px)
+SAFETY_PT = 0.75                # 1 pixel dự phòng sai số làm tròn
+ROW_HEIGHT_STEP_PT = 0.75       # Excel làm tròn chiều cao hàng theo pixel (96 dpi)
+
+# Khi không tìm thấy file font: metric kiểu Arial (đơn vị em)
+_GENERIC = (0.905, 0.212, 1.15, 0.30, 0.55)   # win ascent, win descent, đỉnh dấu chồng, đáy dấu, rộng TB
+
+
+class Metrics(NamedTuple):
+    """Metric đã nhân cỡ chữ (pt)."""
+    size: float
+    ascent: float           # usWinAscent
+    descent: float          # usWinDescent (dương)
+    line_height: float      # ascent + descent
+
+
+class _FontFace:
+    """Bảng glyph cần cho việc đo: cmap -> glyph, khung bao từng glyph, độ rộng (đơn vị em)."""
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        self._extent_cache: Dict[str, Tuple[float, float]] = {}
+        if path is None:
+            self.win_ascent, self.win_descent, self._top, self._bottom, self._avg = _GENERIC
+            self._widths: Dict[int, float] = {}
+            self._boxes = None
+            return
+        from reportlab.pdfbase.ttfonts import TTFontFile
+
+        f = TTFontFile(path)
+        upem = float(f.unitsPerEm)
+        try:
+            os2 = f.get_table("OS/2")
+            win_asc, win_desc = struct.unpack(">HH", os2[74:78])
+        except Exception:
+            hhea = f.get_table("hhea")
+            win_asc, win_desc = struct.unpack(">hh", hhea[4:8])
+            win_desc = -win_desc
+        self.win_ascent = win_asc / upem
+        self.win_descent = abs(win_desc) / upem
+        self._top = f.bbox[3] / 1000.0
+        self._bottom = -f.bbox[1] / 1000.0
+        self._avg = (f.defaultWidth or 500.0) / 1000.0
+        self._widths = {cp: w / 1000.0 for cp, w in f.charWidths.items()}  # reportlab: 1/1000 em
+
+        glyf = f.get_table("glyf") if "glyf" in f.table else b""
+        pos = f.glyphPos
+        boxes: Dict[int, Tuple[float, float]] = {}
+        for cp, gid in f.charToGlyph.items():
+            if gid + 1 < len(pos) and pos[gid + 1] > pos[gid] and pos[gid] + 10 <= len(glyf):
+                _n, _x0, y_min, _x1, y_max = struct.unpack(">hhhhh", glyf[pos[gid]:pos[gid] + 10])
+                boxes[cp] = (y_max / upem, -y_min / upem)
+        self._boxes = boxes
+
+    def extent(self, text: str) -> Tuple[float, float]:
+        """(đỉnh cao nhất, đáy thấp nhất) của các glyph trong text, đơn vị em."""
+        hit = self._extent_cache.get(text)
+        if hit is not None:
+            return hit
+        top, bottom = self.win_ascent, self.win_descent
+        if self._boxes is None:
+            # không có glyf: ước lượng theo số dấu phía trên của chữ đã tách (NFD)
+            for ch in set(text):
+                nfd = unicodedata.normalize("NFD", ch)
+                marks = sum(1 for c in nfd if unicodedata.combining(c) and c != "\u0323")
+                if marks >= 2 or (marks and ch.isupper()):
+                    top = max(top, self._top)
+                if "\u0323" in nfd:  # dấu nặng
+                    bottom = max(bottom, self._bottom)
+        else:
+            boxes = self._boxes
+            for ch in set(text):
+                box = boxes.get(ord(ch))
+                if box is not None:
+                    top = max(top, box[0])
+                    bottom = max(bottom, box[1])
+        if len(self._extent_cache) < 4096:
+            self._extent_cache[text] = (top, bottom)
+        return top, bottom
+
+    def width(self, text: str) -> float:
+        widths, avg = self._widths, self._avg
+        return sum(widths.get(ord(ch), avg) for ch in text)
+
+
+@lru_cache(maxsize=None)
+def _face(path: Optional[str]) -> _FontFace:
+    try:
+        return _FontFace(path)
+    except Exception:
+        logger.warning("Không đọc được metric font %s; dùng metric chung", path, exc_info=True)
+        return _FontFace(None)
+
+
+@lru_cache(maxsize=None)
+def _face_for(family: str, bold: bool, italic: bool) -> _FontFace:
+    return _face(resolve_font_file(family or DEFAULT_FONT, bold, italic))
+
+
+@lru_cache(maxsize=4096)
+def font_metrics(family: str, size: float, bold: bool = False, italic: bool = False) -> Metrics:
+    """Metric (pt) cho (font, cỡ, đậm, nghiêng); cache theo đúng khoá này."""
+    face = _face_for(family, bold, italic)
+    asc, desc = face.win_ascent * size, face.win_descent * size
+    return Metrics(size, asc, desc, asc + desc)
+
+
+@dataclass
+class CellText:
+    text: str
+    width: float                    # độ rộng cột (pt)
+    font: str = DEFAULT_FONT
+    size: float = DEFAULT_FONT_SIZE
+    bold: bool = False
+    italic: bool = False
+    wrap: bool = False
+
+
+def wrap_lines(text: str, family: str, size: float, width: float, bold: bool = False, italic: bool = False) -> List[str]:
+    """Ngắt dòng tham lam theo độ rộng (pt) bằng độ rộng glyph; tôn trọng xuống dòng có sẵn."""
+    face = _face_for(family, bold, italic)
+    limit = width / size if size else width
+    lines: List[str] = []
+    for raw in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        cur = ""
+        for word in raw.split(" "):
+            cand = word if not cur else cur + " " + word
+            if not cur or face.width(cand) <= limit:
+                cur = cand
+            else:
+                lines.append(cur)
+                cur = word
+        lines.append(cur)
+    return lines
+
+
+class RowHeightPlanner:
+    """
+    planner = RowHeightPlanner(default_height=15.0)
+    heights = planner.plan(rows)   # rows: iterable các list CellText -> list chiều cao (pt)
+    """
+
+    def __init__(self, default_height: float = DEFAULT_ROW_HEIGHT, *, pad_y: float = CELL_PAD_Y,
+                 safety: float = SAFETY_PT, step: float = ROW_HEIGHT_STEP_PT) -> None:
+        self.default_height = default_height
+        self.pad_y = pad_y
+        self.safety = safety
+        self.step = step
+
+    def cell_height(self, cell: CellText) -> float:
+        text = unicodedata.normalize("NFC", cell.text)
+        if not text:
+            return 0.0
+        m = font_metrics(cell.font or DEFAULT_FONT, float(cell.size or DEFAULT_FONT_SIZE), cell.bold, cell.italic)
+        if cell.wrap:
+            lines = wrap_lines(text, cell.font, m.size, max(cell.width - 2 * CELL_PAD_X, 1.0), cell.bold, cell.italic)
+        else:
+            lines = [text.replace("\r", " ").replace("\n", " ")]
+        face = _face_for(cell.font or DEFAULT_FONT, cell.bold, cell.italic)
+        # dấu chồng chỉ tràn ở dòng đầu (lên trên) và dòng cuối (xuống dưới)
+        top, _ = face.extent(lines[0])
+        _, bottom = face.extent(lines[-1])
+        over = max(0.0, top - face.win_ascent) + max(0.0, bottom - face.win_descent)
+        return len(lines) * m.line_height + over * m.size + 2 * self.pad_y
+
+    def row_height(self, cells: Iterable[CellText]) -> float:
+        content = max((self.cell_height(c) for c in cells), default=0.0)
+        if content <= 0:
+            return self.default_height
+        h = max(self.default_height, content + self.safety)
+        h = math.ceil(h / self.step - 1e-9) * self.step
+        return min(h, MAX_ROW_HEIGHT)
+
+    def plan(self, rows: Iterable[Sequence[CellText]]) -> List[float]:
+        return [self.row_height(r) for r in rows]
+
+
+def cache_info() -> Dict[str, object]:
+    return {"metrics": font_metrics.cache_info()._asdict(), "faces": _face.cache_info()._asdict()}
@@ -0,0 +1,433 @@
+# src/converters/word_template.py
+"""
+Trộn thư (mail-merge) từ 1 mẫu .docx ra hàng loạt PDF: mẫu chỉ mở 1 lần, mỗi bản ghi chỉ thay
+nội dung các ô điền rồi export.
+
+Ô điền được nhận diện theo:
+- Content control (w:sdt): tên = Tag, không có thì Title (alias).
+- Merge field: MERGEFIELD dạng đơn (w:fldSimple) hoặc phức (fldChar begin/instrText/separate/end).
+
+Bản ghi là dict {tên ô: giá trị} (không phân biệt hoa thường), đọc lần lượt từ iterable/generator
+nên cả bộ dữ liệu không phải nằm trong RAM.
+
+    stats = render_template("thu_moi.docx", csv.DictReader(open("khach.csv", encoding="utf-8")),
+                            "PDF_Output/thu", name="{index:05d}_{HoTen}")
+    print(stats["docs_per_min"])
+
+Engine:
+- "com": Microsoft Word qua COM; nếu pool Word đang bật (enable_word_pool) thì mỗi instance mở mẫu
+  1 lần và cùng rút bản ghi từ 1 nguồn chung.
+- "native": python-docx + reportlab (docx_native), mẫu được parse 1 lần, chỉ ghi đè text các ô.
+- "auto": COM trên Windows (hoặc khi pool Word bật), còn lại native.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .word_to_pdf import _apply_page_setup, _export_document, get_word_pool
+
+logger = logging.getLogger(__name__)
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+_UNSAFE_NAME = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
+
+
+def _w(tag: str) -> str:
+    return f"{{{W_NS}}}{tag}"
+
+
+@dataclass
+class MergeResult:
+    index: int                  # thứ tự bản ghi, bắt đầu từ 1
+    dst: Optional[str]
+    ok: bool
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+# -------------------- tiện ích --------------------
+def merge_field_name(instr: str) -> Optional[str]:
+    """' MERGEFIELD  "Ho Ten" \\* MERGEFORMAT ' -> 'Ho Ten'; không phải MERGEFIELD -> None."""
+    m = re.match(r'\s*MERGEFIELD\s+(?:"([^"]+)"|(\S+))', instr or "", re.IGNORECASE)
+    if not m:
+        return None
+    return m.group(1) or m.group(2)
+
+
+def _value_text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _lookup(record: Mapping[str, Any], strict: bool) -> Callable[[str], str]:
+    folded = {str(k).casefold(): v for k, v in record.items()}
+
+    def get(name: str) -> str:
+        key = name.casefold()
+        if key not in folded:
+            if strict:
+                raise KeyError(f"Bản ghi thiếu trường '{name}'")
+            return ""
+        return _value_text(folded[key])
+    return get
+
+
+def output_path(out_dir: Path, name: str, index: int, record: Mapping[str, Any]) -> Path:
+    """Tên file PDF theo mẫu `name` (format với index + các trường của bản ghi), bỏ ký tự không hợp lệ."""
+    fields = {str(k): _value_text(v) for k, v in record.items()}
+    try:
+        stem = name.format(index=index, **fields)
+    except (KeyError, IndexError, ValueError):
+        stem = f"{index:05d}"
+    stem = _UNSAFE_NAME.sub("_", stem).strip(" .") or f"{index:05d}"
+    return out_dir / f"{stem}.pdf"
+
+
+class _SharedRecords:
+    """
+    Iterator dùng chung giữa nhiều worker (mỗi bản ghi chỉ được lấy 1 lần), đánh số từ 1.
+    Tên PDF cũng đặt ở đây, theo thứ tự bản ghi: 2 bản ghi ra cùng tên (vd cùng {HoTen}) thì bản sau
+    thành ten_1.pdf, ten_2.pdf... thay vì ghi đè lên nhau.
+    """
+
+    def __init__(self, records: Iterable[Mapping[str, Any]], out_dir: Path, name: str) -> None:
+        self._it = iter(records)
+        self._lock = threading.Lock()
+        self._index = 0
+        self.out_dir, self.name = out_dir, name
+        self._used: set = set()
+
+    def _unique(self, dst: Path) -> Path:
+        cand, i = dst, 1
+        while cand.name.casefold() in self._used:  # FS Windows / macOS không phân biệt hoa thường
+            cand = dst.with_name(f"{dst.stem}_{i}{dst.suffix}")
+            i += 1
+        self._used.add(cand.name.casefold())
+        return cand
+
+    def next(self) -> Optional[Tuple[int, Mapping[str, Any], Path]]:
+        with self._lock:
+            try:
+                record = next(self._it)
+            except StopIteration:
+                return None
+            self._index += 1
+            return self._index, record, self._unique(output_path(self.out_dir, self.name, self._index, record))
+
+
+class _Progress:
+    """Đếm kết quả (an toàn đa luồng) và gọi on_result."""
+
+    def __init__(self, on_result: Optional[Callable[[MergeResult], None]]) -> None:
+        self.on_result = on_result
+        self.lock = threading.Lock()
+        self.ok = 0
+        self.failed = 0
+
+    def add(self, res: MergeResult) -> None:
+        with self.lock:
+            if res.ok:
+                self.ok += 1
+            else:
+                self.failed += 1
+            if self.on_result is not None:
+                self.on_result(res)
+
+
+def _render_each(records: _SharedRecords, progress: _Progress,
+                 fill: Callable[[Mapping[str, Any]], None], export: Callable[[str], None]) -> None:
+    while True:
+        item = records.next()
+        if item is None:
+            return
+        index, record, dst = item
+        t0 = time.perf_counter()
+        try:
+            fill(record)
+            export(str(dst))
+            res = MergeResult(index, str(dst), True, time.perf_counter() - t0)
+        except Exception as e:
+            logger.error("Bản ghi %d lỗi: %s", index, e)
+            res = MergeResult(index, str(dst), False, time.perf_counter() - t0, f"{type(e).__name__}: {e}")
+        progress.add(res)
+
+
+# -------------------- Engine: native (python-docx) --------------------
+class NativeTemplate:
+    """Mẫu đã parse 1 lần; fill() ghi đè text các ô điền ngay trên cây XML."""
+
+    def __init__(self, template: str | os.PathLike, *, strict: bool = False) -> None:
+        try:
+            import docx  # python-docx
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError("Engine native cần python-docx và reportlab (pip install python-docx reportlab)") from e
+        self.document = docx.Document(str(template))
+        self.strict = strict
+        self.slots: List[Tuple[str, List[Any]]] = []   # (tên ô, các w:t chứa giá trị)
+        for part in self._xml_parts():
+            self._scan(part.element)
+
+    def _xml_parts(self):
+        seen = set()
+        for part in [self.document.part, *self.document.part.package.iter_parts()]:
+            element = getattr(part, "element", None)
+            name = str(getattr(part, "partname", ""))
+            if element is None or id(part) in seen:
+                continue
+            if part is self.document.part or re.search(r"/(header|footer)\d*\.xml$", name):
+                seen.add(id(part))
+                yield part
+
+    @staticmethod
+    def _new_text(parent, before=None) -> Any:
+        from docx.oxml import OxmlElement
+
+        r = OxmlElement("w:r")
+        t = OxmlElement("w:t")
+        r.append(t)
+        if before is not None:
+            before.addprevious(r)
+        else:
+            parent.append(r)
+        return t
+
+    def _scan(self, root) -> None:
+        # Content control (bỏ qua sdt nằm trong sdt đã nhận)
+        claimed = set()
+        for sdt in root.iter(_w("sdt")):
+            if any(a in claimed for a in sdt.iterancestors(_w("sdt"))):
+                continue
+            pr = sdt.find(_w("sdtPr"))
+            if pr is None:
+                continue
+            tag = pr.find(_w("tag"))
+            alias = pr.find(_w("alias"))
+            label = (tag.get(_w("val")) if tag is not None else None) or \
+                    (alias.get(_w("val")) if alias is not None else None)
+            content = sdt.find(_w("sdtContent"))
+            if not label or content is None:
+                continue
+            plc = pr.find(_w("showingPlcHdr"))
+            if plc is not None:
+                pr.remove(plc)
+            texts = list(content.iter(_w("t")))
+            if not texts:
+                para = content.find(_w("p"))
+                texts = [self._new_text(para if para is not None else content)]
+            claimed.add(sdt)
+            self.slots.append((label, texts))
+
+        # MERGEFIELD đơn
+        for fld in root.iter(_w("fldSimple")):
+            label = merge_field_name(fld.get(_w("instr")) or "")
+            if label:
+                texts = list(fld.iter(_w("t"))) or [self._new_text(fld)]
+                self.slots.append((label, texts))
+
+        # MERGEFIELD phức: begin -> instrText -> separate -> (kết quả) -> end
+        instr: List[str] = []
+        label: Optional[str] = None
+        state = None
+        texts: List[Any] = []
+        for r in root.iter(_w("r")):
+            fld = r.find(_w("fldChar"))
+            if fld is not None:
+                kind = fld.get(_w("fldCharType"))
+                if kind == "begin":
+                    instr, texts, state = [], [], "instr"
+                elif kind == "separate" and state == "instr":
+                    label, state = merge_field_name("".join(instr)), "result"
+                elif kind == "end" and state == "result":
+                    if label:
+                        if not texts:  # trường chưa có kết quả: thêm run ngay trước fldChar end
+                            texts = [self._new_text(r.getparent(), before=r)]
+                        self.slots.append((label, texts))
+                    state, label = None, None
+                continue
+            if state == "instr":
+                it = r.find(_w("instrText"))
+                if it is not None:
+                    instr.append(it.text or "")
+            elif state == "result":
+                texts.extend(r.iter(_w("t")))
+
+    def fields(self) -> List[str]:
+        return sorted({name for name, _t in self.slots}, key=str.casefold)
+
+    def fill(self, record: Mapping[str, Any]) -> None:
+        get = _lookup(record, self.strict)
+        values = [(texts, get(name)) for name, texts in self.slots]  # strict: lỗi trước khi sửa gì
+        for texts, value in values:
+            texts[0].text = value
+            if value != value.strip():
+                texts[0].set("{http://www.w3.org/XML/1998/namespace}space", "preserve")
+            for t in texts[1:]:
+                t.text = ""
+
+    def export(self, dst: str, **page_setup) -> int:
+        from .docx_native import render_docx
+        return render_docx(self.document, dst, **page_setup)
+
+
+def _render_native(template: str, records: _SharedRecords, progress: _Progress, strict: bool,
+                   page_setup: Dict[str, Any]) -> None:
+    tpl = NativeTemplate(template, strict=strict)
+    logger.debug("Mẫu %s: %d ô điền (%s)", template, len(tpl.slots), ", ".join(tpl.fields()))
+    _render_each(records, progress, tpl.fill, lambda dst: tpl.export(dst, **page_setup))
+
+
+# -------------------- Engine: COM (Word) --------------------
+def _word_slots(doc) -> List[Tuple[str, Any, bool]]:
+    """(tên, object COM, là content control?) trên mọi story (thân, header, footer, ...)."""
+    wdFieldMergeField = 59
+
+    slots: List[Tuple[str, Any, bool]] = []
+    for story in doc.StoryRanges:
+        rng = story
+        while rng is not None:
+            for cc in rng.ContentControls:
+                label = str(cc.Tag or "") or str(cc.Title or "")
+                if not label:
+                    continue
+                try:
+                    cc.LockContents = False
+                    cc.SetPlaceholderText(None, None, "")  # giá trị rỗng không hiện chữ gợi ý
+                except Exception:
+                    pass
+                slots.append((label, cc, True))
+            for field in rng.Fields:
+                if int(field.Type) == wdFieldMergeField:
+                    label = merge_field_name(str(field.Code.Text))
+                    if label:
+                        slots.append((label, field, False))
+            try:
+                rng = rng.NextStoryRange
+            except Exception:
+                rng = None
+    return slots
+
+
+def _render_with_word(word, template: str, records: _SharedRecords, progress: _Progress, strict: bool,
+                      page_setup: Dict[str, Any], optimize_for: str) -> None:
+    """Chạy trên 1 instance Word: mở mẫu 1 lần rồi rút bản ghi cho tới khi hết."""
+    doc = word.Documents.Open(os.path.abspath(template), ReadOnly=True, AddToRecentFiles=False)
+    try:
+        _apply_page_setup(doc, **page_setup)
+        slots = _word_slots(doc)
+
+        def fill(record: Mapping[str, Any]) -> None:
+            get = _lookup(record, strict)
+            values = [(obj, is_cc, get(label)) for label, obj, is_cc in slots]
+            for obj, is_cc, value in values:
+                if is_cc:
+                    obj.Range.Text = value
+                else:
+                    obj.Result.Text = value
+
+        _render_each(records, progress, fill,
+                     lambda dst: _export_document(doc, dst, optimize_for=optimize_for))
+    finally:
+        doc.Close(False)
+
+
+def _render_com(template: str, records: _SharedRecords, progress: _Progress, strict: bool,
+                page_setup: Dict[str, Any], optimize_for: str) -> None:
+    args = (template, records, progress, strict, page_setup, optimize_for)
+    pool = get_word_pool()
+    if pool is not None:
+        futures = [pool.submit(_render_with_word, *args) for _ in range(pool.size)]
+        for fut in futures:
+            fut.result()
+        return
+
+    import win32com.client as win32  # ModuleNotFoundError nếu chưa cài
+
+    word = win32.DispatchEx("Word.Application")
+    word.Visible = False
+    try:
+        _render_with_word(word, *args)
+    finally:
+        word.Quit()
+
+
+# -------------------- API chính --------------------
+def iter_records_csv(path: str | os.PathLike, encoding: str = "utf-8-sig", **kwargs) -> Iterator[Dict[str, str]]:
+    """Đọc CSV theo từng dòng (generator) để truyền cho render_template."""
+    import csv
+
+    with open(path, newline="", encoding=encoding) as fh:
+        yield from csv.DictReader(fh, **kwargs)
+
+
+def render_template(
+    template: str | os.PathLike,
+    records: Iterable[Mapping[str, Any]],
+    out_dir: str | os.PathLike,
+    *,
+    name: str = "{index:05d}",
+    engine: str = "auto",                       # "auto" | "com" | "native"
+    page_size: Optional[str] = None,
+    orientation: Optional[str] = None,
+    margins_mm: Optional[Tuple[float, float, float, float]] = None,
+    optimize_for: str = "Print",                # COM
+    strict: bool = False,
+    on_result: Optional[Callable[[MergeResult], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Trộn mỗi bản ghi vào mẫu rồi xuất 1 PDF vào out_dir (tên theo `name`, vd "{index:05d}_{HoTen}";
+    trùng tên trong cùng đợt -> thêm _1, _2... theo thứ tự bản ghi).
+
+    - Bản ghi thiếu trường: để trống (strict=True: bản ghi đó lỗi).
+    - Lỗi ở 1 bản ghi không dừng cả đợt; on_result(MergeResult) được gọi sau mỗi bản ghi
+      (có thể từ thread của pool Word).
+    Trả về {"documents", "ok", "failed", "seconds", "docs_per_min", "engine"}.
+    """
+    src = Path(template).resolve()
+    if src.suffix.lower() not in (".docx", ".docm", ".dotx", ".dotm"):
+        raise ValueError(f"Mẫu phải là file .docx/.dotx: {template}")
+    if not src.is_file():
+        raise FileNotFoundError(str(src))
+    out = Path(out_dir).resolve()
+    out.mkdir(parents=True, exist_ok=True)
+
+    page_setup = {"page_size": page_size, "orientation": orientation, "margins_mm": margins_mm}
+    shared = _SharedRecords(records, out, name)
+    progress = _Progress(on_result)
+
+    if engine not in ("auto", "com", "native"):
+        raise ValueError(f"Engine không hỗ trợ cho mẫu: {engine}")
+
+    t0 = time.perf_counter()
+    if engine == "com" or (engine == "auto" and (os.name == "nt" or get_word_pool() is not None)):
+        try:
+            _render_com(str(src), shared, progress, strict, page_setup, optimize_for)
+            engine = "com"
+        except ModuleNotFoundError:
+            if engine == "com":
+                raise
+            engine = "native"  # thiếu pywin32 (chưa bản ghi nào bị rút) -> native
+    else:
+        engine = "native"
+    if engine != "com":
+        _render_native(str(src), shared, progress, strict, page_setup)
+    seconds = time.perf_counter() - t0
+
+    done = progress.ok + progress.failed
+    stats = {
+        "documents": done,
+        "ok": progress.ok,
+        "failed": progress.failed,
+        "seconds": round(seconds, 3),
+        "docs_per_min": round(done * 60.0 / seconds, 1) if seconds > 0 else 0.0,
+        "engine": engine,
+    }
+    logger.info("Trộn %d bản ghi (%d lỗi) trong %.1fs: %.1f tài liệu/phút",
+                done, progress.failed, seconds, stats["docs_per_min"])
+    return stats
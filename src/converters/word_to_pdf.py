@@ -1,12 +1,18 @@
 # src/converters/word_to_pdf.py
 from __future__ import annotations
 
+import logging
 import os
 from pathlib import Path
-from typing import Iterable, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 
-# Hỗ trợ đuôi Word
-WORD_EXTS = {".docx", ".doc"}
+from ..registry import EXTENSIONS
+from .progress import ProgressFn, report
+
+logger = logging.getLogger(__name__)
+
+# Hỗ trợ đuôi Word (khai báo trong src/registry.py)
+WORD_EXTS = EXTENSIONS["word"]
 
 def is_word_file(path: str | os.PathLike) -> bool:
     return Path(path).suffix.lower() in WORD_EXTS
@@ -20,6 +26,24 @@ def _ensure_parent_dir(p: Path) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
 
 # -------------------- Engine: docx2pdf --------------------
+# HRESULT khi không tạo được Word.Application: máy không cài Word / đăng ký COM hỏng / Word không khởi động được
+_WORD_UNAVAILABLE_HRESULTS = {
+    -2147221005,  # CO_E_CLASSSTRING ("Invalid class string")
+    -2147221164,  # REGDB_E_CLASSNOTREG
+    -2146959355,  # CO_E_SERVER_EXEC_FAILURE
+}
+
+def _word_unavailable(exc: BaseException) -> bool:
+    """Lỗi cho biết engine Word không dùng được (thiếu thư viện, không có Word, COM Dispatch lỗi)."""
+    if isinstance(exc, (ModuleNotFoundError, NotImplementedError)):
+        # NotImplementedError: docx2pdf đã cài nhưng hệ điều hành không có Word (Linux)
+        return True
+    try:
+        import pywintypes  # type: ignore
+    except ImportError:
+        return False
+    return isinstance(exc, pywintypes.com_error) and bool(exc.args) and exc.args[0] in _WORD_UNAVAILABLE_HRESULTS
+
 def _word_to_pdf_docx2pdf(src: str, dst: str) -> None:
     """
     Dùng thư viện docx2pdf (trên Windows dùng Word ngầm).
@@ -29,6 +53,131 @@ def _word_to_pdf_docx2pdf(src: str, dst: str) -> None:
     convert(src, dst)
 
 # -------------------- Engine: COM (Word) --------------------
+# Pool Word "ấm" dùng chung (tắt mặc định). Bật bằng enable_word_pool().
+_WORD_POOL = None
+
+def enable_word_pool(size: int = 1, **kwargs):
+    """
+    Bật pool Word cho engine COM: word_to_pdf(engine="com") sẽ dùng lại các instance ấm
+    thay vì DispatchEx/Quit mỗi file. kwargs chuyển cho WordPool (max_jobs, max_memory_mb, dispatch…).
+    """
+    global _WORD_POOL
+    from .com_pool import WordPool
+
+    disable_word_pool()
+    _WORD_POOL = WordPool(size, **kwargs).start()
+    return _WORD_POOL
+
+def disable_word_pool() -> None:
+    """Tắt pool (Quit toàn bộ instance)."""
+    global _WORD_POOL
+    pool, _WORD_POOL = _WORD_POOL, None
+    if pool is not None:
+        pool.close()
+
+def get_word_pool():
+    return _WORD_POOL
+
+def _apply_page_setup(
+    doc,
+    page_size: Optional[str] = None,
+    orientation: Optional[str] = None,
+    margins_mm: Optional[Tuple[float, float, float, float]] = None,
+) -> None:
+    """Áp khổ giấy / hướng / lề lên tài liệu Word đang mở (không đổi gì nếu không truyền)."""
+    wdOrientPortrait = 0
+    wdOrientLandscape = 1
+    wdPaperA4 = 7
+    wdPaperLetter = 2
+
+    if not (page_size or orientation or margins_mm):
+        return
+    ps = doc.PageSetup
+    if page_size:
+        page_size_u = page_size.strip().lower()
+        if page_size_u == "a4":
+            ps.PaperSize = wdPaperA4
+        elif page_size_u == "letter":
+            ps.PaperSize = wdPaperLetter
+    if orientation:
+        ori_u = orientation.strip().lower()
+        ps.Orientation = wdOrientLandscape if ori_u == "landscape" else wdOrientPortrait
+    if margins_mm:
+        left, right, top, bottom = margins_mm
+        ps.LeftMargin = mm_to_pt(left)
+        ps.RightMargin = mm_to_pt(right)
+        ps.TopMargin = mm_to_pt(top)
+        ps.BottomMargin = mm_to_pt(bottom)
+
+def _export_document(
+    doc,
+    dst: str,
+    page_range: Optional[Tuple[int, int]] = None,
+    optimize_for: str = "Print",
+    open_after_export: bool = False,
+    pdf_a: bool = False,
+) -> None:
+    """ExportAsFixedFormat cho tài liệu Word đang mở (không đóng tài liệu)."""
+    # Constants Word
+    wdExportFormatPDF = 17
+    wdExportOptimizeForPrint = 0
+    wdExportOptimizeForOnScreen = 1
+    wdExportAllDocument = 0
+    wdExportFromTo = 3
+
+    # Export options
+    if page_range and page_range[0] >= 1 and page_range[1] >= page_range[0]:
+        export_range = wdExportFromTo
+        from_p, to_p = int(page_range[0]), int(page_range[1])
+    else:
+        export_range = wdExportAllDocument
+        from_p, to_p = 1, 1  # ignored
+
+    optimize = wdExportOptimizeForOnScreen if optimize_for.lower() == "screen" else wdExportOptimizeForPrint
+
+    doc.ExportAsFixedFormat(
+        OutputFileName=os.path.abspath(dst),
+        ExportFormat=wdExportFormatPDF,
+        OpenAfterExport=open_after_export,
+        OptimizeFor=optimize,
+        Range=export_range,
+        From=from_p,
+        To=to_p,
+        Item=0,  # wdExportDocumentContent
+        IncludeDocProps=True,
+        KeepIRM=True,
+        CreateBookmarks=1,
+        DocStructureTags=True,
+        BitmapMissingFonts=True,
+        UseISO19005_1=bool(pdf_a),
+    )
+
+def _export_with_word(
+    word,
+    src: str,
+    dst: str,
+    page_size: Optional[str] = None,
+    orientation: Optional[str] = None,
+    margins_mm: Optional[Tuple[float, float, float, float]] = None,
+    page_range: Optional[Tuple[int, int]] = None,
+    optimize_for: str = "Print",
+    open_after_export: bool = False,
+    pdf_a: bool = False,
+) -> None:
+    """Mở src trên instance Word có sẵn, áp page setup, export PDF rồi đóng tài liệu."""
+    doc = None
+    try:
+        doc = word.Documents.Open(os.path.abspath(src), ReadOnly=True, AddToRecentFiles=False)
+
+        # Page setup (tuỳ chọn)
+        _apply_page_setup(doc, page_size, orientation, margins_mm)
+
+        _export_document(doc, dst, page_range=page_range, optimize_for=optimize_for,
+                         open_after_export=open_after_export, pdf_a=pdf_a)
+    finally:
+        if doc is not None:
+            doc.Close(False)
+
 def _word_to_pdf_com(
     src: str,
     dst: str,
@@ -42,97 +191,212 @@ def _word_to_pdf_com(
 ) -> None:
     """
     Dùng Microsoft Word qua COM (pywin32). Cần Windows + MS Word + pip install pywin32
+    Nếu pool đang bật (enable_word_pool), chạy trên instance ấm của pool.
     """
-    import win32com.client as win32  # ModuleNotFoundError nếu chưa cài
+    options = dict(
+        page_size=page_size,
+        orientation=orientation,
+        margins_mm=margins_mm,
+        page_range=page_range,
+        optimize_for=optimize_for,
+        open_after_export=open_after_export,
+        pdf_a=pdf_a,
+    )
 
-    # Constants Word
-    wdExportFormatPDF = 17
-    wdExportOptimizeForPrint = 0
-    wdExportOptimizeForOnScreen = 1
-    wdExportAllDocument = 0
-    wdExportFromTo = 3
+    pool = _WORD_POOL
+    if pool is not None:
+        pool.run(_export_with_word, src, dst, **options)
+        return
 
-    wdOrientPortrait = 0
-    wdOrientLandscape = 1
-    wdPaperA4 = 7
-    wdPaperLetter = 2
+    import win32com.client as win32  # ModuleNotFoundError nếu chưa cài
 
     word = win32.DispatchEx("Word.Application")
     word.Visible = False
+    try:
+        _export_with_word(word, src, dst, **options)
+    finally:
+        word.Quit()
+
+# -------------------- Engine: COM, chia trang song song --------------------
+# Dưới ngưỡng này export 1 lần nhanh hơn (chi phí mở tài liệu ở mỗi instance + ghép PDF)
+CHUNK_MIN_PAGES = 40
+
+def _inspect_with_word(
+    word,
+    src: str,
+    page_size: Optional[str] = None,
+    orientation: Optional[str] = None,
+    margins_mm: Optional[Tuple[float, float, float, float]] = None,
+) -> Tuple[int, List[Tuple[str, int]]]:
+    """Số trang (sau page setup) và danh sách (tiêu đề, cấp 1..9) theo thứ tự trong tài liệu."""
+    wdStatisticPages = 2
+    wdGoToHeading = 11
+    wdGoToNext = 2
+
     doc = None
     try:
-        doc = word.Documents.Open(os.path.abspath(src))
+        doc = word.Documents.Open(os.path.abspath(src), ReadOnly=True, AddToRecentFiles=False)
+        _apply_page_setup(doc, page_size, orientation, margins_mm)
+        pages = int(doc.ComputeStatistics(wdStatisticPages))
 
-        # Page setup (tuỳ chọn)
-        if page_size or orientation or margins_mm:
-            ps = doc.PageSetup
-            if page_size:
-                page_size_u = page_size.strip().lower()
-                if page_size_u == "a4":
-                    ps.PaperSize = wdPaperA4
-                elif page_size_u == "letter":
-                    ps.PaperSize = wdPaperLetter
-            if orientation:
-                ori_u = orientation.strip().lower()
-                ps.Orientation = wdOrientLandscape if ori_u == "landscape" else wdOrientPortrait
-            if margins_mm:
-                left, right, top, bottom = margins_mm
-                ps.LeftMargin = mm_to_pt(left)
-                ps.RightMargin = mm_to_pt(right)
-                ps.TopMargin = mm_to_pt(top)
-                ps.BottomMargin = mm_to_pt(bottom)
-
-        # Export options
-        if page_range and page_range[0] >= 1 and page_range[1] >= page_range[0]:
-            export_range = wdExportFromTo
-            from_p, to_p = int(page_range[0]), int(page_range[1])
-        else:
-            export_range = wdExportAllDocument
-            from_p, to_p = 1, 1  # ignored
-
-        optimize = wdExportOptimizeForOnScreen if optimize_for.lower() == "screen" else wdExportOptimizeForPrint
-
-        doc.ExportAsFixedFormat(
-            OutputFileName=os.path.abspath(dst),
-            ExportFormat=wdExportFormatPDF,
-            OpenAfterExport=open_after_export,
-            OptimizeFor=optimize,
-            Range=export_range,
-            From=from_p,
-            To=to_p,
-            Item=0,  # wdExportDocumentContent
-            IncludeDocProps=True,
-            KeepIRM=True,
-            CreateBookmarks=1,
-            DocStructureTags=True,
-            BitmapMissingFonts=True,
-            UseISO19005_1=bool(pdf_a),
-        )
+        headings: List[Tuple[str, int]] = []
+        rng = doc.Range(0, 0)
+        last = -1
+        while True:
+            rng = rng.GoTo(What=wdGoToHeading, Which=wdGoToNext)
+            start = int(rng.Start)
+            if start <= last:
+                break  # GoTo không tiến thêm: đã hết tiêu đề
+            last = start
+            para = rng.Paragraphs(1)
+            level = int(para.OutlineLevel)
+            if 1 <= level <= 9:
+                text = str(para.Range.Text).strip("\r\n\x07 ")
+                if text:
+                    headings.append((text, level))
+        return pages, headings
     finally:
         if doc is not None:
             doc.Close(False)
-        word.Quit()
+
+def _page_ranges(pages: int, chunks: int) -> List[Tuple[int, int]]:
+    """Chia 1..pages thành tối đa `chunks` đoạn liên tiếp gần bằng nhau."""
+    chunks = max(1, min(chunks, pages))
+    size, extra = divmod(pages, chunks)
+    ranges, start = [], 1
+    for i in range(chunks):
+        end = start + size - 1 + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+def _word_to_pdf_com_chunked(
+    src: str,
+    dst: str,
+    chunks: int,
+    page_size: Optional[str] = None,
+    orientation: Optional[str] = None,
+    margins_mm: Optional[Tuple[float, float, float, float]] = None,
+    optimize_for: str = "Print",
+    open_after_export: bool = False,
+    progress: Optional[ProgressFn] = None,
+) -> None:
+    """
+    Export tài liệu lớn trên nhiều instance Word cùng lúc: đọc số trang, chia thành `chunks` đoạn,
+    mỗi đoạn export (wdExportFromTo) ra 1 file tạm, rồi ghép bằng merge_pdfs. Mục lục được dựng lại
+    theo cấp tiêu đề của tài liệu gốc nên chương cắt ngang ranh giới vẫn đúng cây.
+    Dùng pool đang bật nếu có >= 2 instance, không thì mở pool tạm `chunks` instance.
+    progress: báo mỗi khi 1 đoạn export xong, bước cuối là ghép PDF.
+    """
+    import tempfile
+    from concurrent.futures import as_completed, wait
+
+    from ..pdf.merge import merge_pdfs
+
+    setup = dict(page_size=page_size, orientation=orientation, margins_mm=margins_mm)
+    pool, own_pool = _WORD_POOL, False
+    if pool is None or pool.size < 2:
+        from .com_pool import WordPool
+        pool, own_pool = WordPool(chunks, max_jobs=0).start(), True
+    try:
+        pages, headings = pool.run(_inspect_with_word, src, **setup)
+        if pages < max(CHUNK_MIN_PAGES, 2):
+            pool.run(_export_with_word, src, dst, optimize_for=optimize_for,
+                     open_after_export=open_after_export, **setup)
+            return
+
+        ranges = _page_ranges(pages, min(chunks, pool.size))
+        with tempfile.TemporaryDirectory(prefix=".chunks-", dir=str(Path(dst).parent)) as tmp:
+            parts = [os.path.join(tmp, f"part{i:03d}.pdf") for i in range(len(ranges))]
+            futures = [pool.submit(_export_with_word, src, part, page_range=r,
+                                   optimize_for=optimize_for, **setup)
+                       for part, r in zip(parts, ranges)]
+            total = len(futures) + 1
+            try:
+                for done, fut in enumerate(as_completed(futures), 1):
+                    fut.result()
+                    report(progress, done, total, f"{done}/{len(futures)}")
+            except BaseException:
+                # lỗi/huỷ: bỏ đoạn chưa chạy, chờ đoạn đang export xong rồi mới xoá thư mục tạm
+                for fut in futures:
+                    fut.cancel()
+                wait(futures)
+                raise
+            merge_pdfs(parts, dst, outline_levels=headings)
+            report(progress, total, total, "merge")
+    finally:
+        if own_pool:
+            pool.close()
+
+    if open_after_export:
+        os.startfile(dst)  # type: ignore[attr-defined]  # chỉ có trên Windows (COM)
+
+# -------------------- Engine: native (python-docx + reportlab) --------------------
+def _word_to_pdf_native(
+    src: str,
+    dst: str,
+    page_size: Optional[str] = None,
+    orientation: Optional[str] = None,
+    margins_mm: Optional[Tuple[float, float, float, float]] = None,
+) -> None:
+    """
+    Không cần Microsoft Word (chạy được trên Linux). Chỉ hỗ trợ .docx.
+    pip install python-docx reportlab
+    """
+    if Path(src).suffix.lower() != ".docx":
+        raise ValueError(f"Engine native chỉ hỗ trợ .docx: {src}")
+    from .docx_native import render_docx
+    render_docx(src, dst, page_size=page_size, orientation=orientation, margins_mm=margins_mm)
+
+# -------------------- Engine: LibreOffice (listener headless) --------------------
+def _word_to_pdf_libreoffice(
+    src: str,
+    dst: str,
+    page_range: Optional[Tuple[int, int]] = None,
+    pdf_a: bool = False,
+) -> None:
+    """Gửi tới listener soffice --headless dùng chung (xem converters/libreoffice.py)."""
+    from .libreoffice import libreoffice_to_pdf
+
+    filter_data = {}
+    if page_range and page_range[0] >= 1 and page_range[1] >= page_range[0]:
+        filter_data["PageRange"] = f"{int(page_range[0])}-{int(page_range[1])}"
+    if pdf_a:
+        filter_data["SelectPdfVersion"] = 1  # PDF/A-1b
+    libreoffice_to_pdf(src, dst, filter_data=filter_data or None)
 
 # -------------------- API chính: word_to_pdf --------------------
 def word_to_pdf(
     src_path: str,
     dst_path: Optional[str] = None,
-    engine: str = "auto",                       # "auto" | "docx2pdf" | "com"
+    engine: str = "auto",                       # "auto" | "docx2pdf" | "com" | "native" | "libreoffice"
     *,
-    page_size: Optional[str] = None,            # áp dụng cho COM
-    orientation: Optional[str] = None,          # áp dụng cho COM
-    margins_mm: Optional[Tuple[float, float, float, float]] = None,  # áp dụng cho COM
-    page_range: Optional[Tuple[int, int]] = None,                    # áp dụng cho COM
+    page_size: Optional[str] = None,            # áp dụng cho COM, native
+    orientation: Optional[str] = None,          # áp dụng cho COM, native
+    margins_mm: Optional[Tuple[float, float, float, float]] = None,  # áp dụng cho COM, native
+    page_range: Optional[Tuple[int, int]] = None,                    # COM, libreoffice (native: bỏ qua + cảnh báo)
     optimize_for: str = "Print",                # COM: "Print" | "Screen"
     open_after_export: bool = False,            # COM
-    pdf_a: bool = False                         # COM
+    pdf_a: bool = False,                        # COM, libreoffice (native: bỏ qua + cảnh báo)
+    chunks: int = 0,                            # COM: export song song trên N instance Word rồi ghép
+    progress: Optional[ProgressFn] = None,      # callback(done, total, label), xem converters/progress.py
+    stats: Optional[dict] = None,               # cache bật: stats["cache"] = "hit" | "miss"
 ) -> str:
     """
     Chuyển 1 file Word (.doc/.docx) -> PDF. Trả về đường dẫn PDF.
 
     - Giữ tương thích: có thể truyền dst_path như tham số thứ 2 (positional), hoặc keyword.
-    - engine="auto": thử docx2pdf trước, nếu thiếu thì dùng COM.
+    - engine="auto": thử docx2pdf trước, nếu thiếu thì dùng COM; không có Word (vd: Linux, hoặc COM Dispatch
+      báo chưa cài Word) thì dùng native.
+      Pool Word đang bật (enable_word_pool) -> dùng thẳng pool.
+    - engine="native": python-docx + reportlab, không cần Microsoft Word (chỉ .docx).
+    - engine="libreoffice": listener soffice --headless chạy sẵn (cần cài LibreOffice).
     - Khi cần khống chế layout in ấn (A4, lề, xoay ngang…), dùng engine="com" kèm các tuỳ chọn.
+    - chunks=N (COM, tài liệu >= CHUNK_MIN_PAGES trang): chia trang thành N đoạn, export song song trên
+      N instance Word rồi ghép PDF (giữ mục lục). Bỏ qua khi có page_range hoặc pdf_a.
+    - Nếu cache bật (src.cache.enable_cache), file đã chuyển với cùng nội dung + tuỳ chọn được lấy lại từ cache.
+    - progress: 0/1 trước khi export và 1/1 khi xong; với chunks thì báo theo từng đoạn. Ném
+      ConversionCancelled trong callback để huỷ (Word không ngắt được giữa 1 lần export).
     """
     if not is_word_file(src_path):
         raise ValueError(f"Không phải file Word hợp lệ: {src_path}")
@@ -149,13 +413,23 @@ def word_to_pdf(
         try:
             _word_to_pdf_docx2pdf(str(src), str(dst))
             return True
-        except ModuleNotFoundError:
+        except Exception as e:
+            if not _word_unavailable(e):
+                raise
             return False
 
-    if engine == "docx2pdf":
-        if not try_docx2pdf():
-            raise ModuleNotFoundError("Chưa cài docx2pdf (pip install docx2pdf)")
-    elif engine == "com":
+    def run_com() -> None:
+        if chunks > 1 and not page_range and not pdf_a:
+            _word_to_pdf_com_chunked(
+                str(src), str(dst), chunks,
+                page_size=page_size,
+                orientation=orientation,
+                margins_mm=margins_mm,
+                optimize_for=optimize_for,
+                open_after_export=open_after_export,
+                progress=progress,
+            )
+            return
         _word_to_pdf_com(
             str(src), str(dst),
             page_size=page_size,
@@ -166,18 +440,48 @@ def word_to_pdf(
             open_after_export=open_after_export,
             pdf_a=pdf_a,
         )
-    else:
-        # auto
-        if not try_docx2pdf():
-            _word_to_pdf_com(
-                str(src), str(dst),
-                page_size=page_size,
-                orientation=orientation,
-                margins_mm=margins_mm,
-                page_range=page_range,
-                optimize_for=optimize_for,
-                open_after_export=open_after_export,
-                pdf_a=pdf_a,
-            )
 
-    return str(dst)
+    def run_native() -> None:
+        ignored = [name for name, value in (("page_range", page_range), ("pdf_a", pdf_a)) if value]
+        if ignored:
+            # engine native chưa hỗ trợ: PDF ra là toàn bộ tài liệu, PDF thường
+            logger.warning("Engine native bỏ qua %s cho %s (cần engine com hoặc libreoffice)",
+                           ", ".join(ignored), src.name)
+        _word_to_pdf_native(str(src), str(dst), page_size=page_size,
+                            orientation=orientation, margins_mm=margins_mm)
+
+    def convert() -> str:
+        if engine == "docx2pdf":
+            if not try_docx2pdf():
+                raise ModuleNotFoundError("Chưa cài docx2pdf (pip install docx2pdf)")
+        elif engine == "com":
+            run_com()
+        elif engine == "native":
+            run_native()
+        elif engine == "libreoffice":
+            _word_to_pdf_libreoffice(str(src), str(dst), page_range=page_range, pdf_a=pdf_a)
+        elif _WORD_POOL is not None:
+            # auto + pool đang bật (vd: warm-up của app): dùng instance Word ấm, không để docx2pdf mở Word mới
+            run_com()
+        else:
+            # auto
+            if not try_docx2pdf():
+                if os.name == "nt":
+                    try:
+                        run_com()
+                        return str(dst)
+                    except Exception as e:
+                        if not _word_unavailable(e):
+                            raise
+                        # thiếu pywin32 / máy không có Word -> native
+                run_native()
+        return str(dst)
+
+    from ..cache import cached_convert
+    options = {"page_size": page_size, "orientation": orientation, "margins_mm": margins_mm,
+               "page_range": page_range, "optimize_for": optimize_for, "pdf_a": pdf_a,
+               "chunks": chunks > 1}
+    report(progress, 0, 1, src.name)
+    out = cached_convert("word", src, dst, engine, options, convert, stats)
+    report(progress, 1, 1, src.name)
+    return out
@@ -0,0 +1,723 @@
+# src/converters/xlsx_native.py
+"""
+Engine thuần Python cho Excel (.xlsx/.xlsm/.xltx/.xltm), không cần Microsoft Excel:
+openpyxl (read_only=True) đọc từng hàng, reportlab canvas vẽ và đẩy trang ngay khi đầy.
+
+Bố cục bám theo setup_sheet của engine COM: vừa 1 trang theo chiều ngang (FitToPagesWide=1),
+khổ ngang (Landscape), cùng lề, canh giữa ngang, căn giữa dọc trong ô và cùng mô hình chiều cao
+hàng theo metric font (row_height.RowHeightPlanner). Ô gộp (chữ vẽ trên cả dải cột), chiều cao hàng
+tuỳ chỉnh, hàng/cột ẩn và chữ tràn sang ô trống bên phải được xử lý như Excel; native_layout_issues()
+liệt kê các điểm có thể còn lệch để engine "auto" chọn Excel thay vì native.
+
+Bộ nhớ phẳng theo số hàng: độ rộng cột đọc từ phần đầu XML của sheet (trước <sheetData>),
+sau đó các hàng được stream và phân trang ngay, không nạp cả sheet. Ô gộp và thuộc tính hàng
+(chiều cao tuỳ chỉnh, ẩn) được quét thẳng trên byte XML, không parse thêm một lượt cả sheet.
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import logging
+import posixpath
+import re
+import unicodedata
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+from .excel_to_pdf import _points
+from .fonts import font_variant, resolve_font
+from .progress import ProgressFn, report
+from .row_height import CELL_PAD_X, CellText, RowHeightPlanner, font_metrics, wrap_lines
+
+logger = logging.getLogger(__name__)
+
+NATIVE_EXTS = {".xlsx", ".xlsm", ".xltx", ".xltm"}
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# Trang in giống setup_sheet: A4 ngang, lề 0.25" trái/phải, 0.5" trên/dưới
+PAGE_W, PAGE_H = 841.89, 595.28
+MARGIN_LR = _points(0.25)
+MARGIN_TB = _points(0.5)
+
+DEFAULT_COL_WIDTH = 8.43        # đơn vị ký tự (Calibri 11)
+DEFAULT_ROW_HEIGHT = 15.0       # pt
+DEFAULT_FONT_SIZE = 11.0
+
+
+def _m(tag: str) -> str:
+    return f"{{{MAIN_NS}}}{tag}"
+
+
+def col_width_pt(width_chars: float) -> float:
+    """Độ rộng cột Excel (ký tự) -> pt, theo công thức pixel của Excel (~7px/ký tự + 5px)."""
+    return (float(width_chars) * 7.0 + 5.0) * 0.75
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch.upper()) - 64)
+    return n
+
+
+def parse_ref(ref: str) -> Tuple[int, int, int, int]:
+    """'B2:K200' -> (min_row, min_col, max_row, max_col); 'A1' -> (1, 1, 1, 1)."""
+    parts = ref.replace("$", "").split(":")
+
+    def split(cell: str) -> Tuple[int, int]:
+        letters = "".join(ch for ch in cell if ch.isalpha())
+        digits = "".join(ch for ch in cell if ch.isdigit())
+        return int(digits or 1), _col_index(letters or "A")
+
+    r1, c1 = split(parts[0])
+    r2, c2 = split(parts[-1])
+    return min(r1, r2), min(c1, c2), max(r1, r2), max(c1, c2)
+
+
+# -------------------- đọc cấu trúc workbook (không qua openpyxl) --------------------
+def workbook_sheets(zf: zipfile.ZipFile) -> List[Dict[str, str]]:
+    """[{name, member, state, print_area}] theo thứ tự tab, đọc từ workbook.xml + rels."""
+    rels_root = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {}
+    for rel in rels_root.findall(f"{{{PKG_REL_NS}}}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            member = target.lstrip("/")
+        else:
+            member = posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = member
+
+    wb_root = ET.fromstring(zf.read("xl/workbook.xml"))
+    print_areas: Dict[int, str] = {}
+    names = wb_root.find(_m("definedNames"))
+    for dn in (names if names is not None else []):
+        if dn.get("name") == "_xlnm.Print_Area" and dn.get("localSheetId") is not None:
+            print_areas[int(dn.get("localSheetId"))] = (dn.text or "").strip()
+    out = []
+    sheets = wb_root.find(_m("sheets"))
+    for i, sh in enumerate(sheets if sheets is not None else []):
+        rid = sh.get(f"{{{REL_NS}}}id")
+        out.append({
+            "name": sh.get("name", ""),
+            "member": targets.get(rid, ""),
+            "state": sh.get("state", "visible"),
+            "print_area": print_areas.get(i),
+        })
+    return out
+
+
+def sheet_has_drawing(zf: zipfile.ZipFile, member: str) -> bool:
+    """Sheet có drawing (biểu đồ, hình, ảnh) - xem trong rels của sheet, không đọc dữ liệu."""
+    rels = posixpath.join(posixpath.dirname(member), "_rels", posixpath.basename(member) + ".rels")
+    try:
+        root = ET.fromstring(zf.read(rels))
+    except KeyError:
+        return False
+    return any(rel.get("Type", "").endswith("/drawing")
+               for rel in root.findall(f"{{{PKG_REL_NS}}}Relationship"))
+
+
+def read_sheet_header(zf: zipfile.ZipFile, member: str) -> Dict:
+    """
+    Đọc phần đầu XML của 1 worksheet (dừng ở <sheetData>): dimension, độ rộng cột,
+    chiều cao hàng mặc định. Không đọc dữ liệu hàng nên chi phí gần như cố định.
+    """
+    info: Dict = {"dimension": None, "cols": [], "default_row_height": DEFAULT_ROW_HEIGHT,
+                  "default_col_width": None}
+    with zf.open(member) as fh:
+        for event, elem in ET.iterparse(fh, events=("start",)):
+            tag = elem.tag
+            if tag == _m("sheetData"):
+                break
+            if tag == _m("dimension"):
+                info["dimension"] = elem.get("ref")
+            elif tag == _m("sheetFormatPr"):
+                if elem.get("defaultRowHeight"):
+                    info["default_row_height"] = float(elem.get("defaultRowHeight"))
+                if elem.get("defaultColWidth"):
+                    info["default_col_width"] = float(elem.get("defaultColWidth"))
+                elif elem.get("baseColWidth"):
+                    info["default_col_width"] = float(elem.get("baseColWidth")) + 0.71
+            elif tag == _m("col"):
+                info["cols"].append((
+                    int(elem.get("min", "1")),
+                    int(elem.get("max", "1")),
+                    float(elem.get("width", DEFAULT_COL_WIDTH)),
+                    elem.get("hidden") in ("1", "true"),
+                ))
+    return info
+
+
+def sheet_has_cells(zf: zipfile.ZipFile, member: str) -> bool:
+    """Sheet có ít nhất 1 ô có giá trị/công thức? Dừng ở ô đầu tiên tìm thấy (hoặc hết <sheetData>)."""
+    with zf.open(member) as fh:
+        for event, elem in ET.iterparse(fh, events=("end",)):
+            tag = elem.tag
+            if tag == _m("c"):
+                if elem.find(_m("v")) is not None or elem.find(_m("is")) is not None \
+                        or elem.find(_m("f")) is not None:
+                    return True
+                elem.clear()
+            elif tag == _m("row"):
+                elem.clear()
+            elif tag == _m("sheetData"):
+                return False
+    return False
+
+
+def sheet_is_blank(zf: zipfile.ZipFile, member: str) -> bool:
+    """Worksheet không in ra gì: không ô có dữ liệu và không drawing (sheet trống vẫn ghi dimension "A1")."""
+    try:
+        dim = read_sheet_header(zf, member)["dimension"]
+    except (KeyError, ET.ParseError):
+        return False  # không đọc được: để engine tự xử lý
+    if dim:
+        r1, c1, r2, c2 = parse_ref(dim)
+        if r1 != r2 or c1 != c2:
+            return False
+    return not sheet_has_cells(zf, member) and not sheet_has_drawing(zf, member)
+
+
+# -------------------- bố cục: ô gộp, hàng tuỳ chỉnh/ẩn, xuống dòng, chữ tràn --------------------
+def _flag(value: Optional[str]) -> bool:
+    return value in ("1", "true")
+
+
+def _wrap_styles(zf: zipfile.ZipFile) -> set:
+    """Chỉ số cellXfs có wrapText/shrinkToFit hoặc căn ngang khác trái/mặc định."""
+    try:
+        root = ET.fromstring(zf.read("xl/styles.xml"))
+    except KeyError:
+        return set()
+    xfs = root.find(_m("cellXfs"))
+    out = set()
+    for i, xf in enumerate(xfs if xfs is not None else []):
+        al = xf.find(_m("alignment"))
+        if al is not None and (_flag(al.get("wrapText")) or _flag(al.get("shrinkToFit"))
+                               or al.get("horizontal") not in (None, "general", "left")):
+            out.add(i)
+    return out
+
+
+def _shared_string_lengths(zf: zipfile.ZipFile, needed: set) -> Dict[int, int]:
+    """Độ dài các shared string cần xét (dừng khi đã đọc tới chỉ số lớn nhất cần)."""
+    out: Dict[int, int] = {}
+    if not needed:
+        return out
+    last = max(needed)
+    try:
+        fh = zf.open("xl/sharedStrings.xml")
+    except KeyError:
+        return out
+    with fh:
+        i = 0
+        for event, elem in ET.iterparse(fh, events=("end",)):
+            if elem.tag != _m("si"):
+                continue
+            if i in needed:
+                out[i] = len("".join(t.text or "" for t in elem.iter(_m("t"))))
+            elem.clear()
+            if i >= last:
+                break
+            i += 1
+    return out
+
+
+# thẻ mở <row ...> / <mergeCell ...> (có thể kèm tiền tố namespace) và thuộc tính của chúng
+_ROW_TAG = re.compile(rb"<(?:[\w.-]+:)?row\b([^>]*)>")
+_MERGE_TAG = re.compile(rb"<(?:[\w.-]+:)?mergeCell\b([^>]*)>")
+_ATTR = re.compile(rb"([\w:.-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+_SCAN_CHUNK = 1 << 20
+
+
+def _scan_tags(zf: zipfile.ZipFile, member: str, pattern: "re.Pattern") -> Iterator[Dict[str, str]]:
+    """
+    Duyệt thẳng byte XML đã giải nén (từng khối 1 MB), trả thuộc tính của từng thẻ khớp pattern.
+    Không dựng cây phần tử nên rẻ hơn nhiều so với iterparse và không giữ lại gì sau mỗi khối.
+    """
+    with zf.open(member) as fh:
+        tail = b""
+        while True:
+            chunk = fh.read(_SCAN_CHUNK)
+            buf = tail + chunk
+            # thẻ có thể bị cắt ở cuối khối: giữ phần từ dấu "<" cuối cùng cho khối sau
+            cut = len(buf) if not chunk else buf.rfind(b"<")
+            if cut < 0:
+                cut = len(buf)
+            for m in pattern.finditer(buf, 0, cut):
+                yield {k.decode().rpartition(":")[2]: (v1 if v1 is not None else v2 or b"").decode()
+                       for k, v1, v2 in _ATTR.findall(m.group(1))}
+            if not chunk:
+                return
+            tail = buf[cut:]
+
+
+def read_merges(zf: zipfile.ZipFile, member: str) -> List[Tuple[int, int, int, int]]:
+    """Các dải ô gộp (<mergeCells> nằm sau <sheetData>): quét byte, không parse dữ liệu hàng."""
+    return [parse_ref(a["ref"]) for a in _scan_tags(zf, member, _MERGE_TAG) if a.get("ref")]
+
+
+def iter_row_attrs(zf: zipfile.ZipFile, member: str) -> Iterator[Tuple[int, Optional[float], bool]]:
+    """(hàng, chiều cao customHeight | None, ẩn?) theo thứ tự <row>, stream song song với lượt vẽ."""
+    row = 0
+    for a in _scan_tags(zf, member, _ROW_TAG):
+        row = int(float(a.get("r") or row + 1))
+        height = float(a["ht"]) if _flag(a.get("customHeight")) and a.get("ht") else None
+        yield row, height, _flag(a.get("hidden"))
+
+
+def read_sheet_layout(zf: zipfile.ZipFile, member: str, cells: bool = False) -> Dict:
+    """
+    Quét 1 lượt XML sheet: {"merges": [(r1, c1, r2, c2)], "row_heights": {hàng: pt} (customHeight),
+    "hidden_rows": {hàng}}. cells=True: thêm "wrap" (ô có style xuống dòng/căn giữa/phải) và
+    "overflow" (chuỗi dài hơn độ rộng cột, sẽ tràn sang ô bên cạnh) - chỉ dùng cho sheet nhỏ.
+    """
+    layout: Dict = {"merges": [], "row_heights": {}, "hidden_rows": set()}
+    wrap_styles = _wrap_styles(zf) if cells else set()
+    strings: List[Tuple[int, int, object]] = []  # (cột, hàng, chỉ số shared string | độ dài)
+    wrap = False
+    row = 0
+    sheet_data = None
+    with zf.open(member) as fh:
+        for event, elem in ET.iterparse(fh, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == _m("sheetData"):
+                    sheet_data = elem
+                elif tag == _m("row"):
+                    row = int(elem.get("r") or row + 1)
+                    if _flag(elem.get("customHeight")) and elem.get("ht"):
+                        layout["row_heights"][row] = float(elem.get("ht"))
+                    if _flag(elem.get("hidden")):
+                        layout["hidden_rows"].add(row)
+                elif tag == _m("mergeCell") and elem.get("ref"):
+                    layout["merges"].append(parse_ref(elem.get("ref")))
+            elif tag == _m("c") and cells:
+                if elem.get("s") and int(elem.get("s")) in wrap_styles and (
+                        elem.find(_m("v")) is not None or elem.find(_m("is")) is not None):
+                    wrap = True
+                t = elem.get("t")
+                col = parse_ref(elem.get("r"))[1] if elem.get("r") else 0
+                if t == "s" and elem.findtext(_m("v")):
+                    strings.append((col, row, int(elem.findtext(_m("v")))))
+                elif t == "inlineStr":
+                    strings.append((col, row, -len("".join(x.text or "" for x in elem.iter(_m("t"))))))
+                elif t == "str" and elem.findtext(_m("v")):
+                    strings.append((col, row, -len(elem.findtext(_m("v")))))
+                elem.clear()
+            elif tag == _m("row"):
+                elem.clear()
+                if sheet_data is not None:  # gỡ hàng đã xong khỏi <sheetData>: bộ nhớ không tăng theo số hàng
+                    sheet_data.remove(elem)
+    if cells:
+        header = read_sheet_header(zf, member)
+        default = header.get("default_col_width") or DEFAULT_COL_WIDTH
+        widths = {}
+        for lo, hi, w, _hidden in header.get("cols", []):
+            for c in range(lo, hi + 1):
+                widths[c] = w
+        lengths = _shared_string_lengths(zf, {i for _c, _r, i in strings if i >= 0})
+        layout["wrap"] = wrap
+        layout["overflow"] = any((lengths.get(i, 0) if i >= 0 else -i) > widths.get(c, default)
+                                 for c, _r, i in strings)
+    return layout
+
+
+def native_layout_issues(zf: zipfile.ZipFile, member: str) -> List[str]:
+    """
+    Lý do bản native có thể khác Excel (rỗng = an toàn để bỏ qua Excel): ô gộp, chiều cao hàng tuỳ chỉnh,
+    hàng ẩn, chữ xuống dòng/căn lề, chữ tràn sang ô bên cạnh. Dùng khi định tuyến "auto" (excel_to_pdf).
+    """
+    layout = read_sheet_layout(zf, member, cells=True)
+    issues = []
+    if layout["merges"]:
+        issues.append("ô gộp")
+    if layout["row_heights"]:
+        issues.append("chiều cao hàng tuỳ chỉnh")
+    if layout["hidden_rows"]:
+        issues.append("hàng ẩn")
+    if layout["wrap"]:
+        issues.append("xuống dòng/căn lề")
+    if layout["overflow"]:
+        issues.append("chữ tràn ô")
+    return issues
+
+
+# -------------------- định dạng giá trị ô --------------------
+def format_value(value, number_format: str = "General") -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, _dt.datetime):
+        if value.time() == _dt.time(0):
+            return value.strftime("%d/%m/%Y")
+        return value.strftime("%d/%m/%Y %H:%M")
+    if isinstance(value, (_dt.date, _dt.time)):
+        return value.strftime("%d/%m/%Y") if isinstance(value, _dt.date) else value.strftime("%H:%M")
+    if isinstance(value, (int, float)):
+        fmt = number_format or "General"
+        if "%" in fmt:
+            decimals = fmt.split(".")[1].count("0") if "." in fmt else 0
+            return f"{value * 100:.{decimals}f}%"
+        if fmt != "General" and "0" in fmt:
+            decimals = fmt.split(".")[1].split(";")[0].count("0") if "." in fmt else 0
+            grouped = "," in fmt
+            return f"{value:,.{decimals}f}" if grouped else f"{value:.{decimals}f}"
+        if isinstance(value, float):
+            return f"{value:.10g}"
+        return str(value)
+    return unicodedata.normalize("NFC", str(value))
+
+
+def _fit_text(text: str, font: str, size: float, width: float) -> str:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    if stringWidth(text, font, size) <= width:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if stringWidth(text[:mid], font, size) <= width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def _hex_color(color) -> Optional[str]:
+    try:
+        rgb = color.rgb if color is not None else None
+    except Exception:
+        return None
+    if isinstance(rgb, str) and len(rgb) in (6, 8):
+        return "#" + rgb[-6:]  # bỏ kênh alpha (ARGB)
+    return None
+
+
+# -------------------- renderer --------------------
+class _Cell:
+    __slots__ = ("text", "font", "size", "bold", "italic", "color", "fill", "h_align", "wrap",
+                 "border", "numeric")
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.font = ""
+        self.size = DEFAULT_FONT_SIZE
+        self.bold = self.italic = self.wrap = self.numeric = False
+        self.color: Optional[str] = None
+        self.fill: Optional[str] = None
+        self.h_align: Optional[str] = None
+        self.border = (False, False, False, False)  # left, right, top, bottom
+
+
+class SheetRenderer:
+    """Vẽ 1 worksheet (stream từng hàng) lên canvas reportlab đang mở."""
+
+    def __init__(self, canvas, zf: zipfile.ZipFile, ws, member: str) -> None:
+        self.c = canvas
+        self.ws = ws
+        self.header = read_sheet_header(zf, member) if member else {
+            "dimension": None, "cols": [], "default_row_height": DEFAULT_ROW_HEIGHT, "default_col_width": None}
+        self.default_font = resolve_font("Calibri")
+        self._font_cache: Dict[Tuple[Optional[str], bool, bool], str] = {}
+        self.planner = RowHeightPlanner(self.header.get("default_row_height") or DEFAULT_ROW_HEIGHT)
+        # openpyxl read_only không đọc ô gộp, chiều cao hàng tuỳ chỉnh, hàng ẩn: ô gộp quét trước
+        # (nằm sau <sheetData>), thuộc tính hàng đọc song song trong lượt vẽ (render)
+        self.zf = zf
+        self.member = member
+        self.merges = read_merges(zf, member) if member else []
+        self.pages = 0
+        self.rows = 0
+
+    def _font(self, name: Optional[str], bold: bool, italic: bool) -> str:
+        key = (name, bold, italic)
+        f = self._font_cache.get(key)
+        if f is None:
+            f = font_variant(resolve_font(name) if name else self.default_font, bold, italic)
+            self._font_cache[key] = f
+        return f
+
+    def _bounds(self) -> Optional[Tuple[int, int, int, int]]:
+        dim = self.header.get("dimension")
+        if dim and ":" in dim:
+            return parse_ref(dim)
+        try:
+            # dimension thiếu/sai (một số thư viện ghi 'A1') -> openpyxl quét để tính lại
+            self.ws.reset_dimensions()
+            ref = self.ws.calculate_dimension(force=True)
+            return parse_ref(ref)
+        except Exception:
+            return parse_ref(dim) if dim else None
+
+    def _col_widths(self, min_col: int, max_col: int) -> List[Tuple[int, float]]:
+        default = self.header.get("default_col_width") or DEFAULT_COL_WIDTH
+        widths = {c: default for c in range(min_col, max_col + 1)}
+        hidden = set()
+        for lo, hi, w, is_hidden in self.header.get("cols", []):
+            for c in range(max(lo, min_col), min(hi, max_col) + 1):
+                widths[c] = w
+                if is_hidden:
+                    hidden.add(c)
+        return [(c, col_width_pt(widths[c])) for c in range(min_col, max_col + 1) if c not in hidden]
+
+    def _read_cell(self, cell) -> _Cell:
+        out = _Cell()
+        value = getattr(cell, "value", None)
+        if value is None:
+            return out
+        try:
+            fmt = cell.number_format
+        except Exception:
+            fmt = "General"
+        out.text = format_value(value, fmt)
+        out.numeric = isinstance(value, (int, float, _dt.date, _dt.time)) and not isinstance(value, bool)
+        try:
+            f = cell.font
+            out.font = f.name or ""
+            out.size = float(f.sz or DEFAULT_FONT_SIZE)
+            out.bold = bool(f.b)
+            out.italic = bool(f.i)
+            out.color = _hex_color(f.color) if f.color is not None and f.color.type == "rgb" else None
+        except Exception:
+            pass
+        try:
+            al = cell.alignment
+            out.h_align = al.horizontal
+            out.wrap = bool(al.wrap_text)
+        except Exception:
+            pass
+        try:
+            fill = cell.fill
+            if fill.fill_type == "solid" and fill.fgColor is not None and fill.fgColor.type == "rgb":
+                out.fill = _hex_color(fill.fgColor)
+        except Exception:
+            pass
+        try:
+            b = cell.border
+            out.border = tuple(bool(side is not None and side.style) for side in (b.left, b.right, b.top, b.bottom))
+        except Exception:
+            pass
+        if "\n" in out.text or "\r" in out.text:
+            out.wrap = True
+        return out
+
+    def _row_height(self, cells: List[_Cell], widths: List[float]) -> float:
+        """Chiều cao hàng theo metric font (cùng planner với engine COM)."""
+        return self.planner.row_height(
+            CellText(cell.text, w, cell.font or "Calibri", cell.size, cell.bold, cell.italic, cell.wrap)
+            for cell, w in zip(cells, widths) if cell.text
+        )
+
+    def render(self) -> int:
+        """Vẽ sheet; trả về số trang đã tạo."""
+        bounds = self._bounds()
+        if bounds is None:
+            return 0
+        min_row, min_col, max_row, max_col = bounds
+        cols = self._col_widths(min_col, max_col)
+        if not cols:
+            return 0
+        col_idx = [c for c, _ in cols]
+        widths = [w for _, w in cols]
+        total_w = sum(widths)
+
+        avail_w = PAGE_W - 2 * MARGIN_LR
+        avail_h = PAGE_H - 2 * MARGIN_TB
+        scale = min(1.0, avail_w / total_w) if total_w else 1.0   # FitToPagesWide=1
+        x0 = MARGIN_LR + (avail_w - total_w * scale) / 2.0      # CenterHorizontally
+        page_rows_h = avail_h / scale
+
+        c = self.c
+        y = 0.0  # toạ độ trong sheet (xuống dưới), tính từ mép trên vùng in
+        page_open = False
+
+        def open_page():
+            nonlocal page_open, y
+            c.setPageSize((PAGE_W, PAGE_H))
+            c.saveState()
+            c.translate(x0, PAGE_H - MARGIN_TB)
+            c.scale(scale, scale)
+            page_open = True
+            y = 0.0
+
+        def close_page():
+            nonlocal page_open
+            c.restoreState()
+            c.showPage()  # trang được ghi ngay, không giữ lại trong bộ nhớ dạng đối tượng
+            self.pages += 1
+            page_open = False
+
+        pos = {ci: i for i, ci in enumerate(col_idx)}
+        row_attrs = iter_row_attrs(self.zf, self.member) if self.member else iter(())
+        attr = next(row_attrs, None)
+        # ô gộp: chữ của ô đầu vẽ trên cả dải cột (cột ẩn bỏ qua), ô bị gộp không có chữ riêng
+        anchors: Dict[int, List[Tuple[int, int, float]]] = {}
+        covered: Dict[int, set] = {}
+        for r1, c1, r2, c2 in self.merges:
+            visible = [pos[ci] for ci in range(c1, c2 + 1) if ci in pos]
+            if not visible:
+                continue
+            anchors.setdefault(r1, []).append((pos[c1] if c1 in pos else visible[0], c1,
+                                               sum(widths[i] for i in visible)))
+            for r in range(r1, r2 + 1):
+                covered.setdefault(r, set()).update(visible)
+
+        first = True
+        rows_iter: Iterator = self.ws.iter_rows(min_row=min_row, max_row=max_row,
+                                                min_col=min_col, max_col=max_col)
+        for r, row in enumerate(rows_iter, start=min_row):  # read_only điền cả hàng trống
+            while attr is not None and attr[0] < r:
+                attr = next(row_attrs, None)
+            custom, hidden = (attr[1], attr[2]) if attr is not None and attr[0] == r else (None, False)
+            if hidden:
+                continue
+            by_col = {}
+            for cell in row:
+                col = getattr(cell, "column", None)
+                if col is not None:
+                    by_col[col] = cell
+            spans: Dict[int, float] = {}
+            for i, c1, span in anchors.get(r, ()):
+                spans[i] = span
+                if c1 not in pos and c1 in by_col:  # ô đầu nằm ở cột ẩn: lấy chữ của nó
+                    by_col[col_idx[i]] = by_col[c1]
+            cells = [self._read_cell(by_col[ci]) if ci in by_col else _Cell() for ci in col_idx]
+            merged = covered.get(r, set())
+            for i in merged - set(spans):
+                cells[i].text = ""
+            height = custom
+            if height is None:
+                height = self._row_height(cells, [spans.get(i, w) for i, w in enumerate(widths)])
+            self.rows += 1
+
+            if not page_open:
+                open_page()
+            elif y + height > page_rows_h and not first:
+                close_page()
+                open_page()
+            first = False
+            self._draw_row(cells, widths, y, min(height, page_rows_h), spans, merged)
+            y += height
+
+        if page_open:
+            close_page()
+        return self.pages
+
+    def _draw_row(self, cells: List[_Cell], widths: List[float], y: float, height: float,
+                  spans: Optional[Dict[int, float]] = None, merged: Optional[set] = None) -> None:
+        """spans: {vị trí ô đầu dải gộp: độ rộng cả dải}; merged: vị trí các ô thuộc dải gộp trong hàng."""
+        c = self.c
+        spans = spans or {}
+        merged = merged or set()
+        top = -y
+        bottom = -y - height
+        # nền + viền trước, chữ sau: chữ tràn/gộp không bị nền của ô bên phải che
+        x = 0.0
+        for cell, w in zip(cells, widths):
+            if cell.fill:
+                c.setFillColor(cell.fill)
+                c.rect(x, bottom, w, height, stroke=0, fill=1)
+            if any(cell.border):
+                c.setStrokeColor("#000000")
+                c.setLineWidth(0.5)
+                left, right, t, b = cell.border
+                if left:
+                    c.line(x, bottom, x, top)
+                if right:
+                    c.line(x + w, bottom, x + w, top)
+                if t:
+                    c.line(x, top, x + w, top)
+                if b:
+                    c.line(x, bottom, x + w, bottom)
+            x += w
+        x = 0.0
+        for i, (cell, w) in enumerate(zip(cells, widths)):
+            if i in spans:
+                w = spans[i]
+            if cell.text:
+                font = self._font(cell.font, cell.bold, cell.italic)
+                c.setFillColor(cell.color or "#000000")
+                c.setFont(font, cell.size)
+                inner = max(w - 2 * CELL_PAD_X, 1)
+                if cell.wrap:
+                    lines = wrap_lines(cell.text, cell.font or "Calibri", cell.size, inner, cell.bold, cell.italic)
+                else:
+                    # chữ tràn sang các ô trống bên phải như Excel
+                    span = inner
+                    j = i + 1
+                    while (j < len(cells) and not cells[j].text and j not in merged and i not in spans
+                           and cell.h_align in (None, "general", "left")):
+                        span += widths[j]
+                        j += 1
+                    lines = [_fit_text(cell.text, font, cell.size, span)]
+                m = font_metrics(cell.font or "Calibri", cell.size, cell.bold, cell.italic)
+                leading = m.line_height
+                block = leading * len(lines)
+                # căn giữa dọc (VerticalAlignment = Center)
+                ty = top - (height - block) / 2.0 - m.ascent
+                align = cell.h_align or ("right" if cell.numeric else "left")
+                for line in lines:
+                    if align in ("center", "centerContinuous"):
+                        c.drawCentredString(x + w / 2.0, ty, line)
+                    elif align == "right":
+                        c.drawRightString(x + w - CELL_PAD_X, ty, line)
+                    else:
+                        c.drawString(x + CELL_PAD_X, ty, line)
+                    ty -= leading
+            x += widths[i]
+
+
+def render_workbook(src: str, dst: str, sheet=None, *, stats: Optional[dict] = None,
+                    progress: Optional[ProgressFn] = None) -> int:
+    """
+    Render workbook -> PDF bằng openpyxl (read_only) + reportlab. Trả về tổng số trang.
+    sheet: None = mọi sheet đang hiện; int (1-based như COM) hoặc tên sheet.
+    progress: báo trước/sau mỗi sheet; huỷ (ConversionCancelled) xảy ra trước c.save() nên không ghi file.
+    """
+    try:
+        import openpyxl
+        from reportlab.pdfgen import canvas as rl_canvas
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("Engine native cho Excel cần openpyxl và reportlab (pip install openpyxl reportlab)") from e
+
+    sheet_stats: list = []
+    if stats is not None:
+        stats["sheets"] = sheet_stats
+
+    wb = openpyxl.load_workbook(src, read_only=True, data_only=True)
+    total = 0
+    try:
+        with zipfile.ZipFile(src) as zf:
+            entries = workbook_sheets(zf)
+            if sheet is None:
+                targets = [e for e in entries if e["state"] == "visible" and not sheet_is_blank(zf, e["member"])]
+            elif isinstance(sheet, int):
+                if not 1 <= sheet <= len(entries):
+                    raise ValueError(f"sheet={sheet} ngoài phạm vi: {src} có {len(entries)} sheet (đánh số từ 1)")
+                targets = [entries[sheet - 1]]
+            else:
+                targets = [e for e in entries if e["name"] == str(sheet)]
+                if not targets:
+                    raise ValueError(f"Không có sheet {sheet!r} trong {src}")
+
+            c = rl_canvas.Canvas(str(dst), pagesize=(PAGE_W, PAGE_H), pageCompression=1)
+            for i, entry in enumerate(targets):
+                report(progress, i, len(targets), entry["name"])
+                ws = wb[entry["name"]]
+                if not hasattr(ws, "iter_rows"):
+                    continue  # chartsheet
+                r = SheetRenderer(c, zf, ws, entry["member"])
+                pages = r.render()
+                total += pages
+                sheet_stats.append({"sheet": entry["name"], "rows": r.rows, "pages": pages})
+            if total == 0:
+                c.showPage()  # PDF hợp lệ cần ít nhất 1 trang
+            c.save()
+            report(progress, len(targets), len(targets), "")
+    finally:
+        wb.close()
+    return total
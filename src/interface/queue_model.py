@@ -0,0 +1,244 @@
+# src/interface/queue_model.py
+"""
+Hàng đợi nhiều tệp dùng chung cho app Word / Excel / ảnh (không chứa widget; QueuePanel trong
+tkinter_ui.py chỉ vẽ lại từ model này).
+
+- add_paths(): tệp lẻ hoặc thư mục (quét đệ quy, lọc theo loại của app) -> mỗi tệp 1 dòng; tên PDF đích
+  đặt giống batch CLI (src.batch.plan_jobs: giữ thư mục con) và không trùng với dòng khác / file có sẵn.
+- Chạy trên BackgroundWorker: tối đa `concurrency` tệp cùng lúc, đổi được khi đang chạy. Tệp Word chạy
+  tối đa 1 tệp 1 lúc (docx2pdf / COM dùng chung 1 instance Word), trừ khi pool Word đang bật: tối đa số instance.
+- Mỗi dòng: trạng thái, tiến độ (progress của converter), thời gian, lỗi; retry_failed() chạy lại dòng lỗi/huỷ.
+- subscribe(fn): fn(item) được gọi trên luồng Tk mỗi khi 1 dòng thay đổi (item=None: thêm/xoá dòng).
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from ..batch import collect_inputs, plan_jobs
+from ..registry import classify
+from .tkinter_ui import BackgroundWorker, Job
+
+logger = logging.getLogger(__name__)
+
+# Số luồng tối đa của worker; số tệp chạy cùng lúc thực tế do ConversionQueue.concurrency quyết định
+MAX_CONCURRENCY = 8
+
+QUEUE_STATES = ("waiting", "running", "done", "failed", "cancelled")
+
+ConvertFn = Callable[[Path, Path, Callable[[int, int, str], None]], Optional[str]]
+
+
+@dataclass
+class QueueItem:
+    id: int
+    src: Path
+    dst: Path
+    kind: Optional[str] = None
+    status: str = "waiting"
+    done: int = 0
+    total: int = 0
+    step: str = ""
+    seconds: float = 0.0
+    attempts: int = 0
+    output: Optional[str] = None
+    error: Optional[str] = None
+    job: Optional[Job] = field(default=None, repr=False)
+
+    @property
+    def fraction(self) -> float:
+        if self.status == "done":
+            return 1.0
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return self.job.elapsed if self.status == "running" and self.job is not None else self.seconds
+
+
+class ConversionQueue:
+    """
+    queue = ConversionQueue(root, lambda src, dst, progress: excel_to_pdf(str(src), str(dst), progress=progress),
+                            out_dir, kinds=("excel",))
+    queue.add_paths(["a.xlsx", "thư_mục/"]); queue.start()
+    """
+
+    def __init__(self, root, convert: ConvertFn, out_dir: str | os.PathLike, *,
+                 kinds: Optional[Sequence[str]] = None, concurrency: int = 1) -> None:
+        self.convert = convert
+        self.out_dir = Path(out_dir)
+        self.kinds = tuple(kinds) if kinds else None
+        self.items: List[QueueItem] = []
+        self.running = False
+        self._concurrency = max(1, min(MAX_CONCURRENCY, concurrency))
+        self._worker = BackgroundWorker(root, max_workers=MAX_CONCURRENCY)
+        self._listeners: List[Callable[[Optional[QueueItem]], None]] = []
+        self._ids = itertools.count(1)
+        self._reserved: set = set()
+
+    # ---- theo dõi ----
+    def subscribe(self, fn: Callable[[Optional[QueueItem]], None]) -> None:
+        self._listeners.append(fn)
+
+    def unsubscribe(self, fn: Callable[[Optional[QueueItem]], None]) -> None:
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, item: Optional[QueueItem]) -> None:
+        for fn in list(self._listeners):
+            try:
+                fn(item)
+            except Exception:
+                logger.exception("Listener hàng đợi lỗi")
+
+    # ---- thêm / xoá dòng ----
+    def accepts(self, path: str | os.PathLike) -> bool:
+        kind = classify(path)
+        return kind is not None and (self.kinds is None or kind in self.kinds)
+
+    def add_paths(self, paths: Iterable[str | os.PathLike], recursive: bool = True) -> List[QueueItem]:
+        """Tệp hoặc thư mục; bỏ tệp không đúng loại và tệp đã có trong hàng đợi. Trả về các dòng mới."""
+        queued = {os.path.normcase(str(it.src.resolve())) for it in self.items}
+        inputs = [(p, base) for p, base in collect_inputs([str(p) for p in paths], recursive=recursive)
+                  if self.accepts(p) and os.path.normcase(str(p.resolve())) not in queued]
+        added = []
+        for job in plan_jobs(inputs, self.out_dir):
+            item = QueueItem(next(self._ids), job.src, self._reserve(job.dst), job.kind)
+            self.items.append(item)
+            added.append(item)
+        if added:
+            self._notify(None)
+            self._pump()
+        return added
+
+    def _reserve(self, dst: Path) -> Path:
+        """Tên đích chưa bị dòng khác giữ và chưa có trên đĩa (a.pdf -> a_1.pdf...)."""
+        cand, i = dst, 1
+        while os.path.normcase(str(cand)) in self._reserved or cand.exists():
+            cand = dst.with_name(f"{dst.stem}_{i}{dst.suffix}")
+            i += 1
+        self._reserved.add(os.path.normcase(str(cand)))
+        return cand
+
+    def remove_finished(self) -> int:
+        """Xoá các dòng đã xong (giữ dòng lỗi/huỷ để còn thử lại)."""
+        keep = [it for it in self.items if it.status != "done"]
+        removed = len(self.items) - len(keep)
+        self.items = keep
+        if removed:
+            self._notify(None)
+        return removed
+
+    # ---- điều khiển ----
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    def set_concurrency(self, n: int) -> None:
+        """Có hiệu lực ngay: tăng thì chạy thêm dòng chờ; giảm thì chờ dòng đang chạy xong bớt."""
+        self._concurrency = max(1, min(MAX_CONCURRENCY, int(n)))
+        self._pump()
+
+    def start(self) -> None:
+        self.running = True
+        self._pump()
+
+    def cancel_all(self) -> None:
+        """Dừng hàng đợi: dòng chờ -> huỷ, dòng đang chạy dừng ở lần báo tiến độ kế tiếp."""
+        self.running = False
+        for it in self.items:
+            if it.status == "waiting":
+                it.status = "cancelled"
+                self._notify(it)
+            elif it.status == "running" and it.job is not None:
+                it.job.cancel()
+
+    def retry_failed(self) -> int:
+        n = 0
+        for it in self.items:
+            if it.status in ("failed", "cancelled"):
+                it.status, it.error, it.done, it.total, it.step = "waiting", None, 0, 0, ""
+                n += 1
+                self._notify(it)
+        if n:
+            self.start()
+        return n
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        self._worker.shutdown()
+
+    # ---- thống kê ----
+    def counts(self) -> Dict[str, int]:
+        out = {s: 0 for s in QUEUE_STATES}
+        for it in self.items:
+            out[it.status] += 1
+        return out
+
+    @property
+    def active(self) -> bool:
+        return any(it.status == "running" for it in self.items)
+
+    @staticmethod
+    def word_limit() -> int:
+        """Số tệp Word chạy cùng lúc: 1 (docx2pdf / COM không có pool dùng chung 1 Word), có pool thì = số instance."""
+        from ..converters.word_to_pdf import get_word_pool
+
+        pool = get_word_pool()
+        return max(1, min(MAX_CONCURRENCY, pool.size)) if pool is not None else 1
+
+    # ---- chạy ----
+    def _pump(self) -> None:
+        if not self.running:
+            return
+        slots = self._concurrency - sum(1 for it in self.items if it.status == "running")
+        word_slots = None
+        if any(it.kind == "word" and it.status == "waiting" for it in self.items):
+            word_slots = self.word_limit() - sum(1 for it in self.items
+                                                 if it.kind == "word" and it.status == "running")
+        for it in self.items:
+            if slots <= 0:
+                break
+            if it.status == "waiting":
+                if it.kind == "word":
+                    if word_slots <= 0:
+                        continue
+                    word_slots -= 1
+                self._launch(it)
+                slots -= 1
+        if not self.active and not any(it.status == "waiting" for it in self.items):
+            self.running = False
+
+    def _launch(self, item: QueueItem) -> None:
+        item.status, item.attempts = "running", item.attempts + 1
+        item.done, item.total, item.step = 0, 0, ""
+        convert, src, dst = self.convert, item.src, item.dst
+
+        def run(progress):
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            return convert(src, dst, progress)
+
+        item.job = self._worker.submit(run, label=src.name,
+                                       on_progress=lambda job, it=item: self._on_progress(it, job),
+                                       on_done=lambda job, it=item: self._on_done(it, job))
+        self._notify(item)
+
+    def _on_progress(self, item: QueueItem, job: Job) -> None:
+        item.done, item.total, item.step = job.done, job.total, job.step
+        self._notify(item)
+
+    def _on_done(self, item: QueueItem, job: Job) -> None:
+        item.seconds = job.elapsed
+        if job.state == "done":
+            item.status, item.output = "done", str(job.result or item.dst)
+        elif job.state == "cancelled":
+            item.status = "cancelled"
+        else:
+            item.status, item.error = "failed", f"{type(job.error).__name__}: {job.error}"
+            logger.warning("Hàng đợi: %s lỗi (lần %d): %s", item.src, item.attempts, item.error)
+        self._notify(item)
+        self._pump()
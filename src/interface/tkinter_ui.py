@@ -1,12 +1,346 @@
 from __future__ import annotations
 
+import itertools
+import logging
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
-from typing import Callable, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from tkinter import ttk, messagebox, filedialog
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from ..converters.progress import ConversionCancelled
+
+if TYPE_CHECKING:
+    from .queue_model import ConversionQueue, QueueItem
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """
+    1 việc chạy nền. state: "pending" -> "running" -> "done" | "error" | "cancelled".
+    done/total/step: tiến độ mới nhất mà converter báo về (total=0: chưa biết tổng).
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, fn: Callable[[Callable[[int, int, str], None]], Any], label: str = "") -> None:
+        self.id = next(Job._ids)
+        self.fn = fn
+        self.label = label
+        self.state = "pending"
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done = 0
+        self.total = 0
+        self.step = ""
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.future: Optional[Future] = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def fraction(self) -> float:
+        if self.state == "done":
+            return 1.0
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def cancel(self) -> None:
+        """Chưa chạy -> bỏ luôn; đang chạy -> dừng ở lần báo tiến độ kế tiếp (ConversionCancelled)."""
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.state = "cancelled"
+
+
+class BackgroundWorker:
+    """
+    Chạy converter ngoài luồng Tk (ThreadPoolExecutor). Luồng worker KHÔNG đụng widget: tiến độ và kết
+    quả được đẩy vào queue.Queue, luồng Tk lấy ra bằng root.after(poll_ms) rồi gọi on_progress/on_done.
+
+        job = worker.submit(lambda progress: excel_to_pdf(src, dst, progress=progress),
+                            on_progress=..., on_done=...)
+        job.cancel()
+    """
+
+    def __init__(self, root: tk.Misc, max_workers: int = 1, *, poll_ms: int = 50) -> None:
+        self.root = root
+        self.max_workers = max(1, max_workers)
+        self.poll_ms = poll_ms
+        self._events: "queue.Queue[Tuple[str, Job]]" = queue.Queue()
+        # job chưa báo xong -> (job, on_progress, on_done); chỉ đọc/ghi trên luồng Tk
+        self._active: Dict[int, Tuple[Job, Optional[Callable[[Job], None]], Optional[Callable[[Job], None]]]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._polling = False
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._active)
+
+    def submit(self, fn: Callable[[Callable[[int, int, str], None]], Any], *, label: str = "",
+               on_progress: Optional[Callable[[Job], None]] = None,
+               on_done: Optional[Callable[[Job], None]] = None) -> Job:
+        """fn(progress) chạy trên luồng worker; on_progress/on_done(job) luôn chạy trên luồng Tk."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="convert",
+                                                initializer=_init_worker_thread)
+        job = Job(fn, label)
+        self._active[job.id] = (job, on_progress, on_done)
+        job.future = self._executor.submit(self._run, job)
+        # cả khi job bị huỷ trước lúc chạy (_run không được gọi) vẫn báo "done" về luồng Tk
+        job.future.add_done_callback(lambda _f, job=job: self._events.put(("done", job)))
+        self._schedule_poll()
+        return job
+
+    def cancel_all(self) -> None:
+        for job, _p, _d in list(self._active.values()):
+            job.cancel()
+
+    def shutdown(self) -> None:
+        """Huỷ mọi job và dừng nhận việc (không chờ job đang chạy: nó tự dừng ở lần báo tiến độ kế tiếp)."""
+        self.cancel_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ---- luồng worker ----
+    def _run(self, job: Job) -> None:
+        job.state, job.started = "running", time.monotonic()
+
+        def progress(done: int, total: int, step: str = "") -> None:
+            if job.cancel_requested:
+                raise ConversionCancelled(job.label)
+            job.done, job.total, job.step = done, total, step
+            self._events.put(("progress", job))
+
+        try:
+            job.result = job.fn(progress)
+            job.state = "done"
+        except ConversionCancelled:
+            job.state = "cancelled"
+        except BaseException as e:
+            job.error, job.state = e, "error"
+        finally:
+            job.finished = time.monotonic()
+
+    # ---- luồng Tk ----
+    def _schedule_poll(self) -> None:
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self) -> None:
+        self._polling = False
+        updated: Dict[int, Job] = {}
+        finished = []
+        while True:
+            try:
+                kind, job = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                updated[job.id] = job  # gộp: mỗi job chỉ vẽ lại 1 lần / nhịp poll
+            else:
+                finished.append(job)
+        for job in updated.values():
+            entry = self._active.get(job.id)
+            if entry and entry[1] and job.state == "running":
+                self._safe_call(entry[1], job)
+        for job in finished:
+            entry = self._active.pop(job.id, None)
+            if job.future is not None and job.future.cancelled():
+                job.state = "cancelled"
+            if entry and entry[2]:
+                self._safe_call(entry[2], job)
+        if self._active:
+            self._schedule_poll()
+
+    @staticmethod
+    def _safe_call(fn: Callable[[Job], None], job: Job) -> None:
+        try:
+            fn(job)
+        except Exception:
+            logger.exception("Callback UI lỗi (job %s)", job.label)
+
+
+_QUEUE_STATUS_TEXT = {
+    "waiting": "⏳ Chờ",
+    "running": "🔄 Đang chạy",
+    "done": "✅ Xong",
+    "failed": "❌ Lỗi",
+    "cancelled": "⏹️ Đã huỷ",
+}
+
+
+def _format_seconds(sec: float) -> str:
+    if sec <= 0:
+        return ""
+    m, s = divmod(int(round(sec)), 60)
+    return f"{m}:{s:02d}" if m else f"{sec:.1f}s"
+
+
+class QueuePanel(ttk.Frame):
+    """
+    Bảng hàng đợi nhiều tệp: mỗi dòng 1 tệp (trạng thái, tiến độ, thời gian, kết quả/lỗi), chọn số tệp
+    chạy cùng lúc, thử lại dòng lỗi. Chỉ vẽ lại từ ConversionQueue (queue_model.py), không giữ trạng thái riêng.
+    """
+
+    COLUMNS = (("file", "Tệp", 220), ("status", "Trạng thái", 110), ("progress", "Tiến độ", 110),
+               ("time", "Thời gian", 70), ("result", "Kết quả", 260))
+    TICK_MS = 500
+
+    def __init__(self, master: tk.Misc, model: "ConversionQueue", *,
+                 filetypes: Tuple[Tuple[str, str], ...] = (("All files", "*.*"),)) -> None:
+        super().__init__(master, padding=10)
+        self.model = model
+        self.filetypes = filetypes
+        self._ticking = False
+
+        bar = ttk.Frame(self)
+        bar.pack(fill=tk.X)
+        ttk.Button(bar, text="Thêm tệp…", command=self._add_files).pack(side=tk.LEFT)
+        ttk.Button(bar, text="Thêm thư mục…", command=self._add_folder).pack(side=tk.LEFT, padx=(6, 0))
+
+        from .queue_model import MAX_CONCURRENCY
+        ttk.Label(bar, text="Chạy cùng lúc:").pack(side=tk.LEFT, padx=(16, 4))
+        self.concurrency_var = tk.IntVar(value=model.concurrency)
+        spin = ttk.Spinbox(bar, from_=1, to=MAX_CONCURRENCY, width=4, textvariable=self.concurrency_var,
+                           command=self._apply_concurrency)
+        spin.pack(side=tk.LEFT)
+        spin.bind("<Return>", lambda _e: self._apply_concurrency())
+        spin.bind("<FocusOut>", lambda _e: self._apply_concurrency())
+
+        ttk.Button(bar, text="Xoá dòng xong", command=model.remove_finished).pack(side=tk.RIGHT)
+        ttk.Button(bar, text="Huỷ tất cả", command=model.cancel_all).pack(side=tk.RIGHT, padx=(0, 6))
+        ttk.Button(bar, text="Thử lại lỗi", command=model.retry_failed).pack(side=tk.RIGHT, padx=(0, 6))
+        ttk.Button(bar, text="▶ Bắt đầu", command=self._start, style="Accent.TButton").pack(side=tk.RIGHT, padx=(0, 6))
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True, pady=(8, 0))
+        self.tree = ttk.Treeview(body, columns=[c[0] for c in self.COLUMNS], show="headings", selectmode="extended")
+        for key, text, width in self.COLUMNS:
+            self.tree.heading(key, text=text)
+            self.tree.column(key, width=width, stretch=key in ("file", "result"))
+        scroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.summary_label = ttk.Label(self, text="", style="Hint.TLabel")
+        self.summary_label.pack(anchor=tk.W, pady=(6, 0))
+
+        model.subscribe(self._on_change)
+        self.bind("<Destroy>", self._on_destroy, add="+")
+        self._rebuild()
+
+    # ---- thao tác ----
+    def _add_files(self) -> None:
+        paths = filedialog.askopenfilenames(parent=self, title="Chọn nhiều tệp…", filetypes=list(self.filetypes))
+        if paths:
+            self._report_added(self.model.add_paths(paths), len(paths))
+
+    def _add_folder(self) -> None:
+        folder = filedialog.askdirectory(parent=self, title="Chọn thư mục (quét cả thư mục con)…")
+        if folder:
+            self._report_added(self.model.add_paths([folder], recursive=True), None)
+
+    def _report_added(self, added: list, picked: Optional[int]) -> None:
+        if not added:
+            messagebox.showinfo("Hàng đợi", "Không có tệp mới phù hợp để thêm.", parent=self)
+        elif picked is not None and len(added) < picked:
+            self.summary_label.config(text=f"Đã thêm {len(added)}/{picked} tệp (bỏ tệp trùng hoặc sai loại).")
+
+    def _apply_concurrency(self) -> None:
+        try:
+            self.model.set_concurrency(int(self.concurrency_var.get()))
+        except (tk.TclError, ValueError):
+            pass
+        self.concurrency_var.set(self.model.concurrency)
+
+    def _start(self) -> None:
+        self._apply_concurrency()
+        self.model.start()
+
+    # ---- vẽ lại ----
+    def _on_change(self, item: Optional["QueueItem"]) -> None:
+        if item is None:
+            self._rebuild()
+        else:
+            self._update_row(item)
+            self._update_summary()
+        if self.model.active and not self._ticking:
+            self._ticking = True
+            self.after(self.TICK_MS, self._tick)
+
+    def _tick(self) -> None:
+        # cập nhật cột thời gian của dòng đang chạy
+        self._ticking = False
+        if not self.winfo_exists():
+            return  # cửa sổ hàng đợi đã đóng (model vẫn chạy tiếp)
+        for it in self.model.items:
+            if it.status == "running":
+                self._update_row(it)
+        if self.model.active:
+            self._ticking = True
+            self.after(self.TICK_MS, self._tick)
+
+    def _rebuild(self) -> None:
+        self.tree.delete(*self.tree.get_children())
+        for it in self.model.items:
+            self.tree.insert("", tk.END, iid=str(it.id), values=self._row_values(it))
+        self._update_summary()
+
+    def _update_row(self, item: "QueueItem") -> None:
+        iid = str(item.id)
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=self._row_values(item))
+
+    @staticmethod
+    def _row_values(it: "QueueItem") -> Tuple[str, ...]:
+        if it.status == "running":
+            progress = f"{it.done}/{it.total} {it.step}".strip() if it.total else (it.step or "…")
+        elif it.status == "done":
+            progress = "100%"
+        else:
+            progress = ""
+        result = it.error if it.status == "failed" else (it.output or "")
+        if it.attempts > 1 and it.status != "waiting":
+            result = f"(lần {it.attempts}) {result}"
+        return (it.src.name, _QUEUE_STATUS_TEXT.get(it.status, it.status), progress,
+                _format_seconds(it.elapsed), result)
+
+    def _update_summary(self) -> None:
+        c = self.model.counts()
+        self.summary_label.config(
+            text=f"Tổng {len(self.model.items)} • đang chạy {c['running']} • chờ {c['waiting']} • "
+                 f"xong {c['done']} • lỗi {c['failed']} • huỷ {c['cancelled']}")
+
+    def _on_destroy(self, event) -> None:
+        if event.widget is self:
+            self.model.unsubscribe(self._on_change)
+
+
+def _init_worker_thread() -> None:
+    # COM cần CoInitialize trên từng luồng (docx2pdf / Word / Excel không qua pool)
+    from ..converters.com_pool import _co_initialize
+    _co_initialize()
+
 
 class ConverterUI:
     """
     Reusable Tkinter UI. Business logic nằm trong callbacks do main truyền vào.
+    Việc chuyển đổi chạy nền qua run_in_background (BackgroundWorker) để cửa sổ không bị đơ.
     """
 
     def __init__(
@@ -23,6 +357,7 @@ class ConverterUI:
         supported_extensions: Tuple[str, ...] = (".doc", ".docx"),
         window_title: Optional[str] = None,
         window_size: str = "680x420",
+        queue_factory: Optional[Callable[[], "ConversionQueue"]] = None,
     ) -> None:
         self.root = root
         self.on_select = on_select
@@ -40,14 +375,24 @@ class ConverterUI:
         self.select_btn: Optional[ttk.Button] = None
         self.convert_btn: Optional[ttk.Button] = None
         self.download_btn: Optional[ttk.Button] = None
+        self.cancel_btn: Optional[ttk.Button] = None
         self.quit_btn: Optional[ttk.Button] = None
 
+        self.worker = BackgroundWorker(root)
+        self.current_job: Optional[Job] = None
+
+        # Hàng đợi nhiều tệp (tuỳ chọn): model tạo khi mở lần đầu, sống tiếp khi đóng cửa sổ hàng đợi
+        self._queue_factory = queue_factory
+        self.queue: Optional["ConversionQueue"] = None
+        self._queue_window: Optional[tk.Toplevel] = None
+
         self._setup_window(window_title or self._title_text.strip("🔄 ").strip())
         self.root.geometry(window_size)
         self.root.minsize(560, 360)
 
         self._setup_styles()
         self._build_layout()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
     # Public API
     def set_progress(self, value: float) -> None:
@@ -74,6 +419,85 @@ class ConverterUI:
         if quit_btn is not None and self.quit_btn is not None:
             self._set_btn_state(self.quit_btn, quit_btn)
 
+    def run_in_background(
+        self,
+        fn: Callable[[Callable[[int, int, str], None]], Any],
+        *,
+        on_success: Callable[[Any], None],
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        on_cancelled: Optional[Callable[[], None]] = None,
+        busy_text: str = "🔄 Đang chuyển đổi…",
+        label: str = "",
+    ) -> Job:
+        """
+        Chạy fn(progress) trên luồng nền; khoá nút chọn/chuyển/tải trong lúc chạy, bật nút Huỷ,
+        thanh tiến độ theo progress(done, total, step). Các callback kết quả chạy trên luồng Tk,
+        sau khi các nút đã được mở lại.
+        """
+        self.set_buttons_enabled(select=False, convert=False, open_downloads=False)
+        self._set_cancel_enabled(True)
+        self.update_status(busy_text, 0)
+
+        def progress(job: Job) -> None:
+            step = f" {job.step}" if job.step else ""
+            count = f" ({job.done}/{job.total})" if job.total else ""
+            self.update_status(f"{busy_text}{step}{count}", 100 * job.fraction)
+
+        def done(job: Job) -> None:
+            self.current_job = None
+            self._set_cancel_enabled(False)
+            self.set_buttons_enabled(select=True, convert=True, open_downloads=True, quit_btn=True)
+            if job.state == "done":
+                on_success(job.result)
+            elif job.state == "cancelled":
+                self.update_status("⏹️ Đã huỷ chuyển đổi.", 0)
+                if on_cancelled:
+                    on_cancelled()
+            else:
+                logger.error("Chuyển đổi lỗi (%s): %s", job.label, job.error)
+                if on_error:
+                    on_error(job.error)
+                else:
+                    self.update_status("❌ Lỗi khi chuyển đổi.", 0)
+                    self.alert_error("Lỗi", f"Không thể chuyển đổi: {job.error}")
+
+        self.current_job = self.worker.submit(fn, label=label, on_progress=progress, on_done=done)
+        return self.current_job
+
+    def cancel_current(self) -> None:
+        """Nút Huỷ: converter dừng ở lần báo tiến độ kế tiếp (sheet/trang kế tiếp)."""
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self._set_cancel_enabled(False)
+            self.update_status("⏹️ Đang huỷ… (chờ bước hiện tại xong)")
+
+    def open_queue(self) -> None:
+        """Mở (hoặc đưa lên trước) cửa sổ hàng đợi nhiều tệp."""
+        if self._queue_factory is None:
+            return
+        if self._queue_window is not None and self._queue_window.winfo_exists():
+            self._queue_window.deiconify()
+            self._queue_window.lift()
+            return
+        if self.queue is None:
+            self.queue = self._queue_factory()
+        win = tk.Toplevel(self.root)
+        win.title(f"{self.root.title()} – Hàng đợi")
+        win.geometry("820x440")
+        QueuePanel(win, self.queue, filetypes=self._queue_filetypes()).pack(fill=tk.BOTH, expand=True)
+        self._queue_window = win
+
+    def _queue_filetypes(self) -> Tuple[Tuple[str, str], ...]:
+        patterns = " ".join("*" + e.lstrip("*") for e in self._supported_extensions)
+        return (("Tệp hỗ trợ", patterns), ("All files", "*.*")) if patterns else (("All files", "*.*"),)
+
+    def close(self) -> None:
+        """Đóng cửa sổ: huỷ việc nền (kể cả hàng đợi) rồi thoát mainloop."""
+        self.worker.shutdown()
+        if self.queue is not None:
+            self.queue.shutdown()
+        self.root.quit()
+
     def alert_info(self, title: str, message: str) -> None:
         messagebox.showinfo(title, message, parent=self.root)
 
@@ -124,14 +548,21 @@ class ConverterUI:
         ext_text = ", ".join(self._supported_extensions) if self._supported_extensions else "*.*"
         ttk.Label(step1, text=f"Hỗ trợ: {ext_text}").pack(anchor=tk.W)
 
-        self.select_btn = ttk.Button(step1, text=self._select_button_text, command=self.on_select)
-        self.select_btn.pack(anchor=tk.W, pady=(8, 0))
+        row = ttk.Frame(step1)
+        row.pack(anchor=tk.W, pady=(8, 0))
+        self.select_btn = ttk.Button(row, text=self._select_button_text, command=self.on_select)
+        self.select_btn.pack(side=tk.LEFT)
+        if self._queue_factory is not None:
+            ttk.Button(row, text="📋 Nhiều tệp / thư mục…", command=self.open_queue).pack(side=tk.LEFT, padx=(8, 0))
 
         step2 = ttk.LabelFrame(container, text="⚙️ Bước 2: Chuyển đổi", padding=12)
         step2.pack(fill=tk.X, pady=(0, 10))
 
         self.convert_btn = ttk.Button(step2, text=self._convert_button_text, command=self.on_convert, style="Accent.TButton")
-        self.convert_btn.pack(anchor=tk.W)
+        self.convert_btn.pack(side=tk.LEFT)
+
+        self.cancel_btn = ttk.Button(step2, text="Huỷ", command=self.cancel_current, state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.LEFT, padx=(8, 0))
 
         step3 = ttk.LabelFrame(container, text="⬇️ Bước 3: Tải xuống", padding=12)
         step3.pack(fill=tk.X, pady=(0, 10))
@@ -152,9 +583,13 @@ class ConverterUI:
         footer = ttk.Frame(container)
         footer.pack(fill=tk.X, pady=(12, 0))
 
-        self.quit_btn = ttk.Button(footer, text="Thoát", command=self.root.quit)
+        self.quit_btn = ttk.Button(footer, text="Thoát", command=self.close)
         self.quit_btn.pack(side=tk.RIGHT)
 
+    def _set_cancel_enabled(self, enabled: bool) -> None:
+        if self.cancel_btn is not None:
+            self._set_btn_state(self.cancel_btn, enabled)
+
     @staticmethod
     def _set_btn_state(btn: ttk.Button, enabled: bool) -> None:
         try:
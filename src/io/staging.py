@@ -0,0 +1,158 @@
+# src/io/staging.py
+"""
+Ghi file đầu ra không sao chép thừa.
+
+- staging_path(target): file tạm nằm CẠNH file đích (cùng ổ đĩa) -> finalize() chỉ là os.replace
+  (đổi tên nguyên tử: người khác không bao giờ thấy PDF dở dang, không copy dữ liệu).
+- finalize(tmp, target, alternatives): đích đang bị khoá (Windows: PDF đang mở) thì thử lần lượt các
+  đường dẫn thay thế; khác ổ đĩa (EXDEV) mới phải clone/copy.
+- clone_file(src, dst): "Lưu thành…" / cache: reflink (FICLONE, chia sẻ block copy-on-write) ->
+  hard link -> copy_file_range (copy trong kernel) -> shutil.copyfile. Đích được ghi qua file tạm
+  rồi os.replace nên không bao giờ dở dang.
+"""
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int), linux/fs.h
+
+CLONE_METHODS = ("reflink", "link", "copy_file_range", "copy")
+
+
+def staging_path(target: str | os.PathLike, suffix: Optional[str] = None) -> str:
+    """Đường dẫn tạm duy nhất cùng thư mục với target (giữ đuôi file: Excel/Word tự thêm .pdf nếu thiếu)."""
+    target = os.fspath(target)
+    folder, name = os.path.split(os.path.abspath(target))
+    os.makedirs(folder, exist_ok=True)
+    ext = suffix if suffix is not None else os.path.splitext(name)[1]
+    return os.path.join(folder, f".{name}.{uuid.uuid4().hex[:12]}.tmp{ext}")
+
+
+def _unlink_quiet(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _reflink(src: str, dst: str) -> None:
+    import fcntl  # chỉ có trên POSIX
+
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+
+
+def _copy_file_range(src: str, dst: str) -> None:
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        remaining = os.fstat(fs.fileno()).st_size
+        while remaining > 0:
+            n = os.copy_file_range(fs.fileno(), fd.fileno(), remaining)
+            if n == 0:
+                break
+            remaining -= n
+        if remaining > 0:
+            raise OSError(errno.EIO, "copy_file_range dừng giữa chừng")
+
+
+def _try_clone(src: str, tmp: str, allow_link: bool) -> str:
+    """Tạo bản của src tại tmp (tmp chưa tồn tại); trả về cách đã dùng."""
+    if os.name != "nt":
+        try:
+            _reflink(src, tmp)
+            return "reflink"
+        except (OSError, ImportError):
+            _unlink_quiet(tmp)  # FS không hỗ trợ (ext4, khác ổ...) -> cách sau
+    if allow_link:
+        try:
+            os.link(src, tmp)
+            return "link"
+        except OSError:
+            pass
+    if hasattr(os, "copy_file_range"):
+        try:
+            _copy_file_range(src, tmp)
+            return "copy_file_range"
+        except OSError:
+            _unlink_quiet(tmp)
+    shutil.copyfile(src, tmp)
+    return "copy"
+
+
+def clone_file(src: str | os.PathLike, dst: str | os.PathLike, *, allow_link: bool = True) -> str:
+    """
+    Đặt bản của src tại dst (ghi đè nguyên tử). Trả về cách đã dùng (CLONE_METHODS).
+    allow_link=False khi dst sẽ bị sửa độc lập với src (hard link dùng chung nội dung, reflink thì không).
+    """
+    src, dst = os.fspath(src), os.fspath(dst)
+    tmp = staging_path(dst)
+    try:
+        method = _try_clone(src, tmp, allow_link)
+        os.replace(tmp, dst)
+    except BaseException:
+        _unlink_quiet(tmp)
+        raise
+    logger.debug("clone %s -> %s (%s)", src, dst, method)
+    return method
+
+
+def _place(tmp: str, target: str) -> None:
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    try:
+        os.replace(tmp, target)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        clone_file(tmp, target)  # khác ổ đĩa: không đổi tên được, phải copy
+        _unlink_quiet(tmp)
+
+
+def finalize(tmp: str | os.PathLike, target: str | os.PathLike,
+             alternatives: Iterable[str | os.PathLike] = ()) -> str:
+    """
+    Đưa file tạm về target bằng os.replace. Không được (đích bị khoá...) -> thử từng đường dẫn trong
+    alternatives (có thể là generator, chỉ được tính khi cần). Trả về đường dẫn thực tế; hết cách thì
+    xoá file tạm và ném lỗi cuối cùng.
+    """
+    tmp = os.fspath(tmp)
+    last: Optional[OSError] = None
+    for dest in _chain(target, alternatives):
+        dest = os.fspath(dest)
+        try:
+            _place(tmp, dest)
+            if last is not None:
+                logger.warning("Không ghi được đích chính (%s); đã lưu vào %s", last, dest)
+            return dest
+        except OSError as e:
+            last = e
+    _unlink_quiet(tmp)
+    assert last is not None
+    raise last
+
+
+def _chain(first, rest) -> Iterator:
+    yield first
+    yield from rest
+
+
+@contextmanager
+def staged(target: str | os.PathLike, alternatives: Iterable[str | os.PathLike] = ()) -> Iterator[dict]:
+    """
+    with staged(dst) as st:
+        export(st["tmp"])
+    st["path"] = đường dẫn cuối cùng. Lỗi trong khối with -> xoá file tạm, đích không bị đụng tới.
+    """
+    st = {"tmp": staging_path(target), "path": None}
+    try:
+        yield st
+    except BaseException:
+        _unlink_quiet(st["tmp"])
+        raise
+    st["path"] = finalize(st["tmp"], target, alternatives)
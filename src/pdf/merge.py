@@ -0,0 +1,380 @@
+# src/pdf/merge.py
+"""
+Ghép nhiều PDF thành 1 theo kiểu streaming: đọc từng file bằng PdfReader (mmap, lazy) và chép
+lần lượt các object mà trang cần xuống PdfStreamWriter với số object mới. Bộ nhớ chỉ giữ bảng
+đổi số object + dữ liệu của object đang chép, không dựng cả tài liệu.
+
+Giữ mục lục (bookmark) và named destination: mục lục các phần được nối lại theo thứ tự; tên đích trùng
+với file trước (vd: _Toc.../bookmark của các file cùng mẫu) được đổi thành "<tên>~<số thứ tự file>" và
+/Dest, /D (GoTo) của link trong file đó được đổi theo, để link không nhảy sang trang của file khác;
+truyền outline_levels (tiêu đề + cấp của tài liệu gốc) để dựng lại đúng cây khi 1 chương
+bị cắt ngang ranh giới giữa 2 phần (xem word_to_pdf chunks). Đầu vào dạng (đường dẫn, tiêu đề)
+thêm 1 mục lục cấp 1 cho cả file, mục lục của file nằm bên dưới.
+
+Font/ảnh giống hệt nhau giữa các file (vd: cùng font nhúng, cùng logo ở mọi PDF Word/Excel/ảnh)
+chỉ được ghi 1 lần: stream, /Font và /FontDescriptor được băm theo nội dung (kể cả các object
+chúng tham chiếu) và object trùng được trỏ về bản đã ghi.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from .objects import PdfName, PdfRef, PdfStream, PdfString, dumps, dumps_stream
+from .reader import PdfReader
+from .writer import PdfStreamWriter
+
+logger = logging.getLogger(__name__)
+
+# Khoá trang không chép sang file ghép (trỏ ngược vào cấu trúc của tài liệu cũ)
+_PAGE_DROP = ("Parent", "StructParents", "B")
+
+# Số mục tối đa nhìn trước khi khớp tiêu đề mục lục với outline_levels
+_MATCH_WINDOW = 20
+
+# Độ sâu tham chiếu tối đa khi băm nội dung để khử trùng (font -> descriptor -> file font...)
+_HASH_DEPTH = 8
+# /Type của dictionary (không phải stream) được khử trùng
+_DEDUPE_TYPES = ("Font", "FontDescriptor")
+
+MergeInput = Union[str, "os.PathLike[str]", Tuple[Union[str, "os.PathLike[str]"], str]]
+
+OutlineItem = Tuple[str, int, bytes, bool]  # (tiêu đề, độ sâu, /Dest hoặc /A đã ghi, là action?)
+
+
+def _norm_title(title: str) -> str:
+    return re.sub(r"\s+", " ", title).strip().casefold()
+
+
+class _Copier:
+    """
+    Chép object của 1 file nguồn, đổi số object cũ -> mới (mỗi object chép đúng 1 lần).
+    dedupe: bảng băm nội dung -> số object mới, dùng chung cho mọi file nguồn (None = tắt).
+    """
+
+    def __init__(self, reader: PdfReader, writer: PdfStreamWriter,
+                 dedupe: Optional[Dict[bytes, int]] = None) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.map: Dict[int, Optional[int]] = {}
+        self.pending: List[int] = []
+        self.loaded: Dict[int, object] = {}   # object đã đọc khi xét khử trùng, chờ ghi
+        self.copied = 0
+        self.dedupe = dedupe
+        self.deduped = 0
+        self.rename: Dict[bytes, bytes] = {}  # named destination trùng file trước -> tên mới
+        self._digests: Dict[int, Optional[bytes]] = {}
+        self._structural: Set[int] = set()     # trang, nút cây trang, catalog: không băm xuyên qua
+        for node in reader.page_tree_nodes():
+            self.map[node.num] = writer.pages_root
+            self._structural.add(node.num)
+        root = reader.trailer.get("Root")
+        if isinstance(root, PdfRef):
+            self.map[root.num] = None
+            self._structural.add(root.num)
+        struct = reader.root.get("StructTreeRoot")
+        if isinstance(struct, PdfRef):
+            self.map[struct.num] = None  # bỏ cây cấu trúc (tagged PDF) -> tham chiếu thành null
+            self._structural.add(struct.num)
+
+    def add_page(self, num: int) -> int:
+        self._structural.add(num)
+        return self.map.setdefault(num, self.writer.alloc())
+
+    # ---- khử trùng ----
+    def _feed(self, h, obj, depth: int) -> bool:
+        if isinstance(obj, PdfRef):
+            d = self._digest(obj.num, depth + 1)
+            if d is None:
+                return False
+            h.update(b"R" + d)
+        elif isinstance(obj, dict):
+            h.update(b"<<")
+            for k in sorted(obj):
+                h.update(dumps(PdfName(k)))
+                if not self._feed(h, obj[k], depth):
+                    return False
+            h.update(b">>")
+        elif isinstance(obj, list):
+            h.update(b"[")
+            for v in obj:
+                if not self._feed(h, v, depth):
+                    return False
+            h.update(b"]")
+        else:
+            h.update(dumps(obj) + b" ")
+        return True
+
+    def _digest(self, num: int, depth: int = 0, obj=None) -> Optional[bytes]:
+        """Băm nội dung object + mọi object nó tham chiếu; None nếu chạm trang/cấu trúc, vòng lặp, quá sâu."""
+        if num in self._digests:
+            return self._digests[num]
+        if num in self._structural or depth > _HASH_DEPTH:
+            return None
+        self._digests[num] = None  # chặn vòng lặp
+        if obj is None:
+            obj = self.reader.get(num)
+        h = hashlib.blake2b(digest_size=20)
+        if isinstance(obj, PdfStream):
+            ok = self._feed(h, obj.dict, depth)
+            h.update(b"stream%d:" % len(obj.data))
+            h.update(obj.data)
+        else:
+            ok = self._feed(h, obj, depth)
+        d = h.digest() if ok else None
+        self._digests[num] = d
+        return d
+
+    @staticmethod
+    def _dedupable(obj) -> bool:
+        if isinstance(obj, PdfStream):
+            return True
+        return isinstance(obj, dict) and obj.get("Type") in _DEDUPE_TYPES
+
+    def ref(self, r: PdfRef) -> Optional[int]:
+        try:
+            return self.map[r.num]
+        except KeyError:
+            pass
+        digest = None
+        if self.dedupe is not None:
+            obj = self.loaded[r.num] = self.reader.get(r.num)
+            if self._dedupable(obj):
+                digest = self._digest(r.num, obj=obj)
+                hit = self.dedupe.get(digest) if digest is not None else None
+                if hit is not None:
+                    del self.loaded[r.num]
+                    self.map[r.num] = hit
+                    self.deduped += 1
+                    return hit
+        num = self.map[r.num] = self.writer.alloc()
+        if digest is not None:
+            self.dedupe[digest] = num
+        self.pending.append(r.num)
+        return num
+
+    # ---- đổi tên named destination ----
+    def _renamed(self, value):
+        if isinstance(value, PdfString):
+            new = self.rename.get(bytes(value))
+        elif isinstance(value, PdfName):
+            new = self.rename.get(str(value).encode("utf-8"))
+        else:
+            return value
+        return value if new is None else PdfString(new)
+
+    def retarget(self, obj):
+        """Đổi /Dest và /D của action GoTo (cả dict/array lồng trực tiếp) theo self.rename; không đổi gì -> obj cũ."""
+        if not self.rename:
+            return obj
+        if isinstance(obj, dict):
+            out = None
+            for k, v in obj.items():
+                if k == "Dest" or (k == "D" and obj.get("S") == "GoTo"):
+                    new = self._renamed(v)
+                else:
+                    new = self.retarget(v)
+                if new is not v:
+                    if out is None:
+                        out = dict(obj)
+                    out[k] = new
+            return obj if out is None else out
+        if isinstance(obj, list):
+            new_list = [self.retarget(v) for v in obj]
+            return obj if all(a is b for a, b in zip(new_list, obj)) else new_list
+        return obj
+
+    def drain(self) -> None:
+        while self.pending:
+            old = self.pending.pop()
+            obj = self.loaded.pop(old, None)
+            if obj is None:
+                obj = self.reader.get(old)
+            if isinstance(obj, PdfStream):
+                body = dumps_stream(obj, self.ref)
+            else:
+                body = dumps(self.retarget(obj), self.ref)
+            self.writer.write_object(self.map[old], body)
+            self.copied += 1
+
+
+def _outline_target(reader: PdfReader, target, names: Dict[bytes, object]):
+    """Đưa mục lục về (dest array | action dict, là action?) ; không xác định được -> (None, False)."""
+    if isinstance(target, dict) and target.get("S") == "GoTo":
+        target = reader.resolve(target.get("D"))
+    elif isinstance(target, dict):
+        return target, True  # URI, GoToR, ...: giữ nguyên action
+    if isinstance(target, (PdfString, PdfName)):
+        key = bytes(target) if isinstance(target, PdfString) else str(target).encode("utf-8")
+        target = reader.resolve(names.get(key))
+        if isinstance(target, dict):
+            target = reader.resolve(target.get("D"))
+    if isinstance(target, list) and target:
+        return target, False
+    return None, False
+
+
+def _relevel(items: List[OutlineItem], levels: Sequence[Tuple[str, int]]) -> List[OutlineItem]:
+    """Đặt lại độ sâu theo cấp tiêu đề của tài liệu gốc (khớp tiêu đề tuần tự, có cửa sổ nhìn trước)."""
+    wanted = [(_norm_title(t), max(1, int(lv))) for t, lv in levels]
+    out: List[OutlineItem] = []
+    j = 0
+    for title, depth, payload, is_action in items:
+        key = _norm_title(title)
+        for k in range(j, min(j + _MATCH_WINDOW, len(wanted))):
+            if wanted[k][0] == key:
+                depth = wanted[k][1] - 1
+                j = k + 1
+                break
+        out.append((title, depth, payload, is_action))
+    return out
+
+
+def _write_outlines(writer: PdfStreamWriter, items: List[OutlineItem]) -> Optional[int]:
+    """Dựng cây /Outlines từ danh sách phẳng (độ sâu tăng tối đa 1 cấp mỗi mục)."""
+    if not items:
+        return None
+    root = writer.alloc()
+    nums = [writer.alloc() for _ in items]
+    children: Dict[int, List[int]] = {root: []}
+    stack: List[Tuple[int, int]] = []  # (độ sâu, chỉ số mục)
+    for i, (_title, depth, _payload, _a) in enumerate(items):
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        owner = nums[stack[-1][1]] if stack else root
+        children.setdefault(owner, []).append(i)
+        stack.append(((stack[-1][0] + 1) if stack else 0, i))
+
+    def links(owner: int) -> bytes:
+        kids = children.get(owner)
+        if not kids:
+            return b""
+        return b" /First %d 0 R /Last %d 0 R" % (nums[kids[0]], nums[kids[-1]])
+
+    for owner, kids in children.items():
+        for pos, i in enumerate(kids):
+            title, _depth, payload, is_action = items[i]
+            parts = [b"<< /Title " + dumps(title), b" /Parent %d 0 R" % owner]
+            if pos > 0:
+                parts.append(b" /Prev %d 0 R" % nums[kids[pos - 1]])
+            if pos + 1 < len(kids):
+                parts.append(b" /Next %d 0 R" % nums[kids[pos + 1]])
+            parts.append(links(nums[i]))
+            sub = children.get(nums[i])
+            if sub:
+                parts.append(b" /Count -%d" % len(sub))  # mục con thu gọn
+            parts.append((b" /A " if is_action else b" /Dest ") + payload + b" >>")
+            writer.write_object(nums[i], b"".join(parts))
+    writer.write_object(root, b"<< /Type /Outlines%s /Count %d >>" % (links(root), len(children[root])))
+    return root
+
+
+def merge_pdfs(
+    inputs: Iterable[MergeInput],
+    dst_path: str | os.PathLike,
+    *,
+    outline_levels: Optional[Sequence[Tuple[str, int]]] = None,
+    dedupe: bool = True,
+) -> Dict[str, int]:
+    """
+    Ghép các PDF theo thứ tự vào dst_path. Trả về thống kê
+    {"files", "pages", "objects", "outline", "deduped"} (deduped: số object trùng trỏ về bản đã ghi).
+
+    inputs: đường dẫn, hoặc (đường dẫn, tiêu đề) để thêm mục lục cấp 1 trỏ tới trang đầu của file.
+    Có thể là generator: mỗi file chỉ được mở khi tới lượt (tạo dần rồi xoá được ngay sau khi ghép).
+    outline_levels: [(tiêu đề, cấp 1..9)] theo thứ tự trong tài liệu gốc; nếu có, độ sâu mục lục
+    được đặt theo cấp này thay vì theo từng phần (phần sau bắt đầu giữa chương vẫn đúng cây).
+    dedupe: font/ảnh/stream giống hệt nhau giữa các file chỉ ghi 1 lần.
+    Không hỗ trợ PDF mã hoá. Lỗi giữa chừng -> xoá file đích dở dang.
+    """
+    dst = os.fspath(dst_path)
+    stats = {"files": 0, "pages": 0, "objects": 0, "outline": 0, "deduped": 0}
+    outline: List[OutlineItem] = []
+    dests: Dict[bytes, bytes] = {}
+    info: Optional[Dict[str, str]] = None
+    seen: Optional[Dict[bytes, int]] = {} if dedupe else None
+    titled = False
+
+    writer = PdfStreamWriter(dst, version="1.7")
+    try:
+        for item in inputs:
+            path, title = item if isinstance(item, tuple) else (item, None)
+            with PdfReader(path) as reader:
+                copier = _Copier(reader, writer, seen)
+                pages = list(reader.pages())
+                # cấp số mới cho mọi trang trước: link/mục lục trỏ tới trang sau vẫn đổi số được
+                page_nums = [copier.add_page(ref.num) for ref, _p in pages]
+                shift = 0
+                if title is not None and page_nums:
+                    outline.append((title, 0, b"[%d 0 R /Fit]" % page_nums[0], False))
+                    titled, shift = True, 1
+
+                if info is None:
+                    doc_info = reader.resolve(reader.trailer.get("Info"))
+                    info = {}
+                    if isinstance(doc_info, dict):
+                        for key in ("Title", "Author", "Subject"):
+                            value = reader.resolve(doc_info.get(key))
+                            if isinstance(value, PdfString) and value.text():
+                                info[key] = value.text()
+
+                names = reader.named_dests()
+                for name, dest in names.items():
+                    key = name
+                    if name in dests:
+                        # trùng tên với file trước: đổi tên trong file này (link của nó đổi theo ở retarget)
+                        key, n = b"%s~%d" % (name, stats["files"] + 1), 1
+                        while key in dests:
+                            key, n = b"%s~%d.%d" % (name, stats["files"] + 1, n), n + 1
+                        copier.rename[name] = key
+                    dest = reader.resolve(dest)
+                    if isinstance(dest, dict):
+                        dest = reader.resolve(dest.get("D"))
+                    if isinstance(dest, list):
+                        dests[key] = dumps(dest, copier.ref)
+
+                for entry, depth, target in reader.outline():
+                    dest, is_action = _outline_target(reader, target, names)
+                    if dest is None:
+                        logger.debug("%s: bỏ mục lục không có đích: %s", path, entry)
+                        continue
+                    outline.append((entry, depth + shift, dumps(dest, copier.ref), is_action))
+
+                tree_root = reader.root.get("Pages")  # nút /Pages cũ -> đổi số thành /Pages mới
+                for (_ref, page), num in zip(pages, page_nums):
+                    body = {k: v for k, v in page.items() if k not in _PAGE_DROP}
+                    body["Parent"] = tree_root
+                    writer.write_object(num, dumps(copier.retarget(body), copier.ref))
+                    writer.add_page_object(num)
+                    copier.drain()  # chép dần theo từng trang: bảng chờ luôn nhỏ
+
+                stats["files"] += 1
+                stats["pages"] += len(pages)
+                stats["objects"] += copier.copied
+                stats["deduped"] += copier.deduped
+
+        if outline_levels and not titled:
+            outline = _relevel(outline, outline_levels)
+        extra = []
+        outline_num = _write_outlines(writer, outline)
+        if outline_num:
+            extra.append(f"/Outlines {outline_num} 0 R /PageMode /UseOutlines")
+        if dests:
+            arr = b" ".join(dumps(PdfString(k)) + b" " + v for k, v in sorted(dests.items()))
+            names_num = writer.write_object(writer.alloc(), b"<< /Names [" + arr + b"] >>")
+            extra.append(f"/Names << /Dests {names_num} 0 R >>")
+        stats["outline"] = len(outline)
+        writer.close(info=info or None, catalog_extra=" ".join(extra))
+    except BaseException:
+        writer.abort()
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        raise
+    logger.debug("Ghép %d file (%d trang, %d object trùng bỏ qua) -> %s",
+                 stats["files"], stats["pages"], stats["deduped"], dst)
+    return stats
@@ -0,0 +1,121 @@
+# src/pdf/objects.py
+"""
+Kiểu đối tượng PDF tối giản (dùng chung cho reader/merge) và hàm ghi ra bytes.
+
+Ánh xạ: dict -> dictionary, list -> array, int/float, bool, None -> null,
+PdfName (str), PdfString (bytes), PdfRef (tham chiếu gián tiếp), PdfStream (dict + dữ liệu thô).
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, NamedTuple, Optional
+
+
+class PdfName(str):
+    """Tên PDF, lưu không có dấu '/' ở đầu."""
+
+    __slots__ = ()
+
+
+class PdfString(bytes):
+    """Chuỗi PDF (byte thô, đã bỏ escape)."""
+
+    __slots__ = ()
+
+    def text(self) -> str:
+        """Giải mã chuỗi văn bản PDF (UTF-16BE có BOM, còn lại coi như PDFDocEncoding ~ latin-1)."""
+        raw = bytes(self)
+        if raw.startswith(b"\xfe\xff"):
+            return raw[2:].decode("utf-16-be", "replace")
+        if raw.startswith(b"\xef\xbb\xbf"):
+            return raw[3:].decode("utf-8", "replace")
+        return raw.decode("latin-1")
+
+
+class PdfRef(NamedTuple):
+    num: int
+    gen: int = 0
+
+
+class PdfStream:
+    """Stream: dictionary + dữ liệu thô (chưa giải nén)."""
+
+    __slots__ = ("dict", "data")
+
+    def __init__(self, d: Dict[str, object], data: bytes) -> None:
+        self.dict = d
+        self.data = data
+
+    def get(self, key: str, default=None):
+        return self.dict.get(key, default)
+
+
+_DELIMS = b"()<>[]{}/% \t\r\n\f\x00#"
+
+
+def _name_bytes(name: str) -> bytes:
+    out = bytearray(b"/")
+    for b in name.encode("utf-8"):
+        if b < 0x21 or b > 0x7E or b in _DELIMS:
+            out += b"#%02X" % b
+        else:
+            out.append(b)
+    return bytes(out)
+
+
+def _string_bytes(s: bytes) -> bytes:
+    return b"<" + s.hex().encode("ascii") + b">"
+
+
+def _number(v: float) -> bytes:
+    if isinstance(v, bool):
+        return b"true" if v else b"false"
+    if isinstance(v, int):
+        return str(v).encode("ascii")
+    if float(v).is_integer():
+        return str(int(v)).encode("ascii")
+    return ("%.6f" % v).rstrip("0").rstrip(".").encode("ascii")
+
+
+RefMap = Callable[[PdfRef], Optional[int]]
+
+
+def dumps(obj, ref: Optional[RefMap] = None) -> bytes:
+    """
+    Ghi đối tượng PDF ra bytes. `ref` đổi số object cũ -> mới (merge); trả về None thì ghi null
+    (tham chiếu tới object bị bỏ, vd: cây cấu trúc).
+    """
+    if obj is None:
+        return b"null"
+    if obj is True:
+        return b"true"
+    if obj is False:
+        return b"false"
+    if isinstance(obj, PdfRef):
+        num = ref(obj) if ref else obj.num
+        return b"null" if num is None else b"%d 0 R" % num
+    if isinstance(obj, PdfName):
+        return _name_bytes(obj)
+    if isinstance(obj, (int, float)):
+        return _number(obj)
+    if isinstance(obj, (PdfString, bytes)):
+        return _string_bytes(obj)
+    if isinstance(obj, str):
+        return _string_bytes(b"\xfe\xff" + obj.encode("utf-16-be"))
+    if isinstance(obj, dict):
+        parts = [b"<<"]
+        for k, v in obj.items():
+            parts.append(_name_bytes(k) + b" " + dumps(v, ref))
+        parts.append(b">>")
+        return b" ".join(parts)
+    if isinstance(obj, (list, tuple)):
+        return b"[" + b" ".join(dumps(v, ref) for v in obj) + b"]"
+    if isinstance(obj, PdfStream):
+        raise TypeError("PdfStream phải ghi như object gián tiếp (dumps_stream)")
+    raise TypeError(f"Không ghi được kiểu {type(obj).__name__} vào PDF")
+
+
+def dumps_stream(stream: PdfStream, ref: Optional[RefMap] = None) -> bytes:
+    """Dictionary của stream (đã cập nhật /Length) + 'stream ... endstream'."""
+    d = dict(stream.dict)
+    d["Length"] = len(stream.data)
+    return dumps(d, ref) + b"\nstream\n" + stream.data + b"\nendstream"
@@ -0,0 +1,530 @@
+# src/pdf/reader.py
+"""
+Đọc PDF theo kiểu lazy: file được mmap, chỉ phân tích bảng xref lúc mở; object được đọc khi cần
+(không dựng toàn bộ tài liệu trong RAM). Hỗ trợ xref dạng bảng và dạng stream (PDF 1.5+),
+object stream, cập nhật tăng dần (/Prev). Không hỗ trợ PDF mã hoá.
+
+Đủ cho việc ghép PDF do Word/Excel/LibreOffice/reportlab xuất ra (src/pdf/merge.py).
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .objects import PdfName, PdfRef, PdfStream, PdfString
+
+_WS = b" \t\r\n\f\x00"
+_DELIM = b"()<>[]{}/%"
+_NUM_RE = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_REF_RE = re.compile(rb"(\d+)\s+(\d+)\s+R(?=[\s()<>\[\]{}/%]|$)")
+_OBJ_RE = re.compile(rb"(\d+)\s+(\d+)\s+obj")
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f",
+            ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"}
+
+# Thuộc tính trang được kế thừa từ nút /Pages cha
+INHERITABLE = ("Resources", "MediaBox", "CropBox", "Rotate")
+
+
+class PdfError(ValueError):
+    """PDF hỏng hoặc dùng tính năng không hỗ trợ."""
+
+
+# -------------------- phân tích cú pháp --------------------
+class _Lexer:
+    def __init__(self, buf, pos: int = 0, end: Optional[int] = None) -> None:
+        self.buf = buf
+        self.pos = pos
+        self.end = len(buf) if end is None else end
+
+    def skip_ws(self) -> None:
+        buf, end = self.buf, self.end
+        pos = self.pos
+        while pos < end:
+            c = buf[pos]
+            if c in _WS:
+                pos += 1
+            elif c == 0x25:  # % comment
+                while pos < end and buf[pos] not in b"\r\n":
+                    pos += 1
+            else:
+                break
+        self.pos = pos
+
+    def peek(self, n: int = 1) -> bytes:
+        return bytes(self.buf[self.pos:self.pos + n])
+
+    def keyword(self) -> bytes:
+        self.skip_ws()
+        start = self.pos
+        buf, end = self.buf, self.end
+        while self.pos < end and buf[self.pos] not in _WS and buf[self.pos] not in _DELIM:
+            self.pos += 1
+        return bytes(buf[start:self.pos])
+
+    def parse(self):
+        self.skip_ws()
+        if self.pos >= self.end:
+            raise PdfError("Hết dữ liệu khi đọc object")
+        buf = self.buf
+        c = buf[self.pos]
+        if c == 0x2F:  # /
+            return self._name()
+        if c == 0x3C:  # <
+            if buf[self.pos + 1] == 0x3C:
+                return self._dict()
+            return self._hex()
+        if c == 0x5B:  # [
+            self.pos += 1
+            items = []
+            while True:
+                self.skip_ws()
+                if buf[self.pos] == 0x5D:
+                    self.pos += 1
+                    return items
+                items.append(self.parse())
+        if c == 0x28:  # (
+            return self._literal()
+        if c in b"+-.0123456789":
+            m = _REF_RE.match(buf, self.pos)
+            if m:
+                self.pos = m.end()
+                return PdfRef(int(m.group(1)), int(m.group(2)))
+            m = _NUM_RE.match(buf, self.pos)
+            if not m:
+                raise PdfError(f"Số không hợp lệ tại {self.pos}")
+            self.pos = m.end()
+            s = m.group(0)
+            return float(s) if b"." in s else int(s)
+        kw = self.keyword()
+        if kw == b"true":
+            return True
+        if kw == b"false":
+            return False
+        if kw == b"null":
+            return None
+        raise PdfError(f"Token lạ {kw!r} tại {self.pos}")
+
+    def _name(self) -> PdfName:
+        self.pos += 1
+        start = self.pos
+        buf, end = self.buf, self.end
+        while self.pos < end and buf[self.pos] not in _WS and buf[self.pos] not in _DELIM:
+            self.pos += 1
+        raw = bytes(buf[start:self.pos])
+        if b"#" in raw:
+            raw = re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]), raw)
+        return PdfName(raw.decode("utf-8", "replace"))
+
+    def _dict(self) -> dict:
+        self.pos += 2
+        d = {}
+        while True:
+            self.skip_ws()
+            if self.buf[self.pos] == 0x3E and self.buf[self.pos + 1] == 0x3E:
+                self.pos += 2
+                return d
+            key = self.parse()
+            if not isinstance(key, PdfName):
+                raise PdfError(f"Khoá dictionary không phải name tại {self.pos}")
+            d[str(key)] = self.parse()
+
+    def _hex(self) -> PdfString:
+        end = self.buf.find(b">", self.pos)
+        if end < 0:
+            raise PdfError("Chuỗi hex không đóng")
+        raw = bytes(self.buf[self.pos + 1:end])
+        self.pos = end + 1
+        digits = re.sub(rb"\s", b"", raw)
+        if len(digits) % 2:
+            digits += b"0"
+        return PdfString(bytes.fromhex(digits.decode("ascii")))
+
+    def _literal(self) -> PdfString:
+        buf = self.buf
+        pos = self.pos + 1
+        depth = 1
+        out = bytearray()
+        while True:
+            c = buf[pos]
+            if c == 0x5C:  # backslash
+                pos += 1
+                e = buf[pos]
+                if e in _ESCAPES:
+                    out += _ESCAPES[e]
+                    pos += 1
+                elif 0x30 <= e <= 0x37:
+                    digits = bytes(buf[pos:pos + 3])
+                    n = 1
+                    while n < len(digits) and 0x30 <= digits[n] <= 0x37:
+                        n += 1
+                    out.append(int(digits[:n], 8) & 0xFF)
+                    pos += n
+                elif e == 0x0D:  # nối dòng
+                    pos += 2 if buf[pos + 1] == 0x0A else 1
+                elif e == 0x0A:
+                    pos += 1
+                else:
+                    out.append(e)
+                    pos += 1
+                continue
+            if c == 0x28:
+                depth += 1
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    self.pos = pos + 1
+                    return PdfString(bytes(out))
+            out.append(c)
+            pos += 1
+
+
+# -------------------- giải nén --------------------
+def _unpredict(data: bytes, parms: dict) -> bytes:
+    predictor = int(parms.get("Predictor", 1) or 1)
+    if predictor < 10:
+        if predictor != 1:
+            raise PdfError(f"Predictor {predictor} không hỗ trợ")
+        return data
+    colors = int(parms.get("Colors", 1))
+    bpc = int(parms.get("BitsPerComponent", 8))
+    columns = int(parms.get("Columns", 1))
+    bpp = max(1, colors * bpc // 8)
+    row_len = (colors * bpc * columns + 7) // 8
+    out = bytearray()
+    prev = bytearray(row_len)
+    for i in range(0, len(data), row_len + 1):
+        ftype = data[i]
+        row = bytearray(data[i + 1:i + 1 + row_len])
+        if ftype == 1:
+            for j in range(bpp, len(row)):
+                row[j] = (row[j] + row[j - bpp]) & 0xFF
+        elif ftype == 2:
+            for j in range(len(row)):
+                row[j] = (row[j] + prev[j]) & 0xFF
+        elif ftype == 3:
+            for j in range(len(row)):
+                left = row[j - bpp] if j >= bpp else 0
+                row[j] = (row[j] + ((left + prev[j]) >> 1)) & 0xFF
+        elif ftype == 4:
+            for j in range(len(row)):
+                a = row[j - bpp] if j >= bpp else 0
+                b = prev[j]
+                c = prev[j - bpp] if j >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+                row[j] = (row[j] + pred) & 0xFF
+        out += row
+        prev = row
+    return bytes(out)
+
+
+def decode_stream(stream: PdfStream) -> bytes:
+    """Giải nén stream (chỉ FlateDecode, có/không predictor) - đủ cho xref stream, object stream."""
+    filters = stream.get("Filter")
+    parms = stream.get("DecodeParms")
+    if filters is None:
+        return stream.data
+    if not isinstance(filters, list):
+        filters, parms = [filters], [parms]
+    elif not isinstance(parms, list):
+        parms = [parms] * len(filters)
+    data = stream.data
+    for f, p in zip(filters, parms):
+        if f not in ("FlateDecode", "Fl"):
+            raise PdfError(f"Filter {f} không hỗ trợ")
+        data = zlib.decompressobj().decompress(data)
+        if isinstance(p, dict):
+            data = _unpredict(data, p)
+    return data
+
+
+# -------------------- reader --------------------
+class PdfReader:
+    """
+    reader = PdfReader("a.pdf")
+    for ref, page in reader.pages(): ...
+    obj = reader.resolve(page["Resources"])
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = os.fspath(path)
+        self._fh = open(self.path, "rb")
+        try:
+            self.buf = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # file rỗng
+            self._fh.close()
+            raise PdfError(f"File PDF rỗng: {self.path}")
+        # num -> (1, offset) | (2, objstm_num, index)
+        self.xref: Dict[int, Tuple[int, ...]] = {}
+        self.trailer: Dict[str, object] = {}
+        self._objstm_cache: "OrderedDict[int, Tuple[bytes, List[Tuple[int, int]], int]]" = OrderedDict()
+        try:
+            self._load_xref()
+        except Exception:
+            self.close()
+            raise
+        if "Encrypt" in self.trailer:
+            self.close()
+            raise PdfError(f"PDF mã hoá không hỗ trợ: {self.path}")
+
+    # ---- vòng đời ----
+    def close(self) -> None:
+        try:
+            self.buf.close()
+        except Exception:
+            pass
+        self._fh.close()
+
+    def __enter__(self) -> "PdfReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- xref ----
+    def _load_xref(self) -> None:
+        tail_start = max(0, len(self.buf) - 2048)
+        idx = self.buf.rfind(b"startxref", tail_start)
+        if idx < 0:
+            raise PdfError(f"Không tìm thấy startxref: {self.path}")
+        lx = _Lexer(self.buf, idx + len(b"startxref"))
+        offset = lx.parse()
+        seen = set()
+        while isinstance(offset, int) and offset not in seen:
+            seen.add(offset)
+            trailer = self._read_xref_section(offset)
+            for k, v in trailer.items():
+                self.trailer.setdefault(k, v)
+            if "XRefStm" in trailer:  # file lai (hybrid)
+                self._read_xref_section(int(trailer["XRefStm"]))
+            offset = trailer.get("Prev")
+
+    def _read_xref_section(self, offset: int) -> dict:
+        lx = _Lexer(self.buf, offset)
+        lx.skip_ws()
+        if lx.peek(4) == b"xref":
+            lx.pos += 4
+            while True:
+                lx.skip_ws()
+                if lx.peek(7) == b"trailer":
+                    lx.pos += 7
+                    return lx.parse()
+                start, count = lx.parse(), lx.parse()
+                for i in range(count):
+                    lx.skip_ws()
+                    line = bytes(self.buf[lx.pos:lx.pos + 20])
+                    fields = line.split()
+                    lx.pos += 18
+                    num = start + i
+                    if len(fields) >= 3 and fields[2][:1] == b"n" and num not in self.xref:
+                        self.xref[num] = (1, int(fields[0]))
+                    elif num not in self.xref:
+                        self.xref[num] = (0,)
+        # xref stream
+        m = _OBJ_RE.match(self.buf, lx.pos)
+        if not m:
+            raise PdfError(f"xref hỏng tại {offset}")
+        stream = self._parse_indirect_at(lx.pos)
+        if not isinstance(stream, PdfStream) or stream.get("Type") != "XRef":
+            raise PdfError(f"xref stream hỏng tại {offset}")
+        data = decode_stream(stream)
+        w = [int(x) for x in stream.get("W")]
+        index = stream.get("Index") or [0, int(stream.get("Size"))]
+        pos = 0
+        row = sum(w)
+        for s, n in zip(index[0::2], index[1::2]):
+            for num in range(int(s), int(s) + int(n)):
+                if pos + row > len(data):
+                    break
+                vals = []
+                p = pos
+                for width in w:
+                    v = int.from_bytes(data[p:p + width], "big") if width else None
+                    vals.append(v)
+                    p += width
+                pos += row
+                typ = 1 if vals[0] is None else vals[0]
+                if num in self.xref:
+                    continue
+                if typ == 1:
+                    self.xref[num] = (1, vals[1])
+                elif typ == 2:
+                    self.xref[num] = (2, vals[1], vals[2])
+                else:
+                    self.xref[num] = (0,)
+        return dict(stream.dict)
+
+    # ---- object ----
+    def _parse_indirect_at(self, pos: int):
+        m = _OBJ_RE.match(self.buf, pos)
+        if not m:
+            raise PdfError(f"Không có object tại {pos}")
+        lx = _Lexer(self.buf, m.end())
+        value = lx.parse()
+        if isinstance(value, dict):
+            lx.skip_ws()
+            if lx.peek(6) == b"stream":
+                lx.pos += 6
+                if self.buf[lx.pos:lx.pos + 2] == b"\r\n":
+                    lx.pos += 2
+                elif self.buf[lx.pos:lx.pos + 1] in (b"\n", b"\r"):
+                    lx.pos += 1
+                length = value.get("Length")
+                if isinstance(length, PdfRef):
+                    length = self.get(length)
+                start = lx.pos
+                end = start + int(length) if isinstance(length, int) else -1
+                if end < 0 or self.buf[end:end + 20].lstrip(b"\r\n ").find(b"endstream") != 0:
+                    end = self.buf.find(b"endstream", start)  # /Length sai: dò endstream
+                    if end < 0:
+                        raise PdfError(f"Stream không có endstream tại {pos}")
+                    while end > start and self.buf[end - 1] in b"\r\n":
+                        end -= 1
+                return PdfStream(value, bytes(self.buf[start:end]))
+        return value
+
+    def _objstm(self, num: int):
+        hit = self._objstm_cache.get(num)
+        if hit is not None:
+            self._objstm_cache.move_to_end(num)
+            return hit
+        stream = self.get(num)
+        data = decode_stream(stream)
+        n, first = int(stream.get("N")), int(stream.get("First"))
+        lx = _Lexer(data, 0, first)
+        offsets = [(lx.parse(), lx.parse()) for _ in range(n)]
+        entry = (data, offsets, first)
+        self._objstm_cache[num] = entry
+        if len(self._objstm_cache) > 4:
+            self._objstm_cache.popitem(last=False)
+        return entry
+
+    def get(self, ref):
+        """Object theo số (hoặc PdfRef). Object không tồn tại -> None (theo chuẩn PDF)."""
+        num = ref.num if isinstance(ref, PdfRef) else int(ref)
+        entry = self.xref.get(num)
+        if not entry or entry[0] == 0:
+            return None
+        if entry[0] == 1:
+            return self._parse_indirect_at(entry[1])
+        data, offsets, first = self._objstm(entry[1])
+        _objnum, off = offsets[entry[2]]
+        return _Lexer(data, first + off).parse()
+
+    def resolve(self, obj):
+        seen = 0
+        while isinstance(obj, PdfRef) and seen < 32:
+            obj = self.get(obj)
+            seen += 1
+        return obj
+
+    # ---- trang ----
+    @property
+    def root(self) -> dict:
+        return self.resolve(self.trailer.get("Root")) or {}
+
+    def page_tree_nodes(self) -> List[PdfRef]:
+        """Các nút /Pages trung gian (để merge bỏ qua, không sao chép)."""
+        nodes: List[PdfRef] = []
+        root = self.root.get("Pages")
+        stack = [root] if isinstance(root, PdfRef) else []
+        seen = set()
+        while stack:
+            ref = stack.pop()
+            if ref.num in seen:
+                continue
+            seen.add(ref.num)
+            node = self.get(ref)
+            if isinstance(node, dict) and node.get("Type") == "Pages":
+                nodes.append(ref)
+                stack.extend(k for k in node.get("Kids", ()) if isinstance(k, PdfRef))
+        return nodes
+
+    def pages(self) -> Iterator[Tuple[PdfRef, dict]]:
+        """(ref, dictionary trang đã gắn thuộc tính kế thừa) theo thứ tự trang."""
+        root = self.root.get("Pages")
+        if not isinstance(root, PdfRef):
+            return
+        stack: List[Tuple[PdfRef, dict]] = [(root, {})]
+        seen = set()
+        while stack:
+            ref, inherited = stack.pop()
+            if ref.num in seen:
+                continue
+            seen.add(ref.num)
+            node = self.get(ref)
+            if not isinstance(node, dict):
+                continue
+            if node.get("Type") == "Pages" or "Kids" in node:
+                inh = dict(inherited)
+                for key in INHERITABLE:
+                    if key in node:
+                        inh[key] = node[key]
+                kids = [k for k in node.get("Kids", ()) if isinstance(k, PdfRef)]
+                stack.extend((k, inh) for k in reversed(kids))
+            else:
+                page = dict(node)
+                for key, value in inherited.items():
+                    page.setdefault(key, value)
+                yield ref, page
+
+    def page_count(self) -> int:
+        root = self.resolve(self.root.get("Pages")) or {}
+        return int(self.resolve(root.get("Count")) or 0)
+
+    # ---- outline / named dest ----
+    def named_dests(self) -> Dict[bytes, object]:
+        """Named destination từ /Dests (PDF 1.1) và cây /Names /Dests."""
+        out: Dict[bytes, object] = {}
+        old = self.resolve(self.root.get("Dests"))
+        if isinstance(old, dict):
+            for k, v in old.items():
+                out[k.encode("utf-8")] = v
+        names = self.resolve(self.root.get("Names"))
+        tree = self.resolve(names.get("Dests")) if isinstance(names, dict) else None
+        stack = [tree] if isinstance(tree, dict) else []
+        guard = 0
+        while stack and guard < 100000:
+            guard += 1
+            node = stack.pop()
+            arr = node.get("Names")
+            if isinstance(arr, list):
+                for k, v in zip(arr[0::2], arr[1::2]):
+                    out.setdefault(bytes(k), v)
+            for kid in node.get("Kids", ()) or ():
+                kid = self.resolve(kid)
+                if isinstance(kid, dict):
+                    stack.append(kid)
+        return out
+
+    def outline(self) -> List[Tuple[str, int, object]]:
+        """Mục lục (bookmark) dạng phẳng theo thứ tự: [(tiêu đề, độ sâu, dest|action)]."""
+        out: List[Tuple[str, int, object]] = []
+        root = self.resolve(self.root.get("Outlines"))
+        if not isinstance(root, dict):
+            return out
+        stack: List[Tuple[object, int]] = [(root.get("First"), 0)]
+        seen = set()
+        while stack:
+            ref, depth = stack.pop()
+            if not isinstance(ref, PdfRef) or ref.num in seen:
+                continue
+            seen.add(ref.num)
+            item = self.get(ref)
+            if not isinstance(item, dict):
+                continue
+            title = self.resolve(item.get("Title"))
+            title = title.text() if isinstance(title, PdfString) else ""
+            target = item.get("Dest")
+            if target is None:
+                target = self.resolve(item.get("A"))
+            out.append((title, depth, self.resolve(target)))
+            # duyệt theo thứ tự: anh em kế tiếp đẩy trước, con đẩy sau (được lấy ra trước)
+            stack.append((item.get("Next"), depth))
+            stack.append((item.get("First"), depth + 1))
+        return out
@@ -0,0 +1,201 @@
+# src/pdf/writer.py
+"""
+Bộ ghi PDF tối giản, ghi tuần tự từng object xuống file (không giữ tài liệu trong RAM).
+
+Dùng cho các chỗ cần nhúng nguyên luồng nén có sẵn (JPEG -> DCTDecode, PNG IDAT -> FlateDecode
+có predictor) mà reportlab/Pillow sẽ giải mã rồi nén lại. Chỉ giữ trong bộ nhớ bảng offset
+xref và danh sách số object của các trang.
+"""
+from __future__ import annotations
+
+import io
+import os
+from typing import BinaryIO, Dict, Iterable, List, Optional, Union
+
+Chunks = Union[bytes, Iterable[bytes]]
+
+
+def pdf_name(name: str) -> str:
+    out = []
+    for ch in name:
+        if ch.isalnum() or ch in "-_.":
+            out.append(ch)
+        else:
+            out.append("#%02X" % ord(ch))
+    return "/" + "".join(out)
+
+
+def pdf_string(text: str) -> str:
+    """Chuỗi PDF dạng hex UTF-16BE (an toàn cho tiếng Việt)."""
+    return "<FEFF" + text.encode("utf-16-be").hex().upper() + ">"
+
+
+def pdf_number(v: float) -> str:
+    if float(v).is_integer():
+        return str(int(v))
+    return ("%.4f" % v).rstrip("0").rstrip(".")
+
+
+class PdfStreamWriter:
+    """
+    Ghi PDF theo kiểu append-only:
+
+        w = PdfStreamWriter(path)
+        img = w.add_image_xobject(width, height, "/DeviceRGB", 8, "/DCTDecode", data)
+        w.add_image_page(img, page_w, page_h)
+        w.close()
+    """
+
+    def __init__(self, target: Union[str, os.PathLike, BinaryIO], version: str = "1.4") -> None:
+        if isinstance(target, (str, os.PathLike)):
+            self._fh: BinaryIO = open(target, "wb")
+            self._owns = True
+        else:
+            self._fh = target
+            self._owns = False
+        self._offsets: Dict[int, int] = {}
+        self._next = 1
+        self._pages: List[int] = []
+        self._closed = False
+        self._pages_root = self.alloc()
+        self._write(f"%PDF-{version}\n%\xe2\xe3\xcf\xd3\n".encode("latin-1"))
+
+    # ---- mức thấp ----
+    def _write(self, data: bytes) -> None:
+        self._fh.write(data)
+
+    def _tell(self) -> int:
+        return self._fh.tell()
+
+    def alloc(self) -> int:
+        num = self._next
+        self._next += 1
+        return num
+
+    def write_object(self, num: int, body: Union[str, bytes]) -> int:
+        if isinstance(body, str):
+            body = body.encode("latin-1")
+        self._offsets[num] = self._tell()
+        self._write(b"%d 0 obj\n" % num)
+        self._write(body)
+        self._write(b"\nendobj\n")
+        return num
+
+    def write_stream(self, num: int, dict_body: str, data: Chunks, length: Optional[int] = None) -> int:
+        """
+        Ghi stream. data là bytes hoặc iterable các khối bytes (ghi dần, không gom vào RAM);
+        nếu là iterable thì phải biết trước length.
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            chunks: Iterable[bytes] = (bytes(data),)
+            length = len(data)
+        else:
+            chunks = data
+            if length is None:
+                raise ValueError("Cần length khi data là iterable")
+        self._offsets[num] = self._tell()
+        self._write(b"%d 0 obj\n<< " % num)
+        self._write(dict_body.encode("latin-1"))
+        self._write(b" /Length %d >>\nstream\n" % length)
+        written = 0
+        for chunk in chunks:
+            self._write(chunk)
+            written += len(chunk)
+        if written != length:
+            raise ValueError(f"Độ dài stream sai: khai báo {length}, ghi {written}")
+        self._write(b"\nendstream\nendobj\n")
+        return num
+
+    # ---- mức cao ----
+    def add_image_xobject(self, width: int, height: int, color_space: str, bits: int,
+                          filter_name: Optional[str], data: Chunks, *, length: Optional[int] = None,
+                          decode_parms: Optional[str] = None, smask: Optional[int] = None) -> int:
+        parts = [f"/Type /XObject /Subtype /Image /Width {width} /Height {height}",
+                 f"/ColorSpace {color_space} /BitsPerComponent {bits}"]
+        if filter_name:
+            parts.append(f"/Filter {filter_name}")
+        if decode_parms:
+            parts.append(f"/DecodeParms {decode_parms}")
+        if smask:
+            parts.append(f"/SMask {smask} 0 R")
+        return self.write_stream(self.alloc(), " ".join(parts), data, length)
+
+    def add_page(self, width: float, height: float, content: bytes, resources: str) -> int:
+        content_num = self.write_stream(self.alloc(), "", content)
+        page = self.alloc()
+        self.write_object(page, (
+            f"<< /Type /Page /Parent {self._pages_root} 0 R "
+            f"/MediaBox [0 0 {pdf_number(width)} {pdf_number(height)}] "
+            f"/Resources {resources} /Contents {content_num} 0 R >>"
+        ))
+        self._pages.append(page)
+        return page
+
+    def add_image_page(self, image_num: int, width: float, height: float) -> int:
+        """1 trang kích thước width x height (pt), ảnh phủ kín trang."""
+        content = f"q {pdf_number(width)} 0 0 {pdf_number(height)} 0 0 cm /Im0 Do Q".encode("ascii")
+        return self.add_page(width, height, content, f"<< /XObject << /Im0 {image_num} 0 R >> >>")
+
+    def add_page_object(self, num: int) -> int:
+        """Đăng ký trang đã ghi sẵn bằng write_object (vd: trang chép từ PDF khác, /Parent = pages_root)."""
+        self._pages.append(num)
+        return num
+
+    @property
+    def pages_root(self) -> int:
+        return self._pages_root
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def close(self, info: Optional[Dict[str, str]] = None, catalog_extra: str = "") -> None:
+        """Ghi /Pages, Catalog (thêm catalog_extra, vd: "/Outlines 5 0 R"), xref và trailer."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            kids = " ".join(f"{p} 0 R" for p in self._pages)
+            self.write_object(self._pages_root,
+                              f"<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>")
+            catalog = self.write_object(self.alloc(), f"<< /Type /Catalog /Pages {self._pages_root} 0 R {catalog_extra}>>")
+            info_num = None
+            if info:
+                body = " ".join(f"{pdf_name(k)} {pdf_string(v)}" for k, v in info.items())
+                info_num = self.write_object(self.alloc(), f"<< {body} >>")
+
+            xref_at = self._tell()
+            size = self._next
+            buf = io.BytesIO()
+            buf.write(b"xref\n0 %d\n" % size)
+            buf.write(b"0000000000 65535 f \n")
+            for num in range(1, size):
+                off = self._offsets.get(num)
+                if off is None:
+                    buf.write(b"0000000000 65535 f \n")
+                else:
+                    buf.write(b"%010d 00000 n \n" % off)
+            trailer = f"trailer\n<< /Size {size} /Root {catalog} 0 R"
+            if info_num:
+                trailer += f" /Info {info_num} 0 R"
+            trailer += f" >>\nstartxref\n{xref_at}\n%%EOF\n"
+            buf.write(trailer.encode("latin-1"))
+            self._write(buf.getvalue())
+        finally:
+            if self._owns:
+                self._fh.close()
+
+    def abort(self) -> None:
+        """Đóng file mà không ghi phần kết (dùng khi lỗi giữa chừng)."""
+        self._closed = True
+        if self._owns:
+            self._fh.close()
+
+    def __enter__(self) -> "PdfStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,155 @@
+# src/preflight.py
+"""
+Preflight: ước lượng chi phí chuyển đổi từng file chỉ từ metadata, không mở Office.
+
+- .docx: docProps/app.xml (số trang, số từ) + tổng dung lượng ảnh trong word/media/ (central directory ZIP).
+- .xlsx: dimension từng sheet đọc từ phần đầu XML worksheet (xlsx_native.read_sheet_header).
+- Ảnh: Pillow chỉ đọc header (size/mode), không giải mã điểm ảnh.
+- Định dạng nhị phân (.doc/.xls/.xlsb) và file hỏng: ước lượng theo dung lượng file.
+
+`cost` xấp xỉ số giây chuyển đổi, chỉ dùng để so sánh/xếp lịch (src/scheduler.py), không phải cam kết.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from xml.etree import ElementTree as ET
+
+logger = logging.getLogger(__name__)
+
+APP_NS = "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
+
+# -------------------- Mô hình chi phí (giây, ước lượng thô) --------------------
+BASE_COST = {"word": 1.5, "excel": 2.0, "image": 0.05}  # mở file / khởi động export
+WORD_COST_PER_PAGE = 0.08
+WORD_XML_BYTES_PER_PAGE = 4000      # docx thiếu app.xml: đoán số trang theo document.xml
+STALE_PAGES_FACTOR = 4              # document.xml lớn gấp ngần này so với số trang khai báo -> app.xml đã cũ
+EXCEL_COST_PER_KCELL = 0.004        # mỗi 1000 ô trong vùng dimension
+EXCEL_COST_PER_SHEET = 0.3
+IMAGE_COST_PER_MPIX = 0.03
+COST_PER_MEDIA_MB = 0.05            # ảnh nhúng trong docx/xlsx
+COST_PER_FILE_MB = {"word": 0.6, "excel": 0.8, "image": 0.02}  # dự phòng khi không đọc được metadata
+
+
+@dataclass
+class Estimate:
+    path: str
+    kind: str
+    cost: float
+    size_bytes: int = 0
+    pages: Optional[int] = None
+    words: Optional[int] = None
+    media_bytes: int = 0
+    cells: Optional[int] = None
+    # [{name, member, state, dimension, rows, cols, empty, drawing, print_area}]
+    sheets: List[Dict] = field(default_factory=list)
+    width: Optional[int] = None
+    height: Optional[int] = None
+    mode: Optional[str] = None
+    source: str = "size"                                # metadata dùng: app.xml | xml | sheet | header | size
+    error: Optional[str] = None
+
+
+def _media_bytes(zf: zipfile.ZipFile, prefix: str) -> int:
+    return sum(i.file_size for i in zf.infolist() if i.filename.startswith(prefix))
+
+
+def _int_or_none(text: Optional[str]) -> Optional[int]:
+    try:
+        return int(text) if text is not None else None
+    except ValueError:
+        return None
+
+
+def _docx(zf: zipfile.ZipFile, est: Estimate) -> None:
+    names = set(zf.namelist())
+    if "docProps/app.xml" in names:
+        root = ET.fromstring(zf.read("docProps/app.xml"))
+        est.pages = _int_or_none(root.findtext(f"{{{APP_NS}}}Pages"))
+        est.words = _int_or_none(root.findtext(f"{{{APP_NS}}}Words"))
+        if est.pages:
+            est.source = "app.xml"
+    if "word/document.xml" in names:
+        # app.xml chỉ Word cập nhật khi lưu; file do công cụ khác sinh (python-docx, mẫu) có thể ghi số cũ
+        xml_pages = max(1, zf.getinfo("word/document.xml").file_size // WORD_XML_BYTES_PER_PAGE)
+        if not est.pages or xml_pages > STALE_PAGES_FACTOR * est.pages:
+            est.pages = xml_pages
+            est.source = "xml"
+    est.media_bytes = _media_bytes(zf, "word/media/")
+    est.cost = (BASE_COST["word"] + WORD_COST_PER_PAGE * (est.pages or 1)
+                + COST_PER_MEDIA_MB * est.media_bytes / 1048576)
+
+
+def _xlsx(zf: zipfile.ZipFile, est: Estimate) -> None:
+    from .converters.xlsx_native import (parse_ref, read_sheet_header, sheet_has_cells, sheet_has_drawing,
+                                         workbook_sheets)
+
+    cells = 0
+    for sh in workbook_sheets(zf):
+        drawing = sheet_has_drawing(zf, sh["member"])
+        info = {"name": sh["name"], "member": sh["member"], "state": sh["state"], "dimension": None,
+                "rows": 0, "cols": 0, "empty": not drawing, "drawing": drawing, "print_area": sh["print_area"]}
+        try:
+            dim = read_sheet_header(zf, sh["member"])["dimension"]
+        except (KeyError, ET.ParseError):
+            dim = None  # chartsheet / sheet hỏng
+        if dim:
+            r1, c1, r2, c2 = parse_ref(dim)
+            info.update(dimension=dim, rows=r2 - r1 + 1, cols=c2 - c1 + 1)
+            # sheet trống vẫn được ghi dimension "A1" -> chỉ khi đó mới quét tìm ô có dữ liệu
+            info["empty"] = r1 == r2 and c1 == c2 and not drawing and not sheet_has_cells(zf, sh["member"])
+            if sh["state"] == "visible" and not info["empty"]:  # sheet ẩn/trống không được in
+                cells += info["rows"] * info["cols"]
+        est.sheets.append(info)
+    est.cells = cells
+    est.media_bytes = _media_bytes(zf, "xl/media/")
+    est.source = "sheet"
+    est.cost = (BASE_COST["excel"] + EXCEL_COST_PER_SHEET * len(est.sheets)
+                + EXCEL_COST_PER_KCELL * cells / 1000 + COST_PER_MEDIA_MB * est.media_bytes / 1048576)
+
+
+def _image(path: Path, est: Estimate) -> None:
+    try:
+        from PIL import Image
+    except ImportError:
+        return  # giữ ước lượng theo dung lượng
+    with Image.open(path) as im:  # lazy: chỉ đọc header
+        est.width, est.height = im.size
+        est.mode = im.mode
+    est.source = "header"
+    est.cost = (BASE_COST["image"] + IMAGE_COST_PER_MPIX * est.width * est.height / 1e6
+                + COST_PER_FILE_MB["image"] * est.size_bytes / 1048576)
+
+
+def estimate(path: str | os.PathLike, kind: Optional[str] = None) -> Estimate:
+    """Ước lượng chi phí 1 file; lỗi đọc metadata không ném ra mà rơi về ước lượng theo dung lượng."""
+    p = Path(path)
+    if kind is None:
+        from .batch import classify
+        kind = classify(p) or "word"
+    try:
+        size = p.stat().st_size
+    except OSError as e:
+        return Estimate(str(p), kind, BASE_COST.get(kind, 1.0), error=str(e))
+
+    est = Estimate(str(p), kind, BASE_COST.get(kind, 1.0) + COST_PER_FILE_MB.get(kind, 0.5) * size / 1048576,
+                   size_bytes=size)
+    ext = p.suffix.lower()
+    try:
+        if kind == "image":
+            _image(p, est)
+        elif ext in (".docx", ".docm", ".dotx"):
+            with zipfile.ZipFile(p) as zf:
+                _docx(zf, est)
+        elif ext in (".xlsx", ".xlsm", ".xltx", ".xltm"):
+            with zipfile.ZipFile(p) as zf:
+                _xlsx(zf, est)
+    except Exception as e:  # file hỏng/khác định dạng: converter sẽ báo lỗi thật, ở đây chỉ ước lượng
+        logger.debug("Preflight %s: %s", p, e)
+        est.error = f"{type(e).__name__}: {e}"
+    est.cost = round(est.cost, 3)
+    return est
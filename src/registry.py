@@ -0,0 +1,72 @@
+# src/registry.py
+"""
+Bảng converter theo loại file. Chỉ chứa chuỗi "module:hàm" và đuôi file nên import gần như không tốn gì;
+module converter (và Pillow / reportlab / openpyxl / win32com mà nó dùng bên trong) chỉ được import khi
+get_converter(kind) được gọi lần đầu.
+
+    from src.registry import classify, get_converter
+    kind = classify("a.xlsx")                       # "excel"
+    get_converter(kind)("a.xlsx", "a.pdf")          # import excel_to_pdf tại đây
+
+Dùng chung cho batch (phân loại file), supervisor (tên hàm gửi sang tiến trình worker) và queue của UI.
+"""
+from __future__ import annotations
+
+import os
+
+TYPE_CHECKING = False  # không import typing/collections lúc chạy (~10ms); chú thích kiểu chỉ là chuỗi
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+# Hàm converter theo loại file (module tương đối với package src)
+CONVERTERS: dict[str, str] = {
+    "word": ".converters.word_to_pdf:word_to_pdf",
+    "excel": ".converters.excel_to_pdf:excel_to_pdf",
+    "image": ".converters.image_to_pdf:image_to_pdf",
+}
+
+# Đuôi file theo loại (converter dùng lại đúng các set này: WORD_EXTS, SUPPORTED_EXTS, IMAGE_EXTS)
+EXTENSIONS: dict[str, set[str]] = {
+    "word": {".docx", ".doc"},
+    "excel": {".xlsx", ".xls", ".xlsm", ".xlsb", ".xltx", ".xltm"},
+    "image": {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"},
+}
+
+_LOADED: dict[str, Callable] = {}
+
+
+def register(kind: str, target: str, extensions: Iterable[str]) -> None:
+    """Thêm/thay converter cho 1 loại file. target: "module:hàm" (module tương đối với src hoặc tuyệt đối)."""
+    CONVERTERS[kind] = target
+    exts = EXTENSIONS.setdefault(kind, set())
+    exts.clear()  # sửa tại chỗ: converter giữ tham chiếu tới đúng set này
+    exts.update(e.lower() if e.startswith(".") else "." + e.lower() for e in extensions)
+    _LOADED.pop(target, None)
+
+
+def classify(path: str | os.PathLike) -> str | None:
+    ext = os.path.splitext(os.fspath(path))[1].lower()
+    for kind, exts in EXTENSIONS.items():
+        if ext in exts:
+            return kind
+    return None
+
+
+def resolve(target: str) -> Callable:
+    """Chuỗi "module:hàm" -> hàm (import module ở lần gọi đầu, sau đó lấy từ cache)."""
+    fn = _LOADED.get(target)
+    if fn is None:
+        import importlib
+
+        mod, _, name = target.partition(":")
+        fn = getattr(importlib.import_module(mod, package=__package__), name)
+        _LOADED[target] = fn
+    return fn
+
+
+def get_converter(kind: str) -> Callable:
+    try:
+        target = CONVERTERS[kind]
+    except KeyError:
+        raise ValueError(f"Không có converter cho loại {kind!r} (có: {', '.join(CONVERTERS)})") from None
+    return resolve(target)
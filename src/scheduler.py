@@ -0,0 +1,134 @@
+# src/scheduler.py
+"""
+Hàng đợi job theo chi phí ước lượng (src/preflight.py): shortest-job-first có aging, chia 2 làn.
+
+- Làn "small": lấy job có khoá nhỏ nhất trong cả 2 làn (SJF); khoá = cost + AGING_PER_S * thời điểm vào hàng,
+  nên job lớn chờ lâu dần được ưu tiên lên (không bị đói khi job nhỏ liên tục đổ vào).
+- Làn "large": worker dành riêng cho file lớn (cost >= large_cost) để file lớn vẫn tiến triển song song,
+  hết file lớn thì quay sang làm job nhỏ.
+
+Dùng bởi batch.run_batch; chạy được với job đổ vào dần (push từ thread khác) và close() khi hết.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Job có cost (giây ước lượng) từ ngưỡng này đi làn lớn
+LARGE_JOB_COST = 30.0
+# Mỗi giây chờ trừ đi bao nhiêu "giây chi phí" khỏi độ ưu tiên
+AGING_PER_S = 0.5
+
+LANES = ("small", "large")
+
+
+class CostScheduler:
+    def __init__(self, *, large_cost: float = LARGE_JOB_COST, aging: float = AGING_PER_S,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.large_cost = large_cost
+        self.aging = aging
+        self._clock = clock
+        self._t0 = clock()
+        self._heaps: Dict[str, List[Tuple[float, int, Any]]] = {lane: [] for lane in LANES}
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._closed = False
+
+    def push(self, item: Any, cost: float) -> None:
+        # cost - aging * (now - t_vào) ; phần "- aging * now" giống nhau cho mọi job nên bỏ được -> khoá tĩnh
+        key = cost + self.aging * (self._clock() - self._t0)
+        lane = "large" if cost >= self.large_cost else "small"
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("CostScheduler đã đóng")
+            heapq.heappush(self._heaps[lane], (key, next(self._seq), item))
+            self._cv.notify()
+
+    def close(self) -> None:
+        """Không nhận thêm job; pop() trả None khi hàng đợi rỗng."""
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+
+    def __len__(self) -> int:
+        with self._cv:
+            return sum(len(h) for h in self._heaps.values())
+
+    def _take(self, lane: str):
+        small, large = self._heaps["small"], self._heaps["large"]
+        if lane == "large" and large:
+            return heapq.heappop(large)[2]
+        if small and (not large or small[0] < large[0]):
+            return heapq.heappop(small)[2]
+        if large:
+            return heapq.heappop(large)[2]
+        return None
+
+    def pop(self, lane: str = "small", timeout: Optional[float] = None) -> Any:
+        """Job tiếp theo cho worker của làn `lane`; None khi đã close() và hết job (hoặc quá timeout)."""
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cv:
+            while True:
+                item = self._take(lane)
+                if item is not None or self._closed:
+                    return item
+                remaining = None if deadline is None else deadline - self._clock()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cv.wait(remaining)
+
+
+def lanes_for(workers: int) -> List[str]:
+    """Làn của từng worker: ~1/4 (ít nhất 1 khi có >= 2 worker) dành cho file lớn."""
+    if workers <= 1:
+        return ["small"]
+    n_large = max(1, workers // 4)
+    return ["large"] * n_large + ["small"] * (workers - n_large)
+
+
+def run_scheduled(items: Sequence[Any], costs: Sequence[float], workers: int,
+                  fn: Callable[[Any], Any], *, large_cost: float = LARGE_JOB_COST,
+                  thread_name: str = "sched") -> List[Any]:
+    """
+    Chạy fn(item) cho mọi item trên `workers` thread, thứ tự lấy theo CostScheduler.
+    Trả về kết quả theo đúng thứ tự items (như ThreadPoolExecutor.map). fn không nên ném lỗi.
+    """
+    sched = CostScheduler(large_cost=large_cost)
+    for i, (item, cost) in enumerate(zip(items, costs)):
+        sched.push((i, item), cost)
+    sched.close()
+    results: List[Any] = [None] * len(items)
+    errors: List[BaseException] = []
+
+    def worker(lane: str) -> None:
+        while not errors:
+            job = sched.pop(lane)
+            if job is None:
+                return
+            i, item = job
+            try:
+                results[i] = fn(item)
+            except BaseException as e:  # giữ hành vi như map(): ném lại lỗi đầu tiên
+                errors.append(e)
+
+    lanes = lanes_for(max(1, min(workers, len(items))))
+    if len(lanes) == 1:
+        worker(lanes[0])
+    else:
+        threads = [threading.Thread(target=worker, args=(lane,), name=f"{thread_name}-{i}", daemon=True)
+                   for i, lane in enumerate(lanes)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+def sjf_order(costs: Iterable[float]) -> List[int]:
+    """Chỉ số theo chi phí tăng dần (ổn định) - cho các chỗ đã có pool riêng (vd: process pool ảnh)."""
+    return [i for i, _c in sorted(enumerate(costs), key=lambda ic: ic[1])]
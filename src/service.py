@@ -0,0 +1,745 @@
+# src/service.py
+"""
+Dịch vụ chuyển đổi cục bộ qua HTTP (TCP hoặc Unix socket), thay cho việc gọi converter ngay trên luồng request.
+
+    python -m src.service --port 8765 --image-workers 4 --word-workers 2
+    python -m src.service --unix-socket /run/docxtopdf.sock --allow-path /srv/in
+    python -m src.service --stand-in 0.5          # converter giả (chỉ ghi PDF trống), để thử client / tải
+
+API (JSON, trừ tải PDF):
+    POST   /jobs?name=a.docx        thân request = nội dung file (Content-Length bắt buộc)
+    POST   /jobs                    Content-Type: application/json, {"path": "/srv/in/a.xlsx"} (cần --allow-path)
+                                    tuỳ chọn: kind=word|excel|image, engine=... (query hoặc JSON)
+           -> 202 + job; 429 + Retry-After khi hàng đợi engine đã đầy; 413 khi file quá lớn
+           (gửi kèm `Expect: 100-continue` để nhận 429/413 trước khi gửi thân file; không thì thân bị đọc bỏ)
+    GET    /jobs/<id>               trạng thái: queued | running | done | failed | cancelled, tiến độ, lỗi
+    GET    /jobs/<id>/pdf           tải PDF (stream thẳng từ file bằng sendfile); 409 khi chưa xong
+    DELETE /jobs/<id>               huỷ (job đang chạy dừng ở lần báo tiến độ kế tiếp) và xoá file
+    GET    /jobs, GET /health       danh sách job; độ dài hàng đợi / số worker theo engine
+
+Mỗi engine (image / word / excel) có hàng đợi giới hạn và nhóm worker riêng: ảnh không phải chờ sau tài liệu
+Word lớn. Word/Excel chạy trong tiến trình worker có giám sát (src.supervisor, hạn chót `timeout`) như batch CLI;
+converter truyền qua `converters` (vd: stand_in_converter) chạy ngay trong luồng worker.
+File tải lên và PDF nằm trong work_dir/<id>/, bị xoá sau `ttl` giây kể từ khi job kết thúc.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import queue
+import shutil
+import signal
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, quote, urlsplit
+
+from . import CONVERSION_TIMEOUT
+from .converters.progress import ConversionCancelled, report
+from .registry import EXTENSIONS, classify, get_converter
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("word", "excel", "image")
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+
+DEFAULT_QUEUE_SIZE = 32              # job chờ tối đa mỗi engine; quá -> 429
+DEFAULT_MAX_UPLOAD_MB = 200
+DEFAULT_TTL_S = 3600.0               # giữ job + file sau khi kết thúc
+CHUNK = 1 << 20                      # đọc file tải lên theo khối 1 MB
+MAX_JSON_BYTES = 1 << 16
+KEEPALIVE_TIMEOUT_S = 30.0           # đóng kết nối HTTP/1.1 im lặng quá lâu (cả khi đang nhận thân request)
+
+ConverterFn = Callable[..., str]
+
+
+class ServiceError(Exception):
+    """Lỗi trả về cho client với mã HTTP `status`."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class QueueFull(ServiceError):
+    """Hàng đợi engine đã đầy (HTTP 429); retry_after: số giây nên chờ trước khi gửi lại."""
+
+    def __init__(self, kind: str, retry_after: int) -> None:
+        super().__init__(429, f"Hàng đợi {kind} đã đầy, thử lại sau {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class ServiceJob:
+    id: str
+    kind: str
+    name: str
+    src: Path
+    dst: Path
+    engine: str = "auto"
+    upload: bool = False
+    status: str = "queued"
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    done: int = 0
+    total: int = 0
+    step: str = ""
+    output: Optional[str] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+
+    def to_dict(self, position: Optional[int] = None) -> Dict[str, object]:
+        end = self.finished or time.time()
+        out = {
+            "id": self.id, "kind": self.kind, "name": self.name, "engine": self.engine, "status": self.status,
+            "created": round(self.created, 3),
+            "seconds": round(end - self.started, 3) if self.started else None,
+            "waited": round((self.started or end) - self.created, 3),
+            "progress": {"done": self.done, "total": self.total, "step": self.step},
+            "error": self.error,
+            "links": {"self": f"/jobs/{self.id}", "pdf": f"/jobs/{self.id}/pdf"},
+        }
+        if position is not None:
+            out["position"] = position
+        if self.status == "done" and self.output and os.path.isfile(self.output):
+            out["size"] = os.path.getsize(self.output)
+        return out
+
+
+class _EnginePool:
+    def __init__(self, kind: str, workers: int, queue_size: int) -> None:
+        self.kind = kind
+        self.workers = workers
+        self.queue: "queue.Queue[Optional[ServiceJob]]" = queue.Queue(maxsize=queue_size)
+        self.running = 0
+        self.avg_s = 0.0                   # thời gian chạy trung bình (EMA), để ước lượng Retry-After
+        self.threads: List[threading.Thread] = []
+        self.supervisor = None
+
+
+def stand_in_converter(delay: float = 0.0, *, fail: bool = False, steps: int = 4) -> ConverterFn:
+    """
+    Converter giả cho thử nghiệm dịch vụ trên máy không có Office: chờ `delay` giây (chia `steps` bước,
+    có báo tiến độ và huỷ được) rồi ghi 1 trang PDF trống A4; fail=True -> ném RuntimeError.
+    """
+    def convert(src: str, dst: Optional[str] = None, *, progress=None, **_options) -> str:
+        from .pdf.writer import PdfStreamWriter
+
+        dst = dst or os.path.splitext(src)[0] + ".pdf"
+        for i in range(steps):
+            report(progress, i, steps, f"stand-in {i + 1}/{steps}")
+            time.sleep(delay / steps)
+        if fail:
+            raise RuntimeError(f"stand-in lỗi: {src}")
+        with PdfStreamWriter(dst) as w:
+            w.add_page(595.0, 842.0, b"", "<< >>")
+        report(progress, steps, steps, "xong")
+        return dst
+
+    return convert
+
+
+class ConversionService:
+    """
+    svc = ConversionService(workers={"image": 4, "word": 2}).start()
+    job = svc.submit_upload("a.docx", fileobj, length)   # hoặc svc.submit_path("/srv/in/a.xlsx")
+    svc.get(job.id)["status"]; svc.output_path(job.id)
+    svc.close()
+
+    - workers: số worker mỗi engine (thiếu -> 1; ảnh mặc định số CPU).
+    - queue_size: số job chờ tối đa mỗi engine (không tính job đang chạy).
+    - converters: {kind: hàm(src, dst, progress=..., **options)} thay converter thật (chạy trong luồng).
+    - timeout: hạn chót mỗi file Word/Excel (chạy trong tiến trình worker có giám sát); 0/None: chạy trong luồng.
+    - allow_paths: thư mục được phép nhận job theo đường dẫn; None: chỉ nhận file tải lên.
+    """
+
+    def __init__(self, work_dir: Optional[str | os.PathLike] = None, *,
+                 workers: Optional[Dict[str, int]] = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 engines: Optional[Dict[str, str]] = None,
+                 converters: Optional[Dict[str, ConverterFn]] = None,
+                 timeout: Optional[float] = CONVERSION_TIMEOUT,
+                 dpi: int = 300,
+                 max_upload_mb: float = DEFAULT_MAX_UPLOAD_MB,
+                 ttl: float = DEFAULT_TTL_S,
+                 allow_paths: Optional[Sequence[str | os.PathLike]] = None) -> None:
+        if queue_size < 1:
+            raise ValueError("queue_size phải >= 1")
+        self._owns_dir = work_dir is None
+        self.work_dir = Path(work_dir or tempfile.mkdtemp(prefix="docxtopdf-service-")).resolve()
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        workers = {"word": 1, "excel": 1, "image": os.cpu_count() or 1, **(workers or {})}
+        self.engines = {"word": "auto", "excel": "auto", "image": "auto", **(engines or {})}
+        self.converters = dict(converters or {})
+        self.timeout = timeout
+        self.dpi = dpi
+        self.max_upload = int(max_upload_mb * 1024 * 1024)
+        self.ttl = ttl
+        self.allow_paths = [Path(p).resolve() for p in allow_paths] if allow_paths is not None else None
+        self.pools = {k: _EnginePool(k, max(1, int(workers[k])), queue_size) for k in KINDS}
+        self._jobs: Dict[str, ServiceJob] = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+
+    # ---- vòng đời ----
+    def start(self) -> "ConversionService":
+        if self._started:
+            return self
+        self._started = True
+        for kind, pool in self.pools.items():
+            if kind != "image" and self.timeout and kind not in self.converters:
+                from .converters.libreoffice import port_range_for
+                from .supervisor import Supervisor
+
+                warm = self.engines[kind] in ("auto", "com") and os.name == "nt"
+                pool.supervisor = Supervisor(pool.workers, timeout=self.timeout,
+                                             office=kind if warm else None,
+                                             lo_base_port=port_range_for(kind)).start()
+            for i in range(pool.workers):
+                t = threading.Thread(target=self._worker_loop, args=(pool,), name=f"service-{kind}-{i}",
+                                     daemon=True)
+                t.start()
+                pool.threads.append(t)
+        logger.info("Dịch vụ chuyển đổi: work_dir=%s, worker %s", self.work_dir,
+                    {k: p.workers for k, p in self.pools.items()})
+        return self
+
+    def close(self, cancel: bool = True) -> None:
+        """Ngừng nhận job; cancel=True: huỷ job đang chờ/đang chạy. Chờ worker dừng rồi dọn work_dir (nếu tự tạo)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if cancel:
+                for job in self._jobs.values():
+                    if job.status in ("queued", "running"):
+                        job.cancel_requested = True
+                        if job.status == "queued":
+                            self._finish(job, "cancelled")
+        for pool in self.pools.values():
+            for _ in pool.threads:
+                pool.queue.put(None)
+        for pool in self.pools.values():
+            for t in pool.threads:
+                t.join()
+            if pool.supervisor is not None:
+                pool.supervisor.close()
+        if self._owns_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def __enter__(self) -> "ConversionService":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- nhận job ----
+    def _kind(self, name: str, kind: Optional[str]) -> str:
+        if self._closed:
+            raise ServiceError(503, "Dịch vụ đang dừng")
+        kind = kind or classify(name)
+        if kind not in KINDS:
+            exts = " ".join(sorted(e for k in KINDS for e in EXTENSIONS[k]))
+            raise ServiceError(400, f"Không hỗ trợ {name!r} (kind={kind!r}); đuôi hỗ trợ: {exts}")
+        return kind
+
+    def _new_job(self, name: str, kind: Optional[str], engine: Optional[str], src: Optional[Path]) -> ServiceJob:
+        kind = self._kind(name, kind)
+        self._check_capacity(kind)
+        job_id = uuid.uuid4().hex
+        job_dir = self.work_dir / job_id
+        job_dir.mkdir()
+        stem = Path(name).stem or "output"
+        return ServiceJob(job_id, kind, name, src or job_dir / "in" / name, job_dir / f"{stem}.pdf",
+                          engine or self.engines[kind], upload=src is None)
+
+    def check_upload(self, name: str, length: int, kind: Optional[str] = None) -> str:
+        """
+        Kiểm tra 1 lượt tải lên trước khi đọc thân request (tên, kích thước, loại, chỗ trong hàng đợi);
+        ném ServiceError / QueueFull như submit_upload. Trả về tên file đã chuẩn hoá.
+        """
+        name = os.path.basename(name.replace("\\", "/")).strip()
+        if not name or name in (".", ".."):
+            raise ServiceError(400, "Thiếu tên file (query ?name=... hoặc header X-Filename)")
+        if length > self.max_upload:
+            raise ServiceError(413, f"File quá lớn ({length} byte > {self.max_upload})")
+        self._check_capacity(self._kind(name, kind))
+        return name
+
+    def submit_upload(self, name: str, stream, length: int, *, kind: Optional[str] = None,
+                      engine: Optional[str] = None) -> ServiceJob:
+        """Nhận file từ stream (đọc đúng `length` byte theo khối) và xếp vào hàng đợi engine."""
+        name = self.check_upload(name, length, kind)
+        self._reap()
+        job = self._new_job(name, kind, engine, None)
+        try:
+            job.src.parent.mkdir()
+            remaining = length
+            with open(job.src, "wb") as f:
+                while remaining > 0:
+                    chunk = stream.read(min(CHUNK, remaining))
+                    if not chunk:
+                        raise ServiceError(400, f"Thiếu dữ liệu: nhận {length - remaining}/{length} byte")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            self._enqueue(job)
+        except BaseException:
+            shutil.rmtree(self.work_dir / job.id, ignore_errors=True)
+            raise
+        return job
+
+    def submit_path(self, path: str | os.PathLike, *, kind: Optional[str] = None,
+                    engine: Optional[str] = None) -> ServiceJob:
+        """Job đọc file có sẵn trên máy; chỉ cho phép trong các thư mục allow_paths."""
+        if self.allow_paths is None:
+            raise ServiceError(403, "Dịch vụ không nhận đường dẫn (chạy với --allow-path)")
+        src = Path(path).resolve()
+        if not any(src == root or root in src.parents for root in self.allow_paths):
+            raise ServiceError(403, f"Đường dẫn ngoài thư mục cho phép: {src}")
+        if not src.is_file():
+            raise ServiceError(404, f"Không tìm thấy file: {src}")
+        self._reap()
+        job = self._new_job(src.name, kind, engine, src)
+        try:
+            self._enqueue(job)
+        except BaseException:
+            shutil.rmtree(self.work_dir / job.id, ignore_errors=True)
+            raise
+        return job
+
+    def _check_capacity(self, kind: str) -> None:
+        pool = self.pools[kind]
+        if pool.queue.full():
+            raise QueueFull(kind, self._retry_after(pool))
+
+    def _retry_after(self, pool: _EnginePool) -> int:
+        # Hàng đợi đầy: ước lượng thời gian để worker rút bớt 1 lượt job
+        return max(1, math.ceil((pool.avg_s or 1.0) * pool.queue.qsize() / pool.workers))
+
+    def _enqueue(self, job: ServiceJob) -> None:
+        pool = self.pools[job.kind]
+        with self._lock:
+            if self._closed:
+                raise ServiceError(503, "Dịch vụ đang dừng")
+            try:
+                pool.queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull(job.kind, self._retry_after(pool)) from None
+            self._jobs[job.id] = job
+        logger.info("Job %s: %s (%s) vào hàng đợi, chờ %d", job.id, job.name, job.kind, pool.queue.qsize())
+
+    # ---- tra cứu / huỷ ----
+    def _job(self, job_id: str) -> ServiceJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise ServiceError(404, f"Không có job {job_id}")
+        return job
+
+    def _position(self, job: ServiceJob) -> Optional[int]:
+        if job.status != "queued":
+            return None
+        waiting = list(self.pools[job.kind].queue.queue)  # chỉ đọc, danh sách ngắn (<= queue_size)
+        return waiting.index(job) if job in waiting else None
+
+    def get(self, job_id: str) -> Dict[str, object]:
+        self._reap()
+        with self._lock:
+            job = self._job(job_id)
+            return job.to_dict(self._position(job))
+
+    def jobs(self) -> List[Dict[str, object]]:
+        self._reap()
+        with self._lock:
+            return [j.to_dict(self._position(j)) for j in sorted(self._jobs.values(), key=lambda j: j.created)]
+
+    def output_path(self, job_id: str) -> str:
+        """Đường dẫn PDF của job đã xong; ServiceError 409 nếu job chưa xong / lỗi / đã huỷ."""
+        with self._lock:
+            job = self._job(job_id)
+            if job.status != "done" or not job.output:
+                raise ServiceError(409, f"Job {job_id} đang ở trạng thái {job.status}")
+            return job.output
+
+    def cancel(self, job_id: str) -> Dict[str, object]:
+        """Huỷ và xoá job: đang chờ -> bỏ luôn; đang chạy -> dừng ở lần báo tiến độ kế tiếp rồi dọn file."""
+        with self._lock:
+            job = self._job(job_id)
+            job.cancel_requested = True
+            if job.status == "queued":
+                self._finish(job, "cancelled")
+            if job.status != "running":
+                self._drop(job)
+            return job.to_dict()
+
+    def health(self) -> Dict[str, object]:
+        with self._lock:
+            counts = {s: 0 for s in JOB_STATES}
+            for j in self._jobs.values():
+                counts[j.status] += 1
+            return {
+                "ok": not self._closed,
+                "engines": {k: {"workers": p.workers, "running": p.running, "queued": p.queue.qsize(),
+                                "capacity": p.queue.maxsize, "avg_seconds": round(p.avg_s, 3),
+                                "supervised": p.supervisor is not None}
+                            for k, p in self.pools.items()},
+                "jobs": counts,
+            }
+
+    # ---- dọn dẹp ----
+    def _finish(self, job: ServiceJob, status: str, error: Optional[str] = None) -> None:
+        job.status, job.error, job.finished = status, error, time.time()
+
+    def _drop(self, job: ServiceJob) -> None:
+        self._jobs.pop(job.id, None)
+        shutil.rmtree(self.work_dir / job.id, ignore_errors=True)
+
+    def _reap(self) -> None:
+        """Xoá job (và file) đã kết thúc quá ttl giây."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job in [j for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+                self._drop(job)
+
+    # ---- worker ----
+    def _worker_loop(self, pool: _EnginePool) -> None:
+        while True:
+            job = pool.queue.get()
+            if job is None:
+                return
+            try:
+                self._run(pool, job)
+            except Exception:
+                logger.exception("Worker %s lỗi ngoài dự kiến (job %s)", pool.kind, job.id)
+
+    def _run(self, pool: _EnginePool, job: ServiceJob) -> None:
+        with self._lock:
+            if job.status != "queued" or job.cancel_requested:
+                return  # đã huỷ khi còn chờ
+            job.status, job.started = "running", time.time()
+            pool.running += 1
+
+        def progress(done: int, total: int, label: str = "") -> None:
+            job.done, job.total, job.step = done, total, label
+            if job.cancel_requested:
+                raise ConversionCancelled(job.name)
+
+        status, error, output = "done", None, None
+        t0 = time.perf_counter()
+        try:
+            output = self._convert(pool, job, progress)
+        except ConversionCancelled:
+            status = "cancelled"
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+            logger.warning("Job %s (%s) lỗi: %s", job.id, job.name, error)
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            pool.running -= 1
+            pool.avg_s = elapsed if not pool.avg_s else 0.8 * pool.avg_s + 0.2 * elapsed
+            if job.cancel_requested:
+                status = "cancelled"
+            job.output = output if status == "done" else None
+            self._finish(job, status, error)
+            if job.cancel_requested and job.id in self._jobs:
+                self._drop(job)  # DELETE khi đang chạy (hoặc dịch vụ dừng): không giữ file
+        logger.info("Job %s: %s -> %s (%.2fs)", job.id, job.name, status, elapsed)
+
+    def _convert(self, pool: _EnginePool, job: ServiceJob, progress) -> str:
+        options = {"dpi": self.dpi} if job.kind == "image" else {"engine": job.engine}
+        if pool.supervisor is not None:
+            # Tiến trình worker: không báo tiến độ / huỷ giữa chừng được, nhưng có hạn chót cứng
+            return pool.supervisor.convert(job.kind, job.src, job.dst, **options)
+        fn = self.converters.get(job.kind) or get_converter(job.kind)
+        return fn(str(job.src), str(job.dst), progress=progress, **options)
+
+
+# -------------------- HTTP --------------------
+class _Body:
+    """Thân request: đọc tối đa Content-Length byte, nhớ phần còn lại để đọc bỏ trước khi trả lỗi."""
+
+    def __init__(self, rfile, length: int) -> None:
+        self.rfile, self.left, self.eof = rfile, length, False
+
+    def read(self, n: int = -1) -> bytes:
+        n = self.left if n is None or n < 0 else min(n, self.left)
+        if n <= 0:
+            return b""
+        data = self.rfile.read(n)
+        if not data:
+            self.eof, self.left = True, 0
+        self.left -= len(data)
+        return data
+
+    def drain(self) -> bool:
+        """Đọc bỏ phần thân chưa đọc; False nếu client ngắt giữa chừng (kết nối không dùng lại được)."""
+        while self.left > 0:
+            self.read(CHUNK)
+        return not self.eof
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "docxtopdf-service/1.0"
+    # HTTP/1.1: cần cho Expect: 100-continue và giữ kết nối; mọi phản hồi đều có Content-Length
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT_S
+    _body: Optional[_Body] = None
+
+    @property
+    def service(self) -> ConversionService:
+        return self.server.service
+
+    def address_string(self) -> str:
+        addr = self.client_address
+        return addr[0] if isinstance(addr, tuple) and addr else "unix"
+
+    def log_message(self, fmt, *args) -> None:
+        logger.debug("%s - " + fmt, self.address_string(), *args)
+
+    def handle(self) -> None:
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # client đóng kết nối keep-alive giữa 2 request
+            logger.debug("Client ngắt kết nối: %s", self.address_string())
+
+    def _send_json(self, status: int, body: object, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, e: ServiceError) -> None:
+        headers = {"Retry-After": str(e.retry_after)} if isinstance(e, QueueFull) else None
+        self._send_json(e.status, {"error": str(e)}, headers)
+
+    def _discard_body(self) -> None:
+        """
+        Đọc bỏ phần thân request chưa đọc trước khi trả lỗi: client còn đang gửi file mà server đóng socket
+        thì client nhận BrokenPipe / reset thay vì mã 429/413.
+        """
+        if self._body is None:
+            if self.headers.get("Content-Length") not in (None, "0"):
+                self.close_connection = True  # Content-Length hỏng: không biết thân dài bao nhiêu
+            return
+        try:
+            if not self._body.drain():
+                self.close_connection = True
+        except OSError:
+            self.close_connection = True
+
+    def _upload_args(self, parts: List[str]):
+        """(length, json?) của POST /jobs; ném ServiceError khi sai đường dẫn / Content-Length."""
+        if parts != ["jobs"]:
+            raise ServiceError(404, f"Không có {self.path}")
+        length = self.headers.get("Content-Length")
+        if length is None:
+            raise ServiceError(411, "Cần Content-Length (không hỗ trợ chunked)")
+        try:
+            length = int(length)
+        except ValueError:
+            raise ServiceError(400, f"Content-Length không hợp lệ: {length!r}") from None
+        if length < 0:
+            raise ServiceError(400, f"Content-Length không hợp lệ: {length}")
+        ctype = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        is_json = ctype == "application/json"
+        if is_json and length > MAX_JSON_BYTES:
+            raise ServiceError(413, "JSON quá lớn")
+        return length, is_json
+
+    def handle_expect_100(self) -> bool:
+        """Expect: 100-continue: kiểm tra tên / kích thước / chỗ trong hàng đợi trước khi mời client gửi file."""
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if self.command == "POST":
+                length, is_json = self._upload_args(parts)
+                if not is_json:
+                    name = query.get("name") or self.headers.get("X-Filename") or ""
+                    self.service.check_upload(name, length, query.get("kind"))
+        except ServiceError as e:
+            # client chưa gửi thân; không chờ nó -> đóng kết nối sau phản hồi
+            self.close_connection = True
+            self._send_error(e)
+            return False
+        return super().handle_expect_100()
+
+    def _dispatch(self, handler: Callable[[List[str], Dict[str, str]], None]) -> None:
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self._body = None
+        try:
+            handler(parts, query)
+        except ServiceError as e:
+            self._discard_body()
+            self._send_error(e)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+            logger.debug("Client ngắt kết nối: %s", self.path)
+        except Exception as e:
+            logger.exception("Lỗi xử lý %s %s", self.command, self.path)
+            self._discard_body()
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            self._discard_body()  # handler không đọc hết thân (vd: GET / DELETE có thân)
+
+    def do_GET(self) -> None:
+        self._dispatch(self._get)
+
+    def do_POST(self) -> None:
+        self._dispatch(self._post)
+
+    def do_DELETE(self) -> None:
+        self._dispatch(self._delete)
+
+    def _get(self, parts: List[str], query: Dict[str, str]) -> None:
+        svc = self.service
+        if parts == ["health"]:
+            self._send_json(200, svc.health())
+        elif parts == ["jobs"]:
+            self._send_json(200, {"jobs": svc.jobs()})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            self._send_json(200, svc.get(parts[1]))
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "pdf":
+            self._send_pdf(svc.output_path(parts[1]))
+        else:
+            raise ServiceError(404, f"Không có {self.path}")
+
+    def _send_pdf(self, path: str) -> None:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            name = os.path.basename(path)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(size))
+            self.send_header("Content-Disposition",
+                             f"attachment; filename=\"{name.encode('ascii', 'replace').decode()}\"; "
+                             f"filename*=UTF-8''{quote(name)}")
+            self.end_headers()
+            # Header đã ghi thẳng xuống socket (wfile không đệm) -> gửi thân bằng sendfile, không copy qua Python
+            self.connection.sendfile(f)
+
+    def _post(self, parts: List[str], query: Dict[str, str]) -> None:
+        svc = self.service
+        length, is_json = self._upload_args(parts)
+        self._body = _Body(self.rfile, length)
+        if is_json:
+            try:
+                body = json.loads(self._body.read() or b"{}")
+            except ValueError as e:
+                raise ServiceError(400, f"JSON không hợp lệ: {e}") from None
+            if not isinstance(body, dict) or not body.get("path"):
+                raise ServiceError(400, 'Cần {"path": "..."}')
+            job = svc.submit_path(body["path"], kind=body.get("kind") or query.get("kind"),
+                                  engine=body.get("engine") or query.get("engine"))
+        else:
+            name = query.get("name") or self.headers.get("X-Filename") or ""
+            job = svc.submit_upload(name, self._body, length, kind=query.get("kind"), engine=query.get("engine"))
+        self._send_json(202, svc.get(job.id), {"Location": f"/jobs/{job.id}"})
+
+    def _delete(self, parts: List[str], query: Dict[str, str]) -> None:
+        if len(parts) != 2 or parts[0] != "jobs":
+            raise ServiceError(404, f"Không có {self.path}")
+        self._send_json(200, self.service.cancel(parts[1]))
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service: ConversionService, host: str = "127.0.0.1", port: int = 8765,
+                unix_socket: Optional[str] = None) -> socketserver.BaseServer:
+    """HTTP server (mỗi request 1 luồng; chuyển đổi chạy trên worker của service). unix_socket: bỏ qua host/port."""
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)  # socket cũ còn sót sau lần chạy trước
+        server = _UnixHTTPServer(unix_socket, _Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m src.service",
+                                description="Dịch vụ chuyển Word / Excel / ảnh sang PDF qua HTTP, có hàng đợi.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--unix-socket", metavar="PATH", help="nghe trên Unix socket thay vì TCP")
+    p.add_argument("--work-dir", metavar="DIR", help="nơi lưu file tải lên và PDF (mặc định: thư mục tạm)")
+    p.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, metavar="N",
+                   help=f"số job chờ tối đa mỗi engine, quá thì trả 429 (mặc định {DEFAULT_QUEUE_SIZE})")
+    p.add_argument("--image-workers", type=int, default=os.cpu_count() or 1, metavar="N")
+    p.add_argument("--word-workers", type=int, default=1, metavar="N")
+    p.add_argument("--excel-workers", type=int, default=1, metavar="N")
+    p.add_argument("--word-engine", default="auto",
+                   choices=("auto", "docx2pdf", "com", "native", "libreoffice"))
+    p.add_argument("--excel-engine", default="auto", choices=("auto", "com", "native", "libreoffice"))
+    p.add_argument("--timeout", type=float, default=CONVERSION_TIMEOUT, metavar="SEC",
+                   help="hạn chót mỗi file Word/Excel (0 = chạy trong tiến trình dịch vụ, không giới hạn)")
+    p.add_argument("--dpi", type=int, default=300)
+    p.add_argument("--max-upload-mb", type=float, default=DEFAULT_MAX_UPLOAD_MB, metavar="MB")
+    p.add_argument("--ttl", type=float, default=DEFAULT_TTL_S, metavar="SEC",
+                   help="xoá job và file sau ngần này giây kể từ khi kết thúc")
+    p.add_argument("--allow-path", action="append", metavar="DIR",
+                   help="cho phép gửi job theo đường dẫn file trong DIR (lặp lại được)")
+    p.add_argument("--stand-in", type=float, metavar="SEC",
+                   help="dùng converter giả cho mọi engine (chờ SEC giây rồi ghi PDF trống)")
+    p.add_argument("-v", "--verbose", action="store_true", help="log chi tiết (cả từng request)")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, stream=sys.stderr,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    converters = ({k: stand_in_converter(args.stand_in) for k in KINDS}
+                  if args.stand_in is not None else None)
+    service = ConversionService(
+        args.work_dir,
+        workers={"image": args.image_workers, "word": args.word_workers, "excel": args.excel_workers},
+        queue_size=args.queue_size,
+        engines={"word": args.word_engine, "excel": args.excel_engine},
+        converters=converters,
+        timeout=args.timeout,
+        dpi=args.dpi,
+        max_upload_mb=args.max_upload_mb,
+        ttl=args.ttl,
+        allow_paths=args.allow_path,
+    ).start()
+    server = make_server(service, args.host, args.port, args.unix_socket)
+
+    def stop(*_sig) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    logger.info("Đang nghe trên %s", args.unix_socket or f"http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Đang dừng dịch vụ…")
+    finally:
+        server.server_close()
+        service.close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.unlink(args.unix_socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
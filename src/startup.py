@@ -0,0 +1,116 @@
+# src/startup.py
+"""
+Ngân sách thời gian khởi động: đo import lạnh bằng `python -X importtime` và báo lỗi khi vượt ngân sách
+hoặc khi một module nặng (converter, Pillow, reportlab, openpyxl, win32com, tkinter) bị import sớm.
+
+    python -m src.startup                               # mã thoát 1 nếu vượt ngân sách
+    python -m src.startup --repeat 10 --budget src.cli=300
+
+Mỗi lần đo là 1 interpreter mới chạy `import <module>`. Thời gian của module = tổng cột cumulative của các
+dòng ngoài cùng thuộc module đó và package cha (src, src.x...), không tính phần khởi động interpreter/site.
+Lấy min qua `repeat` lần để bớt nhiễu (lần đầu có thể còn phải biên dịch .pyc).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, Iterable, List, Optional
+
+# Ngân sách mặc định (ms) cho import lạnh; đủ rộng cho máy chậm, chỉ bắt các import nặng bị kéo vào
+BUDGETS_MS: Dict[str, float] = {
+    "src": 10.0,
+    "src.registry": 15.0,
+    "src.supervisor": 150.0,
+    "src.batch": 200.0,
+    "src.cli": 250.0,
+}
+
+# Không module nào trong BUDGETS_MS được kéo theo các module này (chúng chỉ được import khi chuyển đổi)
+FORBIDDEN = (
+    "src.converters.word_to_pdf", "src.converters.excel_to_pdf", "src.converters.image_to_pdf",
+    "src.converters.xlsx_native", "src.converters.com_pool",
+    "PIL", "reportlab", "openpyxl", "win32com", "pythoncom", "tkinter",
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LINE = re.compile(r"^import time:\s*(\d+) \|\s*(\d+) \| ( *)(\S+)")
+
+
+def parse_importtime(stderr: str, module: str) -> float:
+    """Tổng cumulative (ms) của các dòng ngoài cùng là `module` hoặc package cha của nó."""
+    parts = module.split(".")
+    names = {".".join(parts[:i]) for i in range(1, len(parts) + 1)}
+    total_us = 0
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m and not m.group(3) and m.group(4) in names:
+            total_us += int(m.group(2))
+    return total_us / 1000.0
+
+
+def measure(module: str, repeat: int = 5, python: str = sys.executable) -> Dict[str, object]:
+    """Đo `repeat` lần import lạnh của module; trả về ms (min), từng lần đo và các module nặng đã bị import."""
+    code = (f"import sys, {module}; "
+            f"print(' '.join(m for m in {FORBIDDEN!r} if m in sys.modules))")
+    runs: List[float] = []
+    loaded: List[str] = []
+    for _ in range(max(1, repeat)):
+        proc = subprocess.run([python, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} lỗi: {proc.stderr.strip().splitlines()[-1:]}")
+        runs.append(round(parse_importtime(proc.stderr, module), 2))
+        loaded = proc.stdout.split()
+    return {"module": module, "ms": min(runs), "runs": runs, "loaded": loaded}
+
+
+def check(budgets: Optional[Dict[str, float]] = None, repeat: int = 5) -> Dict[str, object]:
+    """Đo mọi module trong budgets; ok=False nếu có module vượt ngân sách hoặc import module nặng."""
+    budgets = BUDGETS_MS if budgets is None else budgets
+    results = []
+    for module, budget in budgets.items():
+        r = measure(module, repeat)
+        r["budget_ms"] = budget
+        r["ok"] = r["ms"] <= budget and not r["loaded"]
+        results.append(r)
+    return {"ok": all(r["ok"] for r in results), "python": sys.version.split()[0], "modules": results}
+
+
+def _parse_budgets(items: Iterable[str]) -> Dict[str, float]:
+    out = dict(BUDGETS_MS)
+    for item in items:
+        module, sep, ms = item.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"--budget cần dạng module=ms: {item!r}")
+        out[module.strip()] = float(ms)
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m src.startup",
+                                description="Đo thời gian import lạnh của package và so với ngân sách.")
+    p.add_argument("--repeat", type=int, default=5, metavar="N", help="số lần đo mỗi module (lấy min)")
+    p.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                   help="đặt/ghi đè ngân sách 1 module (lặp lại được)")
+    args = p.parse_args(argv)
+    try:
+        budgets = _parse_budgets(args.budget)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        p.error(str(e))
+    report = check(budgets, args.repeat)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    for r in report["modules"]:
+        if not r["ok"]:
+            extra = f", import sớm: {' '.join(r['loaded'])}" if r["loaded"] else ""
+            print(f"VƯỢT NGÂN SÁCH: {r['module']} {r['ms']:.1f}ms > {r['budget_ms']:.0f}ms{extra}"
+                  if r["ms"] > r["budget_ms"] else f"LỖI: {r['module']}{extra}", file=sys.stderr)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
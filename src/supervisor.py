@@ -0,0 +1,396 @@
+# src/supervisor.py
+"""
+Chạy converter trong tiến trình con có giám sát, với hạn chót cứng (mặc định CONVERSION_TIMEOUT).
+
+Một tài liệu Word mở hộp thoại modal có thể treo word_to_pdf vô thời hạn; chạy trong cùng tiến trình
+thì không có cách nào ngắt. Ở đây mỗi worker là 1 tiến trình con (multiprocessing "spawn"):
+- Quá hạn: kill worker + cả cây tiến trình con (soffice...) + các WINWORD.EXE/EXCEL.EXE mà worker
+  báo là của nó (Office COM không phải tiến trình con nên phải theo PID), rồi khởi động worker mới.
+- Worker chết giữa chừng: khởi động lại, job báo lỗi WorkerCrashed.
+- Worker được thay mới chủ động sau max_jobs job (hoặc khi RAM vượt max_memory_mb) để chặn rò rỉ bộ nhớ.
+
+    with Supervisor(2, timeout=60, office="word") as sup:
+        sup.convert("word", "a.docx", "a.pdf", engine="com")
+
+Số liệu trong `stats`: jobs, ok, errors, timeouts, crashes, kills, restarts, recycled.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from . import CONVERSION_TIMEOUT
+from .registry import CONVERTERS, resolve
+
+logger = logging.getLogger(__name__)
+
+# Hàm converter theo loại file (đường dẫn "module:hàm", module tương đối với package src) - xem registry.py
+TARGETS = CONVERTERS
+
+OFFICE_PROCESSES = {"word": "WINWORD.EXE", "excel": "EXCEL.EXE"}
+
+
+class ConversionTimeout(TimeoutError):
+    """Job quá hạn; worker (và Office/soffice của nó) đã bị kill."""
+
+
+class WorkerCrashed(RuntimeError):
+    """Tiến trình worker chết khi đang chạy job."""
+
+
+# -------------------- phía tiến trình con --------------------
+def _warm_office(office: Optional[str]):
+    """Trong worker: giữ sẵn 1 instance Office (pool 1 phần tử) để biết PID và tái sử dụng giữa các job."""
+    if office not in OFFICE_PROCESSES or os.name != "nt":
+        return None
+    try:
+        if office == "word":
+            from .converters.word_to_pdf import enable_word_pool
+            return enable_word_pool(1, max_jobs=0)
+        from .converters.excel_to_pdf import enable_excel_pool
+        return enable_excel_pool(1, max_jobs=0)
+    except Exception:
+        logger.warning("Worker: không khởi động được %s, chạy không có pool", office, exc_info=True)
+        return None
+
+
+def _picklable_error(e: BaseException) -> BaseException:
+    import pickle
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+
+def _worker_main(conn, office: Optional[str], lo_port: Optional[int] = None) -> None:
+    if hasattr(os, "setsid"):
+        os.setsid()  # nhóm tiến trình riêng: giám sát kill được cả soffice/tiến trình con khi treo
+    if lo_port is not None:
+        # listener LibreOffice của worker này dùng cổng riêng, không đụng listener của worker khác
+        from .converters.libreoffice import set_base_port
+        set_base_port(lo_port)
+    pool = _warm_office(office)
+
+    def pids() -> List[int]:
+        return pool.pids() if pool is not None else []
+
+    try:
+        conn.send(("ready", pids()))
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                break
+            if msg is None:
+                break
+            target, args, kwargs = msg
+            conn.send(("started", pids()))
+            try:
+                reply = ("ok", resolve(target)(*args, **kwargs))
+            except BaseException as e:
+                reply = ("err", _picklable_error(e), traceback.format_exc())
+            conn.send(reply)
+    finally:
+        if pool is not None:
+            pool.close()
+        try:
+            from .converters.libreoffice import disable_libreoffice
+            disable_libreoffice()
+        except Exception:
+            pass
+
+
+# -------------------- phía giám sát --------------------
+_NO_PID_WARNED = False
+
+
+def _warn_no_office_pid(office: str) -> None:
+    global _NO_PID_WARNED
+    if not _NO_PID_WARNED:
+        _NO_PID_WARNED = True
+        logger.warning("Supervisor: không biết PID %s của worker (Office chạy qua DCOM, không phải tiến trình con): "
+                       "job quá hạn sẽ không kill được Office; cài pywin32/psutil", OFFICE_PROCESSES[office])
+
+
+def _kill_tree(root_pid: int, extra: Set[int]) -> int:
+    """
+    Kill root_pid, mọi tiến trình con cháu của nó và các PID trong extra. Trả về số tiến trình đã kill.
+    Dùng psutil nếu có; không có thì POSIX kill cả process group (worker tự setsid), Windows dùng taskkill /T.
+    """
+    import signal
+    import subprocess
+
+    try:
+        import psutil  # type: ignore
+    except ImportError:
+        psutil = None
+
+    victims: Set[int] = set(extra)
+    if psutil is not None:
+        try:
+            victims.update(c.pid for c in psutil.Process(root_pid).children(recursive=True))
+        except Exception:
+            pass
+    victims.add(root_pid)
+
+    killed = 0
+    if psutil is None and hasattr(os, "killpg"):
+        try:
+            os.killpg(root_pid, signal.SIGKILL)  # worker là trưởng nhóm (setsid trong _worker_main)
+            killed += 1
+            victims.discard(root_pid)
+        except OSError:
+            pass
+    for pid in victims:
+        try:
+            if psutil is not None:
+                psutil.Process(pid).kill()
+            elif os.name == "nt":
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True, check=True)
+            else:
+                os.kill(pid, signal.SIGKILL)
+            killed += 1
+        except Exception:
+            pass
+    return killed
+
+
+class _Worker:
+    def __init__(self, ctx, office: Optional[str], index: int, lo_port: Optional[int] = None) -> None:
+        self.ctx, self.office, self.index, self.lo_port = ctx, office, index, lo_port
+        self.proc = None
+        self.conn = None
+        self.office_pids: Set[int] = set()
+        self.jobs = 0
+
+    def start(self, startup_timeout: float) -> "_Worker":
+        parent, child = self.ctx.Pipe()
+        self.proc = self.ctx.Process(target=_worker_main, args=(child, self.office, self.lo_port),
+                                     name=f"convert-worker-{self.index}", daemon=True)
+        self.proc.start()
+        child.close()
+        self.conn = parent
+        if not parent.poll(startup_timeout):
+            self.kill()
+            raise ConversionTimeout(f"Worker {self.index} không khởi động kịp trong {startup_timeout}s")
+        try:
+            _tag, pids = parent.recv()
+        except EOFError:
+            self.kill()
+            raise WorkerCrashed(f"Worker {self.index} chết khi khởi động (exitcode={self.proc.exitcode})")
+        self.office_pids = set(pids)
+        if self.office in OFFICE_PROCESSES and os.name == "nt" and not pids:
+            _warn_no_office_pid(self.office)
+        return self
+
+    def call(self, target: str, args, kwargs, timeout: Optional[float]):
+        """Trả về ("ok", kết quả) | ("err", exception, traceback) | ("timeout",) | ("crash",)."""
+        try:
+            self.conn.send((target, args, kwargs))
+            if not self.conn.poll(30):
+                return ("timeout",)
+            _tag, pids = self.conn.recv()
+            self.office_pids = set(pids)
+            if not self.conn.poll(timeout):
+                return ("timeout",)
+            return self.conn.recv()
+        except (EOFError, OSError, BrokenPipeError):
+            return ("crash",)
+        finally:
+            self.jobs += 1
+
+    def rss_mb(self) -> Optional[float]:
+        from .converters.com_pool import _rss_bytes
+        total = 0
+        for pid in [self.proc.pid, *self.office_pids] if self.proc else []:
+            rss = _rss_bytes(pid)
+            if rss:
+                total += rss
+        return total / 1048576 if total else None
+
+    def stop(self, wait: float = 30) -> None:
+        if self.proc is None:
+            return
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.proc.join(wait)
+        if self.proc.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self) -> int:
+        if self.proc is None:
+            return 0
+        n = _kill_tree(self.proc.pid, self.office_pids)
+        self.proc.join(5)
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        return n
+
+
+class Supervisor:
+    """
+    N tiến trình worker; run()/submit() chạy 1 hàm converter trên worker rảnh với hạn chót cứng.
+
+    - office: "word" | "excel" | None. Trên Windows, worker giữ sẵn 1 instance Office để tái sử dụng
+      và để biết PID cần kill khi treo.
+    - max_jobs: thay worker mới sau số job này (0 = không giới hạn).
+    - max_memory_mb: thay worker khi RAM (worker + Office của nó) vượt ngưỡng (cần psutil).
+    - lo_base_port: cổng LibreOffice đầu của nhóm (libreoffice.port_range_for); worker i dùng
+      lo_base_port + i * WORKER_PORT_STRIDE. None: mọi worker dùng cổng mặc định (chỉ an toàn với 1 worker).
+    """
+
+    def __init__(self, workers: int = 1, *, timeout: Optional[float] = CONVERSION_TIMEOUT,
+                 max_jobs: int = 50, max_memory_mb: Optional[float] = None,
+                 office: Optional[str] = None, startup_timeout: float = 120,
+                 lo_base_port: Optional[int] = None) -> None:
+        if workers < 1:
+            raise ValueError("workers phải >= 1")
+        self.size = int(workers)
+        self.timeout = timeout
+        self.max_jobs = int(max_jobs or 0)
+        self.max_memory_mb = max_memory_mb
+        self.office = office
+        self.startup_timeout = startup_timeout
+        self.lo_base_port = lo_base_port
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+        self.stats: Dict[str, int] = {"jobs": 0, "ok": 0, "errors": 0, "timeouts": 0, "crashes": 0,
+                                      "kills": 0, "restarts": 0, "recycled": 0}
+
+    # ---- vòng đời ----
+    def start(self) -> "Supervisor":
+        with self._lock:
+            if self._all:
+                return self
+            for i in range(self.size):
+                w = _Worker(self._ctx, self.office, i, self._lo_port(i)).start(self.startup_timeout)
+                self._all.append(w)
+                self._idle.put(w)
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._all)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        for w in workers:
+            w.stop()
+
+    def __enter__(self) -> "Supervisor":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _lo_port(self, index: int) -> Optional[int]:
+        if self.lo_base_port is None:
+            return None
+        from .converters.libreoffice import WORKER_PORT_STRIDE
+        return self.lo_base_port + index * WORKER_PORT_STRIDE
+
+    def _bump(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def _replace(self, old: _Worker, stat: str) -> _Worker:
+        """Worker mới thay `old`; tiến trình chỉ được khởi động khi có job tiếp theo cần tới."""
+        new = _Worker(self._ctx, self.office, old.index, old.lo_port)  # cổng cũ đã được giải phóng khi kill/stop
+        with self._lock:
+            self._all[self._all.index(old)] = new
+            self.stats[stat] += 1
+        return new
+
+    def _acquire(self) -> _Worker:
+        w = self._idle.get()
+        if w.proc is None:
+            try:
+                w.start(self.startup_timeout)
+            except BaseException:
+                logger.exception("Supervisor: không khởi động được worker %d", w.index)
+                w.proc = w.conn = None  # thử lại ở job sau
+                self._idle.put(w)
+                raise
+        return w
+
+    # ---- chạy job ----
+    def run(self, target: str, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Chạy hàm `target` ("module:hàm" hoặc khoá trong TARGETS) trong worker; ném lại lỗi của hàm."""
+        if self._closed:
+            raise RuntimeError("Supervisor đã đóng")
+        if not self._all:
+            self.start()
+        target = TARGETS.get(target, target)
+        limit = self.timeout if timeout is None else timeout
+        limit = limit if limit and limit > 0 else None
+
+        w = self._acquire()
+        t0 = time.monotonic()
+        outcome = w.call(target, args, kwargs, limit)
+        self._bump("jobs")
+        try:
+            if outcome[0] == "timeout":
+                killed = w.kill()
+                self._bump("timeouts")
+                self._bump("kills", killed)
+                logger.error("Supervisor: job quá hạn %.0fs (%s %s) -> kill %d tiến trình",
+                             time.monotonic() - t0, target, args[:1], killed)
+                w = self._replace(w, "restarts")
+                raise ConversionTimeout(f"Quá hạn {limit}s: {args[0] if args else target}")
+            if outcome[0] == "crash":
+                w.kill()
+                self._bump("crashes")
+                logger.error("Supervisor: worker %d chết khi chạy %s", w.index, args[:1])
+                w = self._replace(w, "restarts")
+                raise WorkerCrashed(f"Worker chết khi chuyển: {args[0] if args else target}")
+            if outcome[0] == "err":
+                self._bump("errors")
+                logger.debug("Lỗi trong worker:\n%s", outcome[2])
+                raise outcome[1]
+            self._bump("ok")
+            return outcome[1]
+        finally:
+            self._maybe_recycle_and_release(w)
+
+    def _maybe_recycle_and_release(self, w: _Worker) -> None:
+        reason = None
+        if self.max_jobs and w.jobs >= self.max_jobs:
+            reason = f"đã chạy {w.jobs} job"
+        elif self.max_memory_mb:
+            rss = w.rss_mb()
+            if rss is not None and rss > self.max_memory_mb:
+                reason = f"RAM {rss:.0f} MB"
+        if reason and not self._closed:
+            logger.info("Supervisor: thay worker %d (%s)", w.index, reason)
+            w.stop()
+            w = self._replace(w, "recycled")
+        self._idle.put(w)
+
+    def submit(self, target: str, *args, **kwargs) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="supervisor")
+        return self._executor.submit(self.run, target, *args, **kwargs)
+
+    def convert(self, kind: str, src: str, dst: Optional[str] = None, **options) -> str:
+        """word/excel/image -> PDF trong worker; options chuyển thẳng cho converter (engine, dpi, ...)."""
+        return self.run(kind, str(src), str(dst) if dst else None, **options)
@@ -0,0 +1,146 @@
+# src/warmup.py
+"""
+Khởi động nền cho app giao diện: ngay khi cửa sổ hiện, 1 luồng nền import converter (+ Pillow/reportlab/
+openpyxl), sinh typelib COM (gencache, trong ComPool.start) và bật pool 1 instance Office ẩn
+(enable_word_pool / enable_excel_pool). Lần bấm "Chuyển sang PDF" đầu tiên dùng lại instance đó.
+
+    warm = Warmup("excel", logger=self.logger).start()
+    ...
+    warm.convert(lambda: excel_to_pdf(src, dst))   # chờ warm-up nếu chưa xong, log độ trễ lần đầu
+    ...
+    warm.shutdown()                                  # khi thoát: Quit instance do warm-up bật
+
+Trên máy không có Office (Linux) chỉ import module; lỗi warm-up chỉ ghi log, chuyển đổi vẫn chạy
+theo đường thường (khởi động Office lạnh).
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+WARMUP_KINDS = ("word", "excel", "image")
+
+# Module import sẵn theo loại app (".x" = trong package này; nặng nhất là reportlab/PIL/openpyxl)
+WARMUP_MODULES: Dict[str, Tuple[str, ...]] = {
+    "word": (".converters.word_to_pdf", ".converters.com_pool", ".pdf.merge"),
+    "excel": (".converters.excel_to_pdf", ".converters.com_pool", ".converters.xlsx_native",
+              "openpyxl", "reportlab.pdfgen.canvas"),
+    "image": (".converters.image_to_pdf", "PIL.Image", "reportlab.pdfgen.canvas", "reportlab.lib.utils"),
+}
+
+# Chờ warm-up tối đa (giây) trước khi cho lần chuyển đổi đầu tự khởi động Office
+WARMUP_WAIT_S = 180.0
+
+_logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """1 lần warm-up cho 1 loại app; stats: imports_s, office_s, total_s, first_conversion_s, error."""
+
+    def __init__(self, kind: str, *, office: bool = True, logger: Optional[logging.Logger] = None) -> None:
+        if kind not in WARMUP_KINDS:
+            raise ValueError(f"kind phải là một trong {WARMUP_KINDS}: {kind!r}")
+        self.kind = kind
+        self.office = office and kind in ("word", "excel")
+        self.logger = logger or _logger
+        self.stats: Dict[str, object] = {"kind": kind}
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._first_done = False
+        self._owns_pool = False
+        self._closing = False
+
+    # ---- vòng đời ----
+    def start(self) -> "Warmup":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"warmup-{self.kind}", daemon=True)
+            self._thread.start()
+        return self
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = WARMUP_WAIT_S) -> bool:
+        if self._thread is None:
+            return True
+        return self._done.wait(timeout)
+
+    def shutdown(self) -> None:
+        """Tắt pool Office do warm-up bật (pool người dùng bật sẵn thì giữ nguyên)."""
+        with self._lock:
+            self._closing = True  # warm-up còn đang bật Office -> _run tự tắt khi xong
+            owns, self._owns_pool = self._owns_pool, False
+        if not owns:
+            return
+        t0 = time.perf_counter()
+        try:
+            self._pool_api()[1]()
+            self.logger.info("Warm-up: đã tắt instance %s (%.2fs)", self.kind, time.perf_counter() - t0)
+        except Exception:
+            self.logger.warning("Warm-up: tắt instance %s lỗi", self.kind, exc_info=True)
+
+    # ---- dùng ----
+    def convert(self, fn: Callable[[], T]) -> T:
+        """Chạy 1 lần chuyển đổi sau khi warm-up xong (chờ nếu đang dở); ghi log độ trễ lần đầu tiên."""
+        t0 = time.perf_counter()
+        if not self.wait():
+            self.logger.warning("Warm-up %s chưa xong sau %.0fs; chuyển đổi không chờ nữa", self.kind, WARMUP_WAIT_S)
+        waited = time.perf_counter() - t0
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                first, self._first_done = not self._first_done, True
+            if first:
+                total = time.perf_counter() - t0
+                self.stats.update(first_conversion_s=round(total, 3), first_wait_s=round(waited, 3))
+                self.logger.info("Lần chuyển đổi đầu tiên (%s): %.2fs (trong đó chờ warm-up %.2fs)",
+                                 self.kind, total, waited)
+
+    # ---- luồng nền ----
+    def _pool_api(self) -> Tuple[Callable[..., object], Callable[[], None], Callable[[], object]]:
+        if self.kind == "word":
+            from .converters import word_to_pdf as mod
+            return mod.enable_word_pool, mod.disable_word_pool, mod.get_word_pool
+        from .converters import excel_to_pdf as mod
+        return mod.enable_excel_pool, mod.disable_excel_pool, mod.get_excel_pool
+
+    def _run(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            for name in WARMUP_MODULES[self.kind]:
+                try:
+                    importlib.import_module(name, package=__package__)
+                except ImportError as e:
+                    self.logger.debug("Warm-up: bỏ qua %s (%s)", name, e)
+            self.stats["imports_s"] = round(time.perf_counter() - t0, 3)
+
+            if self.office and os.name == "nt":
+                t1 = time.perf_counter()
+                enable, disable, current = self._pool_api()
+                if current() is None:
+                    # ComPool.start: gencache.EnsureDispatch rồi khởi động 1 instance ẩn
+                    enable(1)
+                    with self._lock:
+                        closing = self._closing
+                        self._owns_pool = not closing
+                    if closing:
+                        disable()  # app đã thoát trong lúc Office đang khởi động
+                self.stats["office_s"] = round(time.perf_counter() - t1, 3)
+        except Exception as e:
+            self.stats["error"] = f"{type(e).__name__}: {e}"
+            self.logger.warning("Warm-up %s lỗi (lần chuyển đổi đầu sẽ khởi động lạnh): %s", self.kind, e)
+        finally:
+            self.stats["total_s"] = round(time.perf_counter() - t0, 3)
+            self.logger.info("Warm-up %s xong sau %.2fs (import %.2fs%s)", self.kind, self.stats["total_s"],
+                             self.stats.get("imports_s", 0.0),
+                             f", Office {self.stats['office_s']:.2f}s" if "office_s" in self.stats else "")
+            self._done.set()
@@ -0,0 +1,197 @@
+# tests/test_pdf_merge.py
+"""
+Kiểm tra round-trip src/pdf (reader, writer, merge): PDF sinh bằng reportlab hoặc ghi tay
+(xref stream + object stream) được ghép bằng merge_pdfs, kết quả đọc lại bằng pypdf (reader độc lập)
+và bằng PdfReader của dự án.
+"""
+from __future__ import annotations
+
+import zlib
+from pathlib import Path
+from typing import List
+
+import pytest
+
+pytest.importorskip("reportlab")
+pypdf = pytest.importorskip("pypdf")
+
+from src.pdf.merge import merge_pdfs
+from src.pdf.reader import PdfReader
+
+
+def _reportlab_pdf(path: Path, label: str, pages: int, outline: bool = False) -> Path:
+    """PDF nhiều trang, mỗi trang 1 dòng chữ "<label> p<số>"; outline=True: 1 bookmark mỗi trang."""
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(path), pagesize=(300, 200))
+    for i in range(1, pages + 1):
+        c.setFont("Helvetica", 12)
+        c.drawString(20, 100, f"{label} p{i}")
+        if outline:
+            key = f"sec{i}"
+            c.bookmarkPage(key)
+            c.addOutlineEntry(f"{label} section {i}", key, level=0)
+        c.showPage()
+    c.save()
+    return path
+
+
+def _xref_stream_pdf(path: Path, texts: List[str]) -> Path:
+    """PDF 1.5 ghi tay: catalog, cây trang, font và các trang nằm trong /ObjStm, bảng xref là stream."""
+    n = len(texts)
+    page_nums = [4 + 2 * i for i in range(n)]
+    packed = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % p for p in page_nums), n),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    contents = {}
+    for num, text in zip(page_nums, texts):
+        packed[num] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 300 200] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (num + 1))
+        contents[num + 1] = b"BT /F1 12 Tf 20 100 Td (%s) Tj ET" % text.encode("latin-1")
+    objstm = 4 + 2 * n
+    xref_num = objstm + 1
+
+    header = b""
+    body = b""
+    for num in sorted(packed):
+        header += b"%d %d " % (num, len(body))
+        body += packed[num] + b"\n"
+    data = zlib.compress(header + body)
+
+    out = bytearray(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for num, stream in sorted(contents.items()):
+        offsets[num] = len(out)
+        out += b"%d 0 obj\n<< /Length %d >>\nstream\n%s\nendstream\nendobj\n" % (num, len(stream), stream)
+    offsets[objstm] = len(out)
+    out += (b"%d 0 obj\n<< /Type /ObjStm /N %d /First %d /Filter /FlateDecode /Length %d >>\nstream\n"
+            % (objstm, len(packed), len(header), len(data)) + data + b"\nendstream\nendobj\n")
+
+    rows = []
+    index_in_stm = {num: i for i, num in enumerate(sorted(packed))}
+    offsets[xref_num] = len(out)
+    for num in range(xref_num + 1):
+        if num == 0:
+            rows.append(b"\x00" + (0).to_bytes(4, "big") + (0xFFFF).to_bytes(2, "big"))
+        elif num in index_in_stm:
+            rows.append(b"\x02" + objstm.to_bytes(4, "big") + index_in_stm[num].to_bytes(2, "big"))
+        else:
+            rows.append(b"\x01" + offsets[num].to_bytes(4, "big") + (0).to_bytes(2, "big"))
+    xref = zlib.compress(b"".join(rows))
+    out += (b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 4 2] /Root 1 0 R /Filter /FlateDecode /Length %d >>\n"
+            b"stream\n" % (xref_num, xref_num + 1, len(xref)) + xref + b"\nendstream\nendobj\n")
+    out += b"startxref\n%d\n%%%%EOF\n" % offsets[xref_num]
+    path.write_bytes(bytes(out))
+    return path
+
+
+def _page_texts(path: Path) -> List[str]:
+    return [p.extract_text().strip() for p in pypdf.PdfReader(str(path)).pages]
+
+
+def _font_refs(path: Path) -> set:
+    refs = set()
+    for page in pypdf.PdfReader(str(path)).pages:
+        fonts = page["/Resources"].get_object().get("/Font", {})
+        for ref in fonts.get_object().values():
+            refs.add(ref.idnum)
+    return refs
+
+
+def test_merge_many_files_keeps_order_and_dedupes_fonts(tmp_path):
+    inputs = [_reportlab_pdf(tmp_path / f"in{i}.pdf", f"file{i}", 2) for i in range(3)]
+    dst = tmp_path / "out.pdf"
+
+    stats = merge_pdfs(inputs, dst)
+
+    assert stats["files"] == 3 and stats["pages"] == 6
+    assert _page_texts(dst) == [f"file{i} p{j}" for i in range(3) for j in (1, 2)]
+    # Helvetica giống hệt nhau ở 3 file: chỉ ghi 1 lần
+    assert len(_font_refs(dst)) == 1
+    assert stats["deduped"] >= 2
+    with PdfReader(str(dst)) as reader:
+        assert reader.page_count() == 6
+
+
+def test_merge_without_dedupe_copies_every_font(tmp_path):
+    inputs = [_reportlab_pdf(tmp_path / f"in{i}.pdf", f"file{i}", 1) for i in range(3)]
+    dst = tmp_path / "out.pdf"
+
+    stats = merge_pdfs(inputs, dst, dedupe=False)
+
+    assert stats["deduped"] == 0
+    assert len(_font_refs(dst)) == 3
+
+
+def test_xref_stream_input(tmp_path):
+    src = _xref_stream_pdf(tmp_path / "xref.pdf", ["stream one", "stream two"])
+    assert _page_texts(src) == ["stream one", "stream two"]  # file ghi tay hợp lệ với pypdf
+    with PdfReader(str(src)) as reader:
+        assert reader.page_count() == 2
+        assert len(list(reader.pages())) == 2
+
+    plain = _reportlab_pdf(tmp_path / "plain.pdf", "plain", 1)
+    dst = tmp_path / "out.pdf"
+    stats = merge_pdfs([src, plain], dst)
+
+    assert stats["pages"] == 3
+    assert _page_texts(dst) == ["stream one", "stream two", "plain p1"]
+
+
+def test_outline_across_inputs(tmp_path):
+    a = _reportlab_pdf(tmp_path / "a.pdf", "A", 2, outline=True)
+    b = _reportlab_pdf(tmp_path / "b.pdf", "B", 2, outline=True)
+    dst = tmp_path / "out.pdf"
+
+    stats = merge_pdfs([(a, "Part A"), (b, "Part B")], dst)
+
+    reader = pypdf.PdfReader(str(dst))
+    top = reader.outline
+    titles = [item.title for item in top if not isinstance(item, list)]
+    assert titles == ["Part A", "Part B"]
+    children = [item for item in top if isinstance(item, list)]
+    assert [[c.title for c in kids] for kids in children] == [
+        ["A section 1", "A section 2"], ["B section 1", "B section 2"]]
+    pages = [[reader.get_destination_page_number(c) for c in kids] for kids in children]
+    assert pages == [[0, 1], [2, 3]]
+    assert [reader.get_destination_page_number(item) for item in top if not isinstance(item, list)] == [0, 2]
+    assert stats["outline"] == 6
+
+
+def _named_dest_pdf(path: Path, label: str) -> Path:
+    """2 trang, named destination "sec1"/"sec2" (cùng tên ở mọi file) và link trang 1 -> "sec2"."""
+    from pypdf.generic import ArrayObject, DictionaryObject, FloatObject, NameObject, TextStringObject
+
+    src = _reportlab_pdf(path.with_suffix(".src.pdf"), label, 2)
+    writer = pypdf.PdfWriter(clone_from=str(src))
+    for i in range(1, len(writer.pages) + 1):
+        writer.add_named_destination(f"sec{i}", i - 1)
+    link = DictionaryObject({
+        NameObject("/Type"): NameObject("/Annot"),
+        NameObject("/Subtype"): NameObject("/Link"),
+        NameObject("/Rect"): ArrayObject([FloatObject(v) for v in (0, 0, 50, 50)]),
+        NameObject("/Dest"): TextStringObject("sec2"),
+    })
+    writer.pages[0][NameObject("/Annots")] = ArrayObject([writer._add_object(link)])
+    with open(path, "wb") as fh:
+        writer.write(fh)
+    return path
+
+
+def test_colliding_named_destinations_stay_in_their_file(tmp_path):
+    a = _named_dest_pdf(tmp_path / "a.pdf", "A")
+    b = _named_dest_pdf(tmp_path / "b.pdf", "B")
+    dst = tmp_path / "out.pdf"
+
+    merge_pdfs([a, b], dst)
+
+    reader = pypdf.PdfReader(str(dst))
+    page_of = {page.indirect_reference.idnum: i for i, page in enumerate(reader.pages)}
+    dests = reader.named_destinations
+    targets = []
+    for first in (0, 2):  # trang 1 của mỗi file
+        annot = reader.pages[first]["/Annots"][0].get_object()
+        targets.append(page_of[dests[str(annot["/Dest"])].page.idnum])
+    assert targets == [1, 3]  # link của file B trỏ tới trang 2 của chính B, không phải của A